@@ -4,4 +4,4 @@ This file makes `etl` importable with `python -m etl.load_bronze` or
 `from etl import ...` when running from the project root.
 """
 
-__all__ = ["db", "load_bronze", "read_csv", "run_pipeline"]
+__all__ = ["aggregates", "benchmark", "binary_copy", "dag", "db", "extract", "indexes", "load_bronze", "load_gold", "load_silver", "metrics", "quality", "read_csv", "run_pipeline", "schema", "shadow", "silver_engine", "staging", "validate"]
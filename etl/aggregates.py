@@ -0,0 +1,197 @@
+"""Aggregate sales queries routed to the gold rollups.
+
+scripts/gold/ddl_gold_aggregates.sql maintains pre-aggregated sales tables
+(line_count, quantity, sales_amount) by day or month and a few dimensions,
+listed in gold.sales_rollup. Their measures are additive, so a rollup
+answers any request whose grain is the same or coarser (a daily rollup
+answers monthly or yearly totals) and whose dimensions it has.
+
+route() picks, among the rollups that can answer a request, the one with
+the fewest rows (pg_class.reltuples, kept current by the ANALYZE of
+gold.refresh_aggregates()). When none can, the request is answered from
+gold.sales_aggregate_source, i.e. the full fact join.
+
+Date filters are half-open, [start, end). A monthly rollup only answers a
+date filter whose bounds are first days of months.
+
+Usage:
+    python -m etl.aggregates --grain month --by country
+    python -m etl.aggregates --grain day --by category --from 2013-01-01 --to 2013-02-01
+    python -m etl.aggregates --grain total --by discount_percent --sql
+"""
+import argparse
+import logging
+from datetime import date
+from typing import List, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from etl.db import pooled_conn
+
+
+load_dotenv()
+
+log = logging.getLogger("aggregates")
+
+# coarsest first
+GRAINS = ("total", "year", "month", "day")
+DIMENSIONS = (
+    "category",
+    "subcategory",
+    "country",
+    "salesperson_key",
+    "salesperson_name",
+    "region",
+    "discount_percent",
+)
+MEASURES = ("line_count", "quantity", "sales_amount")
+SOURCE = "gold.sales_aggregate_source"
+
+ROLLUPS_SQL = """
+SELECT r.table_name, r.grain, r.dimensions, GREATEST(c.reltuples, 0)::bigint
+FROM gold.sales_rollup r
+LEFT JOIN pg_class c ON c.oid = to_regclass(r.table_name)
+ORDER BY r.table_name
+"""
+
+PERIOD_SQL = {
+    "day": "order_date",
+    "month": "order_month",
+    "year": "date_trunc('year', order_month)::date",
+}
+
+
+class Rollup:
+    """A table that holds `MEASURES` summed by `grain` and `dimensions`."""
+
+    def __init__(self, table: str, grain: str, dimensions: Sequence[str], rows: int = 0):
+        self.table = table
+        self.grain = grain
+        self.dimensions = list(dimensions)
+        self.rows = rows
+
+    def covers(self, grain: str, dimensions: Sequence[str],
+               start: date = None, end: date = None) -> bool:
+        if GRAINS.index(grain) > GRAINS.index(self.grain):
+            return False
+        if not set(dimensions) <= set(self.dimensions):
+            return False
+        if self.grain == "month":
+            return all(d is None or d.day == 1 for d in (start, end))
+        return True
+
+    def __repr__(self):
+        return f"Rollup({self.table}, {self.grain}, {self.dimensions}, rows={self.rows})"
+
+
+# The full fact join; answers everything
+SOURCE_ROLLUP = Rollup(SOURCE, "day", DIMENSIONS)
+
+
+def load_rollups(cur) -> List[Rollup]:
+    cur.execute(ROLLUPS_SQL)
+    return [Rollup(table, grain, dims, rows) for table, grain, dims, rows in cur.fetchall()]
+
+
+def _validate(grain: str, dimensions: Sequence[str]):
+    if grain not in GRAINS:
+        raise ValueError(f"Unknown grain: {grain} (expected one of {', '.join(GRAINS)})")
+    unknown = [d for d in dimensions if d not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown dimension(s): {', '.join(unknown)}")
+
+
+def route(rollups: List[Rollup], grain: str, dimensions: Sequence[str] = (),
+          start: date = None, end: date = None) -> Rollup:
+    """Smallest rollup that answers the request; the row source otherwise."""
+    _validate(grain, dimensions)
+    candidates = [r for r in rollups if r.covers(grain, dimensions, start, end)]
+    if not candidates:
+        return SOURCE_ROLLUP
+    # fewest rows, then coarsest grain and fewest dimensions
+    return min(candidates, key=lambda r: (r.rows, -GRAINS.index(r.grain), len(r.dimensions)))
+
+
+def build_query(rollup: Rollup, grain: str, dimensions: Sequence[str] = (),
+                start: date = None, end: date = None) -> Tuple[str, list]:
+    """SQL (and parameters) summing the measures of `rollup` by `grain`
+    and `dimensions`."""
+    _validate(grain, dimensions)
+    columns = ([f"{PERIOD_SQL[grain]} AS period"] if grain != "total" else []) + list(dimensions)
+    group = list(range(1, len(columns) + 1))
+
+    date_column = "order_month" if rollup.grain == "month" else "order_date"
+    where, params = [], []
+    if start is not None:
+        where.append(f"{date_column} >= %s")
+        params.append(start)
+    if end is not None:
+        where.append(f"{date_column} < %s")
+        params.append(end)
+
+    if rollup is SOURCE_ROLLUP:
+        # one row per fact row
+        measures = ["count(*) AS line_count"] + [f"sum({m})::bigint AS {m}" for m in MEASURES[1:]]
+    else:
+        measures = [f"sum({m})::bigint AS {m}" for m in MEASURES]
+    sql = f"SELECT {', '.join(columns + measures)} FROM {rollup.table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if group:
+        positions = ", ".join(str(i) for i in group)
+        sql += f" GROUP BY {positions} ORDER BY {positions}"
+    return sql, params
+
+
+def query(grain: str = "month", dimensions: Sequence[str] = (),
+          start: date = None, end: date = None, conn=None):
+    """Run an aggregate request on the smallest matching rollup.
+
+    Returns (rollup table, column names, rows).
+    """
+    def run(conn):
+        with conn.cursor() as cur:
+            rollup = route(load_rollups(cur), grain, dimensions, start, end)
+            sql, params = build_query(rollup, grain, dimensions, start, end)
+            log.info(f"Answering {grain} by {', '.join(dimensions) or '-'} from {rollup.table}")
+            cur.execute(sql, params)
+            return rollup.table, [d[0] for d in cur.description], cur.fetchall()
+
+    if conn is not None:
+        return run(conn)
+    with pooled_conn() as conn:
+        return run(conn)
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(message)s",
+    )
+    p = argparse.ArgumentParser(description="Aggregate sales from the gold rollups")
+    p.add_argument("--grain", choices=GRAINS, default="month")
+    p.add_argument("--by", nargs="*", default=[], choices=DIMENSIONS, metavar="DIMENSION",
+                   help=f"Dimensions to group by ({', '.join(DIMENSIONS)})")
+    p.add_argument("--from", dest="start", type=date.fromisoformat, help="First order date (inclusive)")
+    p.add_argument("--to", dest="end", type=date.fromisoformat, help="Last order date (exclusive)")
+    p.add_argument("--sql", action="store_true", help="Print the routed query instead of running it")
+    args = p.parse_args()
+
+    if args.sql:
+        with pooled_conn() as conn:
+            with conn.cursor() as cur:
+                rollups = load_rollups(cur)
+        rollup = route(rollups, args.grain, args.by, args.start, args.end)
+        sql, params = build_query(rollup, args.grain, args.by, args.start, args.end)
+        print(f"-- {rollup.table} ({rollup.rows} rows)\n{sql};\n-- params: {params}")
+        return
+
+    table, columns, rows = query(args.grain, args.by, args.start, args.end)
+    print("\t".join(columns))
+    for row in rows:
+        print("\t".join("" if v is None else str(v) for v in row))
+    log.info(f"{len(rows)} row(s) from {table}")
+
+
+if __name__ == "__main__":
+    main()
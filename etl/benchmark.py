@@ -0,0 +1,359 @@
+"""End-to-end pipeline benchmark.
+
+Runs the pipeline stages of etl.run_pipeline (bronze, silver, silver
+checks, gold, gold checks) against the local Postgres at one or more data
+scales and records, per stage:
+
+- wall_s        wall-clock seconds
+- rows / bytes  size of the data the stage consumes (source files for
+                bronze, bronze tables for silver, silver tables for the
+                silver checks and the gold stages)
+- rows_per_s / bytes_per_s
+- peak_rss_mb   peak resident memory of the Python process running the
+                stage (each stage runs in a fresh process); server-side
+                memory is not included
+
+Data for each scale is produced by
+scripts/generators/generate_sales_detail_incremental.py into
+<data-root>/x<scale> and reused on later runs (--regenerate to rebuild).
+
+Results are written as JSON and compared with a stored baseline; a stage
+that is slower (or uses more memory) than the baseline by more than
+--tolerance is reported as a regression and the exit code is 1.
+
+With --copy-table the stages are skipped and only the bronze COPY of one
+table is timed for each source format (BRONZE_FORMAT csv, binary, parquet;
+the Parquet file is staged before timing), best of --repeat runs.
+
+Usage:
+    python -m etl.benchmark --scales 1 10 [--baseline benchmarks/baseline.json]
+    python -m etl.benchmark --scales 1 10 --save-baseline
+    python -m etl.benchmark --data-dir datasets       # one run on existing files
+    python -m etl.benchmark --scales 1 10 --copy-table bronze.crm_sales_details
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from etl.db import get_conn
+from etl.load_bronze import BRONZE_FORMATS, TABLES as BRONZE_TABLES, load_table, source_size, sources
+from etl.staging import stage_table
+
+
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+log = logging.getLogger("benchmark")
+
+ROOT = Path(__file__).resolve().parents[1]
+GENERATOR = ROOT / "scripts" / "generators" / "generate_sales_detail_incremental.py"
+DEFAULT_DATA_ROOT = ROOT / "datasets_synthetic"
+DEFAULT_OUTPUT = ROOT / "benchmarks" / "results.json"
+DEFAULT_BASELINE = ROOT / "benchmarks" / "baseline.json"
+DEFAULT_TOLERANCE = 0.20
+# differences below this many seconds are treated as noise
+MIN_WALL_DELTA_S = 0.5
+
+BRONZE_TABLE_NAMES = [table for table, _ in BRONZE_TABLES]
+SILVER_TABLE_NAMES = [t.replace("bronze.", "silver.", 1) for t in BRONZE_TABLE_NAMES]
+
+# What each stage reads: "files" (the source CSVs) or a list of tables
+STAGE_INPUTS = {
+    "bronze": "files",
+    "silver": BRONZE_TABLE_NAMES,
+    "silver_checks": SILVER_TABLE_NAMES,
+    "gold": SILVER_TABLE_NAMES,
+    "gold_checks": SILVER_TABLE_NAMES,
+}
+
+
+# --------------------------------------------------
+# Stage execution (in a fresh process per stage)
+# --------------------------------------------------
+def _run_stage(name: str) -> dict:
+    from etl.run_pipeline import STAGES
+
+    stage = dict(STAGES)[name]
+    start = time.perf_counter()
+    stage()
+    wall = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"wall_s": wall, "peak_rss_mb": peak_kb / 1024}
+
+
+def run_stage(name: str) -> dict:
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(_run_stage, name).result()
+
+
+# --------------------------------------------------
+# Input sizes
+# --------------------------------------------------
+def file_input(data_dir: Path):
+    total_bytes = 0
+    for _, source in sources(data_dir):
+        total_bytes += source_size(source)
+    # bronze holds one row per data line once loaded
+    rows, _ = table_input(BRONZE_TABLE_NAMES)
+    return rows, total_bytes
+
+
+def table_input(tables):
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            rows = total_bytes = 0
+            for table in tables:
+                cur.execute(f"SELECT count(*), pg_total_relation_size('{table}'::regclass) FROM {table}")
+                count, size = cur.fetchone()
+                rows += count
+                total_bytes += size
+        return rows, total_bytes
+    finally:
+        conn.close()
+
+
+# --------------------------------------------------
+# Benchmark one data directory
+# --------------------------------------------------
+def benchmark_dir(data_dir: Path, scale) -> list:
+    os.environ["DATA_DIR"] = str(data_dir)
+    results = []
+    for name, inputs in STAGE_INPUTS.items():
+        log.info(f">> [x{scale}] Running stage: {name}")
+        if inputs != "files":
+            rows, size = table_input(inputs)
+        metrics = run_stage(name)
+        if inputs == "files":
+            rows, size = file_input(data_dir)
+
+        wall = metrics["wall_s"]
+        results.append({
+            "scale": scale,
+            "stage": name,
+            "wall_s": round(wall, 3),
+            "rows": rows,
+            "bytes": size,
+            "rows_per_s": round(rows / wall, 1) if wall > 0 else None,
+            "bytes_per_s": round(size / wall, 1) if wall > 0 else None,
+            "peak_rss_mb": round(metrics["peak_rss_mb"], 1),
+        })
+        log.info(
+            f">> [x{scale}] {name}: {wall:.2f}s, {rows} rows, "
+            f"{results[-1]['rows_per_s']} rows/s, peak RSS {results[-1]['peak_rss_mb']} MB"
+        )
+    return results
+
+
+# --------------------------------------------------
+# Bronze COPY throughput per source format
+# --------------------------------------------------
+def copy_benchmark(data_dir: Path, scale, table: str, formats: list, repeat: int) -> list:
+    csv_path = data_dir / dict(BRONZE_TABLES)[table]
+    size = csv_path.stat().st_size
+    results = []
+    for source_format in formats:
+        if source_format == "parquet":
+            stage_table(table, csv_path)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            load_table(table, csv_path, "full", validate=False, source_format=source_format)
+            timings.append(time.perf_counter() - start)
+        rows, _ = table_input([table])
+        wall = min(timings)
+        results.append({
+            "scale": scale,
+            "table": table,
+            "format": source_format,
+            "wall_s": round(wall, 3),
+            "rows": rows,
+            "bytes": size,
+            "rows_per_s": round(rows / wall, 1),
+            "bytes_per_s": round(size / wall, 1),
+        })
+        log.info(f">> [x{scale}] {table} {source_format}: {wall:.3f}s, {rows / wall:.0f} rows/s")
+    return results
+
+
+def print_copy_table(results: list):
+    base = {(r["scale"], r["format"]): r["wall_s"] for r in results}
+    print(f"{'scale':>6} {'format':<8} {'wall_s':>8} {'rows/s':>12} {'MB/s':>8} {'vs csv':>7}")
+    for r in results:
+        csv_wall = base.get((r["scale"], "csv"))
+        speedup = f"{csv_wall / r['wall_s']:.2f}x" if csv_wall else "-"
+        print(
+            f"{r['scale']:>6} {r['format']:<8} {r['wall_s']:>8.3f} {r['rows_per_s']:>12.0f} "
+            f"{r['bytes_per_s'] / 1e6:>8.2f} {speedup:>7}"
+        )
+
+
+def ensure_data(data_root: Path, scale: int, regenerate: bool, workers: int) -> Path:
+    data_dir = data_root / f"x{scale}"
+    if regenerate or not (data_dir / "_generator_state.json").exists():
+        log.info(f"Generating scale {scale}x data into {data_dir}")
+        subprocess.run(
+            [sys.executable, str(GENERATOR), "--scale", str(scale),
+             "--output-dir", str(data_dir), "--workers", str(workers)],
+            check=True,
+        )
+    return data_dir
+
+
+def environment() -> dict:
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SHOW server_version")
+            server_version = cur.fetchone()[0]
+    finally:
+        conn.close()
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "postgres": server_version,
+        "host": platform.node(),
+        "cpus": os.cpu_count(),
+        "settings": {
+            key: os.getenv(key)
+            for key in ("BRONZE_MODE", "BRONZE_WORKERS", "BRONZE_FORMAT", "BRONZE_VALIDATE", "SILVER_MODE", "GOLD_MODE")
+        },
+    }
+
+
+# --------------------------------------------------
+# Baseline comparison
+# --------------------------------------------------
+def compare(results: list, baseline: list, tolerance: float) -> list:
+    """Return one message per stage that regressed against the baseline."""
+    base = {(r["scale"], r["stage"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        b = base.get((r["scale"], r["stage"]))
+        if b is None:
+            continue
+        label = f"x{r['scale']} {r['stage']}"
+        if (r["wall_s"] > b["wall_s"] * (1 + tolerance)
+                and r["wall_s"] - b["wall_s"] >= MIN_WALL_DELTA_S):
+            regressions.append(f"{label}: wall time {b['wall_s']:.2f}s -> {r['wall_s']:.2f}s")
+        if r["peak_rss_mb"] > b["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{label}: peak RSS {b['peak_rss_mb']} MB -> {r['peak_rss_mb']} MB")
+    return regressions
+
+
+def print_table(results: list, baseline: list):
+    base = {(r["scale"], r["stage"]): r for r in baseline}
+    print(f"{'scale':>6} {'stage':<14} {'wall_s':>9} {'baseline':>9} {'rows/s':>12} {'MB/s':>9} {'rss_mb':>8}")
+    for r in results:
+        b = base.get((r["scale"], r["stage"]))
+        base_wall = f"{b['wall_s']:.2f}" if b else "-"
+        print(
+            f"{r['scale']:>6} {r['stage']:<14} {r['wall_s']:>9.2f} {base_wall:>9} "
+            f"{(r['rows_per_s'] or 0):>12.0f} {(r['bytes_per_s'] or 0) / 1e6:>9.2f} "
+            f"{r['peak_rss_mb']:>8.1f}"
+        )
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark the pipeline stages at several data scales")
+    p.add_argument("--scales", type=int, nargs="+", default=[1, 10], help="Scale factors to benchmark")
+    p.add_argument("--data-dir", type=Path, help="Benchmark this source directory once instead of generated scales")
+    p.add_argument("--data-root", type=Path, default=DEFAULT_DATA_ROOT, help="Where generated data for each scale is kept")
+    p.add_argument("--regenerate", action="store_true", help="Regenerate data even if it already exists")
+    p.add_argument("--generator-workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Results JSON file")
+    p.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline JSON file to compare against")
+    p.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    p.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    p.add_argument("--copy-table", choices=[table for table, _ in BRONZE_TABLES], help="Only time the bronze COPY of this table per source format")
+    p.add_argument("--copy-formats", nargs="+", choices=BRONZE_FORMATS, default=list(BRONZE_FORMATS))
+    p.add_argument("--repeat", type=int, default=3, help="Runs per format with --copy-table (best is kept)")
+    args = p.parse_args()
+
+    if args.copy_table:
+        if args.data_dir is not None:
+            data_dirs = [(args.data_dir.resolve(), args.data_dir.name)]
+        else:
+            data_dirs = [
+                (ensure_data(args.data_root, scale, args.regenerate, args.generator_workers).resolve(), scale)
+                for scale in args.scales
+            ]
+        results = []
+        for data_dir, scale in data_dirs:
+            results += copy_benchmark(data_dir, scale, args.copy_table, args.copy_formats, args.repeat)
+        report = {
+            "run_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "environment": environment(),
+            "copy": results,
+        }
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        log.info(f"Results written to {args.output}")
+        print_copy_table(results)
+        return
+
+    results = []
+    if args.data_dir is not None:
+        results += benchmark_dir(args.data_dir.resolve(), args.data_dir.name)
+    else:
+        for scale in args.scales:
+            data_dir = ensure_data(args.data_root, scale, args.regenerate, args.generator_workers)
+            results += benchmark_dir(data_dir.resolve(), scale)
+
+    report = {
+        "run_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    log.info(f"Results written to {args.output}")
+
+    baseline = []
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results"]
+    print_table(results, baseline)
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        log.info(f"Baseline saved to {args.baseline}")
+        return
+
+    if not baseline:
+        log.info(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        for message in regressions:
+            log.error(f"REGRESSION {message}")
+        sys.exit(1)
+    log.info(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Minimal DAG runner for the pipeline.
+
+A Node is a named callable with the names of the nodes it depends on.
+run_dag() starts every node on a thread pool as soon as all of its
+dependencies have succeeded. When a node fails, the nodes downstream of it
+are marked "skipped" and independent branches keep running; the run
+raises DagError at the end.
+
+Each node keeps its status (pending, running, success, failed, skipped),
+start/finish timestamps and error message, so the caller can log or store
+them.
+"""
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List
+
+
+log = logging.getLogger("dag")
+
+
+class DagError(RuntimeError):
+    pass
+
+
+class Node:
+    def __init__(self, name: str, fn: Callable[[], None], deps: Iterable[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.deps = sorted(set(deps))
+        self.status = "pending"
+        self.started_at = None
+        self.finished_at = None
+        self.duration_s = None
+        self.error = None
+
+    def __repr__(self):
+        return f"Node({self.name!r}, status={self.status!r})"
+
+    def run(self):
+        self.status = "running"
+        self.started_at = datetime.now()
+        start = time.perf_counter()
+        try:
+            self.fn()
+        except Exception as e:
+            self.status = "failed"
+            self.error = f"{type(e).__name__}: {e}"
+            raise
+        else:
+            self.status = "success"
+        finally:
+            self.duration_s = time.perf_counter() - start
+            self.finished_at = datetime.now()
+
+
+def topological_order(nodes: List[Node]) -> List[Node]:
+    """Return the nodes in a valid run order; raise DagError on unknown
+    dependencies or cycles."""
+    by_name = {node.name: node for node in nodes}
+    if len(by_name) != len(nodes):
+        raise DagError("Duplicate node names")
+    for node in nodes:
+        missing = [dep for dep in node.deps if dep not in by_name]
+        if missing:
+            raise DagError(f"Node {node.name} depends on unknown node(s): {missing}")
+
+    pending = {node.name: len(node.deps) for node in nodes}
+    dependents = _dependents(nodes)
+    ready = [node.name for node in nodes if not node.deps]
+    order = []
+    while ready:
+        name = ready.pop(0)
+        order.append(by_name[name])
+        for child in dependents[name]:
+            pending[child] -= 1
+            if pending[child] == 0:
+                ready.append(child)
+    if len(order) != len(nodes):
+        cycle = sorted(name for name, count in pending.items() if count > 0)
+        raise DagError(f"Dependency cycle between: {cycle}")
+    return order
+
+
+def _dependents(nodes: List[Node]) -> Dict[str, List[str]]:
+    dependents = {node.name: [] for node in nodes}
+    for node in nodes:
+        for dep in node.deps:
+            dependents[dep].append(node.name)
+    return dependents
+
+
+def _skip_downstream(name: str, by_name: Dict[str, Node], dependents: Dict[str, List[str]]):
+    for child in dependents[name]:
+        node = by_name[child]
+        if node.status == "pending":
+            node.status = "skipped"
+            node.error = f"upstream {name} did not succeed"
+            _skip_downstream(child, by_name, dependents)
+
+
+def run_dag(nodes: List[Node], workers: int = 4) -> List[Node]:
+    """Run the nodes respecting their dependencies, up to `workers` at a time."""
+    order = topological_order(nodes)
+    by_name = {node.name: node for node in nodes}
+    dependents = _dependents(nodes)
+    remaining = {node.name: len(node.deps) for node in nodes}
+    # keep the declared order among nodes that become ready together
+    rank = {node.name: i for i, node in enumerate(order)}
+    ready = sorted((n.name for n in nodes if not n.deps), key=rank.get)
+
+    log.info(f"Running {len(nodes)} nodes on {workers} worker(s)")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        running = {}
+        while ready or running:
+            while ready:
+                name = ready.pop(0)
+                log.info(f">> [{name}] started")
+                running[executor.submit(by_name[name].run)] = name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            newly_ready = []
+            for future in done:
+                name = running.pop(future)
+                node = by_name[name]
+                if future.exception() is not None:
+                    log.error(f">> [{name}] failed after {node.duration_s:.2f}s: {node.error}")
+                    _skip_downstream(name, by_name, dependents)
+                    continue
+                log.info(f">> [{name}] done in {node.duration_s:.2f}s")
+                for child in dependents[name]:
+                    remaining[child] -= 1
+                    if remaining[child] == 0 and by_name[child].status == "pending":
+                        newly_ready.append(child)
+            ready = sorted(ready + newly_ready, key=rank.get)
+
+    failed = [node.name for node in nodes if node.status == "failed"]
+    if failed:
+        skipped = sum(node.status == "skipped" for node in nodes)
+        raise DagError(f"{len(failed)} node(s) failed ({', '.join(failed)}); {skipped} skipped")
+    return order
+
+
+def summary(nodes: List[Node]) -> str:
+    width = max(len(node.name) for node in nodes)
+    lines = [f"{'node':<{width}}  {'status':<8}  {'seconds':>8}"]
+    for node in sorted(nodes, key=lambda n: (n.started_at is None, n.started_at or datetime.max)):
+        seconds = f"{node.duration_s:.2f}" if node.duration_s is not None else "-"
+        lines.append(f"{node.name:<{width}}  {node.status:<8}  {seconds:>8}")
+    return "\n".join(lines)
@@ -1,11 +1,128 @@
 import os
+import re
+import threading
+import weakref
+from contextlib import contextmanager
+
 import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
 
-def get_conn():
-    return psycopg2.connect(
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# One pooled connection reserved for SQL scripts (see script_conn)
+_script_conn = None
+_script_lock = threading.RLock()
+
+# Names of the server-side prepared statements of each connection
+_prepared = weakref.WeakKeyDictionary()
+_PLACEHOLDER = re.compile(r"%s")
+
+
+def _conn_kwargs():
+    return dict(
         host="localhost",
         port=os.getenv("POSTGRES_PORT", "5432"),
         dbname=os.getenv("POSTGRES_DB"),
         user=os.getenv("POSTGRES_USER"),
         password=os.getenv("POSTGRES_PASSWORD"),
     )
+
+
+def get_conn():
+    return psycopg2.connect(**_conn_kwargs())
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use.
+
+    The pool size is read from POSTGRES_POOL_SIZE (default 8) and should be
+    at least as large as the number of worker threads sharing it.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            maxconn = int(os.getenv("POSTGRES_POOL_SIZE", "8"))
+            _pool = ThreadedConnectionPool(1, maxconn, **_conn_kwargs())
+        return _pool
+
+
+@contextmanager
+def pooled_conn():
+    """Borrow a connection from the shared pool and return it afterwards.
+
+    Any open transaction is rolled back before the connection goes back to
+    the pool, so a failed caller never leaks state to the next borrower.
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        if not conn.closed:
+            conn.rollback()
+        pool.putconn(conn)
+
+
+def worker_capacity() -> int:
+    """Connections left for worker threads: the pool size minus the one
+    reserved for SQL scripts (script_conn)."""
+    return max(1, get_pool().maxconn - 1)
+
+
+@contextmanager
+def script_conn():
+    """Borrow the connection shared by all SQL script runs of the process.
+
+    It is taken from the pool on first use and kept until
+    release_script_conn(), so scripts do not pay for a connection each and
+    statements prepared on it (execute_prepared) stay prepared. Callers are
+    serialized; the connection is rolled back after each use.
+    """
+    global _script_conn
+    with _script_lock:
+        if _script_conn is None or _script_conn.closed:
+            _script_conn = get_pool().getconn()
+        conn = _script_conn
+        try:
+            yield conn
+        finally:
+            if not conn.closed:
+                conn.rollback()
+
+
+def release_script_conn():
+    global _script_conn
+    with _script_lock:
+        if _script_conn is not None:
+            pool = get_pool()
+            pool.putconn(_script_conn, close=_script_conn.closed)
+            _script_conn = None
+
+
+def execute_prepared(cur, name: str, query: str, params: tuple = ()):
+    """Execute `query` (with %s placeholders) as the server-side prepared
+    statement `name`, preparing it on first use on this connection.
+
+    For statements run repeatedly on one connection: the server parses and
+    plans them once instead of on every execution.
+    """
+    names = _prepared.setdefault(cur.connection, set())
+    if name not in names:
+        count = iter(range(1, len(params) + 1))
+        cur.execute(f"PREPARE {name} AS " + _PLACEHOLDER.sub(lambda _: f"${next(count)}", query))
+        names.add(name)
+    if params:
+        cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+    else:
+        cur.execute(f"EXECUTE {name}")
+
+
+def close_pool():
+    global _pool
+    release_script_conn()
+    with _pool_lock:
+        if _pool is not None and not _pool.closed:
+            _pool.closeall()
+        _pool = None
@@ -0,0 +1,437 @@
+"""Streaming extracts of the gold layer, cached by gold data version.
+
+Consumers read gold.fact_sales and the dimensions through this module
+instead of SELECT * over the views. Each object is read through a named
+(server-side) cursor, EXTRACT_BATCH_ROWS rows at a time, and written with
+pyarrow as CSV, Parquet (zstd) or an Arrow IPC file. The fact is ordered
+by order month and written as one file per month, in Hive-style
+directories (fact_sales/order_month=2013-01/fact_sales.parquet; orders
+without a date go to order_month=__HIVE_DEFAULT_PARTITION__), so memory
+stays bounded and readers can prune months.
+
+The gold data version is a hash of the silver watermarks and the silver
+state each gold refresh ran against (meta.pipeline_state; the gold refresh
+procedures mark 'gold.<object>'), the fingerprints of the gold scripts and
+the kinds of the gold relations (view or table), so it only changes when a
+load brings new rows, a full reload or rollback rewrites silver, a gold
+refresh catches up with silver, or gold is redeployed or switched between
+GOLD_MODEs. Pipeline runs whose gold nodes all succeeded, gold loads,
+silver loads (the gold views read silver) and rollbacks record it in
+EXTRACT_CACHE_DIR/gold_version.json; a run whose gold failed or was
+skipped forgets it, so the next extract reads the version from
+PostgreSQL.
+
+Every extract is kept under EXTRACT_CACHE_DIR/<version>/<object>.<format>.
+A repeated extract of the recorded version is served from there without
+connecting to PostgreSQL. A miss reads the version again in the
+extract's snapshot and stores the result under it. The least recently
+used extracts are evicted once the cache exceeds EXTRACT_CACHE_MAX_MB.
+
+Usage:
+    python -m etl.extract run gold.fact_sales --format parquet --out ./exports
+    python -m etl.extract run --format csv              # every gold object
+    python -m etl.extract version --refresh
+    python -m etl.extract cache
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+from etl.db import pooled_conn
+from etl.load_gold import GOLD_OBJECTS
+
+
+load_dotenv()
+
+log = logging.getLogger("extract")
+
+FORMATS = ("csv", "parquet", "arrow")
+CACHE_DIR = Path(os.getenv("EXTRACT_CACHE_DIR", "./extract_cache"))
+CACHE_MAX_MB = int(os.getenv("EXTRACT_CACHE_MAX_MB", "1024"))
+BATCH_ROWS = int(os.getenv("EXTRACT_BATCH_ROWS", "50000"))
+
+VERSION_FILE = "gold_version.json"
+MANIFEST = "manifest.json"
+
+# Objects written as one file per month of this column
+MONTH_COLUMNS = {"gold.fact_sales": "order_date"}
+MONTH_PARTITION = "order_month"
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Arrow type of each PostgreSQL type OID in gold; others are written as text
+ARROW_TYPES = {
+    16: pa.bool_(),
+    20: pa.int64(),
+    21: pa.int16(),
+    23: pa.int32(),
+    25: pa.string(),
+    700: pa.float32(),
+    701: pa.float64(),
+    1043: pa.string(),
+    1082: pa.date32(),
+    1114: pa.timestamp("us"),
+}
+
+VERSION_SQL = """
+SELECT md5(string_agg(part, '|' ORDER BY part))
+FROM (
+    SELECT source_name || '=' || COALESCE(last_watermark, '') AS part
+    FROM meta.pipeline_state
+    WHERE source_name LIKE 'silver.%' OR source_name LIKE 'gold.%'
+    UNION ALL
+    SELECT script_path || '=' || objects_hash
+    FROM meta.schema_fingerprint
+    WHERE script_path LIKE 'scripts/gold/%'
+    UNION ALL
+    SELECT oid::regclass::text || '=' || relkind::text
+    FROM pg_class
+    WHERE relnamespace = 'gold'::regnamespace
+      AND relkind IN ('r', 'p', 'v', 'm')
+      AND NOT relispartition
+) parts
+"""
+
+
+# --------------------------------------------------
+# Gold data version
+# --------------------------------------------------
+def current_version(cur) -> str:
+    cur.execute(VERSION_SQL)
+    return cur.fetchone()[0]
+
+
+def read_version() -> Optional[str]:
+    path = CACHE_DIR / VERSION_FILE
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))["version"]
+    except (ValueError, KeyError):
+        return None
+
+
+def write_version(version: str, run_id: str = None):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = CACHE_DIR / VERSION_FILE
+    tmp = path.with_name(f".{VERSION_FILE}.{uuid.uuid4().hex[:8]}")
+    tmp.write_text(json.dumps({
+        "version": version,
+        "run_id": run_id,
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+    }), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def forget_version():
+    """Drop the recorded version (gold may be partly refreshed); the next
+    extract reads it from PostgreSQL."""
+    (CACHE_DIR / VERSION_FILE).unlink(missing_ok=True)
+
+
+def record_version(run_id: str = None):
+    """Record the gold data version after gold may have changed."""
+    try:
+        with pooled_conn() as conn:
+            with conn.cursor() as cur:
+                version = current_version(cur)
+            conn.rollback()
+        write_version(version, run_id)
+        log.info(f"Gold data version {version}")
+    except Exception as e:
+        log.warning(f"Could not record the gold data version: {e}")
+
+
+def version(refresh: bool = False) -> str:
+    """The recorded gold data version; read from PostgreSQL when
+    `refresh` or none is recorded."""
+    recorded = None if refresh else read_version()
+    if recorded is not None:
+        return recorded
+    with pooled_conn() as conn:
+        with conn.cursor() as cur:
+            recorded = current_version(cur)
+        conn.rollback()
+    write_version(recorded)
+    return recorded
+
+
+# --------------------------------------------------
+# Cache
+# --------------------------------------------------
+def entry_path(version: str, obj: str, fmt: str) -> Path:
+    return CACHE_DIR / version / f"{obj}.{fmt}"
+
+
+def cached(version: str, obj: str, fmt: str) -> Optional[Path]:
+    """The cached extract, marked as just used; None on a miss."""
+    path = entry_path(version, obj, fmt)
+    manifest = path / MANIFEST
+    if not manifest.exists():
+        return None
+    os.utime(manifest)
+    return path
+
+
+def entries() -> List[dict]:
+    """Every cached extract, least recently used first."""
+    found = []
+    for manifest in CACHE_DIR.glob(f"*/*/{MANIFEST}"):
+        info = json.loads(manifest.read_text(encoding="utf-8"))
+        info["path"] = manifest.parent
+        info["last_used"] = manifest.stat().st_mtime
+        found.append(info)
+    return sorted(found, key=lambda e: e["last_used"])
+
+
+def evict(keep=()):
+    """Drop the least recently used extracts until the cache fits in
+    EXTRACT_CACHE_MAX_MB; the extracts in `keep` are never dropped."""
+    cached_entries = entries()
+    total = sum(e["bytes"] for e in cached_entries)
+    limit = CACHE_MAX_MB * 1024 * 1024
+    for entry in cached_entries:
+        if total <= limit:
+            break
+        if entry["path"] in keep:
+            continue
+        log.info(f"Evicting {entry['path']} ({entry['bytes'] / 1e6:.1f} MB)")
+        shutil.rmtree(entry["path"], ignore_errors=True)
+        total -= entry["bytes"]
+        try:
+            entry["path"].parent.rmdir()
+        except OSError:
+            pass  # other extracts of the version remain
+
+
+# --------------------------------------------------
+# Streaming
+# --------------------------------------------------
+def arrow_schema(description) -> pa.Schema:
+    return pa.schema([
+        pa.field(col.name, ARROW_TYPES.get(col.type_code, pa.string()))
+        for col in description
+    ])
+
+
+def to_batch(rows: list, schema: pa.Schema) -> pa.RecordBatch:
+    columns = list(zip(*rows))
+    arrays = []
+    for values, field in zip(columns, schema):
+        if field.type == pa.string():
+            values = [v if v is None or isinstance(v, str) else str(v) for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def open_writer(path: Path, fmt: str, schema: pa.Schema):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "parquet":
+        return pq.ParquetWriter(path, schema, compression="zstd")
+    if fmt == "arrow":
+        return pa.ipc.new_file(str(path), schema)
+    return pacsv.CSVWriter(str(path), schema)
+
+
+def month_of(value) -> str:
+    return value.strftime("%Y-%m") if value is not None else NULL_PARTITION
+
+
+def write_object(conn, obj: str, fmt: str, dest: Path) -> dict:
+    """Stream `obj` into `dest` through a named cursor, one file per order
+    month for the objects of MONTH_COLUMNS."""
+    short = obj.split(".", 1)[1]
+    month_column = MONTH_COLUMNS.get(obj)
+    order = f" ORDER BY {month_column} NULLS LAST" if month_column else ""
+
+    rows = 0
+    files = []
+    writer = None
+    month = None
+    with conn.cursor(name=f"extract_{short}") as cur:
+        cur.itersize = BATCH_ROWS
+        cur.execute(f"SELECT * FROM {obj}{order}")
+        schema = None
+        try:
+            while True:
+                batch = cur.fetchmany(BATCH_ROWS)
+                if schema is None:
+                    schema = arrow_schema(cur.description)
+                if not batch:
+                    break
+                rows += len(batch)
+                if month_column is None:
+                    if writer is None:
+                        writer = open_writer(dest / f"{short}.{fmt}", fmt, schema)
+                        files.append(f"{short}.{fmt}")
+                    writer.write_batch(to_batch(batch, schema))
+                    continue
+
+                # rows arrive ordered by month: cut the batch at month changes
+                index = schema.get_field_index(month_column)
+                start = 0
+                while start < len(batch):
+                    batch_month = month_of(batch[start][index])
+                    end = start
+                    while end < len(batch) and month_of(batch[end][index]) == batch_month:
+                        end += 1
+                    if writer is None or batch_month != month:
+                        if writer is not None:
+                            writer.close()
+                        month = batch_month
+                        name = f"{short}/{MONTH_PARTITION}={month}/{short}.{fmt}"
+                        writer = open_writer(dest / name, fmt, schema)
+                        files.append(name)
+                    writer.write_batch(to_batch(batch[start:end], schema))
+                    start = end
+
+            if writer is None and month_column is None:
+                # an empty object still gets its file
+                writer = open_writer(dest / f"{short}.{fmt}", fmt, schema)
+                files.append(f"{short}.{fmt}")
+        finally:
+            if writer is not None:
+                writer.close()
+
+    return {
+        "object": obj,
+        "format": fmt,
+        "rows": rows,
+        "files": files,
+        "bytes": sum((dest / name).stat().st_size for name in files),
+    }
+
+
+def build(conn, version: str, obj: str, fmt: str) -> Path:
+    """Extract `obj` into the cache under `version`. The files are written
+    to a temporary directory that is renamed into place once complete."""
+    start = time.perf_counter()
+    final = entry_path(version, obj, fmt)
+    tmp = final.with_name(f".{final.name}.{uuid.uuid4().hex[:8]}")
+    tmp.mkdir(parents=True)
+    try:
+        info = write_object(conn, obj, fmt, tmp)
+        info.update(version=version, created_at=datetime.now().isoformat(timespec="seconds"))
+        (tmp / MANIFEST).write_text(json.dumps(info, indent=2), encoding="utf-8")
+        try:
+            tmp.rename(final)
+        except OSError:
+            # extracted concurrently by another process
+            shutil.rmtree(tmp)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    elapsed = time.perf_counter() - start
+    log.info(
+        f">> [{obj}] Extracted {info['rows']:,} rows to {len(info['files'])} {fmt} file(s), "
+        f"{info['bytes'] / 1e6:.1f} MB in {elapsed:.2f}s "
+        f"({info['rows'] / max(elapsed, 1e-6):,.0f} rows/s)"
+    )
+    return final
+
+
+def extract(objects: List[str], fmt: str = "parquet", refresh_version: bool = False) -> List[Path]:
+    """Cached extracts of `objects` in `fmt`, extracting the missing ones
+    from one snapshot of gold."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown extract format: {fmt}")
+    unknown = set(objects) - set(GOLD_OBJECTS)
+    if unknown:
+        raise ValueError(f"Unknown gold objects: {', '.join(sorted(unknown))}")
+
+    ver = version(refresh_version)
+    paths = {obj: cached(ver, obj, fmt) for obj in objects}
+    for obj, path in paths.items():
+        if path is not None:
+            log.info(f">> [{obj}] Served from cache: {path}")
+
+    if any(path is None for path in paths.values()):
+        with pooled_conn() as conn:
+            with conn.cursor() as cur:
+                # one snapshot for the version and every object read
+                cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+                snapshot_version = current_version(cur)
+            if snapshot_version != ver:
+                log.info(f"Gold data version changed: {ver} -> {snapshot_version}")
+                write_version(snapshot_version)
+                ver = snapshot_version
+                paths = {obj: cached(ver, obj, fmt) for obj in objects}
+            for obj, path in paths.items():
+                if path is None:
+                    paths[obj] = build(conn, ver, obj, fmt)
+            conn.rollback()
+        # the extracts just returned stay, even if they exceed the limit
+        evict(keep=set(paths.values()))
+
+    return [paths[obj] for obj in objects]
+
+
+def export(paths: List[Path], out: Path):
+    """Copy cached extracts to `out`, one directory or file per object."""
+    out.mkdir(parents=True, exist_ok=True)
+    for path in paths:
+        shutil.copytree(path, out, dirs_exist_ok=True, ignore=shutil.ignore_patterns(MANIFEST))
+
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(message)s",
+    )
+    p = argparse.ArgumentParser(description="Streaming, cached extracts of the gold layer")
+    sub = p.add_subparsers(dest="command", required=True)
+    r = sub.add_parser("run", help="Extract gold objects (default: all of them)")
+    r.add_argument("objects", nargs="*", help="e.g. gold.fact_sales or fact_sales")
+    r.add_argument("--format", choices=FORMATS, default="parquet")
+    r.add_argument("--out", type=Path, help="Copy the extracts here (default: print the cache paths)")
+    r.add_argument("--refresh-version", action="store_true",
+                   help="Read the gold data version from PostgreSQL, not the recorded one")
+    v = sub.add_parser("version", help="Print the gold data version")
+    v.add_argument("--refresh", action="store_true", help="Read it from PostgreSQL and record it")
+    c = sub.add_parser("cache", help="List the cached extracts, least recently used first")
+    c.add_argument("--clear", action="store_true", help="Remove every cached extract")
+    args = p.parse_args()
+
+    if args.command == "version":
+        print(version(args.refresh))
+        return
+    if args.command == "cache":
+        if args.clear:
+            for entry in entries():
+                shutil.rmtree(entry["path"].parent, ignore_errors=True)
+            return
+        for entry in entries():
+            print(
+                f"{entry['version'][:12]}  {entry['object']:22} {entry['format']:8} "
+                f"{entry['rows']:>10,} rows {entry['bytes'] / 1e6:>9.1f} MB  "
+                f"{datetime.fromtimestamp(entry['last_used']):%Y-%m-%d %H:%M:%S}"
+            )
+        return
+
+    objects = [o if "." in o else f"gold.{o}" for o in args.objects] or list(GOLD_OBJECTS)
+    paths = extract(objects, args.format, args.refresh_version)
+    if args.out:
+        export(paths, args.out)
+        log.info(f"Copied {len(paths)} extract(s) to {args.out}")
+    else:
+        for path in paths:
+            print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""Join-key indexes and statistics of the silver tables.
+
+The silver tables are created without indexes (scripts/silver/ddl_silver.sql)
+and bulk loaded first; the indexes gold joins and the incremental MERGE
+look up by are declared once in MANIFEST and built afterwards, in one pass
+over the loaded rows instead of one insert at a time. After every silver
+load the pipeline runs post_load() for the table:
+
+- ensure   every declared key is covered by a valid btree index whose
+           leading columns are the key; missing ones are built, invalid
+           ones (an interrupted CONCURRENTLY build) dropped and rebuilt.
+           A table that is live, i.e. has been analyzed before and may be
+           read by gold, is indexed CONCURRENTLY (one partition at a time
+           for a partitioned table, attached to the parent index); a table
+           loaded for the first time is indexed directly.
+- analyze  ANALYZE the table, or only its stale partitions, when its size
+           moved by more than ANALYZE_CHANGE_RATIO since the statistics were
+           taken or as many rows were modified. Autovacuum never analyzes a
+           partitioned table itself, and the row estimates of a freshly
+           loaded table decide between index and hash joins in gold.
+
+Index names follow PostgreSQL's own (<table>_<columns>_idx), so the shadow
+swaps (etl.shadow) and partition swaps keep them. The schema fingerprint of
+ddl_silver.sql leaves the declared indexes out (etl.utils.deploy).
+
+Usage:
+    python -m etl.indexes ensure                  # CONCURRENTLY on live tables
+    python -m etl.indexes ensure --tables crm_sales_details --blocking
+    python -m etl.indexes report                  # size and usage of every silver index
+    python -m etl.indexes report --json index_report.json
+"""
+import argparse
+import json
+import logging
+import os
+from typing import List, Sequence
+
+from dotenv import load_dotenv
+
+from etl.db import pooled_conn
+
+
+load_dotenv()
+
+log = logging.getLogger("indexes")
+
+ANALYZE_CHANGE_RATIO = float(os.getenv("ANALYZE_CHANGE_RATIO", "0.1"))
+
+
+# --------------------------------------------------
+# Manifest
+# --------------------------------------------------
+class JoinKey:
+    """`columns` of `table` are looked up by key; `reason` says by what."""
+
+    def __init__(self, table: str, columns: Sequence[str], reason: str):
+        self.table = table
+        self.columns = list(columns)
+        self.reason = reason
+
+    @property
+    def short(self) -> str:
+        return self.table.split(".", 1)[1]
+
+    def index_name(self, relname: str = None) -> str:
+        """Name of the index on `relname` (a partition) or the table."""
+        return f"{relname or self.short}_{'_'.join(self.columns)}_idx"
+
+    def __repr__(self):
+        return f"{self.table} ({', '.join(self.columns)})"
+
+
+MANIFEST = [
+    JoinKey("silver.crm_cust_info", ["cst_id"], "dim_customers, MERGE key"),
+    JoinKey("silver.crm_cust_info", ["cst_key"], "dim_customers: cst_key = cid"),
+    JoinKey("silver.crm_prd_info", ["prd_key", "prd_start_dt"], "dim_products: product_number, MERGE key"),
+    JoinKey("silver.crm_sales_details", ["sls_ord_num", "sls_prd_key"], "fact_sales: order lines, MERGE key"),
+    JoinKey("silver.erp_cust_info", ["cid"], "dim_customers: cst_key = cid"),
+    JoinKey("silver.erp_loc_info", ["cid"], "dim_customers: cst_key = cid"),
+    JoinKey("silver.erp_px_cat_info", ["id"], "dim_products: cat_id = id"),
+    JoinKey("silver.marketing_salesperson", ["salesperson_id"], "dim_salesperson"),
+    JoinKey("silver.marketing_salesperson_sales", ["sls_ord_num"], "fact_sales: sls_ord_num"),
+    JoinKey("silver.marketing_discount_info", ["discount_id"], "dim_discount"),
+    JoinKey("silver.marketing_sales_discount", ["sls_ord_num"], "fact_sales: sls_ord_num"),
+]
+
+
+def keys_of(table: str) -> List[JoinKey]:
+    return [key for key in MANIFEST if key.table == table]
+
+
+def tables() -> List[str]:
+    return list(dict.fromkeys(key.table for key in MANIFEST))
+
+
+# --------------------------------------------------
+# Catalog
+# --------------------------------------------------
+# btree indexes of a relation with their key columns; `parent` is the
+# partitioned index a partition's index is attached to
+INDEXES_SQL = """
+SELECT x.relname,
+       ARRAY(
+           SELECT a.attname::text
+           FROM unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, n)
+               JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+           WHERE k.n <= i.indnkeyatts
+           ORDER BY k.n
+       ),
+       i.indisvalid,
+       (SELECT h.inhparent::regclass::text FROM pg_inherits h WHERE h.inhrelid = i.indexrelid)
+FROM pg_index i
+    JOIN pg_class x ON x.oid = i.indexrelid
+    JOIN pg_am am ON am.oid = x.relam
+WHERE i.indrelid = %s::regclass
+  AND am.amname = 'btree'
+  AND i.indexprs IS NULL
+  AND i.indpred IS NULL
+ORDER BY x.relname
+"""
+
+PARTITIONS_SQL = """
+SELECT c.oid::regclass::text, c.relname
+FROM pg_inherits h
+    JOIN pg_class c ON c.oid = h.inhrelid
+WHERE h.inhparent = %s::regclass
+ORDER BY c.relname
+"""
+
+# the table, or its partitions, with how far their statistics are behind
+STATISTICS_SQL = """
+SELECT c.oid::regclass::text,
+       c.relkind = 'p',
+       c.reltuples,
+       c.relpages,
+       pg_relation_size(c.oid) / current_setting('block_size')::int,
+       COALESCE(s.n_mod_since_analyze, 0)
+FROM pg_class c
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+WHERE c.oid = %s::regclass
+   OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)
+ORDER BY c.oid = %s::regclass DESC, c.relname
+"""
+
+REPORT_SQL = """
+WITH idx AS (
+    SELECT i.indexrelid, i.indrelid, i.indisvalid
+    FROM pg_index i
+        JOIN pg_class t ON t.oid = i.indrelid
+    WHERE t.relnamespace = 'silver'::regnamespace
+      AND NOT t.relispartition
+      AND t.relname NOT LIKE '%\\_shadow'
+      AND t.relname NOT LIKE '%\\_previous'
+)
+SELECT idx.indrelid::regclass::text AS table_name,
+       idx.indexrelid::regclass::text AS index_name,
+       pg_get_indexdef(idx.indexrelid) AS definition,
+       idx.indisvalid AS valid,
+       SUM(pg_relation_size(p.relid))::bigint AS size_bytes,
+       COALESCE(SUM(s.idx_scan), 0)::bigint AS scans,
+       COALESCE(SUM(s.idx_tup_read), 0)::bigint AS tuples_read
+FROM idx
+    -- a partitioned index with the indexes of the partitions
+    CROSS JOIN LATERAL (
+        SELECT idx.indexrelid AS relid
+        UNION
+        SELECT relid FROM pg_partition_tree(idx.indexrelid)
+    ) p
+    LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = p.relid
+GROUP BY idx.indrelid, idx.indexrelid, idx.indisvalid
+ORDER BY 1, 2
+"""
+
+
+def _indexes(cur, relation: str) -> list:
+    cur.execute(INDEXES_SQL, (relation,))
+    return cur.fetchall()
+
+
+def _covering(indexes, key: JoinKey) -> list:
+    """Indexes whose leading columns are the key, valid ones first."""
+    found = [ix for ix in indexes if ix[1][:len(key.columns)] == key.columns]
+    return sorted(found, key=lambda ix: not ix[2])
+
+
+def is_live(cur, table: str) -> bool:
+    """True once the table has been analyzed (its row estimate is known):
+    gold may be reading it."""
+    cur.execute("SELECT reltuples >= 0 FROM pg_class WHERE oid = %s::regclass", (table,))
+    return cur.fetchone()[0]
+
+
+# --------------------------------------------------
+# Ensure
+# --------------------------------------------------
+def _build(cur, key: JoinKey, concurrently: bool) -> str:
+    """Build the key's index on a plain table, or on every partition of a
+    partitioned one and attach them; returns what was done."""
+    schema = key.table.split(".", 1)[0]
+    name = key.index_name()
+    cur.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = %s::regclass", (key.table,))
+    partitioned = cur.fetchone()[0]
+    cols = ", ".join(key.columns)
+    mode = "CONCURRENTLY " if concurrently else ""
+
+    # left invalid by an interrupted CONCURRENTLY build
+    for ix_name, _, valid, _ in _covering(_indexes(cur, key.table), key):
+        if not valid and ix_name == name and not partitioned:
+            cur.execute(f"DROP INDEX {mode}{schema}.{name}")
+
+    if not partitioned:
+        cur.execute(f"CREATE INDEX {mode}{name} ON {key.table} ({cols})")
+        return "built concurrently" if concurrently else "built"
+    if not concurrently:
+        cur.execute(f"DROP INDEX IF EXISTS {schema}.{name}")
+        cur.execute(f"CREATE INDEX {name} ON {key.table} ({cols})")
+        return "built"
+
+    # CONCURRENTLY is not supported on a partitioned table: the parent index
+    # is created invalid on the parent alone, and becomes valid once an
+    # index of every partition is attached to it
+    cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {key.table} ({cols})")
+    cur.execute(PARTITIONS_SQL, (key.table,))
+    for partition, relname in cur.fetchall():
+        covering = _covering(_indexes(cur, partition), key)
+        if any(parent == f"{schema}.{name}" for _, _, _, parent in covering):
+            continue
+        child = key.index_name(relname)
+        for ix_name, _, valid, _ in covering:
+            if ix_name == child and not valid:
+                cur.execute(f"DROP INDEX CONCURRENTLY {schema}.{child}")
+        cur.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {child} ON {partition} ({cols})")
+        cur.execute(f"ALTER INDEX {schema}.{name} ATTACH PARTITION {schema}.{child}")
+    return "built concurrently"
+
+
+def ensure(table: str, concurrently: bool = None) -> List[dict]:
+    """Check or build the declared indexes of `table`. With concurrently
+    None, live tables are indexed CONCURRENTLY."""
+    results = []
+    with pooled_conn() as conn:
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                if concurrently is None:
+                    concurrently = is_live(cur, table)
+                for key in keys_of(table):
+                    covering = _covering(_indexes(cur, table), key)
+                    if covering and covering[0][2]:
+                        results.append({"key": repr(key), "index": covering[0][0], "status": "ok"})
+                        continue
+                    log.info(f">> [{table}] Building index on ({', '.join(key.columns)})"
+                             f"{' concurrently' if concurrently else ''}")
+                    status = _build(cur, key, concurrently)
+                    results.append({"key": repr(key), "index": key.index_name(), "status": status})
+        finally:
+            conn.autocommit = False
+    return results
+
+
+# --------------------------------------------------
+# Statistics
+# --------------------------------------------------
+def _stale(reltuples: float, relpages: int, pages: int, modified: int) -> bool:
+    if reltuples < 0:
+        return True
+    if abs(pages - relpages) > ANALYZE_CHANGE_RATIO * max(relpages, 1):
+        return True
+    return modified > ANALYZE_CHANGE_RATIO * max(reltuples, 1)
+
+
+def analyze(table: str) -> List[str]:
+    """ANALYZE `table` where its statistics are stale; returns the
+    relations analyzed."""
+    with pooled_conn() as conn:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(STATISTICS_SQL, (table, table, table))
+                rows = cur.fetchall()
+                partitioned = rows[0][1]
+                if partitioned:
+                    stale = [r[0] for r in rows[1:] if _stale(*r[2:])]
+                    if not stale and rows[0][2] >= 0:
+                        return []
+                    cur.execute("SELECT current_setting('server_version_num')::int")
+                    if cur.fetchone()[0] >= 170000:
+                        # the stale partitions, then the parent's own statistics
+                        for relation in stale:
+                            cur.execute(f"ANALYZE {relation}")
+                        cur.execute(f"ANALYZE ONLY {table}")
+                        return stale + [table]
+                    # before PostgreSQL 17 the parent is analyzed with every partition
+                    cur.execute(f"ANALYZE {table}")
+                    return [table]
+                if not _stale(*rows[0][2:]):
+                    return []
+                cur.execute(f"ANALYZE {table}")
+                return [table]
+
+
+def post_load(table: str):
+    """Post-load stage of a silver table: ensure its indexes, then analyze
+    it if needed."""
+    built = [r for r in ensure(table) if r["status"] != "ok"]
+    analyzed = analyze(table)
+    for r in built:
+        log.info(f">> [{table}] {r['index']}: {r['status']}")
+    if analyzed:
+        log.info(f">> [{table}] Analyzed {', '.join(analyzed)}")
+
+
+# --------------------------------------------------
+# Report
+# --------------------------------------------------
+def report() -> List[dict]:
+    """Every index of the silver tables with its size and usage since the
+    statistics were reset; `declared` marks the manifest's."""
+    with pooled_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(REPORT_SQL)
+            columns = [d[0] for d in cur.description]
+            rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+            for row in rows:
+                indexes = {ix[0]: ix[1] for ix in _indexes(cur, row["table_name"])}
+                cols = indexes.get(row["index_name"].split(".", 1)[1], [])
+                row["declared"] = any(cols[:len(k.columns)] == k.columns for k in keys_of(row["table_name"]))
+        conn.rollback()
+    return rows
+
+
+def _size(n: int) -> str:
+    for unit in ("B", "kB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(message)s",
+    )
+    p = argparse.ArgumentParser(description="Join-key indexes and statistics of the silver tables")
+    sub = p.add_subparsers(dest="command", required=True)
+    e = sub.add_parser("ensure", help="Build missing or invalid declared indexes, then analyze stale tables")
+    e.add_argument("--tables", nargs="+", help="Silver tables (without schema); default all")
+    e.add_argument("--blocking", action="store_true", help="Plain CREATE INDEX, even on live tables")
+    r = sub.add_parser("report", help="Size and usage of every silver index")
+    r.add_argument("--json", help="Also write the report to this file")
+    args = p.parse_args()
+
+    if args.command == "ensure":
+        selected = [f"silver.{t}" for t in args.tables] if args.tables else tables()
+        for table in selected:
+            if not keys_of(table):
+                raise ValueError(f"No declared join keys for {table}")
+            for r in ensure(table, False if args.blocking else None):
+                print(f"{r['key']:60} {r['index']:55} {r['status']}")
+            for relation in analyze(table):
+                print(f"analyzed {relation}")
+        return
+
+    rows = report()
+    print(f"{'index':62} {'declared':8} {'valid':5} {'size':>9} {'scans':>9} {'tuples read':>12}")
+    for row in rows:
+        print(
+            f"{row['index_name']:62} {'yes' if row['declared'] else 'no':8} "
+            f"{'yes' if row['valid'] else 'no':5} {_size(row['size_bytes']):>9} "
+            f"{row['scans']:>9} {row['tuples_read']:>12}"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        log.info(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
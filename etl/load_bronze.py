@@ -1,12 +1,28 @@
+import io
 import os
+import csv
+import glob
 import time
+import hashlib
 import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 import psycopg2
+import pyarrow as pa
 from dotenv import load_dotenv
 
-from etl.db import get_conn
+from etl import metrics, shadow
+from etl.binary_copy import copy_binary, encode_batches
+from etl.db import execute_prepared, get_conn, pooled_conn, worker_capacity
+from etl.read_csv import open_arrow_csv
+from etl.schema import get_schema
+from etl.staging import iter_copy_batches, stage_table, staged_columns
+from etl.utils.deploy import deploy_sql_file
+from etl.validate import ValidatingReader, byte_lines, reject_path
 
 
 # --------------------------------------------------
@@ -24,10 +40,21 @@ logging.basicConfig(
 )
 log = logging.getLogger("bronze_loader")
 
+REJECT_DIR = Path(os.getenv("BRONZE_REJECT_DIR", "./rejects"))
+
+
+BRONZE_FORMATS = ("csv", "binary", "parquet")
+
+
+def validation_enabled() -> bool:
+    return os.getenv("BRONZE_VALIDATE", "false").lower() in ("1", "true", "yes")
+
 
 # --------------------------------------------------
 # Table → CSV mapping
 # --------------------------------------------------
+# A source may also be a glob of shard files, each plain or compressed
+# (e.g. "source_crm/sales_details_2026-10-*.csv.gz", see load_shards)
 TABLES = [
     ("bronze.crm_cust_info",      "source_crm/cust_info.csv"),
     ("bronze.crm_prd_info",       "source_crm/prd_info.csv"),
@@ -42,59 +69,763 @@ TABLES = [
 ]
 
 
+def sources(data_dir: Path) -> list:
+    """(table, source path) of every bronze table. BRONZE_SOURCES overrides
+    entries of TABLES, e.g.
+    "bronze.crm_sales_details=source_crm/sales_details_*.csv.gz"."""
+    overrides = dict(
+        item.strip().split("=", 1)
+        for item in os.getenv("BRONZE_SOURCES", "").split(",")
+        if item.strip()
+    )
+    unknown = set(overrides) - {table for table, _ in TABLES}
+    if unknown:
+        raise ValueError(f"Unknown tables in BRONZE_SOURCES: {', '.join(sorted(unknown))}")
+    return [(table, data_dir / overrides.get(table, rel_path)) for table, rel_path in TABLES]
+
+
 # --------------------------------------------------
 # COPY helper (FASTEST)
 # --------------------------------------------------
-def copy_csv(cur, table_name: str, csv_path: Path):
-    if not csv_path.exists():
-        raise FileNotFoundError(f"CSV not found: {csv_path}")
+def csv_columns(csv_path: Path) -> list:
+    """Column list for COPY, read from the CSV header.
 
-    with csv_path.open("r", encoding="utf-8") as f:
+    Bronze tables also carry the technical dwh_row_id column, so COPY must
+    name the source columns explicitly instead of relying on table order.
+    """
+    with csv_path.open("r", encoding="utf-8-sig", newline="") as f:
+        header = next(csv.reader(f))
+    return [col.strip().lower() for col in header]
+
+
+def copy_stream(cur, table_name: str, stream, columns: list, header: bool = True):
+    column_list = ", ".join(f'"{col}"' for col in columns)
+    with metrics.copy_wait(stream) as stream:
         cur.copy_expert(
             f"""
-            COPY {table_name}
+            COPY {table_name} ({column_list})
             FROM STDIN
             WITH (
                 FORMAT csv,
-                HEADER true,
+                HEADER {'true' if header else 'false'},
                 DELIMITER ',',
                 QUOTE '"'
             )
             """,
-            f,
+            stream,
+        )
+    metrics.current_span().add(rows=max(cur.rowcount, 0))
+
+
+def copy_validated(cur, table_name: str, lines, columns: list,
+                   header: bool = True, first_line: int = 1, into: str = None,
+                   rejects: Path = None):
+    """COPY only the rows that pass etl.validate; the rest go to the
+    table's reject file (or `rejects`). `into` is the table loaded instead
+    of `table_name` (its shadow, etl.shadow)."""
+    reader = ValidatingReader(
+        lines, table_name, columns, rejects or reject_path(REJECT_DIR, table_name),
+        header=header, first_line=first_line,
+    )
+    try:
+        copy_stream(cur, into or table_name, reader, columns, header=False)
+    finally:
+        reader.close()
+    if reader.rejected:
+        log.warning(
+            f">> [{table_name}] {reader.rejected} row(s) rejected, "
+            f"see {reader.reject_path}"
+        )
+
+
+def copy_csv(cur, table_name: str, csv_path: Path, validate: bool = False, into: str = None):
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV not found: {csv_path}")
+
+    columns = csv_columns(csv_path)
+    if validate:
+        with csv_path.open("r", encoding="utf-8-sig", newline="") as f:
+            copy_validated(cur, table_name, f, columns, into=into)
+        return
+
+    with csv_path.open("r", encoding="utf-8") as f:
+        copy_stream(cur, into or table_name, f, columns)
+
+
+def copy_csv_binary(cur, table_name: str, csv_path: Path, into: str = None):
+    """Parse `csv_path` client-side into typed Arrow batches and stream
+    them with binary COPY, one batch at a time."""
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV not found: {csv_path}")
+
+    reader = open_arrow_csv(csv_path, table_name)
+    types = dict(get_schema(table_name))
+    kinds = [types.get(col, "text") for col in reader.schema.names]
+    copy_binary(cur, into or table_name, reader.schema.names, encode_batches(reader, kinds))
+
+
+def copy_staged(cur, table_name: str, csv_path: Path, into: str = None):
+    """Full load from the Parquet staging of `csv_path` via binary COPY."""
+    path = stage_table(table_name, csv_path)
+    copy_binary(cur, into or table_name, staged_columns(path), iter_copy_batches(table_name, path))
+
+
+def copy_typed(cur, table_name: str, csv_path: Path, source_format: str, validate: bool,
+               into: str = None):
+    """Binary COPY ("binary" or "parquet"), falling back to CSV COPY when a
+    value does not convert to its bronze type or the server rejects the
+    binary data."""
+    cur.execute("SAVEPOINT typed_copy")
+    try:
+        if source_format == "parquet":
+            copy_staged(cur, table_name, csv_path, into)
+        else:
+            log.info(f">> [{table_name}] Loading {csv_path.name} (binary COPY)")
+            copy_csv_binary(cur, table_name, csv_path, into)
+    except (pa.ArrowInvalid, psycopg2.DataError, psycopg2.errors.QueryCanceled) as e:
+        log.warning(
+            f">> [{table_name}] {source_format} load failed, falling back to CSV COPY: "
+            f"{str(e).strip()}"
         )
+        cur.execute("ROLLBACK TO SAVEPOINT typed_copy")
+        copy_csv(cur, table_name, csv_path, validate, into)
+    else:
+        cur.execute("RELEASE SAVEPOINT typed_copy")
 
 
 # --------------------------------------------------
-# Main ETL
+# Incremental mode: per-file watermarks
 # --------------------------------------------------
-def main():
-    data_dir = Path(os.getenv("DATA_DIR", "./datasets"))
+HASH_CHUNK_SIZE = 1024 * 1024
+# Bytes at each end of the ingested prefix that fingerprint it
+HASH_WINDOW = 1024 * 1024
 
-    batch_start = time.time()
 
-    log.info("=" * 60)
-    log.info("Loading Bronze Layer (CSV → PostgreSQL)")
-    log.info("=" * 60)
+class RangeReader:
+    """Read-only stream over bytes [start, end) of a file for COPY.
 
-    conn = get_conn()
-    cur = conn.cursor()
+    Counts the line breaks handed to COPY, so the line count of the ingested
+    prefix is kept up to date in the same pass as the load.
+    """
+
+    def __init__(self, f, start: int, end: int):
+        self._f = f
+        self._remaining = end - start
+        self.lines = 0
+        f.seek(start)
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._f.read(size)
+        self._remaining -= len(data)
+        self.lines += data.count(b"\n")
+        return data
+
+    def skip_line_breaks(self):
+        """Consume leading CR/LF bytes (tail of an unterminated last row)."""
+        while self._remaining > 0:
+            pos = self._f.tell()
+            byte = self._f.read(1)
+            if byte not in (b"\r", b"\n"):
+                self._f.seek(pos)
+                return
+            self._remaining -= 1
+            self.lines += byte == b"\n"
+
+
+def hash_prefix(f, length: int):
+    """Hash the first `length` bytes."""
+    digest = hashlib.sha256()
+    f.seek(0)
+    remaining = length
+    while remaining > 0:
+        data = f.read(min(HASH_CHUNK_SIZE, remaining))
+        if not data:
+            break
+        digest.update(data)
+        remaining -= len(data)
+    return digest
+
+
+def prefix_fingerprint(f, length: int) -> str:
+    """Fingerprint of the first `length` bytes: their length and their
+    first and last HASH_WINDOW bytes. An append run checks the ingested
+    prefix with it, reading at most 2 * HASH_WINDOW bytes however long the
+    file has grown; a rewrite that keeps the length and both ends of the
+    prefix goes unnoticed."""
+    digest = hashlib.sha256(str(length).encode())
+    f.seek(0)
+    digest.update(f.read(min(HASH_WINDOW, length)))
+    tail = max(HASH_WINDOW, length - HASH_WINDOW)
+    if tail < length:
+        f.seek(tail)
+        digest.update(f.read(length - tail))
+    return digest.hexdigest()
 
-    try:
-        for table, rel_path in TABLES:
-            csv_path = data_dir / rel_path
-            start = time.time()
 
-            log.info(f">> Truncating table: {table}")
+def get_file_state(cur, table: str):
+    execute_prepared(
+        cur,
+        "bronze_get_file_state",
+        """
+        SELECT file_size, file_mtime, content_hash, byte_offset, row_count, line_count
+        FROM meta.bronze_file_state
+        WHERE table_name = %s
+        """,
+        (table,),
+    )
+    row = cur.fetchone()
+    if row is None:
+        return None
+    keys = ("file_size", "file_mtime", "content_hash", "byte_offset", "row_count", "line_count")
+    return dict(zip(keys, row))
+
+
+def save_file_state(cur, table: str, csv_path: Path, stat, content_hash: str,
+                    byte_offset: int, row_count: int, line_count: int):
+    execute_prepared(
+        cur,
+        "bronze_save_file_state",
+        """
+        INSERT INTO meta.bronze_file_state (
+            table_name, file_path, file_size, file_mtime,
+            content_hash, byte_offset, row_count, line_count, updated_at
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
+        ON CONFLICT (table_name) DO UPDATE SET
+            file_path    = EXCLUDED.file_path,
+            file_size    = EXCLUDED.file_size,
+            file_mtime   = EXCLUDED.file_mtime,
+            content_hash = EXCLUDED.content_hash,
+            byte_offset  = EXCLUDED.byte_offset,
+            row_count    = EXCLUDED.row_count,
+            line_count   = EXCLUDED.line_count,
+            updated_at   = EXCLUDED.updated_at
+        """,
+        (table, str(csv_path), stat.st_size, stat.st_mtime,
+         content_hash, byte_offset, row_count, line_count),
+    )
+
+
+def load_incremental(cur, table: str, csv_path: Path, validate: bool = False):
+    """Load only what changed in `csv_path` since the last recorded state.
+
+    - size and mtime unchanged            -> skip
+    - old content is a prefix of the file -> COPY the appended tail only
+    - anything else (rewritten file)      -> TRUNCATE + full COPY
+
+    The old content is recognized by its fingerprint (prefix_fingerprint),
+    so an append reads the two ends of the prefix and the new tail only.
+    """
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV not found: {csv_path}")
+
+    stat = csv_path.stat()
+    state = get_file_state(cur, table)
+
+    if (
+        state is not None
+        and state["file_size"] == stat.st_size
+        and state["file_mtime"] == stat.st_mtime
+    ):
+        log.info(f">> [{table}] {csv_path.name} unchanged, skipping")
+        return
+
+    columns = csv_columns(csv_path)
+    with csv_path.open("rb") as f:
+        append = False
+        if state is not None and state["byte_offset"] <= stat.st_size:
+            append = prefix_fingerprint(f, state["byte_offset"]) == state["content_hash"]
+
+        if append and state["byte_offset"] == stat.st_size:
+            # Only the mtime moved (e.g. touched); refresh the recorded state.
+            log.info(f">> [{table}] {csv_path.name} content unchanged, skipping")
+            save_file_state(
+                cur, table, csv_path, stat, state["content_hash"],
+                state["byte_offset"], state["row_count"], state["line_count"],
+            )
+            return
+
+        if append:
+            start = state["byte_offset"]
+            row_count = state["row_count"] or 0
+            prefix_lines = state["line_count"] or 0
+            log.info(
+                f">> [{table}] Appending {stat.st_size - start} new bytes "
+                f"of {csv_path.name} from offset {start}"
+            )
+            reader = RangeReader(f, start, stat.st_size)
+            metrics.current_span().add(bytes=stat.st_size - start)
+            if start > 0:
+                f.seek(start - 1)
+                if f.read(1) != b"\n":
+                    reader.skip_line_breaks()
+            if validate:
+                copy_validated(cur, table, byte_lines(reader), columns,
+                               header=False, first_line=prefix_lines + 1)
+            else:
+                copy_stream(cur, table, reader, columns, header=False)
+        else:
+            if state is not None:
+                log.info(f">> [{table}] {csv_path.name} was rewritten, full reload")
+            row_count = 0
+            prefix_lines = 0
+            log.info(f">> [{table}] Truncating table")
             cur.execute(f"TRUNCATE TABLE {table};")
+            clear_shard_state(cur, table)
+            log.info(f">> [{table}] Loading {csv_path.name}")
+            reader = RangeReader(f, 0, stat.st_size)
+            metrics.current_span().add(bytes=stat.st_size)
+            if validate:
+                copy_validated(cur, table, byte_lines(reader, strip_bom=True), columns)
+            else:
+                copy_stream(cur, table, reader, columns, header=True)
+
+        fingerprint = prefix_fingerprint(f, stat.st_size)
+
+    row_count += max(cur.rowcount, 0)
+    save_file_state(
+        cur, table, csv_path, stat, fingerprint, stat.st_size, row_count,
+        prefix_lines + reader.lines,
+    )
+
+
+# --------------------------------------------------
+# Sharded sources: globs of plain, gzip or zstd CSV files
+# --------------------------------------------------
+# Decompressed on the fly by pyarrow, by file suffix
+COMPRESSIONS = {".gz": "gzip", ".zst": "zstd"}
+
+# Shards loaded in parallel, each over a connection of its own (outside the
+# pool, so they do not compete with the DAG workers). The limit holds for
+# the whole process: tables loaded in parallel share the shard connections
+SHARD_WORKERS = int(os.getenv("BRONZE_SHARD_WORKERS", "4"))
+_shard_slots = threading.BoundedSemaphore(max(1, SHARD_WORKERS))
+
+
+def shard_progressive() -> bool:
+    """Whether full loads of sharded sources TRUNCATE and commit shard by
+    shard (readers see the table fill up) instead of swapping a shadow in."""
+    return os.getenv("BRONZE_SHARD_PROGRESSIVE", "false").lower() in ("1", "true", "yes")
+
+
+SAVE_SHARD_STATE_SQL = """
+INSERT INTO meta.bronze_shard_state (
+    table_name, shard_path, file_size, file_mtime, content_hash, row_count, loaded_at
+)
+VALUES (%s, %s, %s, %s, %s, %s, NOW())
+ON CONFLICT (table_name, shard_path) DO UPDATE SET
+    file_size    = EXCLUDED.file_size,
+    file_mtime   = EXCLUDED.file_mtime,
+    content_hash = EXCLUDED.content_hash,
+    row_count    = EXCLUDED.row_count,
+    loaded_at    = EXCLUDED.loaded_at
+"""
+
+
+def is_sharded(source: Path) -> bool:
+    return glob.has_magic(str(source)) or source.suffix in COMPRESSIONS
+
+
+def shard_paths(source: Path) -> list:
+    paths = [Path(p) for p in sorted(glob.glob(str(source)))]
+    if not paths:
+        raise FileNotFoundError(f"No source files match: {source}")
+    return paths
+
+
+def shard_key(path: Path) -> str:
+    """meta.bronze_shard_state key of a shard: its resolved path, so the
+    same file matches however DATA_DIR or the glob spell it."""
+    return str(path.resolve())
+
+
+def source_size(source: Path) -> int:
+    """Bytes on disk of a source file or of all its shards."""
+    if is_sharded(source):
+        return sum(Path(p).stat().st_size for p in glob.glob(str(source)))
+    return source.stat().st_size if source.exists() else 0
+
+
+class HashingFile(io.RawIOBase):
+    """Raw file feeding every byte read into `digest`, so the hash of a
+    (compressed) shard is computed in the same pass as its load."""
+
+    def __init__(self, f, digest):
+        self._f = f
+        self._digest = digest
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = self._f.readinto(buffer)
+        self._digest.update(memoryview(buffer)[:n])
+        return n
+
+
+class CountingReader:
+    """Counts the (decompressed) bytes handed to COPY."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.bytes = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size if size is not None and size >= 0 else None)
+        self.bytes += len(data)
+        return data
+
+
+@contextmanager
+def open_shard(path: Path, digest):
+    """Stream the decompressed content of `path`; no temporary file."""
+    with path.open("rb") as f:
+        raw = HashingFile(f, digest)
+        codec = COMPRESSIONS.get(path.suffix)
+        if codec is None:
+            yield CountingReader(raw)
+        else:
+            yield CountingReader(pa.CompressedInputStream(pa.PythonFile(raw, mode="r"), codec))
+
+
+def shard_columns(path: Path) -> list:
+    with open_shard(path, hashlib.sha256()) as stream:
+        header = next(csv.reader([next(byte_lines(stream, strip_bom=True))]))
+    return [col.strip().lower() for col in header]
+
+
+def get_shard_states(cur, table: str) -> dict:
+    execute_prepared(
+        cur,
+        "bronze_get_shard_states",
+        """
+        SELECT shard_path, file_size, file_mtime, content_hash
+        FROM meta.bronze_shard_state
+        WHERE table_name = %s
+        """,
+        (table,),
+    )
+    keys = ("file_size", "file_mtime", "content_hash")
+    return {row[0]: dict(zip(keys, row[1:])) for row in cur.fetchall()}
+
+
+def shard_state_params(table: str, shard: dict) -> tuple:
+    return (table, shard["path"], shard["size"], shard["mtime"], shard["hash"], shard["rows"])
+
+
+def clear_shard_state(cur, table: str):
+    execute_prepared(
+        cur,
+        "bronze_clear_shard_state",
+        "DELETE FROM meta.bronze_shard_state WHERE table_name = %s",
+        (table,),
+    )
+
+
+def pending_shards(cur, table: str, paths: list):
+    """The shards of `paths` not loaded yet, or None when the table has to
+    be reloaded: a loaded shard changed or no longer matches the source
+    (removed, or moved with DATA_DIR), or none was recorded (the table was
+    loaded from a single file, or its load never completed a shard)."""
+    states = get_shard_states(cur, table)
+    if not states:
+        log.info(f">> [{table}] No shards recorded, full reload")
+        return None
+    missing = set(states) - {shard_key(path) for path in paths}
+    if missing:
+        log.info(f">> [{table}] {len(missing)} loaded shard(s) no longer match the source, full reload")
+        return None
+
+    pending = []
+    for path in paths:
+        state = states.get(shard_key(path))
+        if state is None:
+            pending.append(path)
+            continue
+        stat = path.stat()
+        if state["file_size"] == stat.st_size and state["file_mtime"] == stat.st_mtime:
+            continue
+        if state["file_size"] == stat.st_size:
+            with path.open("rb") as f:
+                digest = hash_prefix(f, stat.st_size)
+            if digest.hexdigest() == state["content_hash"]:
+                # only the mtime moved (e.g. touched)
+                cur.execute(
+                    "UPDATE meta.bronze_shard_state SET file_mtime = %s "
+                    "WHERE table_name = %s AND shard_path = %s",
+                    (stat.st_mtime, table, shard_key(path)),
+                )
+                continue
+        log.info(f">> [{table}] {path.name} changed after it was loaded, full reload")
+        return None
+    return pending
+
+
+def load_shard(table: str, path: Path, validate: bool = False, into: str = None) -> dict:
+    """COPY one shard, committed on a connection of its own once one of the
+    SHARD_WORKERS slots is free. Shards loaded into `table` itself are
+    committed together with their meta.bronze_shard_state row."""
+    start = time.perf_counter()
+    stat = path.stat()
+    digest = hashlib.sha256()
+    columns = shard_columns(path)
+    with _shard_slots:
+        conn = get_conn()
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    with open_shard(path, digest) as stream:
+                        if validate:
+                            rejects = REJECT_DIR / f"{table}.{path.name}.rejects.csv"
+                            copy_validated(cur, table, byte_lines(stream, strip_bom=True), columns,
+                                           into=into, rejects=rejects)
+                        else:
+                            copy_stream(cur, into or table, stream, columns)
+                    shard = {
+                        "path": shard_key(path), "size": stat.st_size, "mtime": stat.st_mtime,
+                        "hash": digest.hexdigest(), "rows": max(cur.rowcount, 0),
+                        "bytes": stream.bytes,
+                    }
+                    if into is None:
+                        cur.execute(SAVE_SHARD_STATE_SQL, shard_state_params(table, shard))
+        finally:
+            conn.close()
+    metrics.current_span().add(bytes=stat.st_size)
+    shard["seconds"] = time.perf_counter() - start
+    return shard
+
+
+def copy_shards(table: str, paths: list, validate: bool = False, into: str = None) -> list:
+    """Load `paths` SHARD_WORKERS at a time, largest first; returns the
+    loaded shards. A failed shard stops the ones not started yet; the
+    shards already committed stay loaded."""
+    start = time.perf_counter()
+    paths = sorted(paths, key=lambda path: path.stat().st_size, reverse=True)
+    workers = max(1, min(SHARD_WORKERS, len(paths)))
+    log.info(f">> [{table}] Loading {len(paths)} shard(s), {workers} at a time")
+
+    loaded = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # each shard gets a copy of the context, so its rows and bytes count
+        # towards the table's metrics span
+        futures = [
+            executor.submit(contextvars.copy_context().run, load_shard, table, path, validate, into)
+            for path in paths
+        ]
+        try:
+            for future in as_completed(futures):
+                shard = future.result()
+                loaded.append(shard)
+                mb = shard["bytes"] / 1e6
+                log.info(
+                    f">> [{table}] Shard {len(loaded)}/{len(paths)} {Path(shard['path']).name}: "
+                    f"{shard['rows']:,} rows, {mb:.1f} MB ({shard['size'] / 1e6:.1f} MB on disk) "
+                    f"in {shard['seconds']:.2f}s, {mb / max(shard['seconds'], 1e-6):.1f} MB/s"
+                )
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+    elapsed = time.perf_counter() - start
+    mb = sum(shard["bytes"] for shard in loaded) / 1e6
+    rows = sum(shard["rows"] for shard in loaded)
+    log.info(
+        f">> [{table}] {len(loaded)} shard(s): {rows:,} rows, {mb:.1f} MB "
+        f"in {elapsed:.2f}s, {mb / max(elapsed, 1e-6):.1f} MB/s, {rows / max(elapsed, 1e-6):,.0f} rows/s"
+    )
+    return loaded
+
 
-            log.info(f">> Loading {csv_path.name} → {table}")
-            copy_csv(cur, table, csv_path)
+def load_shards(table: str, source: Path, mode: str = "full", validate: bool = False):
+    """Load a sharded source. Shards are always read as CSV.
 
+    - incremental: COPY only the shards not loaded yet (recorded in
+      meta.bronze_shard_state); a changed shard reloads the table
+    - full (and reloads): the shards fill <table>_shadow, which is swapped
+      in once all of them are loaded, whatever FULL_LOAD says: the shards
+      commit on connections of their own, so the live table cannot be
+      truncated and refilled in one transaction
+    - full, BRONZE_SHARD_PROGRESSIVE=true: TRUNCATE is committed first,
+      then every shard is committed as it finishes, so readers see the
+      table fill up and a failed load is completed by the next incremental
+      one
+    """
+    paths = shard_paths(source)
+    if mode == "incremental":
+        with pooled_conn() as conn:
+            with conn.cursor() as cur:
+                pending = pending_shards(cur, table, paths)
             conn.commit()
+        if pending is not None:
+            if not pending:
+                log.info(f">> [{table}] All {len(paths)} shard(s) loaded, skipping")
+            else:
+                log.info(f">> [{table}] {len(pending)} of {len(paths)} shard(s) are new")
+                copy_shards(table, pending, validate)
+            return
 
-            log.info(f">> Load Duration: {int(time.time() - start)} seconds")
-            log.info(">> ----------------------------------------")
+    swap = not shard_progressive()
+    into = shadow.shadow_name(table) if swap else None
+    with pooled_conn() as conn:
+        with conn.cursor() as cur:
+            if swap:
+                log.info(f">> [{table}] Creating {into}")
+                shadow.create(cur, table)
+            else:
+                log.info(f">> [{table}] Truncating table")
+                cur.execute(f"TRUNCATE TABLE {table};")
+            clear_file_state(cur, table)
+            clear_shard_state(cur, table)
+        # the shard connections need the shadow, and the truncate released
+        conn.commit()
+
+        loaded = copy_shards(table, paths, validate, into)
+        if swap:
+            with conn.cursor() as cur:
+                shadow.seal(cur, table)
+                after = [
+                    cur.mogrify(SAVE_SHARD_STATE_SQL, shard_state_params(table, shard)).decode()
+                    for shard in loaded
+                ]
+            conn.commit()
+            shadow.swap(conn, table, after=after)
+
+
+# --------------------------------------------------
+# Single table load (one pooled connection per table)
+# --------------------------------------------------
+def load_table(table: str, csv_path: Path, mode: str = "full", validate: bool = None,
+               source_format: str = None):
+    start = time.time()
+    if validate is None:
+        validate = validation_enabled()
+    if source_format is None:
+        source_format = os.getenv("BRONZE_FORMAT", "csv")
+    if source_format not in BRONZE_FORMATS:
+        raise ValueError(f"Unknown bronze source format: {source_format}")
+
+    try:
+        if is_sharded(csv_path):
+            load_shards(table, csv_path, mode, validate)
+        else:
+            load_file(table, csv_path, mode, validate, source_format)
+    except Exception:
+        log.error(f">> [{table}] Load failed")
+        raise
+
+    log.info(f">> [{table}] Load Duration: {int(time.time() - start)} seconds")
+
+
+def clear_file_state(cur, table: str):
+    execute_prepared(
+        cur,
+        "bronze_clear_file_state",
+        "DELETE FROM meta.bronze_file_state WHERE table_name = %s",
+        (table,),
+    )
+
+
+def load_file(table: str, csv_path: Path, mode: str, validate: bool, source_format: str):
+    # full loads with FULL_LOAD=swap fill <table>_shadow and swap it in
+    swap = mode != "incremental" and shadow.strategy() == "swap"
+    into = shadow.shadow_name(table) if swap else None
+
+    with pooled_conn() as conn:
+        with conn.cursor() as cur:
+            if mode == "incremental":
+                load_incremental(cur, table, csv_path, validate)
+            else:
+                if swap:
+                    log.info(f">> [{table}] Creating {into}")
+                    shadow.create(cur, table)
+                else:
+                    log.info(f">> [{table}] Truncating table")
+                    cur.execute(f"TRUNCATE TABLE {table};")
+
+                if source_format != "csv":
+                    copy_typed(cur, table, csv_path, source_format, validate, into)
+                else:
+                    log.info(f">> [{table}] Loading {csv_path.name}")
+                    copy_csv(cur, table, csv_path, validate, into)
+                metrics.current_span().add(bytes=csv_path.stat().st_size)
+
+                # A full reload invalidates any recorded watermark.
+                clear_file_state(cur, table)
+                clear_shard_state(cur, table)
+                if swap:
+                    shadow.seal(cur, table)
+
+        conn.commit()
+        if swap:
+            shadow.swap(conn, table)
+
+
+def traced_load(table: str, csv_path: Path, mode: str):
+    with metrics.span(table, "table", stage="bronze"):
+        load_table(table, csv_path, mode)
+
+
+# --------------------------------------------------
+# Main ETL
+# --------------------------------------------------
+def main(workers: int = None, mode: str = None):
+    data_dir = Path(os.getenv("DATA_DIR", "./datasets"))
+    if workers is None:
+        workers = int(os.getenv("BRONZE_WORKERS", "1"))
+    if mode is None:
+        mode = os.getenv("BRONZE_MODE", "full")
+    if mode not in ("full", "incremental"):
+        raise ValueError(f"Unknown bronze load mode: {mode}")
+    jobs = sources(data_dir)
+    # sharded sources load through a shadow table in either mode
+    if (mode == "full" and shadow.strategy() == "swap") or (
+        not shard_progressive() and any(is_sharded(path) for _, path in jobs)
+    ):
+        deploy_sql_file(shadow.PROCEDURES)
+
+    pool_size = worker_capacity()
+    if workers > pool_size:
+        log.warning(
+            f"BRONZE_WORKERS={workers} exceeds the {pool_size} pooled connections "
+            f"available to workers; using {pool_size} workers"
+        )
+        workers = pool_size
+
+    batch_start = time.time()
+
+    log.info("=" * 60)
+    log.info(
+        f"Loading Bronze Layer (CSV → PostgreSQL, {mode}, {workers} worker(s))"
+    )
+    log.info("=" * 60)
+
+    try:
+        if workers <= 1:
+            for table, csv_path in jobs:
+                traced_load(table, csv_path, mode)
+        else:
+            # Largest files first so the long COPYs start immediately and the
+            # small tables fill in around them.
+            jobs.sort(key=lambda job: source_size(job[1]), reverse=True)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(traced_load, table, csv_path, mode): table
+                    for table, csv_path in jobs
+                }
+                try:
+                    for future in as_completed(futures):
+                        future.result()
+                except Exception:
+                    # Stop tables that have not started yet; running COPYs
+                    # finish (or fail) before the executor shuts down.
+                    for future in futures:
+                        future.cancel()
+                    raise
 
         log.info("=" * 60)
         log.info(
@@ -103,15 +834,10 @@ def main():
         log.info("=" * 60)
 
     except Exception as e:
-        conn.rollback()
         log.error("Error during bronze load")
         log.error(str(e))
         raise
 
-    finally:
-        cur.close()
-        conn.close()
-
 
 if __name__ == "__main__":
     main()
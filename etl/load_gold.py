@@ -0,0 +1,56 @@
+import os
+
+from etl.utils.deploy import deploy_sql_file
+from etl.db import script_conn
+
+GOLD_OBJECTS = [
+    "gold.dim_customers",
+    "gold.dim_products",
+    "gold.dim_salesperson",
+    "gold.dim_discount",
+    "gold.fact_sales",
+]
+
+
+def main(mode: str = None):
+    from etl import extract
+
+    if mode is None:
+        mode = os.getenv("GOLD_MODE", "view")
+    if mode not in ("view", "materialized"):
+        raise ValueError(f"Unknown gold mode: {mode}")
+
+    # partition helpers and the refresh queue of the derived gold tables,
+    # change queue of the customer dimension
+    deploy_sql_file("scripts/proc_partitions.sql")
+    deploy_sql_file("scripts/proc_change_detection.sql")
+
+    if mode == "view":
+        deploy_sql_file("scripts/gold/ddl_gold.sql")
+        calls = []
+    else:
+        # 1) Deploy materialized views only when changed or missing (e.g.
+        #    dropped by a silver DDL cascade); otherwise keep them and
+        #    refresh concurrently
+        deploy_sql_file("scripts/gold/ddl_gold_materialized.sql")
+        # 2) Sync surrogate keys and refresh
+        calls = ["CALL gold.load_gold();"]
+
+    # 3) Sales rollups, maintained by month on top of either variant
+    deploy_sql_file("scripts/gold/ddl_gold_aggregates.sql")
+    calls.append("CALL gold.refresh_aggregates();")
+
+    with script_conn() as conn:
+        with conn:
+            with conn.cursor() as cur:
+                for call in calls:
+                    cur.execute(call)
+                for notice in conn.notices:
+                    print(notice.strip())
+                del conn.notices[:]
+
+    # gold extracts are cached by this version (etl.extract)
+    extract.record_version()
+
+if __name__ == "__main__":
+    main()
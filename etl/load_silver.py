@@ -1,20 +1,73 @@
-from etl.utils.sql import run_sql_file
-from etl.db import get_conn
+import os
 
-def main():
-    # 1) Ensure procedure exists
-    run_sql_file("scripts/silver/proc_load_silver.sql")
+from etl.utils.deploy import deploy_sql_file
+from etl import extract, indexes, shadow, silver_engine
+from etl.db import script_conn
+
+PROCEDURES = {
+    "full": "CALL silver.load_silver();",
+    "incremental": "CALL silver.load_silver_incremental();",
+}
+
+
+def main(mode: str = None):
+    if mode is None:
+        mode = os.getenv("SILVER_MODE", "full")
+    if mode not in PROCEDURES:
+        raise ValueError(f"Unknown silver load mode: {mode}")
+
+    # 1) Ensure procedures exist
+    deploy_sql_file("scripts/proc_partitions.sql")
+    deploy_sql_file("scripts/proc_change_detection.sql")
+    deploy_sql_file("scripts/silver/proc_load_silver.sql")
+    deploy_sql_file("scripts/silver/proc_load_silver_incremental.sql")
+    deploy_sql_file(shadow.PROCEDURES)
 
-    # 2) Execute procedure
-    conn = get_conn()
     try:
+        # 2) Execute procedure (or the Python engine, full loads only)
+        load(mode)
+
+        # 3) Build the declared indexes after the load, refresh stale statistics
+        for table in indexes.tables():
+            indexes.post_load(table)
+    finally:
+        # the gold views read silver, so the gold data version may have
+        # changed (etl.extract); read from the tables, also after a failure
+        extract.record_version()
+
+
+def load(mode: str):
+    if mode == "full" and shadow.strategy() == "swap":
+        # one table at a time: each rewritten table is swapped in on its own
+        try:
+            for table in silver_engine.TABLES:
+                if table.key is None:
+                    shadow.load_silver_table(table.name)
+                elif silver_engine.engine() == "python":
+                    silver_engine.load_table(table)
+                else:
+                    run_procedure(f"CALL silver.load_{table.short}();")
+        finally:
+            silver_engine.shutdown()
+        return
+    if mode == "full" and silver_engine.engine() == "python":
+        try:
+            silver_engine.load_silver()
+        finally:
+            silver_engine.shutdown()
+        return
+
+    run_procedure(PROCEDURES[mode])
+
+
+def run_procedure(call: str):
+    with script_conn() as conn:
         with conn:
             with conn.cursor() as cur:
-                cur.execute("CALL silver.load_silver();")
+                cur.execute(call)
                 for notice in conn.notices:
                     print(notice.strip())
-    finally:
-        conn.close()
+                del conn.notices[:]
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,465 @@
+"""Run-level metrics and tracing for the ETL package.
+
+Enabled for a pipeline run with ETL_METRICS=true. Every run_pipeline
+invocation records a tree of spans under one run id:
+
+    run        the whole invocation
+    stage      bronze, silver, gold, quality, ddl (wall time of its nodes)
+    table      one DAG node: a table load, gold object or quality check
+               (ddl/procedure nodes have kind "task")
+    statement  one SQL statement run through etl.utils.sql
+
+Each span has its duration, rows (COPY / statement row counts, rows
+written by a silver/gold node), bytes (bronze input read) and DB wait
+time: the time spent blocked on the database, i.e. statement execution
+and COPY minus the time the client spent producing the COPY data. DB wait
+adds up to every enclosing span.
+
+At the end of the run the spans are appended to METRICS_DIR/spans.jsonl
+(one JSON object per line, default ./metrics), and the run's metrics are
+written in the Prometheus text format to METRICS_DIR/etl.prom, every
+sample labelled with the run id. The file can be read by the node_exporter
+textfile collector, or served:
+
+    python -m etl.metrics serve --port 9108   # GET /metrics
+    python -m etl.metrics trends --last 20    # throughput per run from spans.jsonl
+"""
+import argparse
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+log = logging.getLogger("metrics")
+
+METRICS_DIR = Path(os.getenv("METRICS_DIR", "./metrics"))
+SPANS_FILE = "spans.jsonl"
+PROM_FILE = "etl.prom"
+
+def enabled() -> bool:
+    return os.getenv("ETL_METRICS", "false").lower() in ("1", "true", "yes")
+
+
+# --------------------------------------------------
+# Spans
+# --------------------------------------------------
+class Span:
+    def __init__(self, tracer: "Tracer", name: str, kind: str, parent: "Span" = None, **attrs):
+        self.tracer = tracer
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.duration_s = None
+        self.rows = None
+        self.bytes = None
+        self.db_wait_s = 0.0
+        self.status = "running"
+        self.error = None
+
+    def add(self, rows: int = None, bytes: int = None):
+        """Count rows/bytes processed by this span."""
+        with self.tracer.lock:
+            if rows is not None:
+                self.rows = (self.rows or 0) + rows
+            if bytes is not None:
+                self.bytes = (self.bytes or 0) + bytes
+
+    def add_db_wait(self, seconds: float):
+        with self.tracer.lock:
+            span = self
+            while span is not None:
+                span.db_wait_s += seconds
+                span = span.parent
+
+    def finish(self, error: BaseException = None):
+        self.duration_s = time.perf_counter() - self._start
+        self.status = "failed" if error is not None else "success"
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id": self.tracer.run_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "kind": self.kind,
+            "started_at": self.started_at.isoformat(),
+            "duration_s": self.duration_s,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "db_wait_s": round(self.db_wait_s, 6),
+            "status": self.status,
+            "error": self.error,
+            "attrs": self.attrs,
+        }
+
+
+class _NullSpan:
+    """Stands in for a span when no run is traced."""
+
+    def add(self, rows: int = None, bytes: int = None):
+        pass
+
+    def add_db_wait(self, seconds: float):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """The spans of one run; shared by the DAG worker threads."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.lock = threading.Lock()
+        self.spans: List[Span] = []
+        self.stages: Dict[str, Span] = {}
+        self.root = self.start("run", "run")
+
+    def start(self, name: str, kind: str, parent: Span = None, **attrs) -> Span:
+        span = Span(self, name, kind, parent, **attrs)
+        with self.lock:
+            self.spans.append(span)
+        return span
+
+    def stage(self, name: str) -> Span:
+        """Stage span, opened by the first node of the stage."""
+        with self.lock:
+            span = self.stages.get(name)
+            if span is None:
+                span = self.stages[name] = Span(self, name, "stage", self.root)
+                self.spans.append(span)
+        return span
+
+    def close_stages(self):
+        # a stage lasts from its first node's start to its last node's end
+        for stage in self.stages.values():
+            children = [s for s in self.spans if s.parent is stage and s.duration_s is not None]
+            end = max((s._start + s.duration_s for s in children), default=stage._start)
+            stage.duration_s = end - stage._start
+            stage.status = "failed" if any(s.status == "failed" for s in children) else "success"
+            stage.rows = sum(s.rows or 0 for s in children) if any(s.rows is not None for s in children) else None
+            stage.bytes = sum(s.bytes or 0 for s in children) if any(s.bytes is not None for s in children) else None
+
+
+_tracer: Optional[Tracer] = None
+_current: contextvars.ContextVar = contextvars.ContextVar("etl_span", default=None)
+
+
+def start_run(run_id: str) -> Optional[Tracer]:
+    """Start tracing `run_id` when ETL_METRICS is enabled."""
+    global _tracer
+    _tracer = Tracer(run_id) if enabled() else None
+    if _tracer is not None:
+        _current.set(_tracer.root)
+        log.info(f"Recording metrics of run {run_id} in {METRICS_DIR}")
+    return _tracer
+
+
+def active() -> bool:
+    return _tracer is not None
+
+
+def current_span():
+    span = _current.get()
+    return span if span is not None and _tracer is not None else NULL_SPAN
+
+
+@contextmanager
+def span(name: str, kind: str, stage: str = None, **attrs):
+    """Record a span around the block; it becomes the current span of the
+    thread. With `stage`, the span is placed under that stage's span
+    (e.g. DAG nodes, which run on worker threads)."""
+    tracer = _tracer
+    if tracer is None:
+        yield NULL_SPAN
+        return
+    parent = tracer.stage(stage) if stage else _current.get() or tracer.root
+    s = tracer.start(name, kind, parent, **attrs)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.finish(e)
+        raise
+    else:
+        s.finish()
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def db_wait():
+    """Count the block as time spent waiting on the database."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current_span().add_db_wait(time.perf_counter() - start)
+
+
+class TimedReader:
+    """File-like wrapper measuring the time spent producing COPY data, so
+    that COPY time can be split into client and server time."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.read_s = 0.0
+
+    def read(self, *args):
+        start = time.perf_counter()
+        try:
+            return self.stream.read(*args)
+        finally:
+            self.read_s += time.perf_counter() - start
+
+    def readline(self, *args):
+        start = time.perf_counter()
+        try:
+            return self.stream.readline(*args)
+        finally:
+            self.read_s += time.perf_counter() - start
+
+
+@contextmanager
+def copy_wait(stream):
+    """Time a COPY fed by `stream`; the DB wait is the COPY time minus the
+    time spent reading the stream. Yields the stream to pass to COPY."""
+    if _tracer is None:
+        yield stream
+        return
+    reader = TimedReader(stream)
+    start = time.perf_counter()
+    try:
+        yield reader
+    finally:
+        current_span().add_db_wait(max(time.perf_counter() - start - reader.read_s, 0.0))
+
+
+# --------------------------------------------------
+# Export
+# --------------------------------------------------
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample(name: str, labels: dict, value) -> str:
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return f"{name}{{{body}}} {value if isinstance(value, int) else repr(float(value))}"
+
+
+def prometheus_text(tracer: Tracer) -> str:
+    """The run's metrics in the Prometheus text exposition format."""
+    run = {"run_id": tracer.run_id}
+    families = {
+        "etl_run_info": ("gauge", "Pipeline run; 1 for the run in this file.", []),
+        "etl_run_start_timestamp_seconds": ("gauge", "Start of the run (Unix time).", []),
+        "etl_run_duration_seconds": ("gauge", "Wall time of the run.", []),
+        "etl_stage_duration_seconds": ("gauge", "Wall time of a stage.", []),
+        "etl_stage_rows": ("gauge", "Rows processed by the nodes of a stage.", []),
+        "etl_table_duration_seconds": ("gauge", "Duration of a DAG node.", []),
+        "etl_table_rows": ("gauge", "Rows loaded or written by a DAG node.", []),
+        "etl_table_bytes": ("gauge", "Input bytes read by a DAG node.", []),
+        "etl_table_db_wait_seconds": ("gauge", "Time a DAG node spent waiting on the database.", []),
+        "etl_table_rows_per_second": ("gauge", "Rows per second of a DAG node.", []),
+        "etl_statements": ("gauge", "SQL statements executed, per stage.", []),
+        "etl_statement_duration_seconds_sum": ("gauge", "Total SQL statement time, per stage.", []),
+    }
+
+    root = tracer.root
+    families["etl_run_info"][2].append(_sample("etl_run_info", {**run, "status": root.status}, 1))
+    families["etl_run_start_timestamp_seconds"][2].append(
+        _sample("etl_run_start_timestamp_seconds", run, root.started_at.timestamp()))
+    families["etl_run_duration_seconds"][2].append(
+        _sample("etl_run_duration_seconds", run, root.duration_s or 0))
+
+    statements: Dict[str, List[float]] = {}
+    for s in tracer.spans:
+        if s.kind == "stage":
+            labels = {**run, "stage": s.name}
+            families["etl_stage_duration_seconds"][2].append(
+                _sample("etl_stage_duration_seconds", labels, s.duration_s or 0))
+            if s.rows is not None:
+                families["etl_stage_rows"][2].append(_sample("etl_stage_rows", labels, s.rows))
+        elif s.kind in ("table", "task"):
+            labels = {**run, "stage": s.parent.name if s.parent else "", "table": s.name}
+            families["etl_table_duration_seconds"][2].append(
+                _sample("etl_table_duration_seconds", labels, s.duration_s or 0))
+            families["etl_table_db_wait_seconds"][2].append(
+                _sample("etl_table_db_wait_seconds", labels, s.db_wait_s))
+            if s.rows is not None:
+                families["etl_table_rows"][2].append(_sample("etl_table_rows", labels, s.rows))
+                if s.duration_s:
+                    families["etl_table_rows_per_second"][2].append(
+                        _sample("etl_table_rows_per_second", labels, s.rows / s.duration_s))
+            if s.bytes is not None:
+                families["etl_table_bytes"][2].append(_sample("etl_table_bytes", labels, s.bytes))
+        elif s.kind == "statement":
+            stage = _stage_of(s)
+            statements.setdefault(stage, []).append(s.duration_s or 0)
+
+    for stage, durations in sorted(statements.items()):
+        labels = {**run, "stage": stage}
+        families["etl_statements"][2].append(_sample("etl_statements", labels, len(durations)))
+        families["etl_statement_duration_seconds_sum"][2].append(
+            _sample("etl_statement_duration_seconds_sum", labels, sum(durations)))
+
+    lines = []
+    for name, (kind, help_text, samples) in families.items():
+        if not samples:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+def _stage_of(s: Span) -> str:
+    while s is not None and s.kind != "stage":
+        s = s.parent
+    return s.name if s is not None else "none"
+
+
+def export(tracer: Tracer, metrics_dir: Path = None) -> Path:
+    metrics_dir = metrics_dir or METRICS_DIR
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+
+    spans = sorted(tracer.spans, key=lambda s: s._start)
+    with (metrics_dir / SPANS_FILE).open("a", encoding="utf-8") as f:
+        for s in spans:
+            f.write(json.dumps(s.to_dict(), default=str) + "\n")
+
+    prom = metrics_dir / PROM_FILE
+    tmp = prom.with_name(f"{prom.name}.{os.getpid()}.tmp")
+    tmp.write_text(prometheus_text(tracer), encoding="utf-8")
+    os.replace(tmp, prom)
+    return prom
+
+
+def finish_run(error: BaseException = None) -> Optional[Path]:
+    """Stop tracing and export the run. Returns the Prometheus file."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is None:
+        return None
+    _current.set(None)
+    tracer.close_stages()
+    tracer.root.finish(error)
+    try:
+        path = export(tracer)
+    except OSError as e:
+        log.warning(f"Could not export metrics of run {tracer.run_id}: {e}")
+        return None
+    log.info(f"Metrics of run {tracer.run_id}: {len(tracer.spans)} spans -> {METRICS_DIR}")
+    return path
+
+
+# --------------------------------------------------
+# CLI: serve the latest run, throughput across runs
+# --------------------------------------------------
+def serve(port: int, metrics_dir: Path):
+    prom = metrics_dir / PROM_FILE
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            try:
+                body = prom.read_bytes()
+            except OSError:
+                body = b""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            log.debug(fmt % args)
+
+    server = ThreadingHTTPServer(("", port), Handler)
+    log.info(f"Serving {prom} on http://localhost:{port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def trends(metrics_dir: Path, last: int) -> List[dict]:
+    """Per-run totals from spans.jsonl, oldest first."""
+    runs: Dict[str, dict] = {}
+    path = metrics_dir / SPANS_FILE
+    if not path.exists():
+        return []
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            s = json.loads(line)
+            run = runs.setdefault(s["run_id"], {"run_id": s["run_id"], "rows": 0, "bytes": 0,
+                                                "db_wait_s": 0.0, "statements": 0})
+            if s["kind"] == "run":
+                run.update(started_at=s["started_at"], duration_s=s["duration_s"], status=s["status"])
+                run["db_wait_s"] = s["db_wait_s"]
+            elif s["kind"] == "stage" and s["name"] == "bronze":
+                run["rows"] = s["rows"] or 0
+                run["bytes"] = s["bytes"] or 0
+                run["bronze_s"] = s["duration_s"]
+            elif s["kind"] == "statement":
+                run["statements"] += 1
+    rows = [r for r in runs.values() if "started_at" in r]
+    return sorted(rows, key=lambda r: r["started_at"])[-last:]
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(message)s",
+    )
+    p = argparse.ArgumentParser(description="Pipeline run metrics")
+    p.add_argument("--metrics-dir", type=Path, default=METRICS_DIR)
+    sub = p.add_subparsers(dest="command", required=True)
+    s = sub.add_parser("serve", help="Serve the latest run's metrics at /metrics")
+    s.add_argument("--port", type=int, default=int(os.getenv("METRICS_PORT", "9108")))
+    t = sub.add_parser("trends", help="Throughput of the recent runs")
+    t.add_argument("--last", type=int, default=20)
+    args = p.parse_args()
+
+    if args.command == "serve":
+        serve(args.port, args.metrics_dir)
+        return
+
+    print(f"{'run_id':<12}  {'started':<19}  {'status':<7}  {'seconds':>8}  {'db wait':>8}  "
+          f"{'stmts':>5}  {'bronze rows':>11}  {'rows/s':>9}  {'MB/s':>6}")
+    for r in trends(args.metrics_dir, args.last):
+        bronze_s = r.get("bronze_s") or 0
+        print(
+            f"{r['run_id']:<12}  {r['started_at'][:19]:<19}  {r['status']:<7}  "
+            f"{r['duration_s'] or 0:>8.2f}  {r['db_wait_s']:>8.2f}  {r['statements']:>5}  "
+            f"{r['rows']:>11}  {(r['rows'] / bronze_s if bronze_s else 0):>9.0f}  "
+            f"{(r['bytes'] / bronze_s / 1e6 if bronze_s else 0):>6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
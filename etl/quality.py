@@ -0,0 +1,397 @@
+"""Single-scan data quality checks for the Silver and Gold layers.
+
+Rules are declared once per table in RULES. For each table the engine
+builds ONE aggregate query that evaluates every rule in a single pass
+(count(*) FILTER (WHERE ...) per rule, plus anti-joins against the
+DISTINCT keys of referenced tables), and tables are checked in parallel.
+Only rules that find violations cost an extra query, to fetch a few
+sample keys.
+
+Rule kinds:
+- Condition(name, predicate)     row is invalid when the predicate is true
+- Unique(name, columns)          duplicate (or NULL) keys
+- Reference(name, columns, parent, parent_columns)
+                                 value has no match in the parent table
+
+These are the rules of tests/quality_checks_silver.sql and
+tests/quality_checks_gold.sql, which stay available for running by hand
+in psql.
+
+Usage:
+    python -m etl.quality                       # all tables, full report
+    python -m etl.quality --layer silver --fail-fast
+    python -m etl.quality --json quality_report.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence
+
+from dotenv import load_dotenv
+
+from etl import metrics
+from etl.db import pooled_conn, worker_capacity
+
+
+load_dotenv()
+
+log = logging.getLogger("quality")
+
+DEFAULT_SAMPLE_SIZE = 5
+
+
+class QualityCheckError(RuntimeError):
+    def __init__(self, results: List[dict]):
+        self.results = results
+        failed = [r for r in results if r["violations"]]
+        super().__init__(
+            f"{len(failed)} quality rule(s) failed: "
+            + "; ".join(f"{r['table']}.{r['rule']} ({r['violations']})" for r in failed)
+        )
+
+
+# --------------------------------------------------
+# Rule declarations
+# --------------------------------------------------
+class Condition:
+    """Rows for which `predicate` is true are violations."""
+
+    def __init__(self, name: str, predicate: str, description: str = ""):
+        self.name = name
+        self.predicate = predicate
+        self.description = description or predicate
+
+    def violation_sql(self, alias: str) -> str:
+        return f"({self.predicate})"
+
+
+class Unique:
+    """`columns` must be unique; NULL keys are violations unless allow_null.
+    With allow_null, NULL keys are grouped together as by GROUP BY (the
+    checks of tests/quality_checks_gold.sql), so a repeated NULL key is
+    still a duplicate."""
+
+    def __init__(self, name: str, columns: Sequence[str], allow_null: bool = False, description: str = ""):
+        self.name = name
+        self.columns = list(columns)
+        self.allow_null = allow_null
+        what = "duplicate" if allow_null else "duplicate or NULL"
+        self.description = description or f"{what} {', '.join(self.columns)}"
+
+    def _key(self, prefix: str = "") -> str:
+        cols = [f"{prefix}{col}" for col in self.columns]
+        return cols[0] if len(cols) == 1 else f"({', '.join(cols)})"
+
+    def _null(self, prefix: str = "") -> str:
+        return " OR ".join(f"{prefix}{col} IS NULL" for col in self.columns)
+
+    def aggregate_sql(self) -> str:
+        if self.allow_null:
+            # extra rows per GROUP BY group; ROW() keeps NULL keys as a group
+            return f"count(*) - count(DISTINCT ROW({', '.join('t.' + col for col in self.columns)}))"
+        # extra rows per duplicated key + rows with a NULL key part
+        not_null = " AND ".join(f"t.{col} IS NOT NULL" for col in self.columns)
+        dupes = (
+            f"count(*) FILTER (WHERE {not_null})"
+            f" - count(DISTINCT {self._key('t.')}) FILTER (WHERE {not_null})"
+        )
+        return f"{dupes} + count(*) FILTER (WHERE {self._null('t.')})"
+
+    def sample_sql(self, table: str, limit: int) -> str:
+        having = "count(*) > 1" if self.allow_null else f"count(*) > 1 OR {self._null()}"
+        cols = ", ".join(self.columns)
+        return f"SELECT {cols} FROM {table} GROUP BY {cols} HAVING {having} LIMIT {limit}"
+
+
+class Reference:
+    """Every `columns` value must exist as `parent_columns` in `parent`.
+    A NULL value counts as a violation, like the LEFT JOIN ... IS NULL checks."""
+
+    def __init__(self, name: str, columns: Sequence[str], parent: str,
+                 parent_columns: Optional[Sequence[str]] = None, description: str = ""):
+        self.name = name
+        self.columns = list(columns)
+        self.parent = parent
+        self.parent_columns = list(parent_columns or columns)
+        self.description = description or f"orphan {', '.join(self.columns)} (not in {parent})"
+
+    def join_sql(self, alias: str) -> str:
+        # DISTINCT keeps the join from multiplying rows of the checked table
+        select = ", ".join(f"{col} AS k{i}" for i, col in enumerate(self.parent_columns))
+        on = " AND ".join(f"{alias}.k{i} = t.{col}" for i, col in enumerate(self.columns))
+        return f"LEFT JOIN (SELECT DISTINCT {select} FROM {self.parent}) {alias} ON {on}"
+
+    def violation_sql(self, alias: str) -> str:
+        return f"{alias}.k0 IS NULL"
+
+
+class TableRules:
+    def __init__(self, table: str, key: Sequence[str], rules: list):
+        self.table = table
+        self.key = list(key)
+        self.rules = rules
+
+    def parents(self) -> List[str]:
+        return sorted({rule.parent for rule in self.rules if isinstance(rule, Reference)})
+
+    def _aliases(self) -> Dict[str, str]:
+        refs = [rule for rule in self.rules if isinstance(rule, Reference)]
+        return {rule.name: f"r{i}" for i, rule in enumerate(refs)}
+
+    def _from_sql(self) -> str:
+        aliases = self._aliases()
+        joins = [
+            rule.join_sql(aliases[rule.name])
+            for rule in self.rules if isinstance(rule, Reference)
+        ]
+        return "\n".join([f"FROM {self.table} t"] + joins)
+
+    def scan_sql(self) -> str:
+        """One aggregate query evaluating every rule of the table."""
+        aliases = self._aliases()
+        columns = ["count(*) AS total_rows"]
+        for rule in self.rules:
+            if isinstance(rule, Unique):
+                columns.append(f"{rule.aggregate_sql()} AS \"{rule.name}\"")
+            else:
+                columns.append(
+                    f"count(*) FILTER (WHERE {rule.violation_sql(aliases.get(rule.name, ''))}) AS \"{rule.name}\""
+                )
+        return "SELECT\n    " + ",\n    ".join(columns) + "\n" + self._from_sql()
+
+    def sample_sql(self, rule, limit: int) -> str:
+        if isinstance(rule, Unique):
+            return rule.sample_sql(self.table, limit)
+        alias = self._aliases().get(rule.name, "")
+        cols = [f"t.{col}" for col in self.key]
+        if isinstance(rule, Reference):
+            cols += [f"t.{col}" for col in rule.columns if col not in self.key]
+        return (
+            f"SELECT {', '.join(cols)}\n{self._from_sql()}\n"
+            f"WHERE {rule.violation_sql(alias)}\nLIMIT {limit}"
+        )
+
+
+DATE_RANGE = "{col} IS NOT NULL AND ({col} < DATE '1900-01-01' OR {col} > DATE '2050-01-01')"
+
+RULES = [
+    # ---------------- Silver ----------------
+    TableRules("silver.crm_cust_info", ["cst_id"], [
+        Unique("cst_id_unique", ["cst_id"]),
+        Condition("cst_key_spaces", "cst_key <> TRIM(cst_key)", "unwanted spaces in cst_key"),
+    ]),
+    TableRules("silver.crm_prd_info", ["prd_id"], [
+        Unique("prd_id_unique", ["prd_id"]),
+        Condition("prd_nm_spaces", "prd_nm <> TRIM(prd_nm)", "unwanted spaces in prd_nm"),
+        Condition("prd_cost_invalid", "prd_cost < 0 OR prd_cost IS NULL", "negative or NULL prd_cost"),
+        Condition("prd_dates_order", "prd_end_dt < prd_start_dt", "prd_end_dt < prd_start_dt"),
+    ]),
+    TableRules("silver.crm_sales_details", ["sls_ord_num", "sls_prd_key"], [
+        Condition(
+            "sls_dates_range",
+            " OR ".join(f"({DATE_RANGE.format(col=col)})" for col in ("sls_order_dt", "sls_ship_dt", "sls_due_dt")),
+            "invalid or out-of-range dates",
+        ),
+        Condition(
+            "sls_dates_order",
+            "(sls_ship_dt IS NOT NULL AND sls_order_dt > sls_ship_dt)"
+            " OR (sls_due_dt IS NOT NULL AND sls_order_dt > sls_due_dt)",
+            "order date after ship/due date",
+        ),
+        Condition(
+            "sls_sales_consistency",
+            "sls_sales <> sls_quantity * sls_price OR sls_sales IS NULL OR sls_quantity IS NULL"
+            " OR sls_price IS NULL OR sls_sales <= 0 OR sls_quantity <= 0 OR sls_price <= 0",
+            "sales <> quantity * price, or NULL/non-positive values",
+        ),
+    ]),
+    TableRules("silver.erp_cust_info", ["cid"], [
+        Condition("bdate_range", "bdate < DATE '1924-01-01' OR bdate > CURRENT_DATE", "out-of-range bdate"),
+    ]),
+    TableRules("silver.erp_px_cat_info", ["id"], [
+        Condition(
+            "cat_spaces",
+            "cat <> TRIM(cat) OR subcat <> TRIM(subcat) OR maintenance <> TRIM(maintenance)",
+            "unwanted spaces in cat/subcat/maintenance",
+        ),
+    ]),
+    TableRules("silver.marketing_salesperson", ["salesperson_id"], [
+        Unique("salesperson_id_unique", ["salesperson_id"]),
+        Condition(
+            "salesperson_spaces",
+            "name <> TRIM(name) OR region <> TRIM(region) OR email <> TRIM(email)",
+            "unwanted spaces in name/region/email",
+        ),
+    ]),
+    TableRules("silver.marketing_discount_info", ["discount_id"], [
+        Unique("discount_id_unique", ["discount_id"]),
+        Condition("percent_range", "percent < 0 OR percent > 100 OR percent IS NULL", "percent outside 0-100 or NULL"),
+    ]),
+    TableRules("silver.marketing_salesperson_sales", ["sls_ord_num"], [
+        Reference("salesperson_exists", ["salesperson_id"], "silver.marketing_salesperson"),
+        Reference("order_exists", ["sls_ord_num"], "silver.crm_sales_details"),
+    ]),
+    TableRules("silver.marketing_sales_discount", ["sls_ord_num"], [
+        Reference("discount_exists", ["discount_id"], "silver.marketing_discount_info"),
+        Reference("order_exists", ["sls_ord_num"], "silver.crm_sales_details"),
+    ]),
+    # ---------------- Gold ----------------
+    TableRules("gold.dim_customers", ["customer_id"], [
+        Unique("customer_key_unique", ["customer_key"], allow_null=True),
+    ]),
+    TableRules("gold.dim_products", ["product_number"], [
+        Unique("product_key_unique", ["product_key"], allow_null=True),
+    ]),
+    TableRules("gold.dim_salesperson", ["salesperson_id"], [
+        Unique("salesperson_key_unique", ["salesperson_key"], allow_null=True),
+    ]),
+    TableRules("gold.dim_discount", ["discount_id"], [
+        Unique("discount_key_unique", ["discount_key"], allow_null=True),
+    ]),
+    TableRules("gold.fact_sales", ["order_number", "product_key"], [
+        Reference("customer_key_exists", ["customer_key"], "gold.dim_customers"),
+        Reference("product_key_exists", ["product_key"], "gold.dim_products"),
+    ]),
+]
+
+
+def rules_for(layer: str = None, tables: Sequence[str] = None) -> List[TableRules]:
+    selected = [
+        t for t in RULES
+        if (layer is None or t.table.startswith(f"{layer}."))
+        and (tables is None or t.table in tables)
+    ]
+    if tables is not None:
+        unknown = set(tables) - {t.table for t in selected}
+        if unknown:
+            raise KeyError(f"No quality rules declared for {sorted(unknown)}")
+    return selected
+
+
+# --------------------------------------------------
+# Engine
+# --------------------------------------------------
+def check_table(table_rules: TableRules, sample_size: int = DEFAULT_SAMPLE_SIZE) -> List[dict]:
+    """Evaluate all rules of one table in a single scan; one result per rule."""
+    with pooled_conn() as conn:
+        with conn.cursor() as cur:
+            with metrics.db_wait():
+                cur.execute(table_rules.scan_sql())
+                row = cur.fetchone()
+            names = [col.name for col in cur.description]
+            counts = dict(zip(names, row))
+            metrics.current_span().add(rows=counts["total_rows"])
+
+            results = []
+            for rule in table_rules.rules:
+                violations = counts[rule.name]
+                samples = []
+                if violations:
+                    with metrics.db_wait():
+                        cur.execute(table_rules.sample_sql(rule, sample_size))
+                    samples = [list(r) if len(r) > 1 else r[0] for r in cur.fetchall()]
+                results.append({
+                    "table": table_rules.table,
+                    "rule": rule.name,
+                    "description": rule.description,
+                    "rows": counts["total_rows"],
+                    "violations": violations,
+                    "sample_keys": samples,
+                })
+        conn.rollback()
+    for r in results:
+        if r["violations"]:
+            log.error(
+                f">> [{r['table']}] {r['rule']}: {r['violations']} violation(s) "
+                f"({r['description']}), e.g. {r['sample_keys']}"
+            )
+    log.info(f">> [{table_rules.table}] {len(results)} rule(s) checked in one scan")
+    return results
+
+
+def assert_table(table: str, sample_size: int = DEFAULT_SAMPLE_SIZE) -> List[dict]:
+    """check_table() for one table name; raises QualityCheckError on violations."""
+    (table_rules,) = rules_for(tables=[table])
+    results = check_table(table_rules, sample_size)
+    if any(r["violations"] for r in results):
+        raise QualityCheckError(results)
+    return results
+
+
+def run_checks(
+    layer: str = None,
+    tables: Sequence[str] = None,
+    workers: int = None,
+    fail_fast: bool = False,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+) -> List[dict]:
+    """Check tables in parallel and return every rule result.
+
+    With fail_fast, the first table with a violation cancels the tables not
+    yet started and raises QualityCheckError.
+    """
+    selected = rules_for(layer, tables)
+    if workers is None:
+        workers = int(os.getenv("QUALITY_WORKERS", "4"))
+    workers = max(1, min(workers, len(selected) or 1, worker_capacity()))
+
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(check_table, t, sample_size): t.table for t in selected}
+        for future in as_completed(futures):
+            table_results = future.result()
+            results.extend(table_results)
+            if fail_fast and any(r["violations"] for r in table_results):
+                for pending in futures:
+                    pending.cancel()
+                raise QualityCheckError(table_results)
+
+    order = {t.table: i for i, t in enumerate(selected)}
+    results.sort(key=lambda r: order[r["table"]])
+    return results
+
+
+def print_report(results: List[dict]):
+    width = max((len(f"{r['table']}.{r['rule']}") for r in results), default=10)
+    for r in results:
+        status = "FAIL" if r["violations"] else "ok"
+        line = f"{status:<4}  {r['table'] + '.' + r['rule']:<{width}}  {r['violations']:>8} / {r['rows']}"
+        if r["violations"]:
+            line += f"  {r['description']}; sample: {r['sample_keys']}"
+        print(line)
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+    )
+    p = argparse.ArgumentParser(description="Run the Silver/Gold quality rules")
+    p.add_argument("--layer", choices=["silver", "gold"], help="Only check this layer")
+    p.add_argument("--table", action="append", help="Only check this table (repeatable)")
+    p.add_argument("--fail-fast", action="store_true", help="Stop at the first table with violations")
+    p.add_argument("--workers", type=int, help="Tables checked in parallel (default QUALITY_WORKERS or 4)")
+    p.add_argument("--samples", type=int, default=DEFAULT_SAMPLE_SIZE, help="Sample keys per failed rule")
+    p.add_argument("--json", help="Write the report to this JSON file")
+    args = p.parse_args()
+
+    try:
+        results = run_checks(args.layer, args.table, args.workers, args.fail_fast, args.samples)
+    except QualityCheckError as e:
+        results = e.results
+        print_report(results)
+        sys.exit(1)
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, default=str)
+    if any(r["violations"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
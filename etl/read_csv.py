@@ -1,7 +1,174 @@
+"""Streaming CSV readers for the source files.
+
+Three ways to consume a file, all with bounded memory:
+
+- iter_rows(path)            one dict per row (str values)
+- iter_chunks(path, n)       lists of up to n row dicts
+- iter_batches(path, table)  typed pandas DataFrames of up to n rows,
+                             typed by the bronze schema in etl.schema
+- open_arrow_csv(path, table)
+                             streaming reader of typed Arrow record
+                             batches (pyarrow's multi-threaded parser)
+
+All readers accept `columns=[...]` to project only the needed columns.
+Column names are lower-cased, so upper-case ERP headers read the same as
+the bronze column names.
+"""
 import csv
+from itertools import islice
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from etl.schema import get_schema
+
+DEFAULT_CHUNK_SIZE = 50_000
+ARROW_BLOCK_SIZE = 4 * 1024 * 1024
+
+ARROW_TYPES = {
+    "int": pa.int32(),
+    "text": pa.string(),
+    "date": pa.date32(),
+    "timestamp": pa.timestamp("us"),
+}
+
+
+def read_header(csv_path: Path) -> List[str]:
+    with csv_path.open("r", newline="", encoding="utf-8-sig") as f:
+        header = next(csv.reader(f), None)
+    if header is None:
+        raise ValueError(f"CSV has no header: {csv_path}")
+    return [col.strip().lower() for col in header]
+
+
+def _column_positions(header: List[str], columns: Optional[Sequence[str]], csv_path: Path):
+    if columns is None:
+        return list(range(len(header))), header
+    names = [col.lower() for col in columns]
+    missing = [col for col in names if col not in header]
+    if missing:
+        raise ValueError(f"Columns {missing} not found in {csv_path}")
+    return [header.index(col) for col in names], names
+
+
+def iter_rows(csv_path: Path, columns: Optional[Sequence[str]] = None) -> Iterator[Dict[str, str]]:
+    """Yield one dict per data row; missing trailing fields read as ""."""
+    with csv_path.open("r", newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        header = [col.strip().lower() for col in header]
+        positions, names = _column_positions(header, columns, csv_path)
+
+        for row in reader:
+            if not row:
+                continue
+            width = len(row)
+            yield {
+                name: (row[pos] if pos < width else "")
+                for name, pos in zip(names, positions)
+            }
+
+
+def iter_chunks(
+    csv_path: Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    columns: Optional[Sequence[str]] = None,
+) -> Iterator[List[Dict[str, str]]]:
+    """Yield lists of at most `chunk_size` row dicts."""
+    rows = iter_rows(csv_path, columns)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _apply_types(frame: pd.DataFrame, types: Dict[str, str]) -> pd.DataFrame:
+    for col in frame.columns:
+        kind = types.get(col, "text")
+        if kind == "int":
+            values = pd.to_numeric(frame[col], errors="coerce")
+            # non-integral numbers are invalid for an INT column
+            frame[col] = values.where(values.isna() | (values % 1 == 0)).astype("Int64")
+        elif kind == "date":
+            frame[col] = pd.to_datetime(frame[col], format="%Y-%m-%d", errors="coerce")
+        elif kind == "timestamp":
+            frame[col] = pd.to_datetime(frame[col], format="ISO8601", errors="coerce")
+    return frame
+
+
+def iter_batches(
+    csv_path: Path,
+    table: str,
+    batch_size: int = DEFAULT_CHUNK_SIZE,
+    columns: Optional[Sequence[str]] = None,
+    typed: bool = True,
+) -> Iterator[pd.DataFrame]:
+    """Yield typed columnar batches of at most `batch_size` rows.
+
+    Types come from the bronze schema of `table`: "int" columns become
+    nullable Int64, "date"/"timestamp" become datetime64, "text" stays str.
+    Values that do not parse become NA. With `typed=False` every column is
+    returned as the raw text, with "" for empty fields.
+    """
+    types = dict(get_schema(table))
+    header = read_header(csv_path)
+    positions, names = _column_positions(header, columns, csv_path)
+
+    reader = pd.read_csv(
+        csv_path,
+        header=0,
+        names=header,
+        usecols=positions,
+        dtype=str,
+        keep_default_na=False,
+        na_values=[""],
+        chunksize=batch_size,
+        encoding="utf-8-sig",
+    )
+    with reader:
+        for frame in reader:
+            if columns is not None:
+                frame = frame[names].copy()
+            if typed:
+                yield _apply_types(frame, types)
+            else:
+                yield frame.fillna("")
+
+
+def arrow_schema(table: str, columns: Sequence[str]) -> pa.Schema:
+    types = dict(get_schema(table))
+    return pa.schema([(col, ARROW_TYPES[types.get(col, "text")]) for col in columns])
+
+
+def open_arrow_csv(csv_path: Path, table: str, block_size: int = ARROW_BLOCK_SIZE):
+    """Streaming reader of Arrow record batches typed by the bronze schema.
+
+    Empty fields follow COPY's CSV rules: unquoted empty is NULL, quoted
+    empty ("") is an empty string. A value that does not parse as its
+    column type raises pyarrow.ArrowInvalid while reading.
+    """
+    columns = read_header(csv_path)
+    return pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(
+            column_names=columns, skip_rows=1, block_size=block_size,
+        ),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=arrow_schema(table, columns),
+            null_values=[""],
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+
 
 def read_csv_as_records(csv_path: Path):
-    with csv_path.open("r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return list(reader)
+    """Materialize every row as a dict. Prefer the iterators above for
+    large files; this keeps the whole file in memory."""
+    return list(iter_rows(csv_path))
@@ -1,9 +1,24 @@
 import os
+import re
+import uuid
 import logging
+from pathlib import Path
 from dotenv import load_dotenv
-from etl.load_bronze import main as load_bronze
+from etl import extract, indexes, metrics, shadow, silver_engine
+from etl.dag import DagError, Node, run_dag, summary
+from etl.db import execute_prepared, pooled_conn, release_script_conn, worker_capacity
+from etl.load_bronze import TABLES as BRONZE_TABLES, load_table, main as load_bronze, sources
 from etl.load_silver import main as load_silver
-from etl.utils.sql import run_sql_file
+from etl.load_gold import main as load_gold
+from etl.quality import RULES, assert_table, run_checks
+from etl.utils import profiling
+from etl.utils.deploy import deploy_sql_file, is_deployed, record_deployment
+from etl.utils.sql import (
+    run_sql_file,
+    run_statements,
+    split_sql_file,
+    tables_exist,
+)
 
 
 load_dotenv()
@@ -12,19 +27,363 @@ logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s | %(levelname)s | %(name)s | %(message)s"
 )
+log = logging.getLogger("pipeline")
+
+BRONZE_TABLE_NAMES = [table for table, _ in BRONZE_TABLES]
+SILVER_TABLE_NAMES = [t.replace("bronze.", "silver.", 1) for t in BRONZE_TABLE_NAMES]
+
+# Silver tables the materialized gold key maps are built from
+KEY_MAP_SOURCES = [
+    "silver.crm_cust_info",
+    "silver.crm_prd_info",
+    "silver.marketing_salesperson",
+    "silver.marketing_discount_info",
+]
+
+GOLD_VIEW_DDL = "scripts/gold/ddl_gold.sql"
+GOLD_AGGREGATES_DDL = "scripts/gold/ddl_gold_aggregates.sql"
+PARTITION_PROCS = "scripts/proc_partitions.sql"
+CHANGE_DETECTION_PROCS = "scripts/proc_change_detection.sql"
 
-def main():
-    run_sql_file("scripts/bronze/ddl_bronze.sql")
+OBJECT_REF = re.compile(r"\b(?:silver|gold)\.\w+")
+
+
+# --------------------------------------------------
+# Sequential stages (used by etl.benchmark)
+# --------------------------------------------------
+def run_bronze():
+    # incremental runs keep existing tables (and their watermarks)
+    if os.getenv("BRONZE_MODE", "full") != "incremental" or not tables_exist(
+        BRONZE_TABLE_NAMES + ["meta.bronze_file_state"]
+    ):
+        deploy_sql_file("scripts/bronze/ddl_bronze.sql")
     load_bronze()
 
-    # silver
-    run_sql_file("scripts/silver/ddl_silver.sql")
+
+def run_silver():
+    # incremental runs merge into the existing tables
+    if os.getenv("SILVER_MODE", "full") != "incremental" or not tables_exist(
+        SILVER_TABLE_NAMES
+    ):
+        deploy_sql_file("scripts/silver/ddl_silver.sql")
     load_silver()
-    run_sql_file("tests/quality_checks_silver.sql")
-    
-    # gold
-    run_sql_file("scripts/gold/ddl_gold.sql")
-    run_sql_file("tests/quality_checks_gold.sql")
+
+
+def check_silver():
+    run_checks("silver", fail_fast=True)
+
+
+def run_gold():
+    # views, or materialized views refreshed concurrently
+    load_gold()
+
+
+def check_gold():
+    run_checks("gold", fail_fast=True)
+
+
+# Pipeline stages in run order
+STAGES = [
+    ("bronze", run_bronze),
+    ("silver", run_silver),
+    ("silver_checks", check_silver),
+    ("gold", run_gold),
+    ("gold_checks", check_gold),
+]
+
+
+# --------------------------------------------------
+# DAG: one node per table, check and gold object
+# --------------------------------------------------
+def _refs(sql: str, exclude: str = None) -> set:
+    """Schema-qualified silver/gold objects referenced by a statement."""
+    return {ref for ref in OBJECT_REF.findall(sql) if ref != exclude}
+
+
+def _indexed(deps) -> list:
+    """`deps` with each silver table replaced by its post-load index node,
+    for nodes that query the table rather than only define views on it."""
+    return [f"index.{dep}" if dep in SILVER_TABLE_NAMES else dep for dep in deps]
+
+
+def _checks(deps) -> list:
+    """Quality check nodes of the silver tables in `deps`: gold built on a
+    table waits for its checks and is skipped when one fails."""
+    checked = {t.table for t in RULES}
+    return [f"check.{dep}" for dep in sorted(deps) if dep in SILVER_TABLE_NAMES and dep in checked]
+
+
+def _sql_node(name: str, statements, source: str, deps, table: str = None) -> Node:
+    return Node(name, lambda: run_statements(statements, source, table), deps)
+
+
+def swapped_tables(layer: str, mode: str) -> list:
+    """Tables of `layer` whose load swaps a shadow in (etl.shadow). The swap
+    re-creates the views on the table, so DDL creating views on it waits
+    for the load."""
+    if mode != "full" or shadow.strategy() != "swap":
+        return []
+    if layer == "bronze":
+        return list(BRONZE_TABLE_NAMES)
+    return [t for t in SILVER_TABLE_NAMES if silver_engine.TABLES_BY_NAME[t].key is None]
+
+
+def bronze_nodes(mode: str, data_dir: Path) -> list:
+    def ddl():
+        if mode != "incremental" or not tables_exist(
+            BRONZE_TABLE_NAMES + ["meta.bronze_file_state", "meta.bronze_shard_state"]
+        ):
+            deploy_sql_file("scripts/bronze/ddl_bronze.sql")
+        deploy_sql_file(shadow.PROCEDURES)
+
+    nodes = [Node("ddl.bronze", ddl)]
+    for table, csv_path in sources(data_dir):
+        nodes.append(Node(
+            table,
+            lambda table=table, csv_path=csv_path: load_table(table, csv_path, mode),
+            ["ddl.bronze"],
+        ))
+    return nodes
+
+
+def silver_nodes(mode: str, bronze_mode: str = "full") -> list:
+    def ddl():
+        if mode != "incremental" or not tables_exist(SILVER_TABLE_NAMES):
+            deploy_sql_file("scripts/silver/ddl_silver.sql")
+
+    def procedures():
+        deploy_sql_file(PARTITION_PROCS)
+        deploy_sql_file(CHANGE_DETECTION_PROCS)
+        deploy_sql_file("scripts/silver/proc_load_silver.sql")
+        deploy_sql_file("scripts/silver/proc_load_silver_incremental.sql")
+
+    suffix = "_incremental" if mode == "incremental" else ""
+    # ddl.silver waits for ddl.bronze: both create the meta schema
+    nodes = [
+        Node("ddl.silver", ddl, ["ddl.bronze"]),
+        # proc_load_silver.sql creates the silver.<table>_source views on bronze
+        Node("procs.silver", procedures, ["ddl.silver"] + swapped_tables("bronze", bronze_mode)),
+    ]
+    # the Python engine and shadow loads replace the full-load procedures only
+    python_engine = mode == "full" and silver_engine.engine() == "python"
+    swapped = swapped_tables("silver", mode)
+    for bronze_table, silver_table in zip(BRONZE_TABLE_NAMES, SILVER_TABLE_NAMES):
+        deps = [bronze_table, "procs.silver"]
+        if silver_table in swapped:
+            nodes.append(Node(silver_table, lambda t=silver_table: shadow.load_silver_table(t), deps))
+            continue
+        if python_engine:
+            nodes.append(Node(silver_table, lambda t=silver_table: silver_engine.load_table(t), deps))
+            continue
+        call = f"CALL silver.load_{silver_table.split('.', 1)[1]}{suffix}();"
+        nodes.append(_sql_node(silver_table, [call], silver_table, deps, silver_table))
+    # declared indexes are built after the load, then stale statistics refreshed
+    for silver_table in SILVER_TABLE_NAMES:
+        nodes.append(Node(f"index.{silver_table}", lambda t=silver_table: indexes.post_load(t), [silver_table]))
+    return nodes
+
+
+def gold_nodes(mode: str, silver_mode: str = "full") -> list:
+    # Object dependencies are read from the view definitions, which the
+    # materialized variant mirrors.
+    statements = split_sql_file(GOLD_VIEW_DDL)
+    swapped = swapped_tables("silver", silver_mode)
+    views = {}
+    for stmt in statements:
+        match = re.search(r"CREATE\s+VIEW\s+(gold\.\w+)", stmt, re.IGNORECASE)
+        if match:
+            views[match.group(1)] = stmt
+
+    if mode == "view":
+        # ddl_gold.sql runs one view per node; ddl.gold decides whether it
+        # needs deploying and ddl.gold.record records it once all views exist
+        deploy = {}
+
+        def prelude_node(prelude):
+            deploy["needed"] = not is_deployed(GOLD_VIEW_DDL)
+            if deploy["needed"]:
+                log.info(f"Deploying SQL file: {GOLD_VIEW_DDL} (one view per node)")
+                run_statements(prelude, "ddl_gold.sql")
+            else:
+                log.info(f"Skipping {GOLD_VIEW_DDL}: script and objects unchanged")
+
+        def view_node(stmt):
+            if deploy["needed"]:
+                run_statements([stmt], "ddl_gold.sql")
+
+        def record_node():
+            if deploy["needed"]:
+                record_deployment(GOLD_VIEW_DDL)
+
+        prelude = [stmt for stmt in statements if not re.search(r"CREATE\s+VIEW", stmt, re.IGNORECASE)]
+        nodes = [Node("ddl.gold", lambda: prelude_node(prelude), ["ddl.silver"] + swapped)]
+        for name, stmt in views.items():
+            refs = sorted(_refs(stmt, name))
+            nodes.append(Node(name, lambda stmt=stmt: view_node(stmt), ["ddl.gold"] + refs + _checks(refs)))
+        nodes.append(Node("ddl.gold.record", record_node, list(views)))
+        return nodes + aggregate_nodes(["ddl.gold.record"])
+
+    def deploy():
+        # when changed or missing (e.g. dropped by a silver DDL cascade)
+        deploy_sql_file("scripts/gold/ddl_gold_materialized.sql")
+
+    # ddl_gold_materialized.sql registers the fact in meta.partition_refresh_target
+    # and dim_customers in meta.dimension_change_target
+    nodes = [
+        Node("ddl.gold", deploy, ["ddl.silver", "procs.silver"] + swapped),
+        _sql_node("gold.key_maps", ["CALL gold.sync_key_maps();"], "gold.key_maps",
+                  ["ddl.gold"] + _indexed(KEY_MAP_SOURCES) + _checks(KEY_MAP_SOURCES)),
+    ]
+    for name, stmt in views.items():
+        call = f"CALL gold.refresh_object('{name.split('.', 1)[1]}');"
+        refs = sorted(_refs(stmt, name))
+        nodes.append(_sql_node(name, [call], name, ["gold.key_maps"] + _indexed(refs) + _checks(refs), name))
+    return nodes + aggregate_nodes(["ddl.gold"])
+
+
+def aggregate_nodes(deps) -> list:
+    """Deploy and refresh the gold sales rollups once the dimensions they
+    group by are in place; the refresh waits for every object its row
+    source reads."""
+    view = re.compile(r"CREATE\s+(?:OR\s+REPLACE\s+)?VIEW", re.IGNORECASE)
+    # from CREATE on: the script header (same statement) names other objects
+    source = next(
+        stmt[match.start():] for stmt in split_sql_file(GOLD_AGGREGATES_DDL)
+        for match in [view.search(stmt)] if match
+    )
+    refs = sorted(_refs(source, "gold.sales_aggregate_source"))
+    return [
+        Node("ddl.gold.aggregates", lambda: deploy_sql_file(GOLD_AGGREGATES_DDL), deps + ["procs.silver"]),
+        _sql_node("gold.aggregates", ["CALL gold.refresh_aggregates();"], "gold.aggregates",
+                  ["ddl.gold.aggregates"] + _indexed(refs) + _checks(refs)),
+    ]
+
+
+def check_nodes(layer: str) -> list:
+    """One node per table of etl.quality.RULES; all rules of the table run
+    in one scan and the node fails with the table's full report."""
+    return [
+        Node(f"check.{t.table}", lambda table=t.table: assert_table(table), [t.table] + t.parents())
+        for t in RULES if t.table.startswith(f"{layer}.")
+    ]
+
+
+def build_nodes(data_dir: Path = None) -> list:
+    if data_dir is None:
+        data_dir = Path(os.getenv("DATA_DIR", "./datasets"))
+    bronze_mode = os.getenv("BRONZE_MODE", "full")
+    silver_mode = os.getenv("SILVER_MODE", "full")
+    gold_mode = os.getenv("GOLD_MODE", "view")
+    if bronze_mode not in ("full", "incremental"):
+        raise ValueError(f"Unknown bronze load mode: {bronze_mode}")
+    if silver_mode not in ("full", "incremental"):
+        raise ValueError(f"Unknown silver load mode: {silver_mode}")
+    if gold_mode not in ("view", "materialized"):
+        raise ValueError(f"Unknown gold mode: {gold_mode}")
+
+    return (
+        bronze_nodes(bronze_mode, data_dir)
+        + silver_nodes(silver_mode, bronze_mode)
+        + check_nodes("silver")
+        + gold_nodes(gold_mode, silver_mode)
+        + check_nodes("gold")
+    )
+
+
+def node_stage(name: str) -> str:
+    """Metrics stage of a DAG node."""
+    if name.startswith("check."):
+        return "quality"
+    if name.startswith(("ddl.", "procs.")):
+        return "ddl"
+    return name.split(".", 1)[0]
+
+
+def traced(node: Node) -> Node:
+    """Run the node inside a metrics span under its stage."""
+    fn, stage = node.fn, node_stage(node.name)
+    kind = "task" if stage == "ddl" else "table"
+
+    def run():
+        with metrics.span(node.name, kind, stage=stage):
+            fn()
+
+    node.fn = run
+    return node
+
+
+def record_run(run_id: str, nodes: list):
+    """Store each node's status and timings in meta.pipeline_node_run."""
+    try:
+        with pooled_conn() as conn:
+            with conn:
+                with conn.cursor() as cur:
+                    for n in nodes:
+                        execute_prepared(
+                            cur,
+                            "pipeline_record_node",
+                            """
+                            INSERT INTO meta.pipeline_node_run
+                                (run_id, node_name, status, started_at, finished_at, duration_s, error)
+                            VALUES (%s, %s, %s, %s, %s, %s, %s)
+                            """,
+                            (run_id, n.name, n.status, n.started_at, n.finished_at, n.duration_s, n.error),
+                        )
+    except Exception as e:
+        log.warning(f"Could not record run {run_id}: {e}")
+
+
+def gold_succeeded(nodes) -> bool:
+    """Whether every gold deploy and refresh node of the run succeeded."""
+    return all(
+        node.status == "success"
+        for node in nodes
+        if node.name.startswith(("gold.", "ddl.gold"))
+    )
+
+
+def main(workers: int = None):
+    if workers is None:
+        workers = int(os.getenv("PIPELINE_WORKERS", "4"))
+    pool_size = worker_capacity()
+    if workers > pool_size:
+        log.warning(
+            f"PIPELINE_WORKERS={workers} exceeds the {pool_size} pooled connections "
+            f"available to workers; using {pool_size} workers"
+        )
+        workers = pool_size
+
+    # meta tables (idempotent); run before any node so they never race
+    run_sql_file("scripts/init_database.sql")
+
+    run_id = uuid.uuid4().hex[:12]
+    nodes = [traced(node) for node in build_nodes()]
+    log.info(f"Pipeline run {run_id}")
+    profiling.start_run(run_id)
+    metrics.start_run(run_id)
+    error = None
+    try:
+        run_dag(nodes, workers)
+    except DagError as e:
+        error = e
+        log.error(f"Pipeline run {run_id} failed: {e}")
+        raise
+    finally:
+        log.info("Node summary:\n" + summary(nodes))
+        record_run(run_id, nodes)
+        # gold extracts are cached by this version (etl.extract); only a
+        # complete gold refresh is recorded
+        if gold_succeeded(nodes):
+            extract.record_version(run_id)
+        else:
+            log.warning("Gold did not complete; gold data version not recorded")
+            extract.forget_version()
+        if profiling.current() is not None:
+            with pooled_conn() as conn:
+                profiling.finish_run(conn)
+        metrics.finish_run(error)
+        silver_engine.shutdown()
+        release_script_conn()
 
 if __name__ == "__main__":
     main()
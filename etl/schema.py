@@ -0,0 +1,87 @@
+"""Column schemas of the bronze sources.
+
+Each entry lists the source columns in CSV order with the type of the
+matching bronze column (see scripts/bronze/ddl_bronze.sql):
+
+- "int"       -> INT
+- "text"      -> TEXT
+- "date"      -> DATE       (YYYY-MM-DD)
+- "timestamp" -> TIMESTAMP  (YYYY-MM-DD[ HH:MM:SS])
+
+Column names are the lower-case bronze names; CSV headers are matched
+case-insensitively (the ERP files use upper-case headers).
+"""
+
+SOURCE_SCHEMAS = {
+    "bronze.crm_cust_info": [
+        ("cst_id", "int"),
+        ("cst_key", "text"),
+        ("cst_firstname", "text"),
+        ("cst_lastname", "text"),
+        ("cst_marital_status", "text"),
+        ("cst_gndr", "text"),
+        ("cst_create_date", "date"),
+    ],
+    "bronze.crm_prd_info": [
+        ("prd_id", "int"),
+        ("prd_key", "text"),
+        ("prd_nm", "text"),
+        ("prd_cost", "int"),
+        ("prd_line", "text"),
+        ("prd_start_dt", "timestamp"),
+        ("prd_end_dt", "timestamp"),
+    ],
+    "bronze.crm_sales_details": [
+        ("sls_ord_num", "text"),
+        ("sls_prd_key", "text"),
+        ("sls_cust_id", "int"),
+        ("sls_order_dt", "int"),
+        ("sls_ship_dt", "int"),
+        ("sls_due_dt", "int"),
+        ("sls_sales", "int"),
+        ("sls_quantity", "int"),
+        ("sls_price", "int"),
+    ],
+    "bronze.erp_loc_info": [
+        ("cid", "text"),
+        ("cntry", "text"),
+    ],
+    "bronze.erp_cust_info": [
+        ("cid", "text"),
+        ("bdate", "date"),
+        ("gen", "text"),
+    ],
+    "bronze.erp_px_cat_info": [
+        ("id", "text"),
+        ("cat", "text"),
+        ("subcat", "text"),
+        ("maintenance", "text"),
+    ],
+    "bronze.marketing_discount_info": [
+        ("discount_id", "text"),
+        ("description", "text"),
+        ("percent", "int"),
+        ("active", "text"),
+    ],
+    "bronze.marketing_salesperson": [
+        ("salesperson_id", "text"),
+        ("name", "text"),
+        ("region", "text"),
+        ("email", "text"),
+    ],
+    "bronze.marketing_salesperson_sales": [
+        ("salesperson_id", "text"),
+        ("sls_ord_num", "text"),
+    ],
+    "bronze.marketing_sales_discount": [
+        ("discount_id", "text"),
+        ("sls_ord_num", "text"),
+    ],
+}
+
+
+def get_schema(table: str):
+    try:
+        return SOURCE_SCHEMAS[table]
+    except KeyError:
+        raise KeyError(f"No source schema defined for {table}") from None
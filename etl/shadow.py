@@ -0,0 +1,194 @@
+"""Shadow-table full loads (FULL_LOAD=swap).
+
+A full load normally TRUNCATEs the live table and refills it in one
+transaction. TRUNCATE holds an ACCESS EXCLUSIVE lock until the load
+commits, so readers of the table, and of the gold views on it, wait for
+the whole load. With FULL_LOAD=swap the rows go into an UNLOGGED
+<table>_shadow instead (scripts/proc_shadow_swap.sql), which is then made
+durable, indexed, analyzed and committed. A second, short transaction
+swaps it in by renaming. Readers keep the old rows until the swap and
+only wait for the rename. The replaced table is kept as <table>_previous:
+
+    python -m etl.shadow status
+    python -m etl.shadow rollback silver.crm_prd_info
+
+Bronze full loads swap every table. Silver full loads swap the tables
+they rewrite; the customer sources are applied by row hash in place
+(scripts/proc_change_detection.sql).
+"""
+import argparse
+import logging
+import os
+import time
+
+import psycopg2
+from dotenv import load_dotenv
+
+from etl import extract, metrics, silver_engine
+from etl.db import pooled_conn
+
+
+load_dotenv()
+
+log = logging.getLogger("shadow")
+
+STRATEGIES = ("truncate", "swap")
+PROCEDURES = "scripts/proc_shadow_swap.sql"
+
+# How long a swap waits for running readers before giving up and retrying;
+# while it waits, new readers queue behind it
+SWAP_LOCK_TIMEOUT = os.getenv("SWAP_LOCK_TIMEOUT", "5s")
+SWAP_ATTEMPTS = int(os.getenv("SWAP_ATTEMPTS", "5"))
+
+SALES = "silver.crm_sales_details"
+
+STATUS_SQL = """
+SELECT g.table_name,
+       g.swapped_at,
+       meta.generation_table(g.table_name, '_previous') IS NOT NULL AS has_previous,
+       g.previous_watermark,
+       s.last_watermark
+FROM meta.table_generation g
+    LEFT JOIN meta.pipeline_state s ON s.source_name = g.table_name
+ORDER BY g.table_name
+"""
+
+
+def strategy() -> str:
+    name = os.getenv("FULL_LOAD", "truncate")
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown full load strategy: {name}")
+    return name
+
+
+def shadow_name(table: str) -> str:
+    return f"{table}_shadow"
+
+
+def _log_notices(conn):
+    for notice in conn.notices:
+        log.info(notice.strip())
+    del conn.notices[:]
+
+
+# --------------------------------------------------
+# Steps
+# --------------------------------------------------
+def create(cur, table: str):
+    cur.execute("CALL meta.create_shadow(%s)", (table,))
+
+
+def seal(cur, table: str):
+    """SET LOGGED, indexes and ANALYZE, once the shadow is filled."""
+    cur.execute("CALL meta.seal_shadow(%s)", (table,))
+
+
+def swap(conn, table: str, watermark: int = None, after=()):
+    """Swap the sealed shadow in, in a transaction of its own together
+    with the `after` statements. Each attempt waits at most
+    SWAP_LOCK_TIMEOUT for readers of the table and its views, and is
+    retried when it times out or deadlocks with one."""
+    for attempt in range(1, SWAP_ATTEMPTS + 1):
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute("SET LOCAL lock_timeout = %s", (SWAP_LOCK_TIMEOUT,))
+                    cur.execute("CALL meta.swap_shadow(%s, %s)", (table, watermark))
+                    for statement in after:
+                        cur.execute(statement)
+            _log_notices(conn)
+            return
+        except (psycopg2.errors.LockNotAvailable, psycopg2.errors.DeadlockDetected) as e:
+            if attempt == SWAP_ATTEMPTS:
+                raise
+            log.warning(f"Swap of {table} gave way to readers ({attempt}/{SWAP_ATTEMPTS}): {e.pgerror.splitlines()[0]}; retrying")
+            time.sleep(attempt)
+
+
+def rollback(table: str):
+    """Make <table>_previous live again; the replaced rows become the
+    previous generation."""
+    with pooled_conn() as conn:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("SET LOCAL lock_timeout = %s", (SWAP_LOCK_TIMEOUT,))
+                cur.execute("CALL meta.rollback_swap(%s)", (table,))
+        _log_notices(conn)
+    # the restored watermark changes the gold data version
+    extract.record_version()
+
+
+# --------------------------------------------------
+# Silver
+# --------------------------------------------------
+def load_silver_table(table: str):
+    """Full load of a rewritten silver table through its shadow, from its
+    silver.<table>_source view or with the Python engine (SILVER_ENGINE)."""
+    spec = silver_engine.TABLES_BY_NAME[table]
+    if spec.key is not None:
+        raise ValueError(f"{table} is loaded by row hash, not through a shadow")
+    shadow = shadow_name(table)
+
+    with pooled_conn() as conn:
+        with conn:
+            with conn.cursor() as cur:
+                # taken before the copy, as by silver.load_<table>()
+                cur.execute(f"SELECT COALESCE(MAX(dwh_row_id), 0) FROM {spec.bronze}")
+                watermark = cur.fetchone()[0]
+
+                log.info(f"Loading {shadow}")
+                create(cur, table)
+                if silver_engine.engine() == "python":
+                    silver_engine.copy_into(cur, spec, shadow)
+                else:
+                    if table == SALES:
+                        cur.execute(
+                            "CALL meta.ensure_month_partitions(%s, silver.sales_order_months())",
+                            (shadow,),
+                        )
+                    columns = ", ".join(spec.column_names)
+                    cur.execute(
+                        f"INSERT INTO {shadow} ({columns}) SELECT {columns} FROM {table}_source"
+                    )
+                    metrics.current_span().add(rows=max(cur.rowcount, 0))
+                seal(cur, table)
+        _log_notices(conn)
+
+        # every month may have changed
+        after = [f"CALL meta.queue_partition_refresh('{SALES}', 'all')"] if table == SALES else []
+        swap(conn, table, watermark, after)
+
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(message)s",
+    )
+    p = argparse.ArgumentParser(description="Shadow-table generations of bronze and silver tables")
+    sub = p.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Last swap of every table and whether it can be rolled back")
+    r = sub.add_parser("rollback", help="Make the previous generation of a table live again")
+    r.add_argument("table", help="Schema-qualified table, e.g. silver.crm_prd_info")
+    args = p.parse_args()
+
+    if args.command == "rollback":
+        rollback(args.table)
+        return
+    with pooled_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(STATUS_SQL)
+            rows = cur.fetchall()
+        conn.rollback()
+    print(f"{'table':36} {'swapped_at':19} previous  watermark (previous)")
+    for table, swapped_at, has_previous, previous_watermark, watermark in rows:
+        print(
+            f"{table:36} {swapped_at:%Y-%m-%d %H:%M:%S} {'yes' if has_previous else 'no':9} "
+            f"{watermark or '-'} ({previous_watermark or '-'})"
+        )
+
+
+if __name__ == "__main__":
+    main()
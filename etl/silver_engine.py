@@ -0,0 +1,586 @@
+"""Python engine for the full silver load (Bronze -> Silver).
+
+Applies the cleansing rules of scripts/silver/proc_load_silver.sql as
+vectorized pandas/NumPy operations outside the database, so the transform
+CPU is spread over client cores instead of running row by row in one
+server transaction. Enabled with SILVER_ENGINE=python (full loads only;
+SILVER_MODE=incremental always runs the MERGE procedures).
+
+Each bronze table is read in chunks of heap pages (ctid ranges, one TID
+range scan each) by a process pool of SILVER_ENGINE_WORKERS workers. A
+worker reads its pages on its own connection, cleans them and:
+
+- row-wise tables (sales details, categories, marketing tables) encodes
+  the rows for binary COPY (etl.binary_copy) right away;
+- tables with a whole-table step (customer dedup, the product validity
+  window) returns the cleaned frame, pre-deduplicated; the parent
+  finishes them.
+
+The parent loads the result in one transaction, as the procedure does:
+TRUNCATE + binary COPY, or for the customer sources COPY into a temp
+table applied by row hash (meta.apply_dimension_changes, from
+scripts/proc_change_detection.sql). Watermarks, sales partitions and
+the gold refresh queue are maintained the same way.
+
+`python -m etl.silver_engine check` loads every table both ways inside a
+rolled-back transaction and reports the rows only one of them produced.
+
+Usage:
+    SILVER_ENGINE=python python -m etl.run_pipeline
+    python -m etl.silver_engine load [--tables crm_sales_details ...]
+    python -m etl.silver_engine check
+"""
+import argparse
+import logging
+import math
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from dotenv import load_dotenv
+
+from etl import extract
+from etl.binary_copy import copy_binary, encode_batch
+from etl.db import get_conn, pooled_conn
+from etl.read_csv import ARROW_TYPES
+from etl.schema import get_schema
+
+
+load_dotenv()
+
+log = logging.getLogger("silver_engine")
+
+ENGINES = ("sql", "python")
+# 8 MB of table heap per chunk
+CHUNK_PAGES = 1024
+
+PANDAS_TYPES = {
+    pa.int32(): pd.Int64Dtype(),
+    pa.int64(): pd.Int64Dtype(),
+    pa.string(): pd.StringDtype(),
+}
+
+EMAIL_PATTERN = r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"
+
+
+def engine() -> str:
+    name = os.getenv("SILVER_ENGINE", "sql")
+    if name not in ENGINES:
+        raise ValueError(f"Unknown silver engine: {name}")
+    return name
+
+
+# --------------------------------------------------
+# SQL semantics on pandas columns
+# --------------------------------------------------
+def trim(s: pd.Series) -> pd.Series:
+    # TRIM() removes spaces only
+    return s.str.strip(" ")
+
+
+def mapped(s: pd.Series, mapping: Dict[str, str], default: Optional[str] = "n/a") -> pd.Series:
+    """CASE WHEN s IN (...) THEN ... ELSE default END; NULL takes the default."""
+    return s.map(mapping).astype("string").fillna(default)
+
+
+def when(condition: pd.Series) -> pd.Series:
+    """A nullable condition as CASE WHEN sees it: NULL is false."""
+    return condition.astype("boolean").fillna(False).astype(bool)
+
+
+def yyyymmdd(s: pd.Series) -> pd.Series:
+    """CASE WHEN d = 0 OR LENGTH(d::text) <> 8 THEN NULL
+    ELSE to_date(d::text, 'YYYYMMDD') END
+
+    Out-of-range dates raise, as to_date() does."""
+    valid = when((s != 0) & (s.astype("string").str.len() == 8))
+    values = s[valid].astype("int64").to_numpy()
+    year, month, day = values // 10_000, values // 100 % 100, values % 100
+    months = (year - 1970) * 12 + month - 1
+    dates = months.astype("datetime64[M]").astype("datetime64[D]") + (day - 1).astype("timedelta64[D]")
+    # day 31 of a 30-day month etc. rolls over into the next month
+    bad = (values < 0) | (month < 1) | (month > 12) | (day < 1) | (
+        dates.astype("datetime64[M]").astype("int64") != months
+    )
+    if bad.any():
+        raise ValueError(f'date/time field value out of range: "{values[bad][0]}"')
+    out = pd.Series(pd.NaT, index=s.index, dtype="datetime64[s]")
+    out[valid] = dates.astype("datetime64[s]")
+    return out
+
+
+def latest_per_key(df: pd.DataFrame, key: str, order: List[str]) -> pd.DataFrame:
+    """One row per non-NULL `key`: the first by `order` descending with
+    NULLs first (ORDER BY ... DESC in PostgreSQL)."""
+    df = df[df[key].notna()]
+    df = df.sort_values(order, ascending=False, na_position="first", kind="stable")
+    return df.drop_duplicates(key, keep="first")
+
+
+# --------------------------------------------------
+# Transforms (one per silver.load_<table>() procedure)
+# --------------------------------------------------
+def clean_crm_cust_info(df: pd.DataFrame, today) -> pd.DataFrame:
+    df = df[df["cst_id"].notna()]
+    out = pd.DataFrame({
+        "cst_id": df["cst_id"],
+        "cst_key": df["cst_key"],
+        "cst_firstname": trim(df["cst_firstname"]),
+        "cst_lastname": trim(df["cst_lastname"]),
+        "cst_marital_status": mapped(trim(df["cst_marital_status"]).str.upper(), {"S": "Single", "M": "Married"}),
+        "cst_gndr": mapped(trim(df["cst_gndr"]).str.upper(), {"F": "Female", "M": "Male"}),
+        "cst_create_date": df["cst_create_date"],
+        "dwh_row_id": df["dwh_row_id"],
+    })
+    return finish_crm_cust_info(out)
+
+
+def finish_crm_cust_info(df: pd.DataFrame) -> pd.DataFrame:
+    # ROW_NUMBER() OVER (PARTITION BY cst_id ORDER BY cst_create_date DESC, dwh_row_id DESC)
+    return latest_per_key(df, "cst_id", ["cst_create_date", "dwh_row_id"])
+
+
+def clean_crm_prd_info(df: pd.DataFrame, today) -> pd.DataFrame:
+    key = df["prd_key"]
+    return pd.DataFrame({
+        "prd_id": df["prd_id"],
+        "cat_id": key.str.slice(0, 5).str.replace("-", "_", regex=False),
+        "prd_key": key.str.slice(6),
+        "prd_nm": df["prd_nm"],
+        "prd_cost": df["prd_cost"].fillna(0),
+        "prd_line": mapped(
+            trim(df["prd_line"]).str.upper(),
+            {"M": "Mountain", "R": "Road", "S": "Other Sales", "T": "Touring"},
+        ),
+        "prd_start_dt": df["prd_start_dt"].dt.floor("D"),
+        # the validity window runs over the raw key
+        "source_key": key,
+        "source_start": df["prd_start_dt"],
+    })
+
+
+def finish_crm_prd_info(df: pd.DataFrame) -> pd.DataFrame:
+    # (LEAD(prd_start_dt) OVER (PARTITION BY prd_key ORDER BY prd_start_dt) - 1 day)::date
+    df = df.sort_values(["source_key", "source_start"], na_position="last", kind="stable")
+    following = df.groupby("source_key", dropna=False, sort=False)["source_start"].shift(-1)
+    df = df.assign(prd_end_dt=(following - pd.Timedelta(days=1)).dt.floor("D"))
+    return df.drop(columns=["source_key", "source_start"])
+
+
+def clean_crm_sales_details(df: pd.DataFrame, today) -> pd.DataFrame:
+    sales, quantity, price = df["sls_sales"], df["sls_quantity"], df["sls_price"]
+    expected = quantity * price.abs()
+    repair_sales = when(sales.isna() | (sales <= 0) | (sales != expected))
+    # (COALESCE(sls_sales, 0)::numeric / NULLIF(sls_quantity, 0))::int,
+    # rounding half away from zero
+    ratio = sales.fillna(0).astype("Float64") / quantity.where(quantity != 0).astype("Float64")
+    derived = (np.sign(ratio) * np.floor(ratio.abs() + 0.5)).astype("Int64")
+    repair_price = when(price.isna() | (price <= 0))
+    return pd.DataFrame({
+        "sls_ord_num": df["sls_ord_num"],
+        "sls_prd_key": df["sls_prd_key"],
+        "sls_cust_id": df["sls_cust_id"],
+        "sls_order_dt": yyyymmdd(df["sls_order_dt"]),
+        "sls_ship_dt": yyyymmdd(df["sls_ship_dt"]),
+        "sls_due_dt": yyyymmdd(df["sls_due_dt"]),
+        "sls_sales": expected.where(repair_sales, sales),
+        "sls_quantity": quantity,
+        "sls_price": derived.where(repair_price, price),
+    })
+
+
+def clean_erp_cust_info(df: pd.DataFrame, today) -> pd.DataFrame:
+    df = df[df["cid"].notna()]
+    cid = df["cid"]
+    bdate = df["bdate"]
+    out = pd.DataFrame({
+        "cid": cid.where(~when(cid.str.startswith("NAS")), cid.str.slice(3)),
+        "bdate": bdate.where(~when((bdate > today) | (bdate < pd.Timestamp("1924-01-01")))),
+        "gen": mapped(
+            trim(df["gen"]).str.upper(),
+            {"F": "Female", "FEMALE": "Female", "M": "Male", "MALE": "Male"},
+        ),
+        "dwh_row_id": df["dwh_row_id"],
+    })
+    return finish_latest_cid(out)
+
+
+def clean_erp_loc_info(df: pd.DataFrame, today) -> pd.DataFrame:
+    df = df[df["cid"].notna()]
+    country = trim(df["cntry"])
+    out = pd.DataFrame({
+        "cid": df["cid"].str.replace("-", "", regex=False),
+        "cntry": country.where(
+            ~when(country.isna() | (country == "")), "n/a"
+        ).mask(when(country == "DE"), "Germany").mask(when(country.isin(["US", "USA"])), "United States"),
+        "dwh_row_id": df["dwh_row_id"],
+    })
+    return finish_latest_cid(out)
+
+
+def finish_latest_cid(df: pd.DataFrame) -> pd.DataFrame:
+    # DISTINCT ON (cid) ... ORDER BY cid, dwh_row_id DESC
+    return latest_per_key(df, "cid", ["dwh_row_id"])
+
+
+def clean_marketing_salesperson(df: pd.DataFrame, today) -> pd.DataFrame:
+    email = df["email"]
+    return df[["salesperson_id", "name", "region"]].assign(
+        email=email.where(when(email.str.fullmatch(EMAIL_PATTERN, case=False)), "n/a")
+    )
+
+
+def passthrough(columns: List[str]) -> Callable:
+    return lambda df, today: df[columns]
+
+
+class SilverTable:
+    """The Python version of one silver.load_<table>() procedure.
+
+    `clean` runs per chunk in a worker; `finish` (dedup, windows) runs in
+    the parent over all cleaned chunks. Tables with a natural `key` are
+    applied by row hash instead of being truncated.
+    """
+
+    def __init__(self, name: str, columns: List[Tuple[str, str]], clean: Callable,
+                 finish: Callable = None, key: str = None):
+        self.name = name
+        self.short = name.split(".", 1)[1]
+        self.bronze = f"bronze.{self.short}"
+        self.columns = columns
+        self.clean = clean
+        self.finish = finish
+        self.key = key
+
+    @property
+    def column_names(self) -> List[str]:
+        return [name for name, _ in self.columns]
+
+    @property
+    def kinds(self) -> List[str]:
+        return [kind for _, kind in self.columns]
+
+    def encode(self, df: pd.DataFrame) -> bytes:
+        arrays = []
+        for name, kind in self.columns:
+            array = pa.array(df[name], from_pandas=True)
+            arrays.append(array.cast(ARROW_TYPES[kind]))
+        return encode_batch(pa.RecordBatch.from_arrays(arrays, self.column_names), self.kinds)
+
+
+TABLES = [
+    SilverTable(
+        "silver.crm_cust_info",
+        [("cst_id", "int"), ("cst_key", "text"), ("cst_firstname", "text"), ("cst_lastname", "text"),
+         ("cst_marital_status", "text"), ("cst_gndr", "text"), ("cst_create_date", "date")],
+        clean_crm_cust_info, finish_crm_cust_info, key="cst_id",
+    ),
+    SilverTable(
+        "silver.crm_prd_info",
+        [("prd_id", "int"), ("cat_id", "text"), ("prd_key", "text"), ("prd_nm", "text"),
+         ("prd_cost", "int"), ("prd_line", "text"), ("prd_start_dt", "date"), ("prd_end_dt", "date")],
+        clean_crm_prd_info, finish_crm_prd_info,
+    ),
+    SilverTable(
+        "silver.crm_sales_details",
+        [("sls_ord_num", "text"), ("sls_prd_key", "text"), ("sls_cust_id", "int"),
+         ("sls_order_dt", "date"), ("sls_ship_dt", "date"), ("sls_due_dt", "date"),
+         ("sls_sales", "int"), ("sls_quantity", "int"), ("sls_price", "int")],
+        clean_crm_sales_details,
+    ),
+    SilverTable(
+        "silver.erp_cust_info",
+        [("cid", "text"), ("bdate", "date"), ("gen", "text")],
+        clean_erp_cust_info, finish_latest_cid, key="cid",
+    ),
+    SilverTable(
+        "silver.erp_loc_info",
+        [("cid", "text"), ("cntry", "text")],
+        clean_erp_loc_info, finish_latest_cid, key="cid",
+    ),
+    SilverTable(
+        "silver.erp_px_cat_info",
+        [("id", "text"), ("cat", "text"), ("subcat", "text"), ("maintenance", "text")],
+        passthrough(["id", "cat", "subcat", "maintenance"]),
+    ),
+    SilverTable(
+        "silver.marketing_salesperson",
+        [("salesperson_id", "text"), ("name", "text"), ("region", "text"), ("email", "text")],
+        clean_marketing_salesperson,
+    ),
+    SilverTable(
+        "silver.marketing_salesperson_sales",
+        [("salesperson_id", "text"), ("sls_ord_num", "text")],
+        passthrough(["salesperson_id", "sls_ord_num"]),
+    ),
+    SilverTable(
+        "silver.marketing_discount_info",
+        [("discount_id", "text"), ("description", "text"), ("percent", "int"), ("active", "text")],
+        passthrough(["discount_id", "description", "percent", "active"]),
+    ),
+    SilverTable(
+        "silver.marketing_sales_discount",
+        [("discount_id", "text"), ("sls_ord_num", "text")],
+        passthrough(["discount_id", "sls_ord_num"]),
+    ),
+]
+TABLES_BY_NAME = {t.name: t for t in TABLES}
+
+
+# --------------------------------------------------
+# Workers
+# --------------------------------------------------
+_worker_conn = None
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    global _worker_conn
+    _worker_conn = get_conn()
+    _worker_conn.set_session(readonly=True, autocommit=True)
+
+
+def read_pages(conn, bronze: str, first_page: int, last_page: int) -> pd.DataFrame:
+    """Rows of heap pages [first_page, last_page) of a bronze table, typed
+    by its schema (NULL-able Int64 / string, datetime64 dates)."""
+    schema = [("dwh_row_id", None)] + get_schema(bronze)
+    names = [name for name, _ in schema]
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT {', '.join(names)} FROM {bronze} "
+            "WHERE ctid >= %s::tid AND ctid < %s::tid",
+            (f"({first_page},0)", f"({last_page},0)"),
+        )
+        rows = cur.fetchall()
+    values = list(zip(*rows)) if rows else [()] * len(names)
+    arrays = [
+        pa.array(column, type=ARROW_TYPES[kind] if kind else pa.int64())
+        for column, (_, kind) in zip(values, schema)
+    ]
+    return pa.Table.from_arrays(arrays, names).to_pandas(
+        types_mapper=PANDAS_TYPES.get, date_as_object=False
+    )
+
+
+def transform_chunk(table_name: str, first_page: int, last_page: int, today):
+    """Worker task: clean one chunk. Returns encoded COPY rows, or the
+    cleaned frame when the table has a finishing step."""
+    table = TABLES_BY_NAME[table_name]
+    df = table.clean(read_pages(_worker_conn, table.bronze, first_page, last_page), today)
+    if table.finish is not None:
+        return df
+    return table.encode(df)
+
+
+def _workers() -> int:
+    return int(os.getenv("SILVER_ENGINE_WORKERS", "4"))
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=_workers(), mp_context=get_context("spawn"), initializer=_init_worker
+            )
+        return _pool
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def _chunks(cur, table: SilverTable, chunk_pages: int) -> List[Tuple[int, int]]:
+    cur.execute(
+        "SELECT pg_relation_size(%s::regclass) / current_setting('block_size')::int",
+        (table.bronze,),
+    )
+    pages = cur.fetchone()[0]
+    count = max(1, math.ceil(pages / chunk_pages))
+    # the last chunk is open-ended: it also reads pages added meanwhile
+    return [(i * chunk_pages, (i + 1) * chunk_pages if i < count - 1 else 2**31 - 1) for i in range(count)]
+
+
+def transformed(cur, table: SilverTable, chunk_pages: int) -> Iterator:
+    """Worker results of every chunk, in page order, with at most two
+    chunks per worker in flight. `cur` is only used up front, so the
+    results can feed a COPY on the same connection."""
+    cur.execute("SELECT CURRENT_DATE")
+    today = pd.Timestamp(cur.fetchone()[0])
+    chunks = _chunks(cur, table, chunk_pages)
+    pool = get_pool()
+
+    def results():
+        pending = []
+        for first, last in chunks:
+            pending.append(pool.submit(transform_chunk, table.name, first, last, today))
+            if len(pending) >= 2 * _workers():
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+    return results()
+
+
+# --------------------------------------------------
+# Loading
+# --------------------------------------------------
+def copy_into(cur, table, target: str, chunk_pages: int = CHUNK_PAGES):
+    """Clean the bronze rows of `table` and COPY them into `target`: the
+    silver table, a staging table or its shadow (etl.shadow)."""
+    if isinstance(table, str):
+        table = TABLES_BY_NAME[table]
+    if table.name == "silver.crm_sales_details":
+        # one partition per order month, as the procedure creates them
+        cur.execute("CALL meta.ensure_month_partitions(%s, silver.sales_order_months())", (target,))
+
+    results = transformed(cur, table, chunk_pages)
+    if table.finish is not None:
+        frames = [df for df in results if len(df)]
+        df = table.finish(pd.concat(frames, ignore_index=True)) if frames else None
+        batches = [table.encode(df)] if df is not None else []
+    else:
+        batches = results
+    copy_binary(cur, target, table.column_names, batches)
+
+
+def load_table(table, conn=None, chunk_pages: int = CHUNK_PAGES):
+    """Full load of one silver table, like CALL silver.load_<table>(). Runs
+    in one transaction on `conn` (committed by the caller), or on a pooled
+    connection committed here."""
+    if isinstance(table, str):
+        table = TABLES_BY_NAME[table]
+    if conn is None:
+        with pooled_conn() as conn:
+            with conn:
+                load_table(table, conn, chunk_pages)
+        return
+
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT COALESCE(MAX(dwh_row_id), 0) FROM {table.bronze}")
+        watermark = cur.fetchone()[0]
+
+        if table.key is None:
+            log.info(f"Loading {table.name} (truncate + COPY)")
+            cur.execute(f"TRUNCATE TABLE {table.name}")
+            copy_into(cur, table, table.name, chunk_pages)
+        else:
+            log.info(f"Loading {table.name} (changed rows by hash)")
+            staged = f"tmp_{table.short}"
+            cur.execute(
+                f"CREATE TEMP TABLE {staged} ON COMMIT DROP AS "
+                f"SELECT {', '.join(table.column_names)} FROM {table.name} WITH NO DATA"
+            )
+            copy_into(cur, table, staged, chunk_pages)
+            cur.execute("CALL meta.apply_dimension_changes(%s, %s, %s)", (table.name, staged, table.key))
+            cur.execute(f"DROP TABLE {staged}")
+            for notice in conn.notices:
+                log.info(notice.strip())
+            del conn.notices[:]
+
+        cur.execute("CALL meta.set_watermark(%s, %s)", (table.name, watermark))
+        if table.name == "silver.crm_sales_details":
+            # every month may have changed
+            cur.execute("CALL meta.queue_partition_refresh('silver.crm_sales_details', 'all')")
+
+
+def load_silver(conn=None, tables: List[str] = None, chunk_pages: int = CHUNK_PAGES):
+    """All tables in one transaction, like CALL silver.load_silver()."""
+    selected = [TABLES_BY_NAME[name] for name in tables] if tables else TABLES
+    if conn is None:
+        with pooled_conn() as conn:
+            with conn:
+                load_silver(conn, tables, chunk_pages)
+        return
+    for table in selected:
+        load_table(table, conn, chunk_pages)
+
+
+# --------------------------------------------------
+# Parity with the procedures
+# --------------------------------------------------
+PARITY_SQL = """
+SELECT
+    (SELECT count(*) FROM (SELECT * FROM parity_sql EXCEPT ALL SELECT * FROM parity_python) a),
+    (SELECT count(*) FROM (SELECT * FROM parity_python EXCEPT ALL SELECT * FROM parity_sql) b),
+    (SELECT count(*) FROM parity_sql)
+"""
+
+
+def check(tables: List[str] = None, chunk_pages: int = CHUNK_PAGES) -> Dict[str, Tuple[int, int, int]]:
+    """Load each table with its procedure and with the engine, both from
+    an empty table, in one transaction that is rolled back.
+
+    Returns {table: (rows only the procedure produced, rows only the engine
+    produced, procedure rows)}. Takes the silver tables' locks for the
+    duration; run it while the pipeline is idle.
+    """
+    selected = [TABLES_BY_NAME[name] for name in tables] if tables else TABLES
+    report = {}
+    with pooled_conn() as conn:
+        with conn.cursor() as cur:
+            for table in selected:
+                columns = ", ".join(table.column_names)
+                reset = (
+                    f"TRUNCATE TABLE {table.name}; "
+                    f"DELETE FROM meta.dimension_row_hash WHERE source_table = '{table.name}'"
+                )
+                cur.execute(reset)
+                cur.execute(f"CALL silver.load_{table.short}()")
+                cur.execute(f"CREATE TEMP TABLE parity_sql AS SELECT {columns} FROM {table.name}")
+                cur.execute(reset)
+                load_table(table, conn, chunk_pages)
+                cur.execute(f"CREATE TEMP TABLE parity_python AS SELECT {columns} FROM {table.name}")
+                cur.execute(PARITY_SQL)
+                report[table.name] = cur.fetchone()
+                cur.execute("DROP TABLE parity_sql, parity_python")
+                del conn.notices[:]
+        conn.rollback()
+    return report
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(message)s",
+    )
+    p = argparse.ArgumentParser(description="Python engine for the full silver load")
+    p.add_argument("command", choices=["load", "check"])
+    p.add_argument("--tables", nargs="*", metavar="TABLE",
+                   help="Silver tables without schema (default: all)")
+    p.add_argument("--chunk-pages", type=int, default=CHUNK_PAGES,
+                   help=f"Bronze heap pages per worker task (default {CHUNK_PAGES})")
+    args = p.parse_args()
+    tables = [f"silver.{t}" for t in args.tables] if args.tables else None
+
+    try:
+        if args.command == "load":
+            try:
+                load_silver(tables=tables, chunk_pages=args.chunk_pages)
+            finally:
+                # the gold views read silver (etl.extract caches by version)
+                extract.record_version()
+            return
+        failed = False
+        for name, (only_sql, only_python, rows) in check(tables, args.chunk_pages).items():
+            status = "ok" if only_sql == only_python == 0 else "MISMATCH"
+            failed |= status != "ok"
+            print(f"{name:36} {status:8} rows={rows} only_sql={only_sql} only_python={only_python}")
+        if failed:
+            raise SystemExit(1)
+    finally:
+        shutdown()
+
+
+if __name__ == "__main__":
+    main()
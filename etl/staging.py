@@ -0,0 +1,149 @@
+"""Columnar (Parquet) staging of the bronze sources.
+
+Each source in etl.load_bronze.TABLES is converted once into a
+zstd-compressed Parquet file typed by the bronze schema (etl.schema), in
+BRONZE_STAGE_DIR (default ./staging). The source's size and mtime are
+stored in the file's metadata; a staged file is only rebuilt when its
+source changes.
+
+With BRONZE_FORMAT=parquet the bronze loader streams the staged file into
+the table with binary COPY (etl.binary_copy), so repeated full reloads of
+the same inputs skip CSV parsing on both the client and the server.
+
+CSV semantics match COPY ... (FORMAT csv): an unquoted empty field is
+NULL, a quoted empty field ("") is an empty string. A value that does not
+parse as its bronze type fails the conversion, as it would fail COPY.
+
+Usage:
+    python -m etl.staging             # stage every source that changed
+    python -m etl.staging --force     # rebuild all staged files
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Iterator
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+from etl.binary_copy import encode_batches
+from etl.read_csv import open_arrow_csv
+from etl.schema import get_schema
+
+
+load_dotenv()
+
+log = logging.getLogger("bronze_staging")
+
+STAGE_DIR = Path(os.getenv("BRONZE_STAGE_DIR", "./staging"))
+METADATA_KEY = b"bronze_source"
+BATCH_SIZE = 65_536
+
+
+
+# --------------------------------------------------
+# Staging
+# --------------------------------------------------
+def staged_path(table: str, stage_dir: Path = None) -> Path:
+    return (stage_dir or STAGE_DIR) / f"{table}.parquet"
+
+
+def source_fingerprint(csv_path: Path) -> dict:
+    stat = csv_path.stat()
+    return {"path": str(csv_path.resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def is_current(path: Path, csv_path: Path) -> bool:
+    """True when `path` was staged from the current content of `csv_path`."""
+    if not path.exists():
+        return False
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return False
+    recorded = metadata.get(METADATA_KEY)
+    return recorded is not None and json.loads(recorded) == source_fingerprint(csv_path)
+
+
+def convert(table: str, csv_path: Path, path: Path):
+    """Stream `csv_path` into a Parquet file typed by the bronze schema."""
+    fingerprint = source_fingerprint(csv_path)
+    reader = open_arrow_csv(csv_path, table)
+    schema = reader.schema.with_metadata({METADATA_KEY: json.dumps(fingerprint)})
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    rows = 0
+    try:
+        with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return rows
+
+
+def stage_table(table: str, csv_path: Path, force: bool = False,
+                stage_dir: Path = None) -> Path:
+    """Return the staged file for `table`, converting only if the source changed."""
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV not found: {csv_path}")
+
+    path = staged_path(table, stage_dir)
+    if not force and is_current(path, csv_path):
+        log.info(f">> [{table}] Staged file is current: {path}")
+        return path
+
+    start = time.time()
+    log.info(f">> [{table}] Staging {csv_path.name} -> {path}")
+    rows = convert(table, csv_path, path)
+    log.info(
+        f">> [{table}] Staged {rows} rows in {time.time() - start:.2f}s "
+        f"({csv_path.stat().st_size} -> {path.stat().st_size} bytes)"
+    )
+    return path
+
+
+# --------------------------------------------------
+# Parquet -> binary COPY
+# --------------------------------------------------
+def iter_copy_batches(table: str, path: Path, batch_size: int = BATCH_SIZE) -> Iterator[bytes]:
+    """Binary COPY tuples for the staged file, one encoded batch at a time."""
+    types = dict(get_schema(table))
+    parquet = pq.ParquetFile(path)
+    kinds = [types.get(name, "text") for name in parquet.schema_arrow.names]
+    return encode_batches(parquet.iter_batches(batch_size=batch_size), kinds)
+
+
+def staged_columns(path: Path) -> list:
+    return pq.read_schema(path).names
+
+
+def main():
+    from etl.load_bronze import is_sharded, sources
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(message)s",
+    )
+    p = argparse.ArgumentParser(description="Convert the bronze sources to Parquet")
+    p.add_argument("--data-dir", type=Path, default=Path(os.getenv("DATA_DIR", "./datasets")))
+    p.add_argument("--stage-dir", type=Path, default=STAGE_DIR)
+    p.add_argument("--force", action="store_true", help="Rebuild even if the source is unchanged")
+    args = p.parse_args()
+
+    for table, csv_path in sources(args.data_dir):
+        if is_sharded(csv_path):
+            log.info(f">> [{table}] Sharded source, loaded with CSV COPY; not staged")
+            continue
+        stage_table(table, csv_path, args.force, args.stage_dir)
+
+
+if __name__ == "__main__":
+    main()
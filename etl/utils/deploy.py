@@ -0,0 +1,212 @@
+"""Schema fingerprinting: apply DDL scripts only when something changed.
+
+Every deployed script is recorded in meta.schema_fingerprint with two
+hashes:
+
+- script_hash   SHA-256 of the file content
+- objects_hash  SHA-256 of the catalog definitions of the objects the
+                script creates: relation kind, columns, view query and
+                indexes of tables/views/materialized views/sequences, and
+                the source of functions/procedures. The join-key indexes
+                of etl.indexes.MANIFEST are built after load, not by the
+                scripts, and are left out.
+
+A script is applied again when either hash differs from what was recorded:
+the file was edited, or one of its objects was dropped (e.g. by a CASCADE
+of another script), altered by hand or replaced by a different kind of
+object (view vs materialized view). Otherwise deploy_sql_file() returns
+without touching the database, so steady-state runs take no DROP/CREATE
+locks and keep table statistics and cached plans.
+
+DDL_DEPLOY=always re-applies every script, as before.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import List, Tuple
+
+import sqlparse
+
+from etl.db import script_conn
+from etl.indexes import MANIFEST
+from etl.utils.sql import execute_statements, split_sql_file
+
+
+log = logging.getLogger("schema_deploy")
+
+DEPLOY_MODES = ("changed", "always")
+
+CREATE_PATTERN = re.compile(
+    r"\bCREATE\s+(?:OR\s+REPLACE\s+)?(?:UNLOGGED\s+)?"
+    r"(TABLE|VIEW|MATERIALIZED\s+VIEW|SEQUENCE|PROCEDURE|FUNCTION)\s+"
+    r"(?:IF\s+NOT\s+EXISTS\s+)?([\w.]+)",
+    re.IGNORECASE,
+)
+
+RELATIONS_SQL = """
+SELECT t.name,
+       c.relkind::text,
+       (SELECT string_agg(a.attname || ' ' || format_type(a.atttypid, a.atttypmod)
+                          || CASE WHEN a.attnotnull THEN ' NOT NULL' ELSE '' END,
+                          ', ' ORDER BY a.attnum)
+        FROM pg_attribute a
+        WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped),
+       CASE WHEN c.relkind IN ('v', 'm') THEN pg_get_viewdef(c.oid) END,
+       (SELECT string_agg(pg_get_indexdef(i.indexrelid), '; '
+                          ORDER BY pg_get_indexdef(i.indexrelid))
+        FROM pg_index i
+        WHERE i.indrelid = c.oid
+          -- declared join keys of the table, or of the partitioned table
+          AND NOT EXISTS (
+              SELECT 1
+              FROM unnest(%s::text[], %s::text[]) AS m(table_name, columns)
+              WHERE m.table_name IN (
+                        c.oid::regclass::text,
+                        (SELECT h.inhparent::regclass::text FROM pg_inherits h WHERE h.inhrelid = c.oid)
+                    )
+                AND m.columns = (
+                        SELECT string_agg(a.attname, ',' ORDER BY k.n)
+                        FROM unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, n)
+                            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+                    )
+          ))
+FROM unnest(%s::text[]) AS t(name)
+LEFT JOIN pg_class c ON c.oid = to_regclass(t.name)
+ORDER BY t.name
+"""
+
+ROUTINES_SQL = """
+SELECT t.name,
+       (SELECT string_agg(pg_get_functiondef(p.oid), E'\\n'
+                          ORDER BY p.oid::regprocedure::text)
+        FROM pg_proc p
+            JOIN pg_namespace n ON n.oid = p.pronamespace
+        WHERE n.nspname || '.' || p.proname = t.name)
+FROM unnest(%s::text[]) AS t(name)
+ORDER BY t.name
+"""
+
+
+def deploy_mode() -> str:
+    mode = os.getenv("DDL_DEPLOY", "changed")
+    if mode not in DEPLOY_MODES:
+        raise ValueError(f"Unknown DDL deploy mode: {mode}")
+    return mode
+
+
+# --------------------------------------------------
+# Fingerprints
+# --------------------------------------------------
+def script_hash(path: str) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def script_targets(statements: List[str]) -> List[Tuple[str, str]]:
+    """(kind, schema.name) of every object the statements create."""
+    targets = set()
+    for stmt in statements:
+        body = sqlparse.format(stmt, strip_comments=True)
+        for kind, name in CREATE_PATTERN.findall(body):
+            kind = "routine" if kind.upper() in ("PROCEDURE", "FUNCTION") else "relation"
+            targets.add((kind, name.lower()))
+    return sorted(targets)
+
+
+def objects_hash(cur, targets: List[Tuple[str, str]]) -> str:
+    """Hash of the current catalog definitions of `targets`; a missing
+    object hashes as missing."""
+    relations = [name for kind, name in targets if kind == "relation"]
+    routines = [name for kind, name in targets if kind == "routine"]
+    definitions = []
+    if relations:
+        cur.execute(RELATIONS_SQL, (
+            [key.table for key in MANIFEST],
+            [",".join(key.columns) for key in MANIFEST],
+            relations,
+        ))
+        definitions += cur.fetchall()
+    if routines:
+        cur.execute(ROUTINES_SQL, (routines,))
+        definitions += cur.fetchall()
+    return hashlib.sha256(json.dumps(definitions).encode("utf-8")).hexdigest()
+
+
+def _recorded(cur, path: str):
+    cur.execute(
+        "SELECT script_hash, objects_hash FROM meta.schema_fingerprint WHERE script_path = %s",
+        (path,),
+    )
+    return cur.fetchone()
+
+
+def _record(cur, path: str, digest: str, targets, objects: str):
+    cur.execute(
+        """
+        INSERT INTO meta.schema_fingerprint
+            (script_path, script_hash, objects_hash, objects, deployed_at)
+        VALUES (%s, %s, %s, %s, NOW())
+        ON CONFLICT (script_path) DO UPDATE SET
+            script_hash  = EXCLUDED.script_hash,
+            objects_hash = EXCLUDED.objects_hash,
+            objects      = EXCLUDED.objects,
+            deployed_at  = EXCLUDED.deployed_at
+        """,
+        (path, digest, objects, [name for _, name in targets]),
+    )
+
+
+# --------------------------------------------------
+# Deployment
+# --------------------------------------------------
+def is_deployed(path: str) -> bool:
+    """True when `path` and the objects it creates are unchanged since it
+    was last recorded."""
+    if deploy_mode() == "always":
+        return False
+    targets = script_targets(split_sql_file(path))
+    with script_conn() as conn:
+        with conn.cursor() as cur:
+            recorded = _recorded(cur, path)
+            return recorded == (script_hash(path), objects_hash(cur, targets))
+
+
+def record_deployment(path: str):
+    """Record the current fingerprint of `path` (after it was applied by
+    other means, e.g. one statement per DAG node)."""
+    targets = script_targets(split_sql_file(path))
+    with script_conn() as conn:
+        with conn:
+            with conn.cursor() as cur:
+                _record(cur, path, script_hash(path), targets, objects_hash(cur, targets))
+
+
+def deploy_sql_file(path: str) -> bool:
+    """Apply a DDL script unless it is already deployed unchanged.
+
+    Check, apply and record happen in one transaction on the shared
+    script connection. Returns True when the script was applied.
+    """
+    statements = split_sql_file(path)
+    targets = script_targets(statements)
+    digest = script_hash(path)
+    name = Path(path).name
+
+    with script_conn() as conn:
+        with conn:
+            with conn.cursor() as cur:
+                if deploy_mode() == "changed" and _recorded(cur, path) == (digest, objects_hash(cur, targets)):
+                    log.info(f"Skipping {path}: script and objects unchanged")
+                    return False
+
+            log.info(f"Deploying SQL file: {path}")
+            execute_statements(conn, statements, name)
+            for notice in conn.notices:
+                log.info(notice.strip())
+            del conn.notices[:]
+
+            with conn.cursor() as cur:
+                _record(cur, path, digest, targets, objects_hash(cur, targets))
+    return True
@@ -0,0 +1,280 @@
+"""Per-statement profiling of the SQL run by etl.utils.sql.
+
+Enabled for a pipeline run with SQL_PROFILE=true. Every statement executed
+through execute_statements (SQL files and DAG nodes) is recorded with:
+
+- duration and rows affected (cursor rowcount)
+- shared buffer hits/reads and tuples read/written, in the style of
+  pg_stat_statements
+
+pg_stat_statements is not required: the buffer and tuple counts are taken
+from the per-transaction statistics (pg_stat_get_xact_blocks_*,
+pg_stat_xact_all_tables) before and after each statement. They cover
+everything the statement did, including the statements inside a CALL, but
+not temporary objects or relations dropped by the statement itself.
+
+With SQL_EXPLAIN_THRESHOLD_MS set, a query (SELECT/INSERT/UPDATE/DELETE/
+MERGE/WITH) slower than the threshold is run a second time as
+EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) inside a savepoint that is rolled
+back, so its plan is captured without changing any data. CALL, DO and DDL
+cannot be explained; the tuple counts of the tables they touched are
+recorded instead.
+
+At the end of the run the records go to meta.sql_statement_profile and to
+a JSON report in SQL_PROFILE_DIR (default ./profiles).
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import sqlparse
+
+
+log = logging.getLogger("sql_profile")
+
+PROFILE_DIR = Path(os.getenv("SQL_PROFILE_DIR", "./profiles"))
+STATEMENT_PREVIEW = 500
+TOP_STATEMENTS = 10
+
+EXPLAINABLE = re.compile(r"(SELECT|WITH|INSERT|UPDATE|DELETE|MERGE|VALUES|TABLE)\b", re.IGNORECASE)
+
+# Counters of the current transaction, summed over all relations
+STATS_SQL = """
+SELECT coalesce(sum(pg_stat_get_xact_blocks_hit(c.oid)), 0),
+       coalesce(sum(pg_stat_get_xact_blocks_fetched(c.oid)
+                    - pg_stat_get_xact_blocks_hit(c.oid)), 0),
+       coalesce(sum(t.seq_tup_read + coalesce(t.idx_tup_fetch, 0)), 0),
+       coalesce(sum(t.n_tup_ins + t.n_tup_upd + t.n_tup_del), 0)
+FROM pg_class c
+LEFT JOIN pg_stat_xact_all_tables t ON t.relid = c.oid
+"""
+STAT_FIELDS = ("shared_blks_hit", "shared_blks_read", "tuples_read", "tuples_written")
+
+# Per-table counters, for statements that cannot be explained
+TABLE_STATS_SQL = """
+SELECT schemaname || '.' || relname,
+       seq_tup_read + coalesce(idx_tup_fetch, 0),
+       n_tup_ins + n_tup_upd + n_tup_del
+FROM pg_stat_xact_all_tables
+WHERE schemaname NOT IN ('pg_catalog', 'information_schema', 'pg_toast')
+"""
+
+
+def enabled() -> bool:
+    return os.getenv("SQL_PROFILE", "false").lower() in ("1", "true", "yes")
+
+
+def explain_threshold_ms() -> Optional[float]:
+    value = os.getenv("SQL_EXPLAIN_THRESHOLD_MS")
+    return float(value) if value else None
+
+
+def is_explainable(stmt: str) -> bool:
+    body = sqlparse.format(stmt, strip_comments=True).lstrip(" \t\r\n(")
+    return bool(EXPLAINABLE.match(body))
+
+
+# --------------------------------------------------
+# Run-wide collector
+# --------------------------------------------------
+class Profiler:
+    """Statement records of one pipeline run; shared by the DAG workers."""
+
+    def __init__(self, run_id: str, threshold_ms: Optional[float] = None):
+        self.run_id = run_id
+        self.threshold_ms = threshold_ms
+        self.started_at = datetime.now()
+        self.records: List[dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: dict):
+        with self._lock:
+            self.records.append(record)
+
+    def summary(self) -> dict:
+        with self._lock:
+            records = list(self.records)
+        by_source = {}
+        for r in records:
+            s = by_source.setdefault(r["source"], {"statements": 0, "duration_ms": 0.0,
+                                                   "shared_blks_hit": 0, "shared_blks_read": 0})
+            s["statements"] += 1
+            s["duration_ms"] += r["duration_ms"]
+            s["shared_blks_hit"] += r["shared_blks_hit"] or 0
+            s["shared_blks_read"] += r["shared_blks_read"] or 0
+        slowest = sorted(records, key=lambda r: r["duration_ms"], reverse=True)[:TOP_STATEMENTS]
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at.isoformat(),
+            "explain_threshold_ms": self.threshold_ms,
+            "total_duration_ms": sum(r["duration_ms"] for r in records),
+            "by_source": by_source,
+            "slowest": [(r["source"], r["statement_no"], r["duration_ms"]) for r in slowest],
+            "statements": records,
+        }
+
+    def write_report(self, profile_dir: Path = None) -> Path:
+        path = (profile_dir or PROFILE_DIR) / f"{self.run_id}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.summary(), indent=2, default=str), encoding="utf-8")
+        return path
+
+    def store(self, conn):
+        """Insert the records into meta.sql_statement_profile."""
+        with self._lock:
+            records = list(self.records)
+        with conn.cursor() as cur:
+            cur.executemany(
+                """
+                INSERT INTO meta.sql_statement_profile
+                    (run_id, source, statement_no, statement, started_at, duration_ms,
+                     rows_affected, shared_blks_hit, shared_blks_read, tuples_read,
+                     tuples_written, plan, tables, error)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                [
+                    (self.run_id, r["source"], r["statement_no"], r["statement"],
+                     r["started_at"], r["duration_ms"], r["rows_affected"],
+                     r["shared_blks_hit"], r["shared_blks_read"], r["tuples_read"],
+                     r["tuples_written"],
+                     json.dumps(r["plan"]) if r["plan"] is not None else None,
+                     json.dumps(r["tables"]) if r["tables"] is not None else None,
+                     r["error"])
+                    for r in records
+                ],
+            )
+
+
+_current: Optional[Profiler] = None
+
+
+def start_run(run_id: str) -> Optional[Profiler]:
+    """Start collecting for `run_id` when SQL_PROFILE is enabled."""
+    global _current
+    _current = Profiler(run_id, explain_threshold_ms()) if enabled() else None
+    if _current is not None:
+        log.info(f"Profiling SQL statements of run {run_id}"
+                 + (f" (EXPLAIN over {_current.threshold_ms:g} ms)" if _current.threshold_ms else ""))
+    return _current
+
+
+def current() -> Optional[Profiler]:
+    return _current
+
+
+def finish_run(conn=None) -> Optional[Path]:
+    """Stop collecting; store the records (when `conn` is given) and write
+    the JSON report. Returns the report path."""
+    global _current
+    profiler, _current = _current, None
+    if profiler is None:
+        return None
+    if conn is not None:
+        try:
+            with conn:
+                profiler.store(conn)
+        except Exception as e:
+            log.warning(f"Could not store SQL profile of run {profiler.run_id}: {e}")
+    path = profiler.write_report()
+    log.info(f"SQL profile of run {profiler.run_id}: {len(profiler.records)} statements -> {path}")
+    return path
+
+
+# --------------------------------------------------
+# Per-statement measurement
+# --------------------------------------------------
+class StatementProfile:
+    """Measures the statements executed on one cursor (one transaction)."""
+
+    def __init__(self, profiler: Profiler, cur, source: str):
+        self.profiler = profiler
+        self.cur = cur
+        self.source = source
+        # the probe reads pg_class itself; measure what one probe costs
+        first = self._stats()
+        self._overhead = [b - a for a, b in zip(first, self._stats())]
+
+    def _stats(self) -> tuple:
+        self.cur.execute(STATS_SQL)
+        return tuple(int(v) for v in self.cur.fetchone())
+
+    def _table_stats(self) -> dict:
+        self.cur.execute(TABLE_STATS_SQL)
+        return {name: (int(read), int(written)) for name, read, written in self.cur.fetchall()}
+
+    def execute(self, statement_no: int, stmt: str):
+        explainable = is_explainable(stmt)
+        before = self._stats()
+        tables_before = None if explainable else self._table_stats()
+        if tables_before is not None:
+            # _table_stats reads catalog tables only, but keep the baseline exact
+            before = self._stats()
+
+        record = {
+            "source": self.source,
+            "statement_no": statement_no,
+            "statement": stmt[:STATEMENT_PREVIEW],
+            "started_at": datetime.now(),
+            "duration_ms": None,
+            "rows_affected": None,
+            "plan": None,
+            "tables": None,
+            "error": None,
+            **dict.fromkeys(STAT_FIELDS),
+        }
+        start = time.perf_counter()
+        try:
+            self.cur.execute(stmt)
+        except Exception as e:
+            record["duration_ms"] = (time.perf_counter() - start) * 1000
+            record["error"] = str(e).strip()
+            self.profiler.add(record)
+            raise
+        record["duration_ms"] = (time.perf_counter() - start) * 1000
+        record["rows_affected"] = self.cur.rowcount if self.cur.rowcount >= 0 else None
+
+        after = self._stats()
+        for field, b, a, overhead in zip(STAT_FIELDS, before, after, self._overhead):
+            # relations dropped by the statement take their counts with them
+            record[field] = max(a - b - overhead, 0)
+
+        if tables_before is not None:
+            record["tables"] = {
+                name: {"tuples_read": read - tables_before.get(name, (0, 0))[0],
+                       "tuples_written": written - tables_before.get(name, (0, 0))[1]}
+                for name, (read, written) in self._table_stats().items()
+                if (read, written) != tables_before.get(name, (0, 0))
+            } or None
+
+        threshold = self.profiler.threshold_ms
+        if threshold is not None and record["duration_ms"] >= threshold:
+            if explainable:
+                record["plan"] = self._explain(stmt)
+            else:
+                log.info(f"Statement #{statement_no} from {self.source} took "
+                         f"{record['duration_ms']:.0f} ms; not explainable, recording table stats")
+
+        self.profiler.add(record)
+        log.info(
+            f"Statement #{statement_no} from {self.source}: {record['duration_ms']:.1f} ms, "
+            f"rows={record['rows_affected']}, hit={record['shared_blks_hit']}, "
+            f"read={record['shared_blks_read']}"
+        )
+
+    def _explain(self, stmt: str):
+        """EXPLAIN ANALYZE the statement again and roll its effects back."""
+        self.cur.execute("SAVEPOINT sql_profile_explain")
+        try:
+            self.cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {stmt}")
+            plan = self.cur.fetchone()[0]
+        except Exception as e:
+            log.warning(f"EXPLAIN failed for statement from {self.source}: {e}")
+            plan = {"error": str(e).strip()}
+        self.cur.execute("ROLLBACK TO SAVEPOINT sql_profile_explain")
+        return plan
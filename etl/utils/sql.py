@@ -1,47 +1,161 @@
 from pathlib import Path
+import hashlib
+import json
 import logging
-from typing import Iterable
+import os
+import threading
+from typing import Iterable, List
 
 import sqlparse
-from etl.db import get_conn
+from etl import metrics
+from etl.db import execute_prepared, pooled_conn, script_conn
+from etl.utils import profiling
 
 
 # Create a module-level logger
 log = logging.getLogger("sql_runner")
 
+# Rows written to a table (and its partitions) by the current transaction
+TUPLES_WRITTEN_SQL = """
+WITH r AS (SELECT to_regclass(%s) AS relid)
+SELECT coalesce(sum(pg_stat_get_xact_tuples_inserted(t.relid)
+                    + pg_stat_get_xact_tuples_updated(t.relid)), 0)
+FROM (SELECT relid FROM r
+      UNION
+      SELECT p.relid FROM r, pg_partition_tree(r.relid) p) t
+"""
+
+# Split statement lists, keyed by file path and content hash
+SQL_CACHE_DIR = Path(os.getenv("SQL_CACHE_DIR", "./.sql_cache"))
+_split_cache = {}
+_split_lock = threading.Lock()
+
+
+# --------------------------------------------------
+# Script cache
+# --------------------------------------------------
+def _cache_file(path: Path, digest: str) -> Path:
+    key = hashlib.sha256(f"{path.resolve()}\0{digest}".encode("utf-8")).hexdigest()
+    return SQL_CACHE_DIR / f"{key[:32]}.json"
+
+
+def _load_cached(cache_file: Path, digest: str):
+    try:
+        cached = json.loads(cache_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if cached.get("sha256") != digest:
+        return None
+    return cached.get("statements")
+
+
+def _store_cached(cache_file: Path, path: Path, digest: str, statements: List[str]):
+    try:
+        SQL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        tmp.write_text(
+            json.dumps({"path": str(path), "sha256": digest, "statements": statements}),
+            encoding="utf-8",
+        )
+        os.replace(tmp, cache_file)
+    except OSError as e:
+        log.warning(f"Could not cache statements of {path}: {e}")
+
+
+def split_sql_file(path: str) -> List[str]:
+    """Return the non-empty statements of a SQL file, comments included.
+
+    sqlparse is only run when the file is new or its content changed: the
+    split statements are cached in memory and in SQL_CACHE_DIR, keyed by the
+    file path and the SHA-256 of its content.
+    """
+    sql_path = Path(path)
+    raw = sql_path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    key = (str(sql_path.resolve()), digest)
+
+    with _split_lock:
+        statements = _split_cache.get(key)
+    if statements is not None:
+        return list(statements)
+
+    cache_file = _cache_file(sql_path, digest)
+    statements = _load_cached(cache_file, digest)
+    if statements is None:
+        sql_text = raw.decode("utf-8")
+        statements = [stmt.strip() for stmt in sqlparse.split(sql_text) if stmt.strip()]
+        _store_cached(cache_file, sql_path, digest, statements)
+
+    with _split_lock:
+        _split_cache[key] = statements
+    return list(statements)
+
+
+# --------------------------------------------------
+# Execution
+# --------------------------------------------------
+
+
+def execute_statements(conn, statements: List[str], source: str) -> None:
+    """Execute statements on `conn` in the current transaction, logging the
+    failing statement before re-raising. While a profiled run is active
+    (etl.utils.profiling) each statement is timed and measured; while a
+    traced run is active (etl.metrics) each one is a span."""
+    profiler = profiling.current()
+    with conn.cursor() as cur:
+        profile = profiling.StatementProfile(profiler, cur, source) if profiler else None
+        for i, stmt in enumerate(statements, start=1):
+            log.info(f"Executing statement #{i} from {source}")
+
+            try:
+                with metrics.span(f"{source}#{i}", "statement", source=source) as span:
+                    with metrics.db_wait():
+                        if profile is not None:
+                            profile.execute(i, stmt)
+                        else:
+                            cur.execute(stmt)
+                    if cur.rowcount >= 0:
+                        span.add(rows=cur.rowcount)
+            except Exception as e:
+                log.error("=" * 70)
+                log.error(f"❌ SQL FAILED in: {source}")
+                log.error(f"❌ Statement #{i}:\n{stmt[:1200]}")
+                log.error(f"❌ Error: {e}")
+                log.error("=" * 70)
+                raise
+
 
 def run_sql_file(path: str) -> None:
-    """Run all statements in a SQL file inside a single transaction."""
+    """Run all statements in a SQL file inside a single transaction, on the
+    connection shared by all script runs (etl.db.script_conn)."""
     sql_path = Path(path)
-    sql_text = sql_path.read_text(encoding="utf-8")
 
     log.info(f"Running SQL file: {sql_path}")
 
-    conn = get_conn()
-    try:
+    statements = split_sql_file(path)
+    with script_conn() as conn:
+        # rollback happens automatically on error due to `with conn:`
+        with conn:
+            execute_statements(conn, statements, sql_path.name)
+            for notice in conn.notices:
+                log.info(notice.strip())
+            del conn.notices[:]
+
+
+def run_statements(statements: List[str], source: str, table: str = None) -> None:
+    """Run statements in one transaction on a pooled connection, logging
+    any server notices (RAISE NOTICE) they produce. With `table`, the rows
+    they wrote to it are counted on the current metrics span."""
+    with pooled_conn() as conn:
         with conn:
-            with conn.cursor() as cur:
-                statements = sqlparse.split(sql_text)
-
-                for i, stmt in enumerate(statements, start=1):
-                    stmt = stmt.strip()
-                    if not stmt:
-                        continue
-
-                    log.info(f"Executing statement #{i} from {sql_path.name}")
-
-                    try:
-                        cur.execute(stmt)
-                    except Exception as e:
-                        # rollback happens automatically due to `with conn:`
-                        log.error("=" * 70)
-                        log.error(f"❌ SQL FAILED in file: {sql_path}")
-                        log.error(f"❌ Statement #{i}:\n{stmt[:1200]}")
-                        log.error(f"❌ Error: {e}")
-                        log.error("=" * 70)
-                        raise
-    finally:
-        conn.close()
+            execute_statements(conn, statements, source)
+            if table is not None and metrics.active():
+                with conn.cursor() as cur:
+                    cur.execute(TUPLES_WRITTEN_SQL, (table,))
+                    metrics.current_span().add(rows=int(cur.fetchone()[0]))
+            for notice in conn.notices:
+                log.info(notice.strip())
+            del conn.notices[:]
 
 
 def ensure_tables_exist(tables: Iterable[str]) -> None:
@@ -49,8 +163,7 @@ def ensure_tables_exist(tables: Iterable[str]) -> None:
 
     Raises a RuntimeError listing missing tables if any are not present.
     """
-    conn = get_conn()
-    try:
+    with script_conn() as conn:
         cur = conn.cursor()
         missing = []
         for fq in tables:
@@ -60,7 +173,9 @@ def ensure_tables_exist(tables: Iterable[str]) -> None:
                 # assume public schema if not provided
                 schema, table = 'public', fq
 
-            cur.execute(
+            execute_prepared(
+                cur,
+                "etl_table_exists",
                 """
                 SELECT 1 FROM information_schema.tables
                 WHERE table_schema = %s AND table_name = %s
@@ -73,7 +188,14 @@ def ensure_tables_exist(tables: Iterable[str]) -> None:
 
         cur.close()
 
-        if missing:
-            raise RuntimeError(f"Missing tables: {', '.join(missing)}")
-    finally:
-        conn.close()
+    if missing:
+        raise RuntimeError(f"Missing tables: {', '.join(missing)}")
+
+
+def tables_exist(tables: Iterable[str]) -> bool:
+    """Return True when every given table exists (see ensure_tables_exist)."""
+    try:
+        ensure_tables_exist(tables)
+    except RuntimeError:
+        return False
+    return True
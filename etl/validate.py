@@ -0,0 +1,273 @@
+"""Pre-COPY validation of the bronze source files.
+
+A single malformed value (e.g. a bad date) makes COPY abort the whole
+file. ValidatingReader sits between the source file and COPY: it parses
+the CSV in chunks, checks every row against the bronze column types in
+etl.schema, writes rejected rows with their reasons to a reject file and
+hands only the clean rows to COPY through an in-memory buffer.
+
+Clean rows are passed on as their original text (no re-serialization), so
+the data COPY sees is byte-for-byte what the file contains.
+
+Checks per row:
+- number of fields equals the number of columns
+- no NUL characters (PostgreSQL text cannot hold them)
+- "int"       optional sign and digits, within the INT range
+- "date"      YYYY-MM-DD and a real calendar date
+- "timestamp" ISO 8601 date with an optional time
+Empty fields are NULL and always valid; "text" columns are not checked.
+"""
+import csv
+import io
+import logging
+import re
+from itertools import islice
+from operator import itemgetter
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from etl.read_csv import DEFAULT_CHUNK_SIZE
+from etl.schema import get_schema
+
+
+log = logging.getLogger("bronze_validate")
+
+INT_MIN = -2**31
+INT_MAX = 2**31 - 1
+INT_PATTERN = re.compile(r"[+-]?\d+")
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+REJECT_FIELDS = ["line_number", "column", "value", "reason", "raw_row"]
+
+
+# --------------------------------------------------
+# Value checks: return None when valid, else a reason
+# --------------------------------------------------
+def check_int(value: str) -> Optional[str]:
+    # fast path for the common case: plain digits that fit in INT
+    if len(value) < 10 and value.isascii() and value.isdigit():
+        return None
+    value = value.strip()
+    if not value:
+        return None
+    if not INT_PATTERN.fullmatch(value):
+        return "not an integer"
+    if not INT_MIN <= int(value) <= INT_MAX:
+        return "integer out of range"
+    return None
+
+
+def check_date(value: str) -> Optional[str]:
+    value = value.strip()
+    if not value:
+        return None
+    if not DATE_PATTERN.fullmatch(value):
+        return "not a YYYY-MM-DD date"
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return "invalid calendar date"
+    return None
+
+
+def check_timestamp(value: str) -> Optional[str]:
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return "not an ISO 8601 timestamp"
+    return None
+
+
+CHECKS = {
+    "int": check_int,
+    "date": check_date,
+    "timestamp": check_timestamp,
+}
+
+
+# --------------------------------------------------
+# Streaming reader for COPY
+# --------------------------------------------------
+class ValidatingReader:
+    """File-like object for COPY ... FROM STDIN (CSV, no header).
+
+    `lines` are the text lines of the source (with line endings); when
+    `header` is true the first record is skipped. Rejected rows are written
+    to `reject_path` (CSV with line_number, column, value, reason, raw_row).
+    """
+
+    def __init__(self, lines: Iterable[str], table: str, columns: List[str],
+                 reject_path: Path, header: bool = True,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, first_line: int = 1):
+        types = dict(get_schema(table))
+        self.table = table
+        self.columns = columns
+        self.chunk_size = chunk_size
+        self.reject_path = reject_path
+        self.rows = 0
+        self.rejected = 0
+        # (position, name, check) for the columns that need checking
+        self._checks = [
+            (pos, col, CHECKS[types[col]])
+            for pos, col in enumerate(columns)
+            if types.get(col, "text") in CHECKS
+        ]
+        self._lines = iter(lines)
+        self._line = first_line
+        self._buffer = io.StringIO()
+        self._done = False
+        self._eol = None
+        self._reject_file = None
+        self._reject_writer = None
+        # rejects of an earlier load of this table are no longer relevant
+        reject_path.unlink(missing_ok=True)
+        if header:
+            self._records(self._read_lines(1))
+
+    # -- COPY interface ---------------------------------------------------
+    def read(self, size: int = -1) -> str:
+        if size is None or size < 0:
+            parts = [self._buffer.read()]
+            while not self._done:
+                self._fill()
+                parts.append(self._buffer.read())
+            return "".join(parts)
+        data = self._buffer.read(size)
+        while len(data) < size and not self._done:
+            self._fill()
+            data += self._buffer.read(size - len(data))
+        return data
+
+    def close(self):
+        if self._reject_file is not None:
+            self._reject_file.close()
+            self._reject_file = None
+
+    # -- validation -------------------------------------------------------
+    def _read_lines(self, count: int) -> list:
+        """Next `count` lines, extended so no quoted field is left open."""
+        lines = list(islice(self._lines, count))
+        if lines and "".join(lines).count('"') % 2:
+            for line in self._lines:
+                lines.append(line)
+                if line.count('"') % 2:
+                    break
+        return lines
+
+    def _records(self, lines: list):
+        """Parse `lines` into parallel lists of line numbers, field lists
+        and raw record text; blank lines are dropped."""
+        first = self._line
+        self._line += len(lines)
+        if not any('"' in line for line in lines):
+            # no quoting: one record per line, parsed at C speed
+            numbers = range(first, first + len(lines))
+            rows = list(csv.reader(lines))
+            raws = lines
+        else:
+            # quoted fields may span lines; track which lines each record used
+            numbers, rows, raws = [], [], []
+            line_no = first
+            pending = []
+            for line in lines:
+                pending.append(line)
+                raw = "".join(pending)
+                if raw.count('"') % 2:
+                    continue
+                numbers.append(line_no)
+                rows.append(next(csv.reader([raw]), []))
+                raws.append(raw)
+                line_no += len(pending)
+                pending = []
+        if not all(rows):
+            keep = [i for i, row in enumerate(rows) if row]
+            numbers = [numbers[i] for i in keep]
+            rows = [rows[i] for i in keep]
+            raws = [raws[i] for i in keep]
+        return numbers, rows, raws
+
+    def _fill(self):
+        lines = self._read_lines(self.chunk_size)
+        if not lines:
+            self._done = True
+            self.close()
+            return
+        numbers, rows, raws = self._records(lines)
+        if self._eol is None:
+            self._eol = "\r\n" if lines[0].endswith("\r\n") else "\n"
+
+        width = len(self.columns)
+        rejected = {}
+        if set(map(len, rows)) - {width} or any("\x00" in raw for raw in raws):
+            for i, (row, raw) in enumerate(zip(rows, raws)):
+                if len(row) != width:
+                    rejected[i] = ("", "", f"expected {width} fields, got {len(row)}")
+                elif "\x00" in raw:
+                    rejected[i] = ("", "", "NUL character")
+
+        # column by column; each distinct value is checked once
+        good = [row for i, row in enumerate(rows) if i not in rejected] if rejected else rows
+        for pos, col, check in self._checks:
+            bad = {}
+            for value in set(map(itemgetter(pos), good)):
+                reason = check(value)
+                if reason is not None:
+                    bad[value] = reason
+            if not bad:
+                continue
+            for i, row in enumerate(rows):
+                if i not in rejected and row[pos] in bad:
+                    rejected[i] = (col, row[pos], bad[row[pos]])
+
+        clean = raws
+        if rejected:
+            for i in sorted(rejected):
+                self._reject(numbers[i], raws[i], *rejected[i])
+            clean = [raw for i, raw in enumerate(raws) if i not in rejected]
+
+        out = io.StringIO()
+        out.write(self._buffer.read())
+        out.write("".join(clean))
+        # the last line of a file may have no line break; COPY expects the
+        # same line ending throughout
+        if clean and not clean[-1].endswith("\n"):
+            out.write(self._eol)
+        self.rows += len(clean)
+        out.seek(0)
+        self._buffer = out
+
+    def _reject(self, line: int, raw: str, column: str, value: str, reason: str):
+        if self._reject_writer is None:
+            self.reject_path.parent.mkdir(parents=True, exist_ok=True)
+            self._reject_file = self.reject_path.open("w", newline="", encoding="utf-8")
+            self._reject_writer = csv.writer(self._reject_file)
+            self._reject_writer.writerow(REJECT_FIELDS)
+        self._reject_writer.writerow([line, column, value, reason, raw.rstrip("\r\n")])
+        self.rejected += 1
+
+
+def byte_lines(stream, block_size: int = 1024 * 1024, strip_bom: bool = False) -> Iterator[str]:
+    """Decode a binary stream (anything with read(n) -> bytes) into text lines."""
+    pending = b""
+    first = strip_bom
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        if first:
+            block = block.removeprefix(b"\xef\xbb\xbf")
+            first = False
+        lines = (pending + block).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.decode("utf-8") + "\n"
+    if pending:
+        yield pending.decode("utf-8")
+
+
+def reject_path(reject_dir: Path, table: str) -> Path:
+    return reject_dir / f"{table}.rejects.csv"
@@ -5,18 +5,82 @@ DDL Script: Create Bronze Tables
 Purpose:
     Defines and creates tables in the 'bronze' schema.
     Existing Bronze tables are dropped and recreated to ensure a clean
-    raw data layer for ingestion.
+    raw data layer for ingestion. File watermarks used by the incremental
+    bronze load are cleared, since the tables they describe are now empty.
+    Every table carries a technical dwh_row_id column (not present in the
+    source files) that the incremental silver load uses as its watermark.
+    The drops cascade to the silver.<table>_source views, which the silver
+    procedures script re-creates.
 ===============================================================================
 */
 
 
 -- Ensure schema exists
 CREATE SCHEMA IF NOT EXISTS bronze;
+CREATE SCHEMA IF NOT EXISTS meta;
+
+-- =========================
+-- meta.bronze_file_state (incremental load watermarks)
+-- =========================
+CREATE TABLE IF NOT EXISTS meta.bronze_file_state (
+    table_name    TEXT PRIMARY KEY,
+    file_path     TEXT NOT NULL,
+    file_size     BIGINT NOT NULL,
+    file_mtime    DOUBLE PRECISION NOT NULL,
+    content_hash  TEXT NOT NULL,
+    byte_offset   BIGINT NOT NULL,
+    row_count     BIGINT,
+    line_count    BIGINT,
+    updated_at    TIMESTAMP DEFAULT NOW()
+);
+
+TRUNCATE TABLE meta.bronze_file_state;
+
+-- =========================
+-- meta.bronze_shard_state (shards of globbed sources already loaded)
+-- =========================
+CREATE TABLE IF NOT EXISTS meta.bronze_shard_state (
+    table_name    TEXT NOT NULL,
+    shard_path    TEXT NOT NULL,
+    file_size     BIGINT NOT NULL,
+    file_mtime    DOUBLE PRECISION NOT NULL,
+    content_hash  TEXT NOT NULL,
+    row_count     BIGINT,
+    loaded_at     TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (table_name, shard_path)
+);
+
+TRUNCATE TABLE meta.bronze_shard_state;
+
+-- Row ids keep increasing across drops and reloads, so the incremental
+-- silver load can use them as a watermark (see meta.pipeline_state).
+CREATE SEQUENCE IF NOT EXISTS meta.bronze_row_id_seq;
+
+-- Shadow and previous generations of the tables (scripts/proc_shadow_swap.sql)
+-- have the old structure
+DO $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT oid::regclass AS relation
+        FROM pg_class
+        WHERE relnamespace = 'bronze'::regnamespace
+          AND relkind IN ('r', 'p')
+          AND NOT relispartition
+          AND (relname LIKE '%\_shadow' OR relname LIKE '%\_previous')
+    LOOP
+        EXECUTE format('DROP TABLE %s', r.relation);
+    END LOOP;
+    IF to_regclass('meta.table_generation') IS NOT NULL THEN
+        DELETE FROM meta.table_generation WHERE table_name LIKE 'bronze.%';
+    END IF;
+END $$;
 
 -- =========================
 -- crm_cust_info
 -- =========================
-DROP TABLE IF EXISTS bronze.crm_cust_info;
+DROP TABLE IF EXISTS bronze.crm_cust_info CASCADE;
 
 CREATE TABLE bronze.crm_cust_info (
     cst_id              INT,
@@ -25,13 +89,15 @@ CREATE TABLE bronze.crm_cust_info (
     cst_lastname        TEXT,
     cst_marital_status  TEXT,
     cst_gndr            TEXT,
-    cst_create_date     DATE
+    cst_create_date     DATE,
+    dwh_row_id          BIGINT DEFAULT nextval('meta.bronze_row_id_seq')
 );
+CREATE INDEX ON bronze.crm_cust_info USING brin (dwh_row_id);
 
 -- =========================
 -- crm_prd_info
 -- =========================
-DROP TABLE IF EXISTS bronze.crm_prd_info;
+DROP TABLE IF EXISTS bronze.crm_prd_info CASCADE;
 
 CREATE TABLE bronze.crm_prd_info (
     prd_id        INT,
@@ -40,13 +106,15 @@ CREATE TABLE bronze.crm_prd_info (
     prd_cost      INT,
     prd_line      TEXT,
     prd_start_dt  TIMESTAMP,
-    prd_end_dt    TIMESTAMP
+    prd_end_dt    TIMESTAMP,
+    dwh_row_id    BIGINT DEFAULT nextval('meta.bronze_row_id_seq')
 );
+CREATE INDEX ON bronze.crm_prd_info USING brin (dwh_row_id);
 
 -- =========================
 -- crm_sales_details
 -- =========================
-DROP TABLE IF EXISTS bronze.crm_sales_details;
+DROP TABLE IF EXISTS bronze.crm_sales_details CASCADE;
 
 CREATE TABLE bronze.crm_sales_details (
     sls_ord_num   TEXT,
@@ -57,84 +125,100 @@ CREATE TABLE bronze.crm_sales_details (
     sls_due_dt    INT,
     sls_sales     INT,
     sls_quantity  INT,
-    sls_price     INT
+    sls_price     INT,
+    dwh_row_id    BIGINT DEFAULT nextval('meta.bronze_row_id_seq')
 );
+CREATE INDEX ON bronze.crm_sales_details USING brin (dwh_row_id);
 
 -- =========================
 -- erp_loc_info
 -- =========================
-DROP TABLE IF EXISTS bronze.erp_loc_info;
+DROP TABLE IF EXISTS bronze.erp_loc_info CASCADE;
 
 CREATE TABLE bronze.erp_loc_info (
     cid    TEXT,
-    cntry  TEXT
+    cntry  TEXT,
+    dwh_row_id BIGINT DEFAULT nextval('meta.bronze_row_id_seq')
 );
+CREATE INDEX ON bronze.erp_loc_info USING brin (dwh_row_id);
 
 -- =========================
 -- erp_cust_info
 -- =========================
-DROP TABLE IF EXISTS bronze.erp_cust_info;
+DROP TABLE IF EXISTS bronze.erp_cust_info CASCADE;
 
 CREATE TABLE bronze.erp_cust_info (
     cid    TEXT,
     bdate  DATE,
-    gen    TEXT
+    gen    TEXT,
+    dwh_row_id BIGINT DEFAULT nextval('meta.bronze_row_id_seq')
 );
+CREATE INDEX ON bronze.erp_cust_info USING brin (dwh_row_id);
 
 -- =========================
 -- erp_px_cat_info
 -- =========================
-DROP TABLE IF EXISTS bronze.erp_px_cat_info;
+DROP TABLE IF EXISTS bronze.erp_px_cat_info CASCADE;
 
 CREATE TABLE bronze.erp_px_cat_info (
     id           TEXT,
     cat          TEXT,
     subcat       TEXT,
-    maintenance  TEXT
+    maintenance  TEXT,
+    dwh_row_id   BIGINT DEFAULT nextval('meta.bronze_row_id_seq')
 );
+CREATE INDEX ON bronze.erp_px_cat_info USING brin (dwh_row_id);
 
 -- =========================
 -- marketing_salesperson
 -- =========================
-DROP TABLE IF EXISTS bronze.marketing_salesperson;
+DROP TABLE IF EXISTS bronze.marketing_salesperson CASCADE;
 CREATE TABLE bronze.marketing_salesperson (
     salesperson_id TEXT PRIMARY KEY,
     name TEXT NOT NULL,
     region TEXT,
-    email TEXT
+    email TEXT,
+    dwh_row_id BIGINT DEFAULT nextval('meta.bronze_row_id_seq')
 );
+CREATE INDEX ON bronze.marketing_salesperson USING brin (dwh_row_id);
 
 
 
 -- =========================
 -- marketing_salesperson_sales
 -- =========================
-DROP TABLE IF EXISTS bronze.marketing_salesperson_sales;
+DROP TABLE IF EXISTS bronze.marketing_salesperson_sales CASCADE;
 CREATE TABLE bronze.marketing_salesperson_sales (
     salesperson_id TEXT,
-    sls_ord_num TEXT
+    sls_ord_num TEXT,
+    dwh_row_id BIGINT DEFAULT nextval('meta.bronze_row_id_seq')
 );
+CREATE INDEX ON bronze.marketing_salesperson_sales USING brin (dwh_row_id);
 
 
 -- =========================
 -- marketing_discount_info
 -- =========================
-DROP TABLE IF EXISTS bronze.marketing_discount_info;
+DROP TABLE IF EXISTS bronze.marketing_discount_info CASCADE;
 CREATE TABLE bronze.marketing_discount_info (
     discount_id TEXT,
     description TEXT,
     percent INT,
-    active TEXT
+    active TEXT,
+    dwh_row_id BIGINT DEFAULT nextval('meta.bronze_row_id_seq')
 );
+CREATE INDEX ON bronze.marketing_discount_info USING brin (dwh_row_id);
 
 
 -- =========================
 -- marketing_sales_discount
 -- =========================
-DROP TABLE IF EXISTS bronze.marketing_sales_discount;
+DROP TABLE IF EXISTS bronze.marketing_sales_discount CASCADE;
 CREATE TABLE bronze.marketing_sales_discount (
     discount_id TEXT,
-    sls_ord_num TEXT
+    sls_ord_num TEXT,
+    dwh_row_id BIGINT DEFAULT nextval('meta.bronze_row_id_seq')
 );
+CREATE INDEX ON bronze.marketing_sales_discount USING brin (dwh_row_id);
 
 
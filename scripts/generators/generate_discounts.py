@@ -16,26 +16,20 @@ Usage:
 Notes:
  - If `<output-dir>/discount_info.csv` exists it will be used; otherwise a sample roster of N discounts is generated and written there.
  - Assignment is deterministic by hashing `sls_ord_num` so repeated runs are stable.
+ - The sales file is processed in chunks by mapping_engine.write_mapping, so memory stays bounded.
 """
 import argparse
 import csv
-import hashlib
-import shutil
-import time
 from pathlib import Path
 from typing import List, Dict
 
+from mapping_engine import write_mapping
+
 ROOT = Path(__file__).resolve().parents[2]
 DEFAULT_INPUT = ROOT / "datasets" / "source_crm" / "sales_details.csv"
 DEFAULT_OUTPUT_DIR = ROOT / "datasets" / "source_marketing"
 
 
-def load_sales(file_path: Path) -> List[Dict[str, str]]:
-    with file_path.open("r", newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return list(reader)
-
-
 def load_or_make_discounts(file_path: Path, n: int) -> List[Dict[str, str]]:
     if file_path.exists():
         with file_path.open("r", newline="", encoding="utf-8") as f:
@@ -57,89 +51,21 @@ def load_or_make_discounts(file_path: Path, n: int) -> List[Dict[str, str]]:
     return roster
 
 
-def stable_assign(key_value: str, ids: List[str]) -> str:
-    key = (key_value or "").encode("utf-8")
-    h = hashlib.md5(key).hexdigest()
-    idx = int(h[:8], 16) % len(ids)
-    return ids[idx]
-
-
-def generate_files(discounts: List[Dict[str, str]], sales_rows: List[Dict[str, str]], per_discount: bool, map_file: Path, per_dir: Path, include_amount: bool, backup: bool = False, append: bool = False):
+def generate_files(discounts: List[Dict[str, str]], sales_file: Path, per_discount: bool, map_file: Path, per_dir: Path, include_amount: bool, backup: bool = False, append: bool = False) -> int:
     disc_ids = [d["discount_id"] for d in discounts]
-    map_file.parent.mkdir(parents=True, exist_ok=True)
-
-    # backup existing mapping if requested and not appending
-    if backup and map_file.exists() and not append:
-        ts = int(time.time())
-        bak = map_file.with_name(map_file.name + f".bak.{ts}")
-        shutil.copy2(map_file, bak)
-
-    # load existing pairs if appending
-    existing = set()
-    if append and map_file.exists():
-        with map_file.open("r", newline="", encoding="utf-8") as mf:
-            reader = csv.reader(mf)
-            try:
-                header = next(reader)
-            except StopIteration:
-                header = None
-            for r in reader:
-                if not r:
-                    continue
-                existing.add((r[0], r[1]))
-
-    mode = "a" if append and map_file.exists() else "w"
-    write_header = True
-    if mode == "a":
-        write_header = False
-
-    with map_file.open(mode, newline="", encoding="utf-8") as mf:
-        if include_amount:
-            writer = csv.writer(mf)
-            if write_header:
-                writer.writerow(["discount_id", "sls_ord_num", "sls_sales"])
-        else:
-            writer = csv.writer(mf)
-            if write_header:
-                writer.writerow(["discount_id", "sls_ord_num"])
-
-        per_files = {}
-        if per_discount:
-            per_dir.mkdir(parents=True, exist_ok=True)
-
-        for row in sales_rows:
-            ord_num = row.get("sls_ord_num")
-            sales_amt = row.get("sls_sales")
-            disc = stable_assign(ord_num, disc_ids)
-
-            if (disc, ord_num) in existing:
-                continue
-
-            if include_amount:
-                writer.writerow([disc, ord_num, sales_amt])
-            else:
-                writer.writerow([disc, ord_num])
-
-            existing.add((disc, ord_num))
-
-            if per_discount:
-                pf = per_dir / f"{disc}.csv"
-                if append and pf.exists():
-                    pw = csv.writer(pf.open("a", newline="", encoding="utf-8"))
-                else:
-                    pw = csv.writer(pf.open("w", newline="", encoding="utf-8"))
-                    if include_amount:
-                        pw.writerow(["sls_ord_num", "sls_sales"])
-                    else:
-                        pw.writerow(["sls_ord_num"])
-                if include_amount:
-                    pw.writerow([ord_num, sales_amt])
-                else:
-                    pw.writerow([ord_num])
-
-        if per_discount:
-            # files opened per write, nothing to close here
-            pass
+    value_columns = ["sls_ord_num", "sls_sales"] if include_amount else ["sls_ord_num"]
+
+    return write_mapping(
+        sales_file,
+        disc_ids,
+        key_column="sls_ord_num",
+        value_columns=value_columns,
+        map_file=map_file,
+        map_header=["discount_id"] + value_columns,
+        per_dir=per_dir if per_discount else None,
+        backup=backup,
+        append=append,
+    )
 
 
 def main():
@@ -163,14 +89,12 @@ def main():
         print(f"Sales file not found: {SALES_FILE}")
         return
 
-    sales_rows = load_sales(SALES_FILE)
-    print(f"Loaded {len(sales_rows)} sales rows from {SALES_FILE}")
-
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     discounts = load_or_make_discounts(DISC_FILE, args.discount_count)
     print(f"Using {len(discounts)} discounts (discount roster at: {DISC_FILE})")
 
-    generate_files(discounts, sales_rows, args.per_discount, MAP_FILE, PER_DIR, args.include_amount, backup=args.backup, append=args.append)
+    row_count = generate_files(discounts, SALES_FILE, args.per_discount, MAP_FILE, PER_DIR, args.include_amount, backup=args.backup, append=args.append)
+    print(f"Read {row_count} sales rows from {SALES_FILE}")
     print(f"Wrote mapping file: {MAP_FILE}")
     if args.per_discount:
         print(f"Wrote per-discount files to: {PER_DIR}")
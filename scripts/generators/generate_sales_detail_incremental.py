@@ -0,0 +1,554 @@
+"""Generate a synthetic, scalable copy of every bronze source for load testing
+
+The shipped datasets top out at ~60k sales lines. This script writes the full
+set of CRM, ERP and marketing CSVs at a configurable scale factor, in the
+same layout the bronze loader reads (see etl.load_bronze.TABLES), so a run is
+just:
+    DATA_DIR=datasets_synthetic/x100 python -m etl.run_pipeline
+
+Outputs (relative to the output directory):
+ - source_crm/{cust_info,prd_info,sales_details}.csv
+ - source_erp/{cust_info,loc_info,px_cat_info}.csv
+ - source_marketing/{salesperson,discount_info,salesperson_sales,sales_discount}.csv
+ - _generator_state.json     (scale, seed, counters; needed by --daily)
+
+Usage:
+    python scripts/generators/generate_sales_detail_incremental.py --scale 100 [--output-dir <dir>] [--workers 4]
+    python scripts/generators/generate_sales_detail_incremental.py --output-dir <dir> --daily 7
+
+Notes:
+ - At 1x the row counts match the shipped data (~18.5k customers, ~27.7k
+   orders, ~60k sales lines); customers, orders and salespeople scale
+   linearly, products with the square root of the scale factor.
+ - Every sales line references an existing customer and a current product;
+   every order gets exactly one salesperson and one discount, assigned with
+   the same MD5 rule as generate_salesperson_files.py / generate_discounts.py.
+ - The dirty patterns cleaned by proc_load_silver.sql are injected at
+   --dirty-rate: untrimmed names, duplicate/NULL customer ids, bad yyyymmdd
+   dates, negative/missing prices and sales, NAS-prefixed and dashed ERP ids,
+   country codes, out-of-range birthdates and invalid emails.
+ - Output is deterministic for a given --scale/--seed/--chunk-size, whatever
+   --workers is: rows are generated in fixed chunks, each with its own seed,
+   and written in chunk order as they arrive, so memory stays bounded.
+ - --daily N appends N days of new orders, new customers and customer updates
+   to an existing output directory (ready for BRONZE_MODE=incremental).
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from mapping_engine import assign_batch
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from etl.load_bronze import TABLES  # noqa: E402
+
+DEFAULT_OUTPUT_DIR = ROOT / "datasets_synthetic"
+REFERENCE_CATEGORIES = ROOT / "datasets" / "source_erp" / "PX_CAT_INFO.csv"
+STATE_FILE = "_generator_state.json"
+
+# Row counts of the shipped datasets (scale factor 1)
+BASE_CUSTOMERS = 18_484
+BASE_ORDERS = 27_659
+BASE_PRODUCTS = 295
+BASE_SALESPEOPLE = 10
+DISCOUNT_PERCENTS = [5, 10, 15, 20, 25]
+
+FIRST_CUSTOMER_ID = 11_000
+FIRST_ORDER_NUMBER = 43_697
+FIRST_ORDER_DATE = date(2010, 12, 29)
+LAST_ORDER_DATE = date(2014, 1, 28)
+PRODUCT_VERSION_DATES = [date(2011, 7, 1), date(2012, 7, 1), date(2013, 7, 1)]
+DAILY_ORDERS = 25      # per day at 1x, roughly the shipped order rate
+DAILY_CUSTOMERS = 6    # new customers per day at 1x
+DAILY_UPDATES = 3      # re-sent (updated) customers per day at 1x
+
+COUNTRIES = ["Australia", "Canada", "France", "Germany", "United Kingdom", "United States"]
+COUNTRY_CODES = ["DE", "US", "USA", "", " "]
+FIRST_NAMES = ["Jon", "Eugene", "Ruben", "Christy", "Elizabeth", "Julio", "Janet", "Marco", "Rob", "Shannon"]
+LAST_NAMES = ["Yang", "Huang", "Torres", "Zhu", "Johnson", "Ruiz", "Alvarez", "Mehta", "Verhoff", "Carlson"]
+
+DEFAULT_CHUNK_SIZE = 100_000
+DEFAULT_DIRTY_RATE = 0.01
+
+HEADERS = {
+    "bronze.crm_cust_info": ["cst_id", "cst_key", "cst_firstname", "cst_lastname", "cst_marital_status", "cst_gndr", "cst_create_date"],
+    "bronze.crm_prd_info": ["prd_id", "prd_key", "prd_nm", "prd_cost", "prd_line", "prd_start_dt", "prd_end_dt"],
+    "bronze.crm_sales_details": ["sls_ord_num", "sls_prd_key", "sls_cust_id", "sls_order_dt", "sls_ship_dt", "sls_due_dt", "sls_sales", "sls_quantity", "sls_price"],
+    "bronze.erp_loc_info": ["CID", "CNTRY"],
+    "bronze.erp_cust_info": ["CID", "BDATE", "GEN"],
+    "bronze.erp_px_cat_info": ["ID", "CAT", "SUBCAT", "MAINTENANCE"],
+    "bronze.marketing_discount_info": ["discount_id", "description", "percent", "active"],
+    "bronze.marketing_salesperson": ["salesperson_id", "name", "region", "email"],
+    "bronze.marketing_salesperson_sales": ["salesperson_id", "sls_ord_num"],
+    "bronze.marketing_sales_discount": ["discount_id", "sls_ord_num"],
+}
+
+# Seed streams: every chunk of every table gets its own generator
+STREAM_CUSTOMERS = 1
+STREAM_ORDERS = 2
+STREAM_PRODUCTS = 3
+STREAM_DAILY = 4
+
+
+# --------------------------------------------------
+# Sizing and static dimensions
+# --------------------------------------------------
+def sizes(scale: int) -> Dict[str, int]:
+    return {
+        "customers": BASE_CUSTOMERS * scale,
+        "orders": BASE_ORDERS * scale,
+        "products": int(round(BASE_PRODUCTS * scale ** 0.5)),
+        "salespeople": BASE_SALESPEOPLE * scale,
+    }
+
+
+def load_categories() -> List[List[str]]:
+    with REFERENCE_CATEGORIES.open("r", newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        next(reader)
+        return [row for row in reader if row]
+
+
+def make_products(n: int, seed: int) -> Tuple[List[List[str]], List[str], np.ndarray]:
+    """Product history rows plus the current sales keys and their prices.
+
+    Each product has 1-3 versions starting on PRODUCT_VERSION_DATES; the raw
+    prd_end_dt is left blank or wrong on purpose, silver rebuilds it.
+    """
+    rng = np.random.default_rng([seed, STREAM_PRODUCTS])
+    categories = load_categories()
+    rows, keys = [], []
+    costs = rng.integers(1, 2_000, size=n)
+    versions = rng.integers(1, len(PRODUCT_VERSION_DATES) + 1, size=n)
+    lines = rng.choice(["M ", "R ", "S ", "T ", ""], size=n)
+    prd_id = 210
+    for i in range(n):
+        cat_id, _, subcat, _ = categories[i % len(categories)]
+        sales_key = f"{subcat[:2].upper()}-{i:05d}"
+        prd_key = f"{cat_id.replace('_', '-')}-{sales_key}"
+        starts = PRODUCT_VERSION_DATES[-versions[i]:]
+        for v, start in enumerate(starts):
+            cost = int(costs[i] * (1 + 0.05 * v))
+            if v + 1 < len(starts):
+                # historical version: end date before its own start date
+                end = (start - timedelta(days=365)).isoformat()
+            else:
+                end = ""
+            rows.append([
+                prd_id,
+                prd_key,
+                f"{subcat} {i:05d}",
+                "" if rng.random() < 0.1 else cost,
+                lines[i],
+                start.isoformat(),
+                end,
+            ])
+            prd_id += 1
+        keys.append(sales_key)
+    prices = (costs * 1.6 * (1 + 0.05 * (versions - 1))).astype(np.int64) + 1
+    return rows, keys, prices
+
+
+def make_salespeople(n: int, dirty_rate: float) -> List[List[str]]:
+    width = max(3, len(str(n)))
+    regions = ["North", "South", "East", "West", "N/A"]
+    # the last few salespeople get an invalid email
+    n_invalid = max(1, int(round(n * dirty_rate))) if dirty_rate > 0 else 0
+    rows = []
+    for i in range(1, n + 1):
+        name = f"Salesperson {i:02d}"
+        email = f"{name.replace(' ', '').lower()}@example.com"
+        if i > n - n_invalid:
+            email = email.replace("@", "(at)")
+        rows.append([f"SP{str(i).zfill(width)}", name, regions[i % len(regions)], email])
+    return rows
+
+
+def make_discounts() -> List[List[str]]:
+    return [
+        [f"D{str(i).zfill(3)}", f"Promo {pct}% off", pct, "true" if i < len(DISCOUNT_PERCENTS) else "false"]
+        for i, pct in enumerate(DISCOUNT_PERCENTS, start=1)
+    ]
+
+
+# --------------------------------------------------
+# Chunk generators (run in worker processes)
+# --------------------------------------------------
+def _csv_text(rows) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    return buf.getvalue()
+
+
+def _yyyymmdd(days: np.ndarray) -> np.ndarray:
+    dates = np.datetime64(FIRST_ORDER_DATE.isoformat()) + days.astype("timedelta64[D]")
+    return np.char.replace(np.datetime_as_string(dates, unit="D"), "-", "").astype(np.int64)
+
+
+def _iso(days: np.ndarray) -> List[str]:
+    dates = np.datetime64(FIRST_ORDER_DATE.isoformat()) + days.astype("timedelta64[D]")
+    return np.datetime_as_string(dates, unit="D").tolist()
+
+
+def customers_chunk(task: dict) -> Dict[str, str]:
+    """CRM and ERP rows for customers [lo, hi); `day` is the create date
+    (days since FIRST_ORDER_DATE) or None for a spread over the base period."""
+    lo, hi, dirty = task["lo"], task["hi"], task["dirty_rate"]
+    rng = np.random.default_rng(task["seed"])
+    n = hi - lo
+    idx = np.arange(lo, hi)
+    cst_id = FIRST_CUSTOMER_ID + idx
+    span = (LAST_ORDER_DATE - FIRST_ORDER_DATE).days
+    if task.get("day") is None:
+        created = rng.integers(0, span, size=n)
+    else:
+        created = np.full(n, task["day"])
+
+    first = np.array(FIRST_NAMES)[rng.integers(len(FIRST_NAMES), size=n)]
+    last = np.array(LAST_NAMES)[rng.integers(len(LAST_NAMES), size=n)]
+    pad = rng.random(n) < dirty * 5
+    first = np.where(pad, np.char.add(" ", first), first)
+    last = np.where(rng.random(n) < dirty * 5, np.char.add(last, "  "), last)
+    marital = rng.choice(["M", "S", "M ", "s", ""], size=n, p=[0.45, 0.45, 0.04, 0.04, 0.02])
+    gender = rng.choice(["M", "F", "f", ""], size=n, p=[0.4, 0.4, 0.05, 0.15])
+    keys = [f"AW{c:08d}" for c in cst_id.tolist()]
+    created_iso = _iso(created)
+
+    crm = [
+        [c, k, f, l, m, g, d]
+        for c, k, f, l, m, g, d in zip(
+            cst_id.tolist(), keys, first.tolist(), last.tolist(), marital.tolist(), gender.tolist(), created_iso
+        )
+    ]
+    # older duplicates (silver keeps the latest create date) and NULL ids
+    dup = np.flatnonzero(rng.random(n) < dirty).tolist()
+    for i in dup:
+        older = _iso(np.array([max(0, created[i] - 30)]))[0]
+        crm.append([cst_id[i], keys[i], first[i], last[i], "", "", older])
+    for i in np.flatnonzero(rng.random(n) < dirty / 5).tolist():
+        crm.append(["", keys[i], first[i], last[i], "", "", created_iso[i]])
+
+    # ERP: NAS-prefixed ids, mixed gender spellings, out-of-range birthdates
+    nas = rng.random(n) < 0.5
+    erp_ids = [("NAS" + k) if p else k for k, p in zip(keys, nas.tolist())]
+    birth = np.datetime_as_string(
+        np.datetime64("1940-01-01") + rng.integers(0, 50 * 365, size=n).astype("timedelta64[D]"), unit="D"
+    ).tolist()
+    for i in np.flatnonzero(rng.random(n) < dirty).tolist():
+        birth[i] = "9999-09-11" if i % 2 else "1916-02-10"
+    gen = rng.choice(["Male", "Female", "M", "F", ""], size=n, p=[0.4, 0.4, 0.05, 0.05, 0.1]).tolist()
+    erp_cust = zip(erp_ids, birth, gen)
+
+    # ERP locations: dashed ids and country codes next to full names
+    loc_ids = [f"{k[:2]}-{k[2:]}" for k in keys]
+    country = np.array(COUNTRIES)[rng.integers(len(COUNTRIES), size=n)]
+    coded = rng.random(n) < 0.25
+    country = np.where(coded, np.array(COUNTRY_CODES)[rng.integers(len(COUNTRY_CODES), size=n)], country).tolist()
+    erp_loc = zip(loc_ids, country)
+
+    return {
+        "bronze.crm_cust_info": _csv_text(crm),
+        "bronze.erp_cust_info": _csv_text(erp_cust),
+        "bronze.erp_loc_info": _csv_text(erp_loc),
+    }
+
+
+def updates_chunk(task: dict) -> Dict[str, str]:
+    """Re-send existing customers with a newer create date and new attributes."""
+    rng = np.random.default_rng(task["seed"])
+    ids = rng.integers(0, task["customers"], size=task["count"]) + FIRST_CUSTOMER_ID
+    created = _iso(np.array([task["day"]]))[0]
+    rows = [
+        [c, f"AW{c:08d}", FIRST_NAMES[c % len(FIRST_NAMES)], LAST_NAMES[c % len(LAST_NAMES)], m, g, created]
+        for c, m, g in zip(
+            ids.tolist(),
+            rng.choice(["M", "S"], size=len(ids)).tolist(),
+            rng.choice(["M", "F"], size=len(ids)).tolist(),
+        )
+    ]
+    return {"bronze.crm_cust_info": _csv_text(rows)}
+
+
+def orders_chunk(task: dict) -> Dict[str, str]:
+    """Sales lines and marketing mappings for orders [lo, hi)."""
+    lo, hi, dirty = task["lo"], task["hi"], task["dirty_rate"]
+    rng = np.random.default_rng(task["seed"])
+    product_keys = np.array(task["product_keys"], dtype=object)
+    prices = np.asarray(task["prices"])
+    n_products = len(product_keys)
+    n = hi - lo
+
+    ord_idx = np.arange(lo, hi)
+    ord_num = np.array([f"SO{FIRST_ORDER_NUMBER + i}" for i in ord_idx.tolist()], dtype=object)
+    customer = FIRST_CUSTOMER_ID + rng.integers(0, task["customers"], size=n)
+    if task.get("day") is None:
+        # orders are numbered in date order across the base period
+        span = (LAST_ORDER_DATE - FIRST_ORDER_DATE).days
+        order_day = ord_idx * span // task["orders"]
+    else:
+        order_day = np.full(n, task["day"])
+
+    # 1-4 distinct products per order
+    lines = rng.choice([1, 2, 3, 4], size=n, p=[0.35, 0.25, 0.27, 0.13])
+    line_order = np.repeat(np.arange(n), lines)
+    line_no = np.arange(len(line_order)) - np.repeat(np.cumsum(lines) - lines, lines)
+    base = rng.integers(0, n_products, size=n)
+    stride = rng.integers(1, max(2, n_products // 4), size=n)
+    product = (base[line_order] + line_no * stride[line_order]) % n_products
+
+    m = len(line_order)
+    order_dt = _yyyymmdd(order_day)[line_order]
+    ship_dt = _yyyymmdd(order_day + 7)[line_order]
+    due_dt = _yyyymmdd(order_day + 12)[line_order]
+    quantity = rng.choice([1, 2, 3], size=m, p=[0.9, 0.07, 0.03])
+    price = prices[product]
+    sales = quantity * price
+
+    # bad dates: 0 or a truncated yyyymmdd
+    bad = rng.random(m) < dirty
+    order_dt = np.where(bad, np.where(rng.random(m) < 0.5, 0, order_dt // 1000), order_dt)
+    ship_dt = np.where(rng.random(m) < dirty / 5, 0, ship_dt)
+
+    # one money defect per line at most: negative/missing price, missing/wrong sales
+    defect = np.where(rng.random(m) < dirty, rng.integers(1, 5, size=m), 0)
+    price_out = price.astype(object)
+    sales_out = sales.astype(object)
+    price_out[defect == 1] = -price[defect == 1]
+    price_out[defect == 2] = ""
+    sales_out[defect == 3] = ""
+    sales_out[defect == 4] = sales[defect == 4] * 10
+
+    sales_rows = zip(
+        ord_num[line_order].tolist(),
+        product_keys[product].tolist(),
+        customer[line_order].tolist(),
+        order_dt.tolist(),
+        ship_dt.tolist(),
+        due_dt.tolist(),
+        sales_out.tolist(),
+        quantity.tolist(),
+        price_out.tolist(),
+    )
+
+    # one salesperson (by customer) and one discount (by order) per order
+    salesperson = assign_batch(np.char.mod("%d", customer).astype(object), task["salesperson_ids"])
+    discount = assign_batch(ord_num, task["discount_ids"])
+
+    return {
+        "bronze.crm_sales_details": _csv_text(sales_rows),
+        "bronze.marketing_salesperson_sales": _csv_text(zip(salesperson.tolist(), ord_num.tolist())),
+        "bronze.marketing_sales_discount": _csv_text(zip(discount.tolist(), ord_num.tolist())),
+    }
+
+
+def _run_task(task: dict) -> Dict[str, str]:
+    return TASKS[task["kind"]](task)
+
+
+TASKS = {
+    "customers": customers_chunk,
+    "updates": updates_chunk,
+    "orders": orders_chunk,
+}
+
+
+# --------------------------------------------------
+# Ordered, bounded, optionally parallel execution
+# --------------------------------------------------
+def run_tasks(tasks: List[dict], outputs: Dict[str, "io.TextIOBase"], workers: int):
+    """Run chunk tasks and append their output in task order."""
+    def write(result: Dict[str, str]):
+        for table, text in result.items():
+            outputs[table].write(text)
+
+    if workers <= 1:
+        for task in tasks:
+            write(_run_task(task))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(_run_task, task))
+            # keep at most 2 chunks per worker in flight
+            if len(pending) >= workers * 2:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+
+
+def chunk_tasks(kind: str, total: int, chunk_size: int, seed_prefix: list, **extra) -> List[dict]:
+    return [
+        dict(kind=kind, lo=lo, hi=min(lo + chunk_size, total), seed=seed_prefix + [i], **extra)
+        for i, lo in enumerate(range(0, total, chunk_size))
+    ]
+
+
+def table_paths(output_dir: Path) -> Dict[str, Path]:
+    return {table: output_dir / rel for table, rel in TABLES}
+
+
+def open_outputs(paths: Dict[str, Path], tables: List[str], append: bool):
+    outputs = {}
+    for table in tables:
+        path = paths[table]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        f = path.open("a" if append else "w", newline="", encoding="utf-8", buffering=1024 * 1024)
+        if not append:
+            csv.writer(f).writerow(HEADERS[table])
+        outputs[table] = f
+    return outputs
+
+
+def write_rows(path: Path, header: List[str], rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+# --------------------------------------------------
+# Full and daily generation
+# --------------------------------------------------
+def dimensions(state: dict):
+    n = sizes(state["scale"])
+    _, product_keys, prices = make_products(n["products"], state["seed"])
+    salespeople = make_salespeople(n["salespeople"], state["dirty_rate"])
+    return {
+        "product_keys": product_keys,
+        "prices": prices.tolist(),
+        "salesperson_ids": [row[0] for row in salespeople],
+        "discount_ids": [row[0] for row in make_discounts()],
+    }
+
+
+def generate_full(output_dir: Path, scale: int, seed: int, dirty_rate: float, workers: int, chunk_size: int) -> dict:
+    n = sizes(scale)
+    paths = table_paths(output_dir)
+    state = {
+        "scale": scale,
+        "seed": seed,
+        "dirty_rate": dirty_rate,
+        "customers": n["customers"],
+        "orders": n["orders"],
+        "last_day": (LAST_ORDER_DATE - FIRST_ORDER_DATE).days,
+    }
+
+    # small dimensions
+    product_rows, _, _ = make_products(n["products"], seed)
+    write_rows(paths["bronze.crm_prd_info"], HEADERS["bronze.crm_prd_info"], product_rows)
+    write_rows(paths["bronze.erp_px_cat_info"], HEADERS["bronze.erp_px_cat_info"], load_categories())
+    write_rows(paths["bronze.marketing_salesperson"], HEADERS["bronze.marketing_salesperson"],
+               make_salespeople(n["salespeople"], dirty_rate))
+    write_rows(paths["bronze.marketing_discount_info"], HEADERS["bronze.marketing_discount_info"], make_discounts())
+
+    # large tables, streamed chunk by chunk
+    dims = dimensions(state)
+    tasks = chunk_tasks("customers", n["customers"], chunk_size, [seed, STREAM_CUSTOMERS], dirty_rate=dirty_rate)
+    tasks += chunk_tasks(
+        "orders", n["orders"], chunk_size, [seed, STREAM_ORDERS],
+        dirty_rate=dirty_rate, customers=n["customers"], orders=n["orders"], **dims,
+    )
+    tables = [
+        "bronze.crm_cust_info", "bronze.erp_cust_info", "bronze.erp_loc_info",
+        "bronze.crm_sales_details", "bronze.marketing_salesperson_sales", "bronze.marketing_sales_discount",
+    ]
+    outputs = open_outputs(paths, tables, append=False)
+    try:
+        run_tasks(tasks, outputs, workers)
+    finally:
+        for f in outputs.values():
+            f.close()
+    return state
+
+
+def generate_daily(output_dir: Path, state: dict, days: int, workers: int, chunk_size: int) -> dict:
+    scale, seed, dirty_rate = state["scale"], state["seed"], state["dirty_rate"]
+    dims = dimensions(state)
+    rng = np.random.default_rng([seed, STREAM_DAILY, state["last_day"]])
+
+    tasks = []
+    for _ in range(days):
+        day = state["last_day"] + 1
+        new_customers = int(rng.poisson(DAILY_CUSTOMERS * scale))
+        new_orders = int(rng.poisson(DAILY_ORDERS * scale))
+        day_seed = [seed, STREAM_DAILY, day]
+
+        for task in chunk_tasks("customers", new_customers, chunk_size, day_seed + [1], dirty_rate=dirty_rate, day=day):
+            task["lo"] += state["customers"]
+            task["hi"] += state["customers"]
+            tasks.append(task)
+        state["customers"] += new_customers
+        tasks.append(dict(kind="updates", count=DAILY_UPDATES * scale, customers=state["customers"],
+                          day=day, seed=day_seed + [2]))
+
+        for task in chunk_tasks("orders", new_orders, chunk_size, day_seed + [3], dirty_rate=dirty_rate,
+                                customers=state["customers"], orders=new_orders, day=day, **dims):
+            task["lo"] += state["orders"]
+            task["hi"] += state["orders"]
+            tasks.append(task)
+        state["orders"] += new_orders
+        state["last_day"] = day
+
+    tables = [
+        "bronze.crm_cust_info", "bronze.erp_cust_info", "bronze.erp_loc_info",
+        "bronze.crm_sales_details", "bronze.marketing_salesperson_sales", "bronze.marketing_sales_discount",
+    ]
+    outputs = open_outputs(table_paths(output_dir), tables, append=True)
+    try:
+        run_tasks(tasks, outputs, workers)
+    finally:
+        for f in outputs.values():
+            f.close()
+    return state
+
+
+def main():
+    p = argparse.ArgumentParser(description="Generate synthetic bronze source files at a given scale")
+    p.add_argument("--output-dir", type=Path, default=DEFAULT_OUTPUT_DIR, help="Directory to write the source_* folders to")
+    p.add_argument("--scale", type=int, default=1, help="Scale factor (1 = shipped dataset size, up to 1000)")
+    p.add_argument("--seed", type=int, default=42, help="Random seed; the same seed and scale give the same files")
+    p.add_argument("--dirty-rate", type=float, default=DEFAULT_DIRTY_RATE, help="Share of rows with injected data quality issues")
+    p.add_argument("--workers", type=int, default=1, help="Worker processes used to generate chunks")
+    p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Customers/orders per generated chunk")
+    p.add_argument("--daily", type=int, default=0, help="Append N daily batches to an existing output directory instead of regenerating")
+    args = p.parse_args()
+
+    if not 1 <= args.scale <= 1000:
+        p.error("--scale must be between 1 and 1000")
+
+    output_dir = args.output_dir
+    state_file = output_dir / STATE_FILE
+
+    if args.daily:
+        if not state_file.exists():
+            p.error(f"{state_file} not found; run a full generation into {output_dir} first")
+        state = json.loads(state_file.read_text(encoding="utf-8"))
+        before = (state["customers"], state["orders"])
+        state = generate_daily(output_dir, state, args.daily, args.workers, args.chunk_size)
+        last = FIRST_ORDER_DATE + timedelta(days=state["last_day"])
+        print(f"Appended {args.daily} day(s) up to {last}: "
+              f"{state['customers'] - before[0]} customers, {state['orders'] - before[1]} orders")
+    else:
+        state = generate_full(output_dir, args.scale, args.seed, args.dirty_rate, args.workers, args.chunk_size)
+        print(f"Generated scale {args.scale}x into {output_dir}: "
+              f"{state['customers']} customers, {state['orders']} orders")
+
+    state_file.write_text(json.dumps(state, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,15 +16,15 @@ Usage:
 Notes:
  - If `<output-dir>/salesperson.csv` exists it will be used; otherwise a sample roster of N salespeople is generated and written there.
  - Assignment is deterministic by hashing `sls_cust_id`; this keeps assignments stable between runs.
+ - The sales file is processed in chunks by mapping_engine.write_mapping, so memory stays bounded.
 """
 import argparse
 import csv
-import hashlib
-import shutil
-import time
 from pathlib import Path
 from typing import List, Dict
 
+from mapping_engine import write_mapping
+
 ROOT = Path(__file__).resolve().parents[2]
 
 # Defaults:
@@ -35,12 +35,6 @@ DEFAULT_OUTPUT_DIR = ROOT / "datasets" / "source_marketing"
 
 
 
-def load_sales(file_path: Path) -> List[Dict[str, str]]:
-    with file_path.open("r", newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return list(reader)
-
-
 def load_or_make_roster(file_path: Path, n: int) -> List[Dict[str, str]]:
     if file_path.exists():
         with file_path.open("r", newline="", encoding="utf-8") as f:
@@ -61,81 +55,20 @@ def load_or_make_roster(file_path: Path, n: int) -> List[Dict[str, str]]:
     return roster
 
 
-def stable_assign(customer_id: str, salesperson_ids: List[str]) -> str:
-    key = (customer_id or "").encode("utf-8")
-    h = hashlib.md5(key).hexdigest()
-    idx = int(h[:8], 16) % len(salesperson_ids)
-    return salesperson_ids[idx]
-
-
-def generate_files(roster: List[Dict[str, str]], sales_rows: List[Dict[str, str]], per_salesperson: bool, map_file: Path, per_dir: Path, backup: bool = False, append: bool = False):
+def generate_files(roster: List[Dict[str, str]], sales_file: Path, per_salesperson: bool, map_file: Path, per_dir: Path, backup: bool = False, append: bool = False) -> int:
     sp_ids = [r["salesperson_id"] for r in roster]
 
-    # ensure output dir exists
-    map_file.parent.mkdir(parents=True, exist_ok=True)
-
-    # backup existing mapping if requested and not appending
-    if backup and map_file.exists() and not append:
-        ts = int(time.time())
-        bak = map_file.with_name(map_file.name + f".bak.{ts}")
-        shutil.copy2(map_file, bak)
-
-    # if appending, load existing pairs to avoid duplicates
-    existing = set()
-    if append and map_file.exists():
-        with map_file.open("r", newline="", encoding="utf-8") as mf:
-            reader = csv.reader(mf)
-            try:
-                header = next(reader)
-            except StopIteration:
-                header = None
-            for r in reader:
-                if not r:
-                    continue
-                existing.add((r[0], r[1]))
-
-    mode = "a" if append and map_file.exists() else "w"
-    write_header = True
-    if mode == "a":
-        # if appending to existing file, don't write header
-        write_header = False
-
-    # write mapping file
-    with map_file.open(mode, newline="", encoding="utf-8") as mf:
-        writer = csv.writer(mf)
-        if write_header:
-            writer.writerow(["salesperson_id", "sls_ord_num"])
-
-        # optionally prepare per-salesperson files map
-        per_files = {}
-        if per_salesperson:
-            per_dir.mkdir(parents=True, exist_ok=True)
-
-        for row in sales_rows:
-            cust = row.get("sls_cust_id")
-            ord_num = row.get("sls_ord_num")
-            sp = stable_assign(cust, sp_ids)
-
-            if (sp, ord_num) in existing:
-                continue
-
-            writer.writerow([sp, ord_num])
-            existing.add((sp, ord_num))
-
-            if per_salesperson:
-                pf = per_dir / f"{sp}.csv"
-                # open per-salesperson file in append if exists and append requested, else write new
-                if append and pf.exists():
-                    pw = csv.writer(pf.open("a", newline="", encoding="utf-8"))
-                else:
-                    pw = csv.writer(pf.open("w", newline="", encoding="utf-8"))
-                    pw.writerow(["sls_ord_num"])
-                pw.writerow([ord_num])
-
-        # close per-salesperson files
-        if per_salesperson:
-            # files were opened and closed per-write; nothing to close here
-            pass
+    return write_mapping(
+        sales_file,
+        sp_ids,
+        key_column="sls_cust_id",
+        value_columns=["sls_ord_num"],
+        map_file=map_file,
+        map_header=["salesperson_id", "sls_ord_num"],
+        per_dir=per_dir if per_salesperson else None,
+        backup=backup,
+        append=append,
+    )
 
 
 def main():
@@ -157,15 +90,13 @@ def main():
         print(f"Sales file not found: {SALES_FILE}")
         return
 
-    sales_rows = load_sales(SALES_FILE)
-    print(f"Loaded {len(sales_rows)} sales rows from {SALES_FILE}")
-
     # ensure output directory exists so roster can be created
     SP_FILE.parent.mkdir(parents=True, exist_ok=True)
     roster = load_or_make_roster(SP_FILE, args.roster)
     print(f"Using {len(roster)} salespeople (roster at: {SP_FILE})")
 
-    generate_files(roster, sales_rows, args.per_salesperson, MAP_FILE, PER_DIR, backup=args.backup, append=args.append)
+    row_count = generate_files(roster, SALES_FILE, args.per_salesperson, MAP_FILE, PER_DIR, backup=args.backup, append=args.append)
+    print(f"Read {row_count} sales rows from {SALES_FILE}")
     print(f"Wrote mapping file: {MAP_FILE}")
     if args.per_salesperson:
         print(f"Wrote per-salesperson files to: {PER_DIR}")
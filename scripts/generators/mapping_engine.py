@@ -0,0 +1,184 @@
+"""Batched engine shared by the salesperson and discount mapping generators.
+
+The sales file is read in chunks of typed-as-text pandas batches:
+ - assignment (`assign_batch`) hashes each distinct key once per chunk
+   (MD5, first 8 hex digits modulo the roster size) and maps the result
+   back onto the rows with NumPy indexing;
+ - already-written (id, sls_ord_num) pairs are tracked as a sorted uint64
+   array of pair hashes instead of a Python set of string tuples;
+ - every output file (mapping file and per-ID files) gets one buffered
+   writer that stays open for the whole run.
+
+Output rows, their order and their bytes match the row-by-row generators.
+"""
+import csv
+import hashlib
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from etl.read_csv import iter_batches  # noqa: E402
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def assign_batch(keys, ids: List[str]) -> np.ndarray:
+    """Stable roster index of each key: the first 8 hex digits of its MD5
+    modulo len(ids), computed once per distinct key in the batch.
+
+    `keys` is a Series or array of str."""
+    codes, uniques = pd.factorize(np.asarray(keys, dtype=object))
+    n = len(ids)
+    md5 = hashlib.md5
+    positions = np.fromiter(
+        (
+            int.from_bytes(md5(key.encode("utf-8")).digest()[:4], "big") % n
+            for key in np.asarray(uniques, dtype=object).tolist()
+        ),
+        dtype=np.int64,
+        count=len(uniques),
+    )
+    return np.asarray(ids, dtype=object)[positions[codes]]
+
+
+def _rows(frame: pd.DataFrame, columns: List[str]):
+    return zip(*(frame[col].tolist() for col in columns))
+
+
+def _pair_hashes(ids: np.ndarray, ord_nums: np.ndarray) -> np.ndarray:
+    pairs = pd.DataFrame({"id": ids, "ord": ord_nums})
+    return pd.util.hash_pandas_object(pairs, index=False).to_numpy()
+
+
+class SeenPairs:
+    """Compact set of (id, sls_ord_num) pairs: a sorted array of 64-bit hashes."""
+
+    def __init__(self):
+        self._hashes = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def _contains(self, hashes: np.ndarray) -> np.ndarray:
+        if len(self._hashes) == 0:
+            return np.zeros(len(hashes), dtype=bool)
+        pos = np.searchsorted(self._hashes, hashes)
+        pos[pos == len(self._hashes)] = 0
+        return self._hashes[pos] == hashes
+
+    def add_new(self, ids: np.ndarray, ord_nums: np.ndarray) -> np.ndarray:
+        """Return a mask of pairs not seen before (first occurrence only) and
+        record them."""
+        hashes = _pair_hashes(ids, ord_nums)
+        mask = ~pd.Series(hashes).duplicated().to_numpy() & ~self._contains(hashes)
+        if mask.any():
+            merged = np.concatenate([self._hashes, hashes[mask]])
+            self._hashes = np.sort(merged, kind="stable")
+        return mask
+
+    def load_mapping(self, map_file: Path, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Record the (id, sls_ord_num) pairs of an existing mapping file."""
+        reader = pd.read_csv(
+            map_file,
+            usecols=[0, 1],
+            dtype=str,
+            keep_default_na=False,
+            chunksize=chunk_size,
+        )
+        with reader:
+            for frame in reader:
+                self.add_new(frame.iloc[:, 0].to_numpy(), frame.iloc[:, 1].to_numpy())
+
+
+class _Writer:
+    def __init__(self, path: Path, mode: str, header: Optional[List[str]]):
+        self.file = path.open(mode, newline="", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+        self.csv = csv.writer(self.file)
+        if header is not None:
+            self.csv.writerow(header)
+
+    def close(self):
+        self.file.close()
+
+
+def write_mapping(
+    sales_file: Path,
+    ids: List[str],
+    key_column: str,
+    value_columns: List[str],
+    map_file: Path,
+    map_header: List[str],
+    per_dir: Optional[Path] = None,
+    backup: bool = False,
+    append: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Assign every sales row to an ID and write the mapping files.
+
+    Rows of `map_file` are `[id, *value_columns]`; `value_columns[0]` must be
+    `sls_ord_num`, which together with the ID forms the dedup key. With
+    `per_dir`, rows are also written to `<per_dir>/<id>.csv` (value columns
+    only). Returns the number of sales rows read.
+    """
+    map_file.parent.mkdir(parents=True, exist_ok=True)
+
+    # backup existing mapping if requested and not appending
+    if backup and map_file.exists() and not append:
+        ts = int(time.time())
+        bak = map_file.with_name(map_file.name + f".bak.{ts}")
+        shutil.copy2(map_file, bak)
+
+    seen = SeenPairs()
+    appending = append and map_file.exists()
+    if appending:
+        seen.load_mapping(map_file, chunk_size)
+
+    if per_dir is not None:
+        per_dir.mkdir(parents=True, exist_ok=True)
+
+    columns = [key_column] + [c for c in value_columns if c != key_column]
+    map_writer = _Writer(map_file, "a" if appending else "w", None if appending else map_header)
+    per_writers: Dict[str, _Writer] = {}
+    row_count = 0
+
+    try:
+        for frame in iter_batches(
+            sales_file, "bronze.crm_sales_details", chunk_size, columns=columns, typed=False
+        ):
+            row_count += len(frame)
+            assigned = assign_batch(frame[key_column], ids)
+            mask = seen.add_new(assigned, frame["sls_ord_num"].to_numpy(dtype=object))
+            if not mask.any():
+                continue
+
+            out = frame.loc[mask, value_columns]
+            out.insert(0, "_id", assigned[mask])
+            map_writer.csv.writerows(_rows(out, ["_id"] + value_columns))
+
+            if per_dir is not None:
+                for assigned_id, group in out.groupby("_id", sort=False):
+                    writer = per_writers.get(assigned_id)
+                    if writer is None:
+                        pf = per_dir / f"{assigned_id}.csv"
+                        if append and pf.exists():
+                            writer = _Writer(pf, "a", None)
+                        else:
+                            writer = _Writer(pf, "w", value_columns)
+                        per_writers[assigned_id] = writer
+                    writer.csv.writerows(_rows(group, value_columns))
+    finally:
+        map_writer.close()
+        for writer in per_writers.values():
+            writer.close()
+
+    return row_count
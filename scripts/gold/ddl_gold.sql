@@ -8,6 +8,44 @@
  data into clean datasets for analytics/reporting.
  ===============================================================================
  */
+-- Drop the gold objects whichever form (view, materialized view or
+-- table) they have
+DO $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT c.relname, c.relkind
+        FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'gold'
+          AND c.relname IN ('fact_sales', 'dim_customers', 'dim_products', 'dim_salesperson', 'dim_discount')
+          AND c.relkind IN ('v', 'm', 'p', 'r')
+        ORDER BY c.relname = 'fact_sales' DESC
+    LOOP
+        EXECUTE format(
+            'DROP %s IF EXISTS gold.%I CASCADE',
+            CASE WHEN r.relkind = 'm' THEN 'MATERIALIZED VIEW' WHEN r.relkind IN ('p', 'r') THEN 'TABLE' ELSE 'VIEW' END,
+            r.relname
+        );
+    END LOOP;
+END $$;
+-- gold.fact_sales is a view here: stop queueing partition rebuilds for it
+DO $$
+BEGIN
+    IF to_regclass('meta.partition_refresh_target') IS NOT NULL THEN
+        DELETE FROM meta.partition_refresh_target WHERE target_table = 'gold.fact_sales';
+        DELETE FROM meta.partition_refresh_queue WHERE target_table = 'gold.fact_sales';
+    END IF;
+END $$;
+-- gold.dim_customers is a view here too: stop queueing customer changes for it
+DO $$
+BEGIN
+    IF to_regclass('meta.dimension_change_target') IS NOT NULL THEN
+        DELETE FROM meta.dimension_change_target WHERE target_table = 'gold.dim_customers';
+        DELETE FROM meta.dimension_change_queue WHERE target_table = 'gold.dim_customers';
+    END IF;
+END $$;
 -- =============================================================================
 -- Dimension View: gold.dim_customers
 -- =============================================================================
@@ -0,0 +1,284 @@
+/*
+ ===============================================================================
+ DDL: Create Gold Sales Aggregates (PostgreSQL)
+ ===============================================================================
+ Purpose:
+ Pre-aggregated summaries of the sales for dashboards, so that revenue by
+ day/month, product category, customer country, salesperson or discount
+ does not re-join the six-way fact for every query. Works on top of either
+ gold variant (views or materialized); the rows come straight from
+ silver.crm_sales_details joined to the gold dimensions, exactly as
+ gold.fact_sales is built.
+
+ Every rollup table holds line_count, quantity and sales_amount per
+ order_month (and order_date for daily rollups) and its dimensions; all
+ measures are additive, so a rollup also answers any coarser grain or any
+ subset of its dimensions. gold.sales_rollup lists the rollups; etl.aggregates
+ reads it to route a query to the smallest rollup that can answer it.
+
+ gold.refresh_aggregates() maintains the rollups by month:
+   - months queued in meta.partition_refresh_queue by the silver sales
+     loads (target gold.sales_aggregates; 'all' after a full silver load)
+   - months of orders whose country, category, salesperson or discount
+     changed since the last refresh (attribute snapshot diff)
+ Only the rows of those months are re-aggregated; the rollup rows of the
+ other months are kept. An empty snapshot (first run, redeployment)
+ rebuilds everything.
+
+ Run:
+ CALL gold.refresh_aggregates();
+ ===============================================================================
+ */
+-- =============================================================================
+-- Row source: one row per fact row, with the attributes the rollups group by
+-- =============================================================================
+CREATE OR REPLACE VIEW gold.sales_aggregate_source AS
+SELECT sd.sls_order_dt AS order_date,
+    date_trunc('month', sd.sls_order_dt)::date AS order_month,
+    pr.category AS category,
+    pr.subcategory AS subcategory,
+    cu.country AS country,
+    sp.salesperson_key AS salesperson_key,
+    sp.salesperson_name AS salesperson_name,
+    sp.region AS region,
+    dd.discount_percent AS discount_percent,
+    sd.sls_quantity AS quantity,
+    sd.sls_sales AS sales_amount
+FROM silver.crm_sales_details sd
+    LEFT JOIN gold.dim_products pr ON sd.sls_prd_key = pr.product_number
+    LEFT JOIN gold.dim_customers cu ON sd.sls_cust_id = cu.customer_id
+    LEFT JOIN silver.marketing_salesperson_sales msp ON sd.sls_ord_num = msp.sls_ord_num
+    LEFT JOIN gold.dim_salesperson sp ON msp.salesperson_id = sp.salesperson_id
+    LEFT JOIN silver.marketing_sales_discount msd ON sd.sls_ord_num = msd.sls_ord_num
+    LEFT JOIN gold.dim_discount dd ON msd.discount_id = dd.discount_id;
+-- =============================================================================
+-- Rollup tables
+-- =============================================================================
+DROP TABLE IF EXISTS gold.agg_sales_day_category;
+CREATE TABLE gold.agg_sales_day_category (
+    order_month  DATE,
+    order_date   DATE,
+    category     TEXT,
+    subcategory  TEXT,
+    line_count   BIGINT NOT NULL,
+    quantity     BIGINT,
+    sales_amount BIGINT
+);
+CREATE INDEX ix_agg_sales_day_category_date ON gold.agg_sales_day_category (order_date);
+
+DROP TABLE IF EXISTS gold.agg_sales_month_category;
+CREATE TABLE gold.agg_sales_month_category (
+    order_month  DATE,
+    category     TEXT,
+    subcategory  TEXT,
+    line_count   BIGINT NOT NULL,
+    quantity     BIGINT,
+    sales_amount BIGINT
+);
+CREATE INDEX ix_agg_sales_month_category_month ON gold.agg_sales_month_category (order_month);
+
+DROP TABLE IF EXISTS gold.agg_sales_day_country;
+CREATE TABLE gold.agg_sales_day_country (
+    order_month  DATE,
+    order_date   DATE,
+    country      TEXT,
+    line_count   BIGINT NOT NULL,
+    quantity     BIGINT,
+    sales_amount BIGINT
+);
+CREATE INDEX ix_agg_sales_day_country_date ON gold.agg_sales_day_country (order_date);
+
+DROP TABLE IF EXISTS gold.agg_sales_month_country;
+CREATE TABLE gold.agg_sales_month_country (
+    order_month  DATE,
+    country      TEXT,
+    line_count   BIGINT NOT NULL,
+    quantity     BIGINT,
+    sales_amount BIGINT
+);
+CREATE INDEX ix_agg_sales_month_country_month ON gold.agg_sales_month_country (order_month);
+
+DROP TABLE IF EXISTS gold.agg_sales_month_salesperson;
+CREATE TABLE gold.agg_sales_month_salesperson (
+    order_month      DATE,
+    salesperson_key  BIGINT,
+    salesperson_name TEXT,
+    region           TEXT,
+    line_count       BIGINT NOT NULL,
+    quantity         BIGINT,
+    sales_amount     BIGINT
+);
+CREATE INDEX ix_agg_sales_month_salesperson_month ON gold.agg_sales_month_salesperson (order_month);
+
+DROP TABLE IF EXISTS gold.agg_sales_month_discount;
+CREATE TABLE gold.agg_sales_month_discount (
+    order_month      DATE,
+    discount_percent INT,
+    line_count       BIGINT NOT NULL,
+    quantity         BIGINT,
+    sales_amount     BIGINT
+);
+CREATE INDEX ix_agg_sales_month_discount_month ON gold.agg_sales_month_discount (order_month);
+
+-- Rollup catalog: grain ('day' or 'month') and grouping columns
+DROP TABLE IF EXISTS gold.sales_rollup;
+CREATE TABLE gold.sales_rollup (
+    table_name TEXT PRIMARY KEY,
+    grain      TEXT NOT NULL CHECK (grain IN ('day', 'month')),
+    dimensions TEXT[] NOT NULL
+);
+INSERT INTO gold.sales_rollup (table_name, grain, dimensions)
+VALUES ('gold.agg_sales_day_category', 'day', ARRAY['category', 'subcategory']),
+    ('gold.agg_sales_month_category', 'month', ARRAY['category', 'subcategory']),
+    ('gold.agg_sales_day_country', 'day', ARRAY['country']),
+    ('gold.agg_sales_month_country', 'month', ARRAY['country']),
+    ('gold.agg_sales_month_salesperson', 'month', ARRAY['salesperson_key', 'salesperson_name', 'region']),
+    ('gold.agg_sales_month_discount', 'month', ARRAY['discount_percent']);
+
+-- Attribute values the rollups were last built with, per natural key
+-- (customer id, product number, order number for salesperson/discount)
+CREATE TABLE IF NOT EXISTS gold.sales_aggregate_snapshot (
+    lookup      TEXT NOT NULL,
+    natural_key TEXT NOT NULL,
+    attrs       TEXT,
+    PRIMARY KEY (lookup, natural_key)
+);
+TRUNCATE TABLE gold.sales_aggregate_snapshot;
+
+-- Changed months of silver sales are queued for the rollups
+INSERT INTO meta.partition_refresh_target (target_table, source_table)
+VALUES ('gold.sales_aggregates', 'silver.crm_sales_details')
+ON CONFLICT (target_table) DO UPDATE SET source_table = EXCLUDED.source_table;
+DELETE FROM meta.partition_refresh_queue WHERE target_table = 'gold.sales_aggregates';
+-- =============================================================================
+-- Procedure: gold.refresh_aggregates()
+-- =============================================================================
+CREATE OR REPLACE PROCEDURE gold.refresh_aggregates()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time TIMESTAMP;
+    v_full     BOOLEAN;
+    v_months   DATE[];
+    v_default  BOOLEAN;
+    v_first    DATE;
+    v_last     DATE;
+    v_rollup   RECORD;
+    v_columns  TEXT;
+BEGIN
+    start_time := clock_timestamp();
+
+    -- current grouping attributes per natural key
+    CREATE TEMP TABLE tmp_agg_attrs ON COMMIT DROP AS
+    SELECT 'customer' AS lookup, customer_id::text AS natural_key, country AS attrs
+    FROM gold.dim_customers
+    UNION ALL
+    SELECT 'product', product_number, json_build_array(category, subcategory)::text
+    FROM gold.dim_products
+    UNION ALL
+    SELECT 'salesperson', msp.sls_ord_num,
+        string_agg(json_build_array(sp.salesperson_key, sp.salesperson_name, sp.region)::text,
+                   ',' ORDER BY sp.salesperson_key)
+    FROM silver.marketing_salesperson_sales msp
+        LEFT JOIN gold.dim_salesperson sp ON msp.salesperson_id = sp.salesperson_id
+    GROUP BY msp.sls_ord_num
+    UNION ALL
+    SELECT 'discount', msd.sls_ord_num,
+        string_agg(COALESCE(dd.discount_percent::text, ''), ',' ORDER BY dd.discount_percent)
+    FROM silver.marketing_sales_discount msd
+        LEFT JOIN gold.dim_discount dd ON msd.discount_id = dd.discount_id
+    GROUP BY msd.sls_ord_num;
+
+    v_full := NOT EXISTS (SELECT 1 FROM gold.sales_aggregate_snapshot)
+        OR EXISTS (
+            SELECT 1 FROM meta.partition_refresh_queue
+            WHERE target_table = 'gold.sales_aggregates' AND scope = 'all'
+        );
+
+    CREATE TEMP TABLE tmp_agg_rows ON COMMIT DROP AS
+    SELECT * FROM gold.sales_aggregate_source WITH NO DATA;
+
+    IF v_full THEN
+        RAISE NOTICE '>> Rebuilding: gold sales rollups (all months)';
+        INSERT INTO tmp_agg_rows SELECT * FROM gold.sales_aggregate_source;
+    ELSE
+        -- order months whose rows may differ from the last build
+        WITH changed AS (
+            SELECT COALESCE(n.lookup, o.lookup) AS lookup,
+                   COALESCE(n.natural_key, o.natural_key) AS natural_key
+            FROM tmp_agg_attrs n
+                FULL JOIN gold.sales_aggregate_snapshot o
+                  ON o.lookup = n.lookup AND o.natural_key = n.natural_key
+            WHERE n.attrs IS DISTINCT FROM o.attrs
+        ),
+        months AS (
+            SELECT date_trunc('month', sd.sls_order_dt)::date AS month
+            FROM silver.crm_sales_details sd
+                JOIN changed c ON c.lookup = 'customer' AND c.natural_key = sd.sls_cust_id::text
+            UNION
+            SELECT date_trunc('month', sd.sls_order_dt)::date
+            FROM silver.crm_sales_details sd
+                JOIN changed c ON c.lookup = 'product' AND c.natural_key = sd.sls_prd_key
+            UNION
+            SELECT date_trunc('month', sd.sls_order_dt)::date
+            FROM silver.crm_sales_details sd
+                JOIN changed c ON c.lookup IN ('salesperson', 'discount') AND c.natural_key = sd.sls_ord_num
+            UNION
+            SELECT month
+            FROM meta.partition_refresh_queue
+            WHERE target_table = 'gold.sales_aggregates' AND scope = 'month'
+            UNION
+            SELECT NULL::date
+            FROM meta.partition_refresh_queue
+            WHERE target_table = 'gold.sales_aggregates' AND scope = 'default'
+        )
+        SELECT array_agg(month) FILTER (WHERE month IS NOT NULL), bool_or(month IS NULL)
+        INTO v_months, v_default
+        FROM months;
+
+        v_months := COALESCE(v_months, '{}');
+        v_default := COALESCE(v_default, FALSE);
+        RAISE NOTICE '>> Refreshing: gold sales rollups (% month(s)%)',
+            cardinality(v_months), CASE WHEN v_default THEN ' + undated orders' ELSE '' END;
+
+        -- one pass (the gold views are evaluated once); the date range
+        -- keeps the silver partitions outside the changed months unread
+        v_first := (SELECT min(m) FROM unnest(v_months) AS m);
+        v_last := (SELECT max(m) FROM unnest(v_months) AS m) + INTERVAL '1 month';
+        INSERT INTO tmp_agg_rows
+        SELECT * FROM gold.sales_aggregate_source
+        WHERE (order_date >= v_first AND order_date < v_last AND order_month = ANY(v_months))
+           OR (v_default AND order_date IS NULL);
+    END IF;
+
+    FOR v_rollup IN SELECT table_name, grain, dimensions FROM gold.sales_rollup ORDER BY table_name LOOP
+        v_columns := CASE WHEN v_rollup.grain = 'day' THEN 'order_month, order_date' ELSE 'order_month' END
+            || (SELECT string_agg(', ' || quote_ident(d), '' ORDER BY i)
+                FROM unnest(v_rollup.dimensions) WITH ORDINALITY AS u(d, i));
+
+        IF v_full THEN
+            EXECUTE format('TRUNCATE TABLE %s', v_rollup.table_name);
+        ELSE
+            EXECUTE format(
+                'DELETE FROM %s WHERE order_month = ANY($1) OR ($2 AND order_month IS NULL)',
+                v_rollup.table_name
+            ) USING v_months, v_default;
+        END IF;
+        EXECUTE format(
+            'INSERT INTO %1$s (%2$s, line_count, quantity, sales_amount) '
+            'SELECT %2$s, count(*), sum(quantity), sum(sales_amount) '
+            'FROM tmp_agg_rows GROUP BY %2$s',
+            v_rollup.table_name, v_columns
+        );
+        EXECUTE format('ANALYZE %s', v_rollup.table_name);
+    END LOOP;
+
+    DELETE FROM meta.partition_refresh_queue WHERE target_table = 'gold.sales_aggregates';
+    TRUNCATE TABLE gold.sales_aggregate_snapshot;
+    INSERT INTO gold.sales_aggregate_snapshot SELECT * FROM tmp_agg_attrs;
+    CALL meta.mark_refreshed('gold.sales_aggregates');
+
+    RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (clock_timestamp() - start_time))::int;
+    RAISE NOTICE '>> -------------';
+END;
+$$;
@@ -0,0 +1,594 @@
+/*
+ ===============================================================================
+ DDL: Create Materialized Gold Star Schema (PostgreSQL)
+ ===============================================================================
+ Purpose:
+ Materialized alternative to ddl_gold.sql. Same object names and columns,
+ but the dimensions and the fact are persisted and indexed. The dimensions
+ are refreshed with REFRESH MATERIALIZED VIEW CONCURRENTLY so readers are
+ never blocked. The fact is a table partitioned by order month:
+ gold.refresh_fact_sales() rebuilds only the months whose rows may have
+ changed and swaps them in (scripts/proc_partitions.sql), so date-filtered
+ queries and partial reloads only touch the relevant months.
+
+ gold.dim_customers is a table maintained by customer id: the silver loads
+ queue the changed keys of its sources (scripts/proc_change_detection.sql)
+ and gold.refresh_dim_customers() rewrites only those customers. It also
+ keeps their type 2 history in gold.dim_customers_history.
+
+ Surrogate keys come from gold.*_key_map tables instead of ROW_NUMBER():
+ a natural key keeps the key it was first given, and new natural keys get
+ the next value. On first population the keys match the view definitions.
+ The key maps are created IF NOT EXISTS and are never dropped here, so
+ keys stay stable across redeployments.
+
+ Run:
+ CALL gold.load_gold();   -- sync key maps + (concurrent) refresh
+ or, one step at a time (etl.run_pipeline runs these as DAG nodes):
+ CALL gold.sync_key_maps();
+ CALL gold.refresh_object('dim_customers');
+ CALL gold.refresh_object('fact_sales');   -- gold.refresh_fact_sales()
+ ===============================================================================
+ */
+-- Drop the gold objects whichever form (view, materialized view or
+-- table) they have
+DO $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT c.relname, c.relkind
+        FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'gold'
+          AND c.relname IN ('fact_sales', 'dim_customers', 'dim_products', 'dim_salesperson', 'dim_discount')
+          AND c.relkind IN ('v', 'm', 'p', 'r')
+        ORDER BY c.relname = 'fact_sales' DESC
+    LOOP
+        EXECUTE format(
+            'DROP %s IF EXISTS gold.%I CASCADE',
+            CASE WHEN r.relkind = 'm' THEN 'MATERIALIZED VIEW' WHEN r.relkind IN ('p', 'r') THEN 'TABLE' ELSE 'VIEW' END,
+            r.relname
+        );
+    END LOOP;
+END $$;
+-- =============================================================================
+-- Surrogate key maps (natural key -> stable surrogate key)
+-- =============================================================================
+CREATE TABLE IF NOT EXISTS gold.customer_key_map (
+    customer_id INT PRIMARY KEY,
+    customer_key BIGINT GENERATED ALWAYS AS IDENTITY UNIQUE
+);
+CREATE TABLE IF NOT EXISTS gold.product_key_map (
+    product_number TEXT PRIMARY KEY,
+    product_key BIGINT GENERATED ALWAYS AS IDENTITY UNIQUE
+);
+CREATE TABLE IF NOT EXISTS gold.salesperson_key_map (
+    salesperson_id TEXT PRIMARY KEY,
+    salesperson_key BIGINT GENERATED ALWAYS AS IDENTITY UNIQUE
+);
+CREATE TABLE IF NOT EXISTS gold.discount_key_map (
+    discount_id TEXT PRIMARY KEY,
+    discount_key BIGINT GENERATED ALWAYS AS IDENTITY UNIQUE
+);
+-- =============================================================================
+-- Dimension: gold.dim_customers
+-- =============================================================================
+-- Row source of gold.dim_customers (the view of ddl_gold.sql)
+CREATE OR REPLACE VIEW gold.dim_customers_source AS
+SELECT km.customer_key,
+    -- surrogate key
+    ci.cst_id AS customer_id,
+    ci.cst_key AS customer_number,
+    ci.cst_firstname AS first_name,
+    ci.cst_lastname AS last_name,
+    la.cntry AS country,
+    ci.cst_marital_status AS marital_status,
+    CASE
+        WHEN ci.cst_gndr <> 'n/a' THEN ci.cst_gndr -- CRM is primary for gender
+        ELSE COALESCE(ca.gen, 'n/a') -- fallback to ERP
+    END AS gender,
+    ca.bdate AS birthdate,
+    ci.cst_create_date AS create_date
+FROM silver.crm_cust_info ci
+    JOIN gold.customer_key_map km ON km.customer_id = ci.cst_id
+    LEFT JOIN silver.erp_cust_info ca ON ci.cst_key = ca.cid
+    LEFT JOIN silver.erp_loc_info la ON ci.cst_key = la.cid;
+CREATE TABLE gold.dim_customers AS
+SELECT * FROM gold.dim_customers_source
+WITH NO DATA;
+CREATE UNIQUE INDEX ux_dim_customers_key ON gold.dim_customers (customer_key);
+CREATE UNIQUE INDEX ux_dim_customers_id ON gold.dim_customers (customer_id);
+-- Type 2 history: one version per change of a customer's attributes,
+-- kept across redeployments like the key maps
+CREATE TABLE IF NOT EXISTS gold.dim_customers_history (
+    customer_key    BIGINT,
+    customer_id     INT NOT NULL,
+    customer_number TEXT,
+    first_name      TEXT,
+    last_name       TEXT,
+    country         TEXT,
+    marital_status  TEXT,
+    gender          TEXT,
+    birthdate       DATE,
+    create_date     DATE,
+    row_hash        TEXT NOT NULL,
+    valid_from      TIMESTAMP NOT NULL,
+    valid_to        TIMESTAMP,
+    is_current      BOOLEAN NOT NULL DEFAULT TRUE
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_dim_customers_history_current
+    ON gold.dim_customers_history (customer_id) WHERE is_current;
+CREATE INDEX IF NOT EXISTS ix_dim_customers_history_id
+    ON gold.dim_customers_history (customer_id, valid_from);
+-- Changed keys of its silver sources are queued for it; the table is new
+-- (empty), so the first refresh populates it in full
+INSERT INTO meta.dimension_change_target (target_table, source_table)
+VALUES
+    ('gold.dim_customers', 'silver.crm_cust_info'),
+    ('gold.dim_customers', 'silver.erp_cust_info'),
+    ('gold.dim_customers', 'silver.erp_loc_info')
+ON CONFLICT DO NOTHING;
+DELETE FROM meta.dimension_change_queue WHERE target_table = 'gold.dim_customers';
+-- =============================================================================
+-- Dimension: gold.dim_products
+-- =============================================================================
+CREATE MATERIALIZED VIEW gold.dim_products AS
+SELECT km.product_key,
+    -- surrogate key
+    pn.prd_id AS product_id,
+    pn.prd_key AS product_number,
+    pn.prd_nm AS product_name,
+    pn.cat_id AS category_id,
+    pc.cat AS category,
+    pc.subcat AS subcategory,
+    pc.maintenance AS maintenance,
+    pn.prd_cost AS cost,
+    pn.prd_line AS product_line,
+    pn.prd_start_dt AS start_date
+FROM silver.crm_prd_info pn
+    JOIN gold.product_key_map km ON km.product_number = pn.prd_key
+    LEFT JOIN silver.erp_px_cat_info pc ON pn.cat_id = pc.id
+WHERE pn.prd_end_dt IS NULL
+WITH NO DATA;
+-- keep only current (non-historical) products
+CREATE UNIQUE INDEX ux_dim_products_key ON gold.dim_products (product_key);
+CREATE UNIQUE INDEX ux_dim_products_number ON gold.dim_products (product_number);
+-- =============================================================================
+-- Dimension: gold.dim_salesperson
+-- =============================================================================
+CREATE MATERIALIZED VIEW gold.dim_salesperson AS
+SELECT km.salesperson_key,
+    sp.salesperson_id,
+    sp.name AS salesperson_name,
+    sp.region,
+    sp.email
+FROM silver.marketing_salesperson sp
+    JOIN gold.salesperson_key_map km ON km.salesperson_id = sp.salesperson_id
+WITH NO DATA;
+CREATE UNIQUE INDEX ux_dim_salesperson_key ON gold.dim_salesperson (salesperson_key);
+CREATE UNIQUE INDEX ux_dim_salesperson_id ON gold.dim_salesperson (salesperson_id);
+-- =============================================================================
+-- Dimension: gold.dim_discount
+-- =============================================================================
+CREATE MATERIALIZED VIEW gold.dim_discount AS
+SELECT km.discount_key,
+    di.discount_id as discount_id,
+    di.description as discount_description,
+    di.percent as discount_percent,
+    di.active as discount_active
+FROM silver.marketing_discount_info di
+    JOIN gold.discount_key_map km ON km.discount_id = di.discount_id
+WITH NO DATA;
+CREATE UNIQUE INDEX ux_dim_discount_key ON gold.dim_discount (discount_key);
+CREATE UNIQUE INDEX ux_dim_discount_id ON gold.dim_discount (discount_id);
+-- =============================================================================
+-- Fact: gold.fact_sales
+-- =============================================================================
+CREATE TABLE gold.fact_sales (
+    order_number    TEXT,
+    product_key     BIGINT,
+    customer_key    BIGINT,
+    order_date      DATE,
+    shipping_date   DATE,
+    due_date        DATE,
+    sales_amount    INT,
+    quantity        INT,
+    price           INT,
+    salesperson_key BIGINT,
+    discount_key    BIGINT
+) PARTITION BY RANGE (order_date);
+-- monthly partitions are created by gold.refresh_fact_sales(); orders
+-- without a date go to DEFAULT
+CREATE TABLE gold.fact_sales_default PARTITION OF gold.fact_sales DEFAULT;
+-- one row per order line (order number + product); uniqueness is checked
+-- by etl.quality, as a unique index would have to include order_date
+CREATE INDEX ix_fact_sales_order_line ON gold.fact_sales (order_number, product_key);
+CREATE INDEX ix_fact_sales_customer_key ON gold.fact_sales (customer_key);
+CREATE INDEX ix_fact_sales_product_key ON gold.fact_sales (product_key);
+CREATE INDEX ix_fact_sales_salesperson_key ON gold.fact_sales (salesperson_key);
+CREATE INDEX ix_fact_sales_discount_key ON gold.fact_sales (discount_key);
+CREATE INDEX ix_fact_sales_order_date ON gold.fact_sales (order_date);
+-- Row source of gold.fact_sales (the view of ddl_gold.sql)
+CREATE OR REPLACE VIEW gold.fact_sales_source AS
+SELECT sd.sls_ord_num AS order_number,
+    pr.product_key AS product_key,
+    cu.customer_key AS customer_key,
+    sd.sls_order_dt AS order_date,
+    sd.sls_ship_dt AS shipping_date,
+    sd.sls_due_dt AS due_date,
+    sd.sls_sales AS sales_amount,
+    sd.sls_quantity AS quantity,
+    sd.sls_price AS price,
+    sp.salesperson_key AS salesperson_key,
+    dd.discount_key AS discount_key
+FROM silver.crm_sales_details sd
+    LEFT JOIN gold.dim_products pr ON sd.sls_prd_key = pr.product_number
+    LEFT JOIN gold.dim_customers cu ON sd.sls_cust_id = cu.customer_id
+    LEFT JOIN silver.marketing_salesperson_sales msp ON sd.sls_ord_num = msp.sls_ord_num
+    LEFT JOIN gold.dim_salesperson sp ON msp.salesperson_id = sp.salesperson_id
+    LEFT JOIN silver.marketing_sales_discount msd ON sd.sls_ord_num = msd.sls_ord_num
+    LEFT JOIN gold.dim_discount dd ON msd.discount_id = dd.discount_id;
+-- Surrogate keys the fact rows were last built with, per natural key
+-- (customer id, product number, order number for salesperson/discount);
+-- a changed entry marks the months of the orders that use it for rebuild
+CREATE TABLE IF NOT EXISTS gold.fact_sales_key_snapshot (
+    lookup      TEXT NOT NULL,
+    natural_key TEXT NOT NULL,
+    keys        TEXT,
+    PRIMARY KEY (lookup, natural_key)
+);
+TRUNCATE TABLE gold.fact_sales_key_snapshot;
+-- Changed months of silver sales are queued for the fact
+INSERT INTO meta.partition_refresh_target (target_table, source_table)
+VALUES ('gold.fact_sales', 'silver.crm_sales_details')
+ON CONFLICT (target_table) DO UPDATE SET source_table = EXCLUDED.source_table;
+DELETE FROM meta.partition_refresh_queue WHERE target_table = 'gold.fact_sales';
+-- =============================================================================
+-- Procedure: gold.sync_key_maps()
+-- =============================================================================
+CREATE OR REPLACE PROCEDURE gold.sync_key_maps()
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- New natural keys get the next surrogate key, in the same order the
+    -- ROW_NUMBER() views use; existing keys are never renumbered.
+    INSERT INTO gold.customer_key_map (customer_id)
+    SELECT cst_id FROM silver.crm_cust_info
+    WHERE cst_id IS NOT NULL
+    ORDER BY cst_id
+    ON CONFLICT (customer_id) DO NOTHING;
+
+    INSERT INTO gold.product_key_map (product_number)
+    SELECT prd_key FROM silver.crm_prd_info
+    WHERE prd_end_dt IS NULL AND prd_key IS NOT NULL
+    ORDER BY prd_start_dt, prd_key
+    ON CONFLICT (product_number) DO NOTHING;
+
+    INSERT INTO gold.salesperson_key_map (salesperson_id)
+    SELECT salesperson_id FROM silver.marketing_salesperson
+    WHERE salesperson_id IS NOT NULL
+    ORDER BY salesperson_id
+    ON CONFLICT (salesperson_id) DO NOTHING;
+
+    INSERT INTO gold.discount_key_map (discount_id)
+    SELECT discount_id FROM silver.marketing_discount_info
+    WHERE discount_id IS NOT NULL
+    ORDER BY discount_id
+    ON CONFLICT (discount_id) DO NOTHING;
+END;
+$$;
+-- =============================================================================
+-- Procedure: gold.refresh_object(view)
+-- =============================================================================
+CREATE OR REPLACE PROCEDURE gold.refresh_object(p_view TEXT)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time  TIMESTAMP;
+    v_populated BOOLEAN;
+BEGIN
+    start_time := clock_timestamp();
+    IF to_regclass(format('gold.%I', p_view)) IN (
+        SELECT partrelid::regclass FROM pg_partitioned_table
+    ) THEN
+        CALL gold.refresh_fact_sales();
+        RETURN;
+    END IF;
+    -- tables maintained by key: gold.refresh_<table>()
+    IF EXISTS (
+        SELECT 1 FROM pg_class
+        WHERE oid = to_regclass(format('gold.%I', p_view)) AND relkind = 'r'
+    ) THEN
+        EXECUTE format('CALL gold.%I()', 'refresh_' || p_view);
+        CALL meta.mark_refreshed('gold.' || p_view);
+        RETURN;
+    END IF;
+
+    SELECT ispopulated INTO v_populated
+    FROM pg_matviews
+    WHERE schemaname = 'gold' AND matviewname = p_view;
+
+    IF v_populated IS NULL THEN
+        RAISE EXCEPTION 'gold.% is not a materialized view', p_view;
+    ELSIF v_populated THEN
+        RAISE NOTICE '>> Refreshing (concurrently): gold.%', p_view;
+        EXECUTE format('REFRESH MATERIALIZED VIEW CONCURRENTLY gold.%I', p_view);
+    ELSE
+        RAISE NOTICE '>> Populating: gold.%', p_view;
+        EXECUTE format('REFRESH MATERIALIZED VIEW gold.%I', p_view);
+    END IF;
+    EXECUTE format('ANALYZE gold.%I', p_view);
+    CALL meta.mark_refreshed('gold.' || p_view);
+
+    RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (clock_timestamp() - start_time))::int;
+    RAISE NOTICE '>> -------------';
+END;
+$$;
+-- =============================================================================
+-- Procedure: gold.refresh_dim_customers()
+-- =============================================================================
+-- Rewrites the rows of the customers queued in meta.dimension_change_queue:
+-- a CRM change by customer id, an ERP change (birthdate, gender, country)
+-- by customer number. An empty table (just deployed) is populated in full.
+-- The same customers get a new version in gold.dim_customers_history when
+-- their attributes differ from the current one; removed customers have
+-- their current version closed.
+CREATE OR REPLACE PROCEDURE gold.refresh_dim_customers()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time TIMESTAMP;
+    v_rows     BIGINT;
+    v_versions BIGINT;
+BEGIN
+    start_time := clock_timestamp();
+
+    IF NOT EXISTS (SELECT 1 FROM gold.dim_customers) THEN
+        RAISE NOTICE '>> Populating: gold.dim_customers';
+        CREATE TEMP TABLE tmp_dim_customer_ids ON COMMIT DROP AS
+        SELECT customer_id FROM gold.dim_customers_source
+        UNION
+        SELECT customer_id FROM gold.dim_customers_history WHERE is_current;
+    ELSE
+        RAISE NOTICE '>> Applying changes: gold.dim_customers';
+        CREATE TEMP TABLE tmp_dim_customer_ids ON COMMIT DROP AS
+        SELECT q.natural_key::int AS customer_id
+        FROM meta.dimension_change_queue q
+        WHERE q.target_table = 'gold.dim_customers'
+          AND q.source_table = 'silver.crm_cust_info'
+        UNION
+        SELECT ci.cst_id
+        FROM meta.dimension_change_queue q
+            JOIN silver.crm_cust_info ci ON ci.cst_key = q.natural_key
+        WHERE q.target_table = 'gold.dim_customers'
+          AND q.source_table IN ('silver.erp_cust_info', 'silver.erp_loc_info');
+    END IF;
+
+    DELETE FROM gold.dim_customers d
+    USING tmp_dim_customer_ids c
+    WHERE d.customer_id = c.customer_id;
+    INSERT INTO gold.dim_customers
+    SELECT s.*
+    FROM gold.dim_customers_source s
+        JOIN tmp_dim_customer_ids c ON c.customer_id = s.customer_id;
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+
+    -- type 2 history of the same customers
+    CREATE TEMP TABLE tmp_dim_customer_versions ON COMMIT DROP AS
+    SELECT d.*, md5(ROW(d.*)::text) AS row_hash
+    FROM gold.dim_customers d
+    WHERE d.customer_id IN (SELECT customer_id FROM tmp_dim_customer_ids);
+
+    UPDATE gold.dim_customers_history h
+    SET valid_to = start_time,
+        is_current = FALSE
+    WHERE h.is_current
+      AND h.customer_id IN (SELECT customer_id FROM tmp_dim_customer_ids)
+      AND NOT EXISTS (
+          SELECT 1 FROM tmp_dim_customer_versions v
+          WHERE v.customer_id = h.customer_id AND v.row_hash = h.row_hash
+      );
+    INSERT INTO gold.dim_customers_history (
+        customer_key, customer_id, customer_number, first_name, last_name, country,
+        marital_status, gender, birthdate, create_date, row_hash, valid_from
+    )
+    SELECT v.customer_key, v.customer_id, v.customer_number, v.first_name, v.last_name, v.country,
+        v.marital_status, v.gender, v.birthdate, v.create_date, v.row_hash, start_time
+    FROM tmp_dim_customer_versions v
+    WHERE NOT EXISTS (
+        SELECT 1 FROM gold.dim_customers_history h
+        WHERE h.customer_id = v.customer_id AND h.is_current
+    );
+    GET DIAGNOSTICS v_versions = ROW_COUNT;
+
+    DELETE FROM meta.dimension_change_queue WHERE target_table = 'gold.dim_customers';
+    IF v_rows > 0 THEN
+        ANALYZE gold.dim_customers;
+    END IF;
+
+    RAISE NOTICE '>> Customers rewritten: %, new versions: %', v_rows, v_versions;
+    RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (clock_timestamp() - start_time))::int;
+    RAISE NOTICE '>> -------------';
+END;
+$$;
+-- =============================================================================
+-- Procedure: gold.refresh_fact_sales()
+-- =============================================================================
+-- Rebuilds the partitions of gold.fact_sales whose rows may have changed:
+--   - months queued in meta.partition_refresh_queue by the silver sales
+--     loads ('all' after a full silver load: every partition)
+--   - months of orders whose customer, product, salesperson or discount
+--     surrogate key changed since the last refresh (key snapshot diff)
+-- Each month is built off to the side (indexed, analyzed, with its bounds
+-- as a CHECK constraint), new months under their final name. Only then
+-- are they all swapped in at once (meta.swap_partitions), so readers wait
+-- for the renames only, never for the rebuild.
+CREATE OR REPLACE PROCEDURE gold.refresh_fact_sales()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time TIMESTAMP;
+    v_full     BOOLEAN;
+    v_default  REGCLASS;
+    v_part     REGCLASS;
+    v_swap     TEXT;
+    v_month    DATE;
+    v_parts    REGCLASS[] := '{}';
+    v_swaps    REGCLASS[] := '{}';
+    v_months   DATE[] := '{}';
+BEGIN
+    start_time := clock_timestamp();
+
+    -- current surrogate keys per natural key
+    CREATE TEMP TABLE tmp_fact_keys ON COMMIT DROP AS
+    SELECT 'customer' AS lookup, customer_id::text AS natural_key, customer_key::text AS keys
+    FROM gold.dim_customers
+    UNION ALL
+    SELECT 'product', product_number, product_key::text
+    FROM gold.dim_products
+    UNION ALL
+    SELECT 'salesperson', msp.sls_ord_num,
+        string_agg(COALESCE(sp.salesperson_key::text, ''), ',' ORDER BY sp.salesperson_key)
+    FROM silver.marketing_salesperson_sales msp
+        LEFT JOIN gold.dim_salesperson sp ON msp.salesperson_id = sp.salesperson_id
+    GROUP BY msp.sls_ord_num
+    UNION ALL
+    SELECT 'discount', msd.sls_ord_num,
+        string_agg(COALESCE(dd.discount_key::text, ''), ',' ORDER BY dd.discount_key)
+    FROM silver.marketing_sales_discount msd
+        LEFT JOIN gold.dim_discount dd ON msd.discount_id = dd.discount_id
+    GROUP BY msd.sls_ord_num;
+
+    v_full := NOT EXISTS (SELECT 1 FROM gold.fact_sales_key_snapshot)
+        OR EXISTS (
+            SELECT 1 FROM meta.partition_refresh_queue
+            WHERE target_table = 'gold.fact_sales' AND scope = 'all'
+        );
+
+    IF v_full THEN
+        RAISE NOTICE '>> Rebuilding: gold.fact_sales (all partitions)';
+        -- every month with orders, every existing partition (emptied when
+        -- its orders are gone) and the DEFAULT partition
+        CREATE TEMP TABLE tmp_fact_parts ON COMMIT DROP AS
+        SELECT DISTINCT date_trunc('month', sls_order_dt)::date AS month
+        FROM silver.crm_sales_details
+        UNION
+        SELECT meta.partition_month(inhrelid::regclass)
+        FROM pg_inherits
+        WHERE inhparent = 'gold.fact_sales'::regclass;
+    ELSE
+        -- order months whose rows may differ from the last build
+        CREATE TEMP TABLE tmp_fact_parts ON COMMIT DROP AS
+        WITH changed AS (
+            SELECT COALESCE(n.lookup, o.lookup) AS lookup,
+                   COALESCE(n.natural_key, o.natural_key) AS natural_key
+            FROM tmp_fact_keys n
+                FULL JOIN gold.fact_sales_key_snapshot o
+                  ON o.lookup = n.lookup AND o.natural_key = n.natural_key
+            WHERE n.keys IS DISTINCT FROM o.keys
+        ),
+        months AS (
+            SELECT date_trunc('month', sd.sls_order_dt)::date AS month
+            FROM silver.crm_sales_details sd
+                JOIN changed c ON c.lookup = 'customer' AND c.natural_key = sd.sls_cust_id::text
+            UNION
+            SELECT date_trunc('month', sd.sls_order_dt)::date
+            FROM silver.crm_sales_details sd
+                JOIN changed c ON c.lookup = 'product' AND c.natural_key = sd.sls_prd_key
+            UNION
+            SELECT date_trunc('month', sd.sls_order_dt)::date
+            FROM silver.crm_sales_details sd
+                JOIN changed c ON c.lookup IN ('salesperson', 'discount') AND c.natural_key = sd.sls_ord_num
+            UNION
+            SELECT month
+            FROM meta.partition_refresh_queue
+            WHERE target_table = 'gold.fact_sales' AND scope = 'month'
+            UNION
+            SELECT NULL::date
+            FROM meta.partition_refresh_queue
+            WHERE target_table = 'gold.fact_sales' AND scope = 'default'
+        )
+        SELECT DISTINCT month FROM months;
+    END IF;
+
+    v_default := meta.default_partition('gold.fact_sales');
+    FOR v_month IN SELECT month FROM tmp_fact_parts ORDER BY month NULLS FIRST LOOP
+        IF v_month IS NULL THEN
+            v_part := v_default;
+            CONTINUE WHEN v_part IS NULL;
+        ELSE
+            v_part := meta.month_partition('gold.fact_sales', v_month);
+        END IF;
+        -- a new month is built under the name of its partition
+        v_swap := COALESCE(v_part::text || '_swap', 'gold.fact_sales_p' || to_char(v_month, 'YYYYMM'));
+        EXECUTE format(
+            'CREATE TABLE %s (LIKE gold.fact_sales INCLUDING DEFAULTS INCLUDING INDEXES)', v_swap
+        );
+        IF v_month IS NULL THEN
+            EXECUTE format(
+                'INSERT INTO %s SELECT * FROM gold.fact_sales_source WHERE order_date IS NULL',
+                v_swap
+            );
+        ELSE
+            EXECUTE format(
+                'INSERT INTO %s SELECT * FROM gold.fact_sales_source '
+                'WHERE order_date >= %L AND order_date < %L',
+                v_swap, v_month, (v_month + INTERVAL '1 month')::date
+            );
+            EXECUTE format(
+                'ALTER TABLE %s ADD CONSTRAINT partition_bounds '
+                'CHECK (order_date IS NOT NULL AND order_date >= %L AND order_date < %L)',
+                v_swap, v_month, (v_month + INTERVAL '1 month')::date
+            );
+        END IF;
+        EXECUTE format('ANALYZE %s', v_swap);
+        v_parts := v_parts || v_part;
+        v_swaps := v_swaps || v_swap::regclass;
+        v_months := v_months || v_month;
+    END LOOP;
+
+    DELETE FROM meta.partition_refresh_queue WHERE target_table = 'gold.fact_sales';
+    TRUNCATE TABLE gold.fact_sales_key_snapshot;
+    INSERT INTO gold.fact_sales_key_snapshot SELECT * FROM tmp_fact_keys;
+    CALL meta.mark_refreshed('gold.fact_sales');
+
+    -- last: from here on readers of gold.fact_sales wait until the commit
+    CALL meta.swap_partitions('gold.fact_sales', v_parts, v_swaps, v_months);
+    RAISE NOTICE '>> Rebuilt % partition(s) of gold.fact_sales', cardinality(v_swaps);
+
+    RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (clock_timestamp() - start_time))::int;
+    RAISE NOTICE '>> -------------';
+END;
+$$;
+-- =============================================================================
+-- Procedure: gold.load_gold()
+-- =============================================================================
+CREATE OR REPLACE PROCEDURE gold.load_gold()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    batch_start_time TIMESTAMP;
+    v_view           TEXT;
+BEGIN
+    batch_start_time := clock_timestamp();
+
+    RAISE NOTICE '================================================';
+    RAISE NOTICE 'Loading Gold Layer (materialized)';
+    RAISE NOTICE '================================================';
+
+    CALL gold.sync_key_maps();
+
+    -- Dimensions first: the fact joins them
+    FOREACH v_view IN ARRAY ARRAY[
+        'dim_customers', 'dim_products', 'dim_salesperson', 'dim_discount', 'fact_sales'
+    ] LOOP
+        CALL gold.refresh_object(v_view);
+    END LOOP;
+
+    RAISE NOTICE '==========================================';
+    RAISE NOTICE 'Loading Gold Layer is Completed';
+    RAISE NOTICE '   - Total Load Duration: % seconds', EXTRACT(EPOCH FROM (clock_timestamp() - batch_start_time))::int;
+    RAISE NOTICE '==========================================';
+END;
+$$;
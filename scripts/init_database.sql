@@ -12,3 +12,52 @@ CREATE TABLE IF NOT EXISTS meta.pipeline_state (
   updated_at TIMESTAMP DEFAULT NOW()
 );
 
+
+-- Per-node status and timings of DAG pipeline runs (etl.run_pipeline)
+CREATE TABLE IF NOT EXISTS meta.pipeline_node_run (
+  run_id TEXT NOT NULL,
+  node_name TEXT NOT NULL,
+  status TEXT NOT NULL,
+  started_at TIMESTAMP,
+  finished_at TIMESTAMP,
+  duration_s DOUBLE PRECISION,
+  error TEXT,
+  PRIMARY KEY (run_id, node_name)
+);
+
+
+-- Per-statement profile of SQL_PROFILE runs (etl.utils.profiling)
+CREATE TABLE IF NOT EXISTS meta.sql_statement_profile (
+  run_id TEXT NOT NULL,
+  source TEXT NOT NULL,
+  statement_no INT NOT NULL,
+  statement TEXT,
+  started_at TIMESTAMP,
+  duration_ms DOUBLE PRECISION,
+  rows_affected BIGINT,
+  shared_blks_hit BIGINT,
+  shared_blks_read BIGINT,
+  tuples_read BIGINT,
+  tuples_written BIGINT,
+  plan JSONB,
+  tables JSONB,
+  error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS ix_sql_statement_profile_run
+  ON meta.sql_statement_profile (run_id);
+
+
+-- Fingerprints of deployed DDL scripts (etl.utils.deploy)
+CREATE TABLE IF NOT EXISTS meta.schema_fingerprint (
+  script_path TEXT PRIMARY KEY,
+  script_hash TEXT NOT NULL,
+  objects_hash TEXT NOT NULL,
+  objects TEXT[],
+  deployed_at TIMESTAMP DEFAULT NOW()
+);
+
+
+-- meta.bronze_file_state (scripts/bronze/ddl_bronze.sql) of deployments
+-- made before it kept the line count of the ingested prefix
+ALTER TABLE IF EXISTS meta.bronze_file_state ADD COLUMN IF NOT EXISTS line_count BIGINT;
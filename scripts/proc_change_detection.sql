@@ -0,0 +1,182 @@
+/*
+===============================================================================
+Procedures: Dimension Change Detection
+===============================================================================
+Purpose:
+    Loads the customer dimension sources into Silver by row hash instead of
+    rewriting them, and hands the changed natural keys to the gold tables
+    maintained from them:
+        silver.crm_cust_info   cst_id
+        silver.erp_cust_info   cid
+        silver.erp_loc_info    cid
+
+Actions:
+    - meta.apply_dimension_changes(table, rows, key) compares the cleaned
+      source rows (a temp table with the columns of `table` it loads) with
+      the row hashes stored by the previous load, in
+      meta.dimension_row_hash, and applies only the difference: new keys
+      are inserted, keys whose hash changed are updated and keys missing
+      from the source are deleted. Unchanged rows are not touched.
+    - meta.queue_dimension_changes(table, key, keys) is called by the
+      incremental loads with the keys they are about to MERGE; they do
+      not hash, so the stored hashes of `table` are dropped and taken
+      from the table itself by the next full load.
+    - Both queue the changed keys ('insert', 'update', 'delete') for every
+      target registered on the table in meta.dimension_change_target
+      (materialized gold.dim_customers). Each target consumes its own
+      queue entries.
+
+Notes:
+    Stored hashes are taken again from the table when their count no longer
+    matches its row count (first load, table recreated by ddl_silver.sql,
+    incremental load in between).
+
+Run:
+    CALL meta.apply_dimension_changes('silver.erp_loc_info', 'tmp_erp_loc_info', 'cid');
+===============================================================================
+*/
+
+CREATE SCHEMA IF NOT EXISTS meta;
+
+-- Hash of each silver dimension row as last loaded, by natural key
+CREATE TABLE IF NOT EXISTS meta.dimension_row_hash (
+    source_table TEXT NOT NULL,
+    natural_key  TEXT NOT NULL,
+    row_hash     TEXT NOT NULL,
+    PRIMARY KEY (source_table, natural_key)
+);
+
+-- Tables maintained by natural key from silver dimension tables;
+-- registered by the DDL that creates them
+CREATE TABLE IF NOT EXISTS meta.dimension_change_target (
+    target_table TEXT NOT NULL,
+    source_table TEXT NOT NULL,
+    PRIMARY KEY (target_table, source_table)
+);
+
+-- Keys of silver dimension tables changed since a target last read them
+CREATE TABLE IF NOT EXISTS meta.dimension_change_queue (
+    target_table TEXT NOT NULL,
+    source_table TEXT NOT NULL,
+    natural_key  TEXT NOT NULL,
+    change_type  TEXT NOT NULL CHECK (change_type IN ('insert', 'update', 'delete')),
+    queued_at    TIMESTAMP DEFAULT NOW()
+);
+
+CREATE OR REPLACE PROCEDURE meta.apply_dimension_changes(p_table TEXT, p_rows REGCLASS, p_key TEXT)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_columns  TEXT;
+    v_set      TEXT;
+    v_rows     BIGINT;
+    v_hashes   BIGINT;
+    v_inserted BIGINT;
+    v_updated  BIGINT;
+    v_deleted  BIGINT;
+BEGIN
+    -- columns loaded into p_table: those of the cleaned rows
+    SELECT string_agg(format('%I', attname), ', ' ORDER BY attnum),
+           string_agg(format('%I = r.%I', attname, attname), ', ' ORDER BY attnum)
+               FILTER (WHERE attname <> p_key)
+    INTO v_columns, v_set
+    FROM pg_attribute
+    WHERE attrelid = p_rows AND attnum > 0 AND NOT attisdropped;
+
+    -- stored hashes out of step with the table: take them from its rows
+    EXECUTE format('SELECT count(*) FROM %s', p_table) INTO v_rows;
+    SELECT count(*) INTO v_hashes FROM meta.dimension_row_hash WHERE source_table = p_table;
+    IF v_hashes <> v_rows THEN
+        RAISE NOTICE '>> Hashing current rows of: %', p_table;
+        DELETE FROM meta.dimension_row_hash WHERE source_table = p_table;
+        EXECUTE format(
+            'INSERT INTO meta.dimension_row_hash (source_table, natural_key, row_hash) '
+            'SELECT %L, %I::text, md5(ROW(%s)::text) FROM %s WHERE %I IS NOT NULL '
+            'ON CONFLICT DO NOTHING',
+            p_table, p_key, v_columns, p_table, p_key
+        );
+    END IF;
+
+    EXECUTE format(
+        'CREATE TEMP TABLE tmp_dimension_changes ON COMMIT DROP AS '
+        'SELECT COALESCE(n.natural_key, o.natural_key) AS natural_key, n.row_hash, '
+        '    CASE WHEN o.natural_key IS NULL THEN ''insert'' '
+        '         WHEN n.natural_key IS NULL THEN ''delete'' '
+        '         ELSE ''update'' END AS change_type '
+        'FROM (SELECT %I::text AS natural_key, md5(ROW(%s)::text) AS row_hash FROM %s '
+        '      WHERE %I IS NOT NULL) n '
+        '    FULL JOIN (SELECT natural_key, row_hash FROM meta.dimension_row_hash '
+        '               WHERE source_table = %L) o '
+        '      ON o.natural_key = n.natural_key '
+        'WHERE n.row_hash IS DISTINCT FROM o.row_hash',
+        p_key, v_columns, p_rows, p_key, p_table
+    );
+
+    EXECUTE format(
+        'DELETE FROM %s t USING tmp_dimension_changes c '
+        'WHERE c.change_type = ''delete'' AND t.%I::text = c.natural_key',
+        p_table, p_key
+    );
+    EXECUTE format(
+        'UPDATE %s t SET %s FROM tmp_dimension_changes c, %s r '
+        'WHERE c.change_type = ''update'' AND r.%I::text = c.natural_key AND t.%I = r.%I',
+        p_table, v_set, p_rows, p_key, p_key, p_key
+    );
+    EXECUTE format(
+        'INSERT INTO %s (%s) SELECT r.* FROM %s r '
+        'JOIN tmp_dimension_changes c ON c.natural_key = r.%I::text '
+        'WHERE c.change_type = ''insert''',
+        p_table, v_columns, p_rows, p_key
+    );
+
+    DELETE FROM meta.dimension_row_hash h
+    USING tmp_dimension_changes c
+    WHERE h.source_table = p_table AND h.natural_key = c.natural_key AND c.change_type = 'delete';
+    INSERT INTO meta.dimension_row_hash (source_table, natural_key, row_hash)
+    SELECT p_table, natural_key, row_hash
+    FROM tmp_dimension_changes
+    WHERE change_type <> 'delete'
+    ON CONFLICT (source_table, natural_key) DO UPDATE SET row_hash = EXCLUDED.row_hash;
+
+    INSERT INTO meta.dimension_change_queue (target_table, source_table, natural_key, change_type)
+    SELECT t.target_table, t.source_table, c.natural_key, c.change_type
+    FROM meta.dimension_change_target t
+        CROSS JOIN tmp_dimension_changes c
+    WHERE t.source_table = p_table;
+
+    SELECT count(*) FILTER (WHERE change_type = 'insert'),
+           count(*) FILTER (WHERE change_type = 'update'),
+           count(*) FILTER (WHERE change_type = 'delete')
+    INTO v_inserted, v_updated, v_deleted
+    FROM tmp_dimension_changes;
+    -- (silver.load_silver() applies several tables in one transaction)
+    DROP TABLE tmp_dimension_changes;
+    RAISE NOTICE '>> Rows Inserted: %, Updated: %, Deleted: % (unchanged: %)',
+        v_inserted, v_updated, v_deleted, v_rows - v_updated - v_deleted;
+END;
+$$;
+
+CREATE OR REPLACE PROCEDURE meta.queue_dimension_changes(p_table TEXT, p_key TEXT, p_keys TEXT[])
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_existing TEXT[];
+BEGIN
+    -- the table is about to change without its hashes
+    DELETE FROM meta.dimension_row_hash WHERE source_table = p_table;
+
+    IF NOT EXISTS (SELECT 1 FROM meta.dimension_change_target WHERE source_table = p_table) THEN
+        RETURN;
+    END IF;
+    EXECUTE format('SELECT array_agg(%I::text) FROM %s WHERE %I::text = ANY($1)', p_key, p_table, p_key)
+    INTO v_existing
+    USING p_keys;
+
+    INSERT INTO meta.dimension_change_queue (target_table, source_table, natural_key, change_type)
+    SELECT t.target_table, t.source_table, k.key,
+        CASE WHEN k.key = ANY(COALESCE(v_existing, '{}')) THEN 'update' ELSE 'insert' END
+    FROM meta.dimension_change_target t
+        CROSS JOIN (SELECT DISTINCT key FROM unnest(p_keys) AS key WHERE key IS NOT NULL) k
+    WHERE t.source_table = p_table;
+END;
+$$;
@@ -0,0 +1,280 @@
+/*
+===============================================================================
+Procedures: Monthly Range Partitions
+===============================================================================
+Purpose:
+    Helpers for tables partitioned BY RANGE on a DATE column with one
+    partition per calendar month plus a DEFAULT partition (NULL dates):
+        silver.crm_sales_details   on sls_order_dt
+        gold.fact_sales            on order_date (materialized gold)
+
+Actions:
+    - meta.month_partition(parent, month) returns the month's partition,
+      <parent>_pYYYYMM in the parent's schema, or NULL if it does not exist.
+    - meta.partition_month(partition) returns the first day of the month a
+      partition holds (from its bounds), NULL for the DEFAULT partition.
+    - meta.ensure_month_partitions(parent, months) creates the missing
+      partitions for the given months, UNLOGGED when the DEFAULT partition
+      is (shadow tables, scripts/proc_shadow_swap.sql). Rows of a new month
+      already sitting in the DEFAULT partition are moved into it before it
+      is attached.
+    - meta.swap_partition(partition, replacement) swaps a rebuilt table in
+      for a partition: DETACH the old one, ATTACH the replacement with the
+      same bounds, DROP the old one and give the replacement (and its
+      indexes) the old names. Readers see either the old or the new rows
+      of that month, and the other partitions are not touched.
+    - meta.swap_partitions(parent, partitions, replacements, months) swaps
+      several rebuilt tables in (or attaches them as new months) in one
+      step, after locking the parent once under a lock_timeout, so the
+      rebuilds themselves never hold a lock readers wait for.
+    - meta.queue_partition_refresh(source, scope, months) records that
+      months of a source (silver.crm_sales_details) changed, for every
+      derived table registered on it in meta.partition_refresh_target
+      (gold.fact_sales, the gold aggregates); scope is 'all', 'month' or
+      'default'. Each derived table consumes its own queue entries.
+
+Run:
+    CALL meta.ensure_month_partitions('silver.crm_sales_details', ARRAY['2013-01-01'::date]);
+===============================================================================
+*/
+
+CREATE SCHEMA IF NOT EXISTS meta;
+
+-- Derived tables rebuilt by month from a partitioned source; registered
+-- by the DDL that creates them
+CREATE TABLE IF NOT EXISTS meta.partition_refresh_target (
+    target_table TEXT PRIMARY KEY,
+    source_table TEXT NOT NULL
+);
+
+-- Partitions of derived tables waiting to be rebuilt
+CREATE TABLE IF NOT EXISTS meta.partition_refresh_queue (
+    target_table TEXT NOT NULL,
+    scope        TEXT NOT NULL CHECK (scope IN ('all', 'month', 'default')),
+    month        DATE,
+    queued_at    TIMESTAMP DEFAULT NOW()
+);
+
+-- Partition of `p_parent` holding `p_month`, NULL when it does not exist
+-- (or `p_month` is NULL)
+CREATE OR REPLACE FUNCTION meta.month_partition(p_parent REGCLASS, p_month DATE)
+RETURNS REGCLASS
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT to_regclass(format(
+        '%I.%I', n.nspname, c.relname || '_p' || to_char(p_month, 'YYYYMM')
+    ))
+    FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.oid = p_parent AND p_month IS NOT NULL;
+$$;
+
+-- First day of the month `p_partition` holds (its lower bound), NULL for
+-- the DEFAULT partition
+CREATE OR REPLACE FUNCTION meta.partition_month(p_partition REGCLASS)
+RETURNS DATE
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT substring(pg_get_expr(relpartbound, oid) FROM 'FROM \(''([^'']+)''\)')::date
+    FROM pg_class
+    WHERE oid = p_partition;
+$$;
+
+-- DEFAULT partition of `p_parent`, NULL when it has none
+CREATE OR REPLACE FUNCTION meta.default_partition(p_parent REGCLASS)
+RETURNS REGCLASS
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT NULLIF(partdefid, 0)::regclass
+    FROM pg_partitioned_table
+    WHERE partrelid = p_parent;
+$$;
+
+CREATE OR REPLACE PROCEDURE meta.ensure_month_partitions(p_parent REGCLASS, p_months DATE[])
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_schema  TEXT;
+    v_name    TEXT;
+    v_column  TEXT;
+    v_default REGCLASS;
+    v_month   DATE;
+    v_table   TEXT;
+BEGIN
+    SELECT n.nspname, c.relname, a.attname
+    INTO v_schema, v_name, v_column
+    FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        JOIN pg_partitioned_table pt ON pt.partrelid = c.oid
+        JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum = pt.partattrs[0]
+    WHERE c.oid = p_parent;
+
+    IF v_column IS NULL THEN
+        RAISE EXCEPTION '% is not a partitioned table', p_parent;
+    END IF;
+    v_default := meta.default_partition(p_parent);
+
+    FOR v_month IN
+        SELECT DISTINCT date_trunc('month', m)::date
+        FROM unnest(p_months) AS m
+        WHERE m IS NOT NULL
+        ORDER BY 1
+    LOOP
+        CONTINUE WHEN meta.month_partition(p_parent, v_month) IS NOT NULL;
+
+        v_table := format('%I.%I', v_schema, v_name || '_p' || to_char(v_month, 'YYYYMM'));
+        RAISE NOTICE '>> Creating partition % [%, %)', v_table, v_month, (v_month + INTERVAL '1 month')::date;
+        EXECUTE format(
+            'CREATE %s TABLE %s (LIKE %s INCLUDING DEFAULTS)',
+            CASE WHEN (SELECT relpersistence FROM pg_class WHERE oid = v_default) = 'u' THEN 'UNLOGGED' ELSE '' END,
+            v_table, p_parent
+        );
+        IF v_default IS NOT NULL THEN
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM %s WHERE %I >= %L AND %I < %L RETURNING *) '
+                'INSERT INTO %s SELECT * FROM moved',
+                v_default, v_column, v_month, v_column, (v_month + INTERVAL '1 month')::date,
+                v_table
+            );
+        END IF;
+        EXECUTE format(
+            'ALTER TABLE %s ATTACH PARTITION %s FOR VALUES FROM (%L) TO (%L)',
+            p_parent, v_table, v_month, (v_month + INTERVAL '1 month')::date
+        );
+    END LOOP;
+END;
+$$;
+
+CREATE OR REPLACE PROCEDURE meta.swap_partition(p_partition REGCLASS, p_replacement REGCLASS)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_parent REGCLASS;
+    v_bound  TEXT;
+    v_name   TEXT;
+    v_old    TEXT := p_partition::text;
+    v_new    TEXT := p_replacement::text;
+    v_parent_indexes OID[];
+    v_index_names    TEXT[];
+    r        RECORD;
+BEGIN
+    SELECT i.inhparent::regclass, pg_get_expr(c.relpartbound, c.oid), c.relname
+    INTO v_parent, v_bound, v_name
+    FROM pg_class c
+        JOIN pg_inherits i ON i.inhrelid = c.oid
+    WHERE c.oid = p_partition;
+
+    IF v_parent IS NULL THEN
+        RAISE EXCEPTION '% is not a partition', p_partition;
+    END IF;
+
+    -- names of the partition's indexes, by the parent index they belong to
+    SELECT array_agg(i.inhparent), array_agg(c.relname)
+    INTO v_parent_indexes, v_index_names
+    FROM pg_index x
+        JOIN pg_inherits i ON i.inhrelid = x.indexrelid
+        JOIN pg_class c ON c.oid = x.indexrelid
+    WHERE x.indrelid = p_partition;
+
+    EXECUTE format('ALTER TABLE %s DETACH PARTITION %s', v_parent, v_old);
+    EXECUTE format('ALTER TABLE %s ATTACH PARTITION %s %s', v_parent, v_new, v_bound);
+    EXECUTE format('DROP TABLE %s', v_old);
+    EXECUTE format('ALTER TABLE %s RENAME TO %I', v_new, v_name);
+
+    -- ATTACH named the replacement's indexes after the replacement table;
+    -- keep the old names so the partition looks the same as before
+    FOR r IN
+        SELECT i.inhrelid::regclass AS index, o.name
+        FROM unnest(v_parent_indexes, v_index_names) AS o(parent, name)
+            JOIN pg_inherits i ON i.inhparent = o.parent
+            JOIN pg_index x ON x.indexrelid = i.inhrelid
+        WHERE x.indrelid = p_replacement
+    LOOP
+        EXECUTE format('ALTER INDEX %s RENAME TO %I', r.index, r.name);
+    END LOOP;
+END;
+$$;
+
+-- Swap rebuilt tables in for partitions of `p_parent` in one short step:
+-- p_replacements[i] replaces p_partitions[i] (meta.swap_partition), or is
+-- attached as the partition of month p_months[i] when p_partitions[i] is
+-- NULL (a new month; the replacement already has the partition's name).
+-- The parent and its partitions are locked once up front, each attempt
+-- waiting at most `p_lock_timeout` for readers. A replacement with a
+-- partition_bounds CHECK constraint is attached without a scan; the
+-- constraint is dropped once it is attached.
+CREATE OR REPLACE PROCEDURE meta.swap_partitions(
+    p_parent       REGCLASS,
+    p_partitions   REGCLASS[],
+    p_replacements REGCLASS[],
+    p_months       DATE[],
+    p_lock_timeout TEXT DEFAULT '5s',
+    p_attempts     INT DEFAULT 5
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_timeout TEXT := current_setting('lock_timeout');
+    v_attempt INT;
+    i         INT;
+BEGIN
+    IF COALESCE(cardinality(p_replacements), 0) = 0 THEN
+        RETURN;
+    END IF;
+
+    FOR v_attempt IN 1..p_attempts LOOP
+        BEGIN
+            PERFORM set_config('lock_timeout', p_lock_timeout, true);
+            EXECUTE format('LOCK TABLE %s IN ACCESS EXCLUSIVE MODE', p_parent);
+            EXIT;
+        EXCEPTION WHEN lock_not_available OR deadlock_detected THEN
+            IF v_attempt = p_attempts THEN
+                RAISE;
+            END IF;
+            RAISE NOTICE '>> Swap into % gave way to readers (%/%); retrying', p_parent, v_attempt, p_attempts;
+            PERFORM pg_sleep(v_attempt);
+        END;
+    END LOOP;
+    PERFORM set_config('lock_timeout', v_timeout, true);
+
+    FOR i IN 1..cardinality(p_replacements) LOOP
+        IF p_partitions[i] IS NOT NULL THEN
+            CALL meta.swap_partition(p_partitions[i], p_replacements[i]);
+        ELSE
+            EXECUTE format(
+                'ALTER TABLE %s ATTACH PARTITION %s FOR VALUES FROM (%L) TO (%L)',
+                p_parent, p_replacements[i], p_months[i], (p_months[i] + INTERVAL '1 month')::date
+            );
+        END IF;
+        IF EXISTS (
+            SELECT 1 FROM pg_constraint
+            WHERE conrelid = p_replacements[i] AND conname = 'partition_bounds'
+        ) THEN
+            EXECUTE format('ALTER TABLE %s DROP CONSTRAINT partition_bounds', p_replacements[i]);
+        END IF;
+    END LOOP;
+END;
+$$;
+
+DROP PROCEDURE IF EXISTS meta.queue_partition_refresh(TEXT, TEXT, DATE[]);
+CREATE PROCEDURE meta.queue_partition_refresh(p_source TEXT, p_scope TEXT, p_months DATE[] DEFAULT NULL)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF p_scope = 'month' THEN
+        INSERT INTO meta.partition_refresh_queue (target_table, scope, month)
+        SELECT DISTINCT t.target_table, 'month', date_trunc('month', m)::date
+        FROM meta.partition_refresh_target t
+            CROSS JOIN unnest(p_months) AS m
+        WHERE t.source_table = p_source AND m IS NOT NULL;
+    ELSE
+        INSERT INTO meta.partition_refresh_queue (target_table, scope)
+        SELECT target_table, p_scope
+        FROM meta.partition_refresh_target
+        WHERE source_table = p_source;
+    END IF;
+END;
+$$;
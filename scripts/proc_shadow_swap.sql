@@ -0,0 +1,366 @@
+/*
+===============================================================================
+Procedures: Shadow-Table Loads
+===============================================================================
+Purpose:
+    Full reloads of a bronze or silver table without emptying the live table:
+    the new rows are loaded into a shadow table next to it, which is then
+    swapped in by renaming, in a transaction that only takes a short
+    ACCESS EXCLUSIVE lock. The replaced table is kept as the previous
+    generation until the next swap, so a bad load can be rolled back at
+    once.
+
+        <table>_shadow     being loaded (UNLOGGED while it is filled)
+        <table>            live
+        <table>_previous   replaced by the last swap
+
+Actions:
+    - meta.create_shadow(table) creates an empty UNLOGGED <table>_shadow with
+      the columns, defaults and constraints of <table> but no indexes. A
+      partitioned table gets a partitioned shadow whose partitions are
+      UNLOGGED (meta.ensure_month_partitions creates new months with the
+      persistence of the DEFAULT partition).
+    - meta.seal_shadow(table) runs once the shadow is filled: SET LOGGED
+      (the rows are WAL-logged once, as whole pages), then the indexes
+      and primary/unique keys of <table> are built on it and it is
+      analyzed.
+    - meta.swap_shadow(table, watermark) drops <table>_previous, renames
+      <table> to <table>_previous and <table>_shadow to <table>, with their
+      indexes, constraints and partitions. Views reading <table> are bound
+      to it by OID, so they are re-created from their definition and read
+      the new table; materialized views are rebuilt with their indexes
+      and the views on them.
+      With a watermark, the silver watermark of <table> is set and the
+      replaced one is kept for a rollback.
+    - meta.rollback_swap(table) exchanges <table> and <table>_previous the
+      same way and restores the watermark of the previous generation; run
+      it twice to undo it. Gold tables refreshed from <table> by month are
+      queued for a full rebuild.
+
+Notes:
+    Readers only wait for the swap itself. Swaps run one at a time and lock
+    the views on <table> before <table>, as their readers do. Index and
+    partition names follow the table: <table>_shadow_p201301 becomes
+    <table>_p201301, so the swapped table has the same names (and schema
+    fingerprint) as before.
+
+Run:
+    CALL meta.create_shadow('silver.crm_prd_info');
+    INSERT INTO silver.crm_prd_info_shadow (...) SELECT ... FROM silver.crm_prd_info_source;
+    CALL meta.seal_shadow('silver.crm_prd_info');
+    COMMIT;
+    CALL meta.swap_shadow('silver.crm_prd_info', 1234);
+===============================================================================
+*/
+
+CREATE SCHEMA IF NOT EXISTS meta;
+
+-- Last swap of every table loaded through a shadow
+CREATE TABLE IF NOT EXISTS meta.table_generation (
+    table_name         TEXT PRIMARY KEY,
+    swapped_at         TIMESTAMP NOT NULL,
+    previous_watermark TEXT
+);
+
+-- Name of an index or partition of <base><from> once that table is
+-- renamed to <base><to>
+CREATE OR REPLACE FUNCTION meta.generation_name(p_name TEXT, p_base TEXT, p_from TEXT, p_to TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT CASE
+        WHEN starts_with(p_name, p_base || p_from)
+            THEN p_base || p_to || substr(p_name, length(p_base || p_from) + 1)
+        WHEN p_from <> '' AND right(p_name, length(p_from)) = p_from
+            THEN left(p_name, -length(p_from)) || p_to
+        ELSE p_name || p_to
+    END;
+$$;
+
+-- <schema>.<table><suffix>, NULL when it does not exist
+CREATE OR REPLACE FUNCTION meta.generation_table(p_table TEXT, p_suffix TEXT)
+RETURNS REGCLASS
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT to_regclass(format('%I.%I', split_part(p_table, '.', 1), split_part(p_table, '.', 2) || p_suffix));
+$$;
+
+-- Rename <table><from> to <table><to>, with its partitions and indexes
+CREATE OR REPLACE PROCEDURE meta.rename_generation(p_table TEXT, p_from TEXT, p_to TEXT)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_base TEXT := split_part(p_table, '.', 2);
+    v_rel  REGCLASS := meta.generation_table(p_table, p_from);
+    r      RECORD;
+BEGIN
+    IF v_rel IS NULL THEN
+        RAISE EXCEPTION '% does not exist', p_table || p_from;
+    END IF;
+
+    FOR r IN
+        SELECT x.indexrelid::regclass AS relation, c.relname, 'INDEX' AS kind
+        FROM pg_index x
+            JOIN pg_class c ON c.oid = x.indexrelid
+        WHERE x.indrelid = v_rel
+           OR x.indrelid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = v_rel)
+        UNION ALL
+        SELECT c.oid::regclass, c.relname, 'TABLE'
+        FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = v_rel
+        UNION ALL
+        SELECT c.oid::regclass, c.relname, 'TABLE'
+        FROM pg_class c
+        WHERE c.oid = v_rel
+    LOOP
+        -- (renaming a key's index renames the constraint too)
+        EXECUTE format(
+            'ALTER %s %s RENAME TO %I',
+            r.kind, r.relation, meta.generation_name(r.relname, v_base, p_from, p_to)
+        );
+    END LOOP;
+END;
+$$;
+
+CREATE OR REPLACE PROCEDURE meta.create_shadow(p_table TEXT)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_live    REGCLASS := p_table::regclass;
+    v_schema  TEXT := split_part(p_table, '.', 1);
+    v_base    TEXT := split_part(p_table, '.', 2);
+    v_shadow  TEXT := format('%I.%I', split_part(p_table, '.', 1), split_part(p_table, '.', 2) || '_shadow');
+    v_default REGCLASS;
+BEGIN
+    -- left over by a load that failed before its swap
+    EXECUTE format('DROP TABLE IF EXISTS %s', v_shadow);
+
+    IF (SELECT relkind FROM pg_class WHERE oid = v_live) = 'p' THEN
+        -- partitioned tables have no storage of their own; their partitions
+        -- are UNLOGGED
+        EXECUTE format(
+            'CREATE TABLE %s (LIKE %s INCLUDING ALL EXCLUDING INDEXES) PARTITION BY %s',
+            v_shadow, v_live, pg_get_partkeydef(v_live)
+        );
+        v_default := meta.default_partition(v_live);
+        IF v_default IS NOT NULL THEN
+            EXECUTE format(
+                'CREATE UNLOGGED TABLE %I.%I PARTITION OF %s DEFAULT',
+                v_schema,
+                meta.generation_name((SELECT relname FROM pg_class WHERE oid = v_default), v_base, '', '_shadow'),
+                v_shadow
+            );
+        END IF;
+    ELSE
+        EXECUTE format(
+            'CREATE UNLOGGED TABLE %s (LIKE %s INCLUDING ALL EXCLUDING INDEXES)',
+            v_shadow, v_live
+        );
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE PROCEDURE meta.seal_shadow(p_table TEXT)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_live   REGCLASS := p_table::regclass;
+    v_base   TEXT := split_part(p_table, '.', 2);
+    v_shadow REGCLASS := meta.generation_table(p_table, '_shadow');
+    v_name   TEXT;
+    r        RECORD;
+BEGIN
+    IF v_shadow IS NULL THEN
+        RAISE EXCEPTION 'No shadow table for %', p_table;
+    END IF;
+
+    -- SET LOGGED rewrites the table, so it goes before the index builds
+    FOR r IN
+        SELECT c.oid::regclass AS relation
+        FROM pg_class c
+        WHERE c.relpersistence = 'u'
+          AND (c.oid = v_shadow OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = v_shadow))
+    LOOP
+        EXECUTE format('ALTER TABLE %s SET LOGGED', r.relation);
+    END LOOP;
+
+    FOR r IN
+        SELECT x.indexrelid, c.relname, k.oid AS constraint_oid
+        FROM pg_index x
+            JOIN pg_class c ON c.oid = x.indexrelid
+            LEFT JOIN pg_constraint k ON k.conindid = x.indexrelid AND k.conrelid = v_live
+        WHERE x.indrelid = v_live
+        ORDER BY c.relname
+    LOOP
+        v_name := meta.generation_name(r.relname, v_base, '', '_shadow');
+        IF r.constraint_oid IS NOT NULL THEN
+            EXECUTE format(
+                'ALTER TABLE %s ADD CONSTRAINT %I %s',
+                v_shadow, v_name, pg_get_constraintdef(r.constraint_oid)
+            );
+        ELSE
+            -- on a partitioned table the index is built on every partition
+            EXECUTE regexp_replace(
+                pg_get_indexdef(r.indexrelid),
+                '^CREATE (UNIQUE )?INDEX \S+ ON (ONLY )?\S+',
+                format('CREATE \1INDEX %I ON %s', v_name, v_shadow)
+            );
+        END IF;
+    END LOOP;
+
+    EXECUTE format('ANALYZE %s', v_shadow);
+END;
+$$;
+
+-- Make <table><incoming> the live table and move the live one to
+-- <table><outgoing>, keeping the views that read it on the live table.
+-- Views reading <table> are re-created in place; materialized views have no
+-- CREATE OR REPLACE, so they are dropped and created again together with
+-- every view built on them.
+CREATE OR REPLACE PROCEDURE meta.exchange_generation(p_table TEXT, p_incoming TEXT, p_outgoing TEXT)
+LANGUAGE plpgsql
+SET search_path = pg_catalog, pg_temp
+AS $$
+DECLARE
+    v_index TEXT;
+    r       RECORD;
+BEGIN
+    -- one swap at a time: swaps of tables under the same view would each
+    -- hold their table and wait for the other's
+    PERFORM pg_advisory_xact_lock(hashtext('meta.exchange_generation'));
+
+    -- every view on <table>, directly or through other views, at its
+    -- longest distance from it; rebuilt: it is or reads a materialized view
+    -- on <table>
+    CREATE TEMP TABLE tmp_swap_views ON COMMIT DROP AS
+    WITH RECURSIVE dependent (oid, relkind, level, rebuilt) AS (
+        SELECT p_table::regclass::oid, 'r'::"char", 0, FALSE
+        UNION ALL
+        SELECT c.oid, c.relkind, d.level + 1, d.rebuilt OR c.relkind = 'm'
+        FROM dependent d
+            JOIN pg_depend x ON x.refobjid = d.oid AND x.classid = 'pg_rewrite'::regclass
+            JOIN pg_rewrite w ON w.oid = x.objid
+            JOIN pg_class c ON c.oid = w.ev_class
+        WHERE c.oid <> d.oid
+    )
+    SELECT oid,
+           oid::regclass::text AS view_name,
+           relkind,
+           MAX(level) AS level,
+           BOOL_OR(rebuilt) AS rebuilt,
+           BOOL_OR(level = 1) AS direct,
+           NULL::TEXT AS definition,
+           NULL::TEXT[] AS indexes
+    FROM dependent
+    WHERE level > 0
+    GROUP BY oid, relkind;
+
+    -- the views before the table, outermost first, in the order their
+    -- readers lock them. LOCK TABLE would also lock every table under the
+    -- view; re-creating it unchanged locks the view alone. (Materialized
+    -- views are locked when they are dropped.)
+    FOR r IN SELECT oid, view_name FROM tmp_swap_views WHERE relkind = 'v' ORDER BY level DESC, oid LOOP
+        EXECUTE format('CREATE OR REPLACE VIEW %s AS %s', r.view_name, pg_get_viewdef(r.oid));
+    END LOOP;
+
+    -- definitions are read once the views are locked and before the
+    -- renames, printed schema-qualified (search_path), so they name the
+    -- table that is about to be swapped in
+    UPDATE tmp_swap_views v SET
+        definition = pg_get_viewdef(v.oid),
+        indexes    = ARRAY(SELECT pg_get_indexdef(x.indexrelid) FROM pg_index x WHERE x.indrelid = v.oid);
+
+    FOR r IN SELECT * FROM tmp_swap_views WHERE rebuilt ORDER BY level DESC, oid LOOP
+        EXECUTE format(
+            'DROP %s %s',
+            CASE WHEN r.relkind = 'm' THEN 'MATERIALIZED VIEW' ELSE 'VIEW' END, r.view_name
+        );
+    END LOOP;
+
+    CALL meta.rename_generation(p_table, '', p_outgoing);
+    CALL meta.rename_generation(p_table, p_incoming, '');
+
+    FOR r IN SELECT * FROM tmp_swap_views WHERE direct AND NOT rebuilt ORDER BY oid LOOP
+        EXECUTE format('CREATE OR REPLACE VIEW %s AS %s', r.view_name, r.definition);
+    END LOOP;
+    FOR r IN SELECT * FROM tmp_swap_views WHERE rebuilt ORDER BY level, oid LOOP
+        IF r.relkind = 'm' THEN
+            RAISE NOTICE '>> Rebuilding materialized view: %', r.view_name;
+            EXECUTE format('CREATE MATERIALIZED VIEW %s AS %s', r.view_name, r.definition);
+        ELSE
+            EXECUTE format('CREATE VIEW %s AS %s', r.view_name, r.definition);
+        END IF;
+        FOREACH v_index IN ARRAY r.indexes LOOP
+            EXECUTE v_index;
+        END LOOP;
+    END LOOP;
+
+    -- (several tables may be swapped in one transaction)
+    DROP TABLE tmp_swap_views;
+END;
+$$;
+
+CREATE OR REPLACE PROCEDURE meta.swap_shadow(p_table TEXT, p_watermark BIGINT DEFAULT NULL)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_watermark TEXT;
+BEGIN
+    IF meta.generation_table(p_table, '_shadow') IS NULL THEN
+        RAISE EXCEPTION 'No shadow table for %', p_table;
+    END IF;
+
+    RAISE NOTICE '>> Swapping in: %_shadow', p_table;
+    IF meta.generation_table(p_table, '_previous') IS NOT NULL THEN
+        EXECUTE format('DROP TABLE %s', meta.generation_table(p_table, '_previous'));
+    END IF;
+    CALL meta.exchange_generation(p_table, '_shadow', '_previous');
+
+    IF p_watermark IS NOT NULL THEN
+        SELECT last_watermark INTO v_watermark FROM meta.pipeline_state WHERE source_name = p_table;
+        CALL meta.set_watermark(p_table, p_watermark);
+    END IF;
+    INSERT INTO meta.table_generation (table_name, swapped_at, previous_watermark)
+    VALUES (p_table, NOW(), v_watermark)
+    ON CONFLICT (table_name) DO UPDATE SET
+        swapped_at         = EXCLUDED.swapped_at,
+        previous_watermark = EXCLUDED.previous_watermark;
+END;
+$$;
+
+CREATE OR REPLACE PROCEDURE meta.rollback_swap(p_table TEXT)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_previous TEXT;
+    v_current  TEXT;
+BEGIN
+    IF meta.generation_table(p_table, '_previous') IS NULL THEN
+        RAISE EXCEPTION 'No previous generation of %', p_table;
+    END IF;
+
+    RAISE NOTICE '>> Rolling back: % to %_previous', p_table, p_table;
+    IF meta.generation_table(p_table, '_shadow') IS NOT NULL THEN
+        EXECUTE format('DROP TABLE %s', meta.generation_table(p_table, '_shadow'));
+    END IF;
+    CALL meta.exchange_generation(p_table, '_previous', '_shadow');
+    CALL meta.rename_generation(p_table, '_shadow', '_previous');
+
+    -- the rolled back generation becomes the previous one, with its watermark
+    SELECT previous_watermark INTO v_previous FROM meta.table_generation WHERE table_name = p_table;
+    SELECT last_watermark INTO v_current FROM meta.pipeline_state WHERE source_name = p_table;
+    IF v_previous IS NOT NULL THEN
+        CALL meta.set_watermark(p_table, v_previous::BIGINT);
+    END IF;
+    UPDATE meta.table_generation
+    SET swapped_at = NOW(), previous_watermark = v_current
+    WHERE table_name = p_table;
+
+    IF to_regclass('meta.partition_refresh_target') IS NOT NULL THEN
+        CALL meta.queue_partition_refresh(p_table, 'all');
+    END IF;
+END;
+$$;
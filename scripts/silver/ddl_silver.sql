@@ -5,12 +5,50 @@ DDL Script: Create Silver Tables
 Purpose:
     Defines and creates tables in the 'silver' schema.
     Existing tables are dropped and recreated to refresh the Silver layer
-    structure derived from Bronze tables.
+    structure derived from Bronze tables. Its watermarks are reset because
+    the recreated tables are empty.
+    The tables have no indexes here: the join-key and natural-key indexes
+    gold and the incremental MERGE load need are declared in etl/indexes.py
+    and built once the tables are loaded.
+    silver.crm_sales_details is range-partitioned by month of sls_order_dt
+    (helpers in scripts/proc_partitions.sql).
 ===============================================================================
 */
 
 
 CREATE SCHEMA IF NOT EXISTS silver;
+CREATE SCHEMA IF NOT EXISTS meta;
+
+CREATE TABLE IF NOT EXISTS meta.pipeline_state (
+  source_name TEXT PRIMARY KEY,
+  last_success_ts TIMESTAMP,
+  last_watermark TEXT,
+  last_status TEXT,
+  updated_at TIMESTAMP DEFAULT NOW()
+);
+
+DELETE FROM meta.pipeline_state WHERE source_name LIKE 'silver.%';
+
+-- Shadow and previous generations of the tables (scripts/proc_shadow_swap.sql)
+-- have the old structure
+DO $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT oid::regclass AS relation
+        FROM pg_class
+        WHERE relnamespace = 'silver'::regnamespace
+          AND relkind IN ('r', 'p')
+          AND NOT relispartition
+          AND (relname LIKE '%\_shadow' OR relname LIKE '%\_previous')
+    LOOP
+        EXECUTE format('DROP TABLE %s', r.relation);
+    END LOOP;
+    IF to_regclass('meta.table_generation') IS NOT NULL THEN
+        DELETE FROM meta.table_generation WHERE table_name LIKE 'silver.%';
+    END IF;
+END $$;
 
 DROP TABLE IF EXISTS silver.crm_cust_info CASCADE;
 CREATE TABLE silver.crm_cust_info (
@@ -49,7 +87,10 @@ CREATE TABLE silver.crm_sales_details (
     sls_quantity  INT,
     sls_price     INT,
     dwh_create_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+) PARTITION BY RANGE (sls_order_dt);
+-- one partition per order month is created by the load procedures
+-- (meta.ensure_month_partitions); rows without an order date go to DEFAULT
+CREATE TABLE silver.crm_sales_details_default PARTITION OF silver.crm_sales_details DEFAULT;
 
 DROP TABLE IF EXISTS silver.erp_cust_info CASCADE;
 CREATE TABLE silver.erp_cust_info (
@@ -8,52 +8,108 @@ Purpose:
 
 Actions:
     - Truncates Silver tables to support repeatable runs.
-    - Inserts cleaned/transformed data from Bronze into Silver.
+    - Inserts cleaned/transformed data from Bronze into Silver. The rules of
+      the truncated tables are the views silver.<table>_source, which the
+      shadow-table loads (scripts/proc_shadow_swap.sql) read as well.
+    - The customer sources (crm_cust_info, erp_cust_info, erp_loc_info) are
+      not truncated: their cleaned rows are compared with the row hashes
+      of the previous load and only inserted, updated and deleted keys are
+      written (meta.apply_dimension_changes, from
+      scripts/proc_change_detection.sql), then queued for the gold tables
+      maintained from them.
+      Change detection compares rows by key, so each source keeps one row
+      per key, as the incremental MERGE does: the latest by cst_create_date
+      for crm_cust_info, the latest loaded (dwh_row_id) for the ERP cid.
+      Rows without a key are dropped; they never match a customer in gold.
+    - Records the highest Bronze dwh_row_id per table as the watermark for
+      silver.load_silver_incremental() (see proc_load_silver_incremental.sql).
+    - Creates the monthly partitions of silver.crm_sales_details for every
+      order month in Bronze (meta.ensure_month_partitions, from
+      scripts/proc_partitions.sql) and queues a full rebuild of the gold
+      tables derived from it (materialized gold.fact_sales, the rollups).
+    - Each table has its own procedure, silver.load_<table>(), so tables can
+      be loaded independently (etl.run_pipeline runs them as DAG nodes);
+      silver.load_silver() calls all of them in one transaction.
 
 Parameters:
     None.
 
 Run:
     CALL silver.load_silver();
+    CALL silver.load_crm_sales_details();   -- one table
 ===============================================================================
 */
 
 CREATE SCHEMA IF NOT EXISTS silver;
+CREATE SCHEMA IF NOT EXISTS meta;
+
+CREATE TABLE IF NOT EXISTS meta.pipeline_state (
+  source_name TEXT PRIMARY KEY,
+  last_success_ts TIMESTAMP,
+  last_watermark TEXT,
+  last_status TEXT,
+  updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Watermark helpers (last processed bronze dwh_row_id per silver table)
+CREATE OR REPLACE FUNCTION meta.get_watermark(p_source TEXT)
+RETURNS BIGINT
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COALESCE(
+        (SELECT last_watermark::BIGINT FROM meta.pipeline_state WHERE source_name = p_source),
+        0
+    );
+$$;
 
-CREATE OR REPLACE PROCEDURE silver.load_silver()
+CREATE OR REPLACE PROCEDURE meta.set_watermark(p_source TEXT, p_watermark BIGINT)
+LANGUAGE sql
+AS $$
+    INSERT INTO meta.pipeline_state (source_name, last_success_ts, last_watermark, last_status, updated_at)
+    VALUES (p_source, NOW(), p_watermark::TEXT, 'success', NOW())
+    ON CONFLICT (source_name) DO UPDATE SET
+        last_success_ts = EXCLUDED.last_success_ts,
+        last_watermark  = EXCLUDED.last_watermark,
+        last_status     = EXCLUDED.last_status,
+        updated_at      = EXCLUDED.updated_at;
+$$;
+
+-- Derived tables record the silver watermarks they were refreshed against
+-- (the gold refresh procedures mark 'gold.<object>'), so versions computed
+-- over meta.pipeline_state tell a refreshed layer from a stale one
+CREATE OR REPLACE PROCEDURE meta.mark_refreshed(p_target TEXT)
+LANGUAGE sql
+AS $$
+    INSERT INTO meta.pipeline_state (source_name, last_success_ts, last_watermark, last_status, updated_at)
+    SELECT p_target, NOW(),
+        md5(COALESCE(string_agg(source_name || '=' || COALESCE(last_watermark, ''), '|' ORDER BY source_name), '')),
+        'success', NOW()
+    FROM meta.pipeline_state
+    WHERE source_name LIKE 'silver.%'
+    ON CONFLICT (source_name) DO UPDATE SET
+        last_success_ts = EXCLUDED.last_success_ts,
+        last_watermark  = EXCLUDED.last_watermark,
+        last_status     = EXCLUDED.last_status,
+        updated_at      = EXCLUDED.updated_at;
+$$;
+
+-- silver.crm_cust_info
+CREATE OR REPLACE PROCEDURE silver.load_crm_cust_info()
 LANGUAGE plpgsql
 AS $$
 DECLARE
-    start_time       TIMESTAMP;
-    end_time         TIMESTAMP;
-    batch_start_time TIMESTAMP;
-    batch_end_time   TIMESTAMP;
+    start_time  TIMESTAMP;
+    end_time    TIMESTAMP;
+    v_watermark BIGINT;
 BEGIN
-    batch_start_time := clock_timestamp();
+    -- Watermark taken before the copy: Bronze rows arriving meanwhile are
+    -- merged again (idempotently) by the next incremental run
+    SELECT COALESCE(MAX(dwh_row_id), 0) INTO v_watermark FROM bronze.crm_cust_info;
 
-    RAISE NOTICE '================================================';
-    RAISE NOTICE 'Loading Silver Layer';
-    RAISE NOTICE '================================================';
-
-    RAISE NOTICE '------------------------------------------------';
-    RAISE NOTICE 'Loading CRM Tables';
-    RAISE NOTICE '------------------------------------------------';
-
-    -- silver.crm_cust_info
     start_time := clock_timestamp();
-    RAISE NOTICE '>> Truncating Table: silver.crm_cust_info';
-    TRUNCATE TABLE silver.crm_cust_info;
-
-    RAISE NOTICE '>> Inserting Data Into: silver.crm_cust_info';
-    INSERT INTO silver.crm_cust_info (
-        cst_id,
-        cst_key,
-        cst_firstname,
-        cst_lastname,
-        cst_marital_status,
-        cst_gndr,
-        cst_create_date
-    )
+    RAISE NOTICE '>> Detecting Changes: silver.crm_cust_info';
+    CREATE TEMP TABLE tmp_crm_cust_info ON COMMIT DROP AS
     SELECT
         cst_id,
         cst_key,
@@ -73,18 +129,57 @@ BEGIN
     FROM (
         SELECT
             *,
-            ROW_NUMBER() OVER (PARTITION BY cst_id ORDER BY cst_create_date DESC) AS flag_last
+            ROW_NUMBER() OVER (PARTITION BY cst_id ORDER BY cst_create_date DESC, dwh_row_id DESC) AS flag_last
         FROM bronze.crm_cust_info
         WHERE cst_id IS NOT NULL
     ) t
     WHERE flag_last = 1;
 
+    CALL meta.apply_dimension_changes('silver.crm_cust_info', 'tmp_crm_cust_info', 'cst_id');
+    DROP TABLE tmp_crm_cust_info;
+
     end_time := clock_timestamp();
     RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
     RAISE NOTICE '>> -------------';
 
+    CALL meta.set_watermark('silver.crm_cust_info', v_watermark);
+END;
+$$;
+
+-- silver.crm_prd_info
+CREATE OR REPLACE VIEW silver.crm_prd_info_source AS
+SELECT
+    prd_id,
+    REPLACE(SUBSTRING(prd_key FROM 1 FOR 5), '-', '_') AS cat_id,
+    SUBSTRING(prd_key FROM 7) AS prd_key,
+    prd_nm,
+    COALESCE(prd_cost, 0) AS prd_cost,
+    CASE
+        WHEN UPPER(TRIM(prd_line)) = 'M' THEN 'Mountain'
+        WHEN UPPER(TRIM(prd_line)) = 'R' THEN 'Road'
+        WHEN UPPER(TRIM(prd_line)) = 'S' THEN 'Other Sales'
+        WHEN UPPER(TRIM(prd_line)) = 'T' THEN 'Touring'
+        ELSE 'n/a'
+    END AS prd_line,
+    prd_start_dt::date AS prd_start_dt,
+    (
+      LEAD(prd_start_dt) OVER (PARTITION BY prd_key ORDER BY prd_start_dt)
+      - INTERVAL '1 day'
+    )::date AS prd_end_dt
+FROM bronze.crm_prd_info;
+
+CREATE OR REPLACE PROCEDURE silver.load_crm_prd_info()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time  TIMESTAMP;
+    end_time    TIMESTAMP;
+    v_watermark BIGINT;
+BEGIN
+    -- Watermark taken before the copy: Bronze rows arriving meanwhile are
+    -- merged again (idempotently) by the next incremental run
+    SELECT COALESCE(MAX(dwh_row_id), 0) INTO v_watermark FROM bronze.crm_prd_info;
 
-    -- silver.crm_prd_info
     start_time := clock_timestamp();
     RAISE NOTICE '>> Truncating Table: silver.crm_prd_info';
     TRUNCATE TABLE silver.crm_prd_info;
@@ -102,31 +197,83 @@ BEGIN
     )
     SELECT
         prd_id,
-        REPLACE(SUBSTRING(prd_key FROM 1 FOR 5), '-', '_') AS cat_id,
-        SUBSTRING(prd_key FROM 7) AS prd_key,
+        cat_id,
+        prd_key,
         prd_nm,
-        COALESCE(prd_cost, 0) AS prd_cost,
-        CASE
-            WHEN UPPER(TRIM(prd_line)) = 'M' THEN 'Mountain'
-            WHEN UPPER(TRIM(prd_line)) = 'R' THEN 'Road'
-            WHEN UPPER(TRIM(prd_line)) = 'S' THEN 'Other Sales'
-            WHEN UPPER(TRIM(prd_line)) = 'T' THEN 'Touring'
-            ELSE 'n/a'
-        END AS prd_line,
-        prd_start_dt::date AS prd_start_dt,
-        (
-          LEAD(prd_start_dt) OVER (PARTITION BY prd_key ORDER BY prd_start_dt)
-          - INTERVAL '1 day'
-        )::date AS prd_end_dt
-    FROM bronze.crm_prd_info;
+        prd_cost,
+        prd_line,
+        prd_start_dt,
+        prd_end_dt
+    FROM silver.crm_prd_info_source;
 
     end_time := clock_timestamp();
     RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
     RAISE NOTICE '>> -------------';
 
+    CALL meta.set_watermark('silver.crm_prd_info', v_watermark);
+END;
+$$;
+
+-- silver.crm_sales_details
+-- Order months in Bronze, one partition each
+CREATE OR REPLACE FUNCTION silver.sales_order_months()
+RETURNS DATE[]
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT array_agg(DISTINCT date_trunc('month', to_date(sls_order_dt::text, 'YYYYMMDD'))::date)
+    FROM bronze.crm_sales_details
+    WHERE sls_order_dt <> 0 AND LENGTH(sls_order_dt::text) = 8;
+$$;
+
+CREATE OR REPLACE VIEW silver.crm_sales_details_source AS
+SELECT
+    sls_ord_num,
+    sls_prd_key,
+    sls_cust_id,
+    CASE
+        WHEN sls_order_dt = 0 OR LENGTH(sls_order_dt::text) <> 8 THEN NULL
+        ELSE to_date(sls_order_dt::text, 'YYYYMMDD')
+    END AS sls_order_dt,
+    CASE
+        WHEN sls_ship_dt = 0 OR LENGTH(sls_ship_dt::text) <> 8 THEN NULL
+        ELSE to_date(sls_ship_dt::text, 'YYYYMMDD')
+    END AS sls_ship_dt,
+    CASE
+        WHEN sls_due_dt = 0 OR LENGTH(sls_due_dt::text) <> 8 THEN NULL
+        ELSE to_date(sls_due_dt::text, 'YYYYMMDD')
+    END AS sls_due_dt,
+    CASE
+        WHEN sls_sales IS NULL
+          OR sls_sales <= 0
+          OR sls_sales <> sls_quantity * ABS(sls_price)
+        THEN sls_quantity * ABS(sls_price)
+        ELSE sls_sales
+    END AS sls_sales,
+    sls_quantity,
+    CASE
+        WHEN sls_price IS NULL OR sls_price <= 0
+        THEN (COALESCE(sls_sales, 0)::numeric / NULLIF(sls_quantity, 0))::int
+        ELSE sls_price
+    END AS sls_price
+FROM bronze.crm_sales_details;
+
+CREATE OR REPLACE PROCEDURE silver.load_crm_sales_details()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time  TIMESTAMP;
+    end_time    TIMESTAMP;
+    v_watermark BIGINT;
+BEGIN
+    -- Watermark taken before the copy: Bronze rows arriving meanwhile are
+    -- merged again (idempotently) by the next incremental run
+    SELECT COALESCE(MAX(dwh_row_id), 0) INTO v_watermark FROM bronze.crm_sales_details;
 
-    -- silver.crm_sales_details
     start_time := clock_timestamp();
+    -- one partition per order month
+    CALL meta.ensure_month_partitions('silver.crm_sales_details', silver.sales_order_months());
+
     RAISE NOTICE '>> Truncating Table: silver.crm_sales_details';
     TRUNCATE TABLE silver.crm_sales_details;
 
@@ -146,94 +293,134 @@ BEGIN
         sls_ord_num,
         sls_prd_key,
         sls_cust_id,
-        CASE
-            WHEN sls_order_dt = 0 OR LENGTH(sls_order_dt::text) <> 8 THEN NULL
-            ELSE to_date(sls_order_dt::text, 'YYYYMMDD')
-        END AS sls_order_dt,
-        CASE
-            WHEN sls_ship_dt = 0 OR LENGTH(sls_ship_dt::text) <> 8 THEN NULL
-            ELSE to_date(sls_ship_dt::text, 'YYYYMMDD')
-        END AS sls_ship_dt,
-        CASE
-            WHEN sls_due_dt = 0 OR LENGTH(sls_due_dt::text) <> 8 THEN NULL
-            ELSE to_date(sls_due_dt::text, 'YYYYMMDD')
-        END AS sls_due_dt,
-        CASE
-            WHEN sls_sales IS NULL
-              OR sls_sales <= 0
-              OR sls_sales <> sls_quantity * ABS(sls_price)
-            THEN sls_quantity * ABS(sls_price)
-            ELSE sls_sales
-        END AS sls_sales,
+        sls_order_dt,
+        sls_ship_dt,
+        sls_due_dt,
+        sls_sales,
         sls_quantity,
-        CASE
-            WHEN sls_price IS NULL OR sls_price <= 0
-            THEN (COALESCE(sls_sales, 0)::numeric / NULLIF(sls_quantity, 0))::int
-            ELSE sls_price
-        END AS sls_price
-    FROM bronze.crm_sales_details;
+        sls_price
+    FROM silver.crm_sales_details_source;
 
     end_time := clock_timestamp();
     RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
     RAISE NOTICE '>> -------------';
 
+    CALL meta.set_watermark('silver.crm_sales_details', v_watermark);
+    -- every month may have changed
+    CALL meta.queue_partition_refresh('silver.crm_sales_details', 'all');
+END;
+$$;
 
-    RAISE NOTICE '------------------------------------------------';
-    RAISE NOTICE 'Loading ERP Tables';
-    RAISE NOTICE '------------------------------------------------';
-
+-- silver.erp_cust_info
+CREATE OR REPLACE PROCEDURE silver.load_erp_cust_info()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time  TIMESTAMP;
+    end_time    TIMESTAMP;
+    v_watermark BIGINT;
+BEGIN
+    -- Watermark taken before the copy: Bronze rows arriving meanwhile are
+    -- merged again (idempotently) by the next incremental run
+    SELECT COALESCE(MAX(dwh_row_id), 0) INTO v_watermark FROM bronze.erp_cust_info;
 
-    -- silver.erp_cust_info
     start_time := clock_timestamp();
-    RAISE NOTICE '>> Truncating Table: silver.erp_cust_info';
-    TRUNCATE TABLE silver.erp_cust_info;
+    RAISE NOTICE '>> Detecting Changes: silver.erp_cust_info';
+    CREATE TEMP TABLE tmp_erp_cust_info ON COMMIT DROP AS
+    SELECT DISTINCT ON (cid) cid, bdate, gen
+    FROM (
+        SELECT
+            dwh_row_id,
+            CASE
+                WHEN cid LIKE 'NAS%' THEN SUBSTRING(cid FROM 4)
+                ELSE cid
+            END AS cid,
+            CASE
+                WHEN bdate > CURRENT_DATE THEN NULL
+                WHEN bdate < DATE '1924-01-01' THEN NULL
+                ELSE bdate
+            END AS bdate,
+            CASE
+                WHEN UPPER(TRIM(gen)) IN ('F', 'FEMALE') THEN 'Female'
+                WHEN UPPER(TRIM(gen)) IN ('M', 'MALE') THEN 'Male'
+                ELSE 'n/a'
+            END AS gen
+        FROM bronze.erp_cust_info
+        WHERE cid IS NOT NULL
+    ) t
+    ORDER BY cid, dwh_row_id DESC;
 
-    RAISE NOTICE '>> Inserting Data Into: silver.erp_cust_info';
-    INSERT INTO silver.erp_cust_info (cid, bdate, gen)
-    SELECT
-        CASE
-            WHEN cid LIKE 'NAS%' THEN SUBSTRING(cid FROM 4)
-            ELSE cid
-        END AS cid,
-        CASE
-            WHEN bdate > CURRENT_DATE THEN NULL
-            WHEN bdate < DATE '1924-01-01' THEN NULL
-            ELSE bdate
-        END AS bdate,
-        CASE
-            WHEN UPPER(TRIM(gen)) IN ('F', 'FEMALE') THEN 'Female'
-            WHEN UPPER(TRIM(gen)) IN ('M', 'MALE') THEN 'Male'
-            ELSE 'n/a'
-        END AS gen
-    FROM bronze.erp_cust_info;
+    CALL meta.apply_dimension_changes('silver.erp_cust_info', 'tmp_erp_cust_info', 'cid');
+    DROP TABLE tmp_erp_cust_info;
 
     end_time := clock_timestamp();
     RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
     RAISE NOTICE '>> -------------';
 
+    CALL meta.set_watermark('silver.erp_cust_info', v_watermark);
+END;
+$$;
+
+-- silver.erp_loc_info
+CREATE OR REPLACE PROCEDURE silver.load_erp_loc_info()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time  TIMESTAMP;
+    end_time    TIMESTAMP;
+    v_watermark BIGINT;
+BEGIN
+    -- Watermark taken before the copy: Bronze rows arriving meanwhile are
+    -- merged again (idempotently) by the next incremental run
+    SELECT COALESCE(MAX(dwh_row_id), 0) INTO v_watermark FROM bronze.erp_loc_info;
 
-    -- silver.erp_loc_info
     start_time := clock_timestamp();
-    RAISE NOTICE '>> Truncating Table: silver.erp_loc_info';
-    TRUNCATE TABLE silver.erp_loc_info;
-    RAISE NOTICE '>> Inserting Data Into: silver.erp_loc_info';
-    INSERT INTO silver.erp_loc_info (cid, cntry)
-    SELECT
-        REPLACE(cid, '-', '') AS cid,
-        CASE
-            WHEN TRIM(cntry) = 'DE' THEN 'Germany'
-            WHEN TRIM(cntry) IN ('US', 'USA') THEN 'United States'
-            WHEN TRIM(cntry) = '' OR cntry IS NULL THEN 'n/a'
-            ELSE TRIM(cntry)
-        END AS cntry
-    FROM bronze.erp_loc_info;
+    RAISE NOTICE '>> Detecting Changes: silver.erp_loc_info';
+    CREATE TEMP TABLE tmp_erp_loc_info ON COMMIT DROP AS
+    SELECT DISTINCT ON (cid) cid, cntry
+    FROM (
+        SELECT
+            dwh_row_id,
+            REPLACE(cid, '-', '') AS cid,
+            CASE
+                WHEN TRIM(cntry) = 'DE' THEN 'Germany'
+                WHEN TRIM(cntry) IN ('US', 'USA') THEN 'United States'
+                WHEN TRIM(cntry) = '' OR cntry IS NULL THEN 'n/a'
+                ELSE TRIM(cntry)
+            END AS cntry
+        FROM bronze.erp_loc_info
+        WHERE cid IS NOT NULL
+    ) t
+    ORDER BY cid, dwh_row_id DESC;
+
+    CALL meta.apply_dimension_changes('silver.erp_loc_info', 'tmp_erp_loc_info', 'cid');
+    DROP TABLE tmp_erp_loc_info;
 
     end_time := clock_timestamp();
     RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
     RAISE NOTICE '>> -------------';
 
+    CALL meta.set_watermark('silver.erp_loc_info', v_watermark);
+END;
+$$;
+
+-- silver.erp_px_cat_info
+CREATE OR REPLACE VIEW silver.erp_px_cat_info_source AS
+SELECT id, cat, subcat, maintenance
+FROM bronze.erp_px_cat_info;
+
+CREATE OR REPLACE PROCEDURE silver.load_erp_px_cat_info()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time  TIMESTAMP;
+    end_time    TIMESTAMP;
+    v_watermark BIGINT;
+BEGIN
+    -- Watermark taken before the copy: Bronze rows arriving meanwhile are
+    -- merged again (idempotently) by the next incremental run
+    SELECT COALESCE(MAX(dwh_row_id), 0) INTO v_watermark FROM bronze.erp_px_cat_info;
 
-    -- silver.erp_px_cat_info
     start_time := clock_timestamp();
     RAISE NOTICE '>> Truncating Table: silver.erp_px_cat_info';
     TRUNCATE TABLE silver.erp_px_cat_info;
@@ -241,37 +428,74 @@ BEGIN
     RAISE NOTICE '>> Inserting Data Into: silver.erp_px_cat_info';
     INSERT INTO silver.erp_px_cat_info (id, cat, subcat, maintenance)
     SELECT id, cat, subcat, maintenance
-    FROM bronze.erp_px_cat_info;
+    FROM silver.erp_px_cat_info_source;
 
     end_time := clock_timestamp();
     RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
     RAISE NOTICE '>> -------------';
 
-    RAISE NOTICE '------------------------------------------------';
-    RAISE NOTICE 'Loading Marketing Tables';
-    RAISE NOTICE '------------------------------------------------';
+    CALL meta.set_watermark('silver.erp_px_cat_info', v_watermark);
+END;
+$$;
 
+-- silver.marketing_salesperson
+CREATE OR REPLACE VIEW silver.marketing_salesperson_source AS
+SELECT
+    salesperson_id,
+    name,
+    region,
+    CASE
+        WHEN email ~* '^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$' THEN email
+        ELSE 'n/a'
+    END AS email
+FROM bronze.marketing_salesperson;
+
+CREATE OR REPLACE PROCEDURE silver.load_marketing_salesperson()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time  TIMESTAMP;
+    end_time    TIMESTAMP;
+    v_watermark BIGINT;
+BEGIN
+    -- Watermark taken before the copy: Bronze rows arriving meanwhile are
+    -- merged again (idempotently) by the next incremental run
+    SELECT COALESCE(MAX(dwh_row_id), 0) INTO v_watermark FROM bronze.marketing_salesperson;
 
-    -- silver.marketing_salesperson
     start_time := clock_timestamp();
     RAISE NOTICE '>> Truncating Table: silver.marketing_salesperson';
     TRUNCATE TABLE silver.marketing_salesperson;
 
     RAISE NOTICE '>> Inserting Data Into: silver.marketing_salesperson';
-    INSERT INTO silver.marketing_salesperson ( salesperson_id, name, region, email)
-    SELECT salesperson_id, name, region, 
-    CASE
-    WHEN email ~* '^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$'
-        THEN email
-    ELSE 'n/a'
-    END AS email
-    FROM bronze.marketing_salesperson;
+    INSERT INTO silver.marketing_salesperson (salesperson_id, name, region, email)
+    SELECT salesperson_id, name, region, email
+    FROM silver.marketing_salesperson_source;
 
     end_time := clock_timestamp();
     RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
     RAISE NOTICE '>> -------------';
 
-    -- silver.marketing_salesperson_sales
+    CALL meta.set_watermark('silver.marketing_salesperson', v_watermark);
+END;
+$$;
+
+-- silver.marketing_salesperson_sales
+CREATE OR REPLACE VIEW silver.marketing_salesperson_sales_source AS
+SELECT salesperson_id, sls_ord_num
+FROM bronze.marketing_salesperson_sales;
+
+CREATE OR REPLACE PROCEDURE silver.load_marketing_salesperson_sales()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time  TIMESTAMP;
+    end_time    TIMESTAMP;
+    v_watermark BIGINT;
+BEGIN
+    -- Watermark taken before the copy: Bronze rows arriving meanwhile are
+    -- merged again (idempotently) by the next incremental run
+    SELECT COALESCE(MAX(dwh_row_id), 0) INTO v_watermark FROM bronze.marketing_salesperson_sales;
+
     start_time := clock_timestamp();
     RAISE NOTICE '>> Truncating Table: silver.marketing_salesperson_sales';
     TRUNCATE TABLE silver.marketing_salesperson_sales;
@@ -279,13 +503,33 @@ BEGIN
     RAISE NOTICE '>> Inserting Data Into: silver.marketing_salesperson_sales';
     INSERT INTO silver.marketing_salesperson_sales (salesperson_id, sls_ord_num)
     SELECT salesperson_id, sls_ord_num
-    FROM bronze.marketing_salesperson_sales;
+    FROM silver.marketing_salesperson_sales_source;
 
     end_time := clock_timestamp();
     RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
     RAISE NOTICE '>> -------------';
 
-    -- silver.marketing_discount_info
+    CALL meta.set_watermark('silver.marketing_salesperson_sales', v_watermark);
+END;
+$$;
+
+-- silver.marketing_discount_info
+CREATE OR REPLACE VIEW silver.marketing_discount_info_source AS
+SELECT discount_id, description, percent, active
+FROM bronze.marketing_discount_info;
+
+CREATE OR REPLACE PROCEDURE silver.load_marketing_discount_info()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time  TIMESTAMP;
+    end_time    TIMESTAMP;
+    v_watermark BIGINT;
+BEGIN
+    -- Watermark taken before the copy: Bronze rows arriving meanwhile are
+    -- merged again (idempotently) by the next incremental run
+    SELECT COALESCE(MAX(dwh_row_id), 0) INTO v_watermark FROM bronze.marketing_discount_info;
+
     start_time := clock_timestamp();
     RAISE NOTICE '>> Truncating Table: silver.marketing_discount_info';
     TRUNCATE TABLE silver.marketing_discount_info;
@@ -293,13 +537,33 @@ BEGIN
     RAISE NOTICE '>> Inserting Data Into: silver.marketing_discount_info';
     INSERT INTO silver.marketing_discount_info (discount_id, description, percent, active)
     SELECT discount_id, description, percent, active
-    FROM bronze.marketing_discount_info;
+    FROM silver.marketing_discount_info_source;
 
     end_time := clock_timestamp();
     RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
     RAISE NOTICE '>> -------------';
 
-    -- silver.marketing_sales_discount
+    CALL meta.set_watermark('silver.marketing_discount_info', v_watermark);
+END;
+$$;
+
+-- silver.marketing_sales_discount
+CREATE OR REPLACE VIEW silver.marketing_sales_discount_source AS
+SELECT discount_id, sls_ord_num
+FROM bronze.marketing_sales_discount;
+
+CREATE OR REPLACE PROCEDURE silver.load_marketing_sales_discount()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time  TIMESTAMP;
+    end_time    TIMESTAMP;
+    v_watermark BIGINT;
+BEGIN
+    -- Watermark taken before the copy: Bronze rows arriving meanwhile are
+    -- merged again (idempotently) by the next incremental run
+    SELECT COALESCE(MAX(dwh_row_id), 0) INTO v_watermark FROM bronze.marketing_sales_discount;
+
     start_time := clock_timestamp();
     RAISE NOTICE '>> Truncating Table: silver.marketing_sales_discount';
     TRUNCATE TABLE silver.marketing_sales_discount;
@@ -307,12 +571,53 @@ BEGIN
     RAISE NOTICE '>> Inserting Data Into: silver.marketing_sales_discount';
     INSERT INTO silver.marketing_sales_discount (discount_id, sls_ord_num)
     SELECT discount_id, sls_ord_num
-    FROM bronze.marketing_sales_discount;
+    FROM silver.marketing_sales_discount_source;
 
     end_time := clock_timestamp();
     RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
     RAISE NOTICE '>> -------------';
 
+    CALL meta.set_watermark('silver.marketing_sales_discount', v_watermark);
+END;
+$$;
+
+CREATE OR REPLACE PROCEDURE silver.load_silver()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    batch_start_time TIMESTAMP;
+    batch_end_time   TIMESTAMP;
+BEGIN
+    batch_start_time := clock_timestamp();
+
+    RAISE NOTICE '================================================';
+    RAISE NOTICE 'Loading Silver Layer';
+    RAISE NOTICE '================================================';
+
+    RAISE NOTICE '------------------------------------------------';
+    RAISE NOTICE 'Loading CRM Tables';
+    RAISE NOTICE '------------------------------------------------';
+
+    CALL silver.load_crm_cust_info();
+    CALL silver.load_crm_prd_info();
+    CALL silver.load_crm_sales_details();
+
+    RAISE NOTICE '------------------------------------------------';
+    RAISE NOTICE 'Loading ERP Tables';
+    RAISE NOTICE '------------------------------------------------';
+
+    CALL silver.load_erp_cust_info();
+    CALL silver.load_erp_loc_info();
+    CALL silver.load_erp_px_cat_info();
+
+    RAISE NOTICE '------------------------------------------------';
+    RAISE NOTICE 'Loading Marketing Tables';
+    RAISE NOTICE '------------------------------------------------';
+
+    CALL silver.load_marketing_salesperson();
+    CALL silver.load_marketing_salesperson_sales();
+    CALL silver.load_marketing_discount_info();
+    CALL silver.load_marketing_sales_discount();
 
     batch_end_time := clock_timestamp();
     RAISE NOTICE '==========================================';
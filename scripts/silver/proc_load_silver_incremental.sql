@@ -0,0 +1,742 @@
+/*
+===============================================================================
+Procedure: Incremental Load Silver Layer (Bronze -> Silver)
+===============================================================================
+Purpose:
+    Applies only the Bronze rows added since the previous Silver load, using
+    the same cleansing rules as silver.load_silver().
+
+Actions:
+    - Reads each Bronze table from its watermark (last processed dwh_row_id,
+      kept in meta.pipeline_state) up to its current maximum.
+    - MERGEs the cleaned delta into Silver on natural keys:
+        crm_cust_info               cst_id (latest cst_create_date wins)
+        crm_prd_info                cat_id + prd_key + prd_start_dt
+        crm_sales_details           sls_ord_num + sls_prd_key
+        erp_cust_info, erp_loc_info cid
+        erp_px_cat_info             id
+        marketing_salesperson       salesperson_id
+        marketing_discount_info     discount_id
+        marketing_*_sales/discount  sls_ord_num
+    - Recomputes prd_end_dt only for product keys touched by the delta.
+    - Queues the merged keys of the customer sources (crm_cust_info,
+      erp_cust_info, erp_loc_info) for the gold tables maintained from
+      them (meta.queue_dimension_changes, scripts/proc_change_detection.sql).
+    - silver.crm_sales_details is partitioned by order month: instead of a
+      MERGE, only the partitions the delta touches are rebuilt (existing
+      rows with the delta applied) and swapped in with DETACH/ATTACH
+      (meta.swap_partition); the same months are queued for the gold
+      tables derived from it (materialized gold.fact_sales, the rollups).
+    - Advances the watermarks in the same transaction.
+    - Each table has its own procedure, silver.load_<table>_incremental(),
+      called in turn by silver.load_silver_incremental().
+
+Notes:
+    Rows deleted from a source are not removed; run silver.load_silver()
+    for a full rebuild. Requires meta.get_watermark / meta.set_watermark
+    from proc_load_silver.sql.
+
+Parameters:
+    None.
+
+Run:
+    CALL silver.load_silver_incremental();
+    CALL silver.load_crm_sales_details_incremental();   -- one table
+===============================================================================
+*/
+
+CREATE SCHEMA IF NOT EXISTS silver;
+
+-- silver.crm_cust_info
+CREATE OR REPLACE PROCEDURE silver.load_crm_cust_info_incremental()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time TIMESTAMP;
+    end_time   TIMESTAMP;
+    v_wm       BIGINT;
+    v_hwm      BIGINT;
+    v_rows     BIGINT;
+    v_keys     TEXT[];
+BEGIN
+    start_time := clock_timestamp();
+    v_wm := meta.get_watermark('silver.crm_cust_info');
+    SELECT COALESCE(MAX(dwh_row_id), v_wm) INTO v_hwm
+    FROM bronze.crm_cust_info WHERE dwh_row_id > v_wm;
+
+    RAISE NOTICE '>> Merging Data Into: silver.crm_cust_info (rows % - %)', v_wm + 1, v_hwm;
+    -- keys about to be merged, for the gold tables maintained from them
+    SELECT array_agg(cst_id::text) INTO v_keys
+    FROM bronze.crm_cust_info
+    WHERE cst_id IS NOT NULL AND dwh_row_id > v_wm AND dwh_row_id <= v_hwm;
+    CALL meta.queue_dimension_changes('silver.crm_cust_info', 'cst_id', v_keys);
+    MERGE INTO silver.crm_cust_info AS s
+    USING (
+        SELECT
+            cst_id,
+            cst_key,
+            TRIM(cst_firstname) AS cst_firstname,
+            TRIM(cst_lastname) AS cst_lastname,
+            CASE
+                WHEN UPPER(TRIM(cst_marital_status)) = 'S' THEN 'Single'
+                WHEN UPPER(TRIM(cst_marital_status)) = 'M' THEN 'Married'
+                ELSE 'n/a'
+            END AS cst_marital_status,
+            CASE
+                WHEN UPPER(TRIM(cst_gndr)) = 'F' THEN 'Female'
+                WHEN UPPER(TRIM(cst_gndr)) = 'M' THEN 'Male'
+                ELSE 'n/a'
+            END AS cst_gndr,
+            cst_create_date
+        FROM (
+            SELECT
+                *,
+                ROW_NUMBER() OVER (PARTITION BY cst_id ORDER BY cst_create_date DESC, dwh_row_id DESC) AS flag_last
+            FROM bronze.crm_cust_info
+            WHERE cst_id IS NOT NULL
+              AND dwh_row_id > v_wm AND dwh_row_id <= v_hwm
+        ) t
+        WHERE flag_last = 1
+    ) AS d
+    ON s.cst_id = d.cst_id
+    -- same precedence as the full load: ORDER BY cst_create_date DESC (NULLs first)
+    WHEN MATCHED AND (
+        d.cst_create_date IS NULL
+        OR (s.cst_create_date IS NOT NULL AND d.cst_create_date >= s.cst_create_date)
+    ) THEN UPDATE SET
+        cst_key            = d.cst_key,
+        cst_firstname      = d.cst_firstname,
+        cst_lastname       = d.cst_lastname,
+        cst_marital_status = d.cst_marital_status,
+        cst_gndr           = d.cst_gndr,
+        cst_create_date    = d.cst_create_date
+    WHEN NOT MATCHED THEN INSERT (
+        cst_id, cst_key, cst_firstname, cst_lastname,
+        cst_marital_status, cst_gndr, cst_create_date
+    ) VALUES (
+        d.cst_id, d.cst_key, d.cst_firstname, d.cst_lastname,
+        d.cst_marital_status, d.cst_gndr, d.cst_create_date
+    );
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    CALL meta.set_watermark('silver.crm_cust_info', v_hwm);
+
+    end_time := clock_timestamp();
+    RAISE NOTICE '>> Rows Merged: %', v_rows;
+    RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
+    RAISE NOTICE '>> -------------';
+END;
+$$;
+
+-- silver.crm_prd_info
+CREATE OR REPLACE PROCEDURE silver.load_crm_prd_info_incremental()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time TIMESTAMP;
+    end_time   TIMESTAMP;
+    v_wm       BIGINT;
+    v_hwm      BIGINT;
+    v_rows     BIGINT;
+BEGIN
+    start_time := clock_timestamp();
+    v_wm := meta.get_watermark('silver.crm_prd_info');
+    SELECT COALESCE(MAX(dwh_row_id), v_wm) INTO v_hwm
+    FROM bronze.crm_prd_info WHERE dwh_row_id > v_wm;
+
+    RAISE NOTICE '>> Merging Data Into: silver.crm_prd_info (rows % - %)', v_wm + 1, v_hwm;
+    MERGE INTO silver.crm_prd_info AS s
+    USING (
+        SELECT DISTINCT ON (cat_id, prd_key, prd_start_dt) *
+        FROM (
+            SELECT
+                dwh_row_id,
+                prd_id,
+                REPLACE(SUBSTRING(prd_key FROM 1 FOR 5), '-', '_') AS cat_id,
+                SUBSTRING(prd_key FROM 7) AS prd_key,
+                prd_nm,
+                COALESCE(prd_cost, 0) AS prd_cost,
+                CASE
+                    WHEN UPPER(TRIM(prd_line)) = 'M' THEN 'Mountain'
+                    WHEN UPPER(TRIM(prd_line)) = 'R' THEN 'Road'
+                    WHEN UPPER(TRIM(prd_line)) = 'S' THEN 'Other Sales'
+                    WHEN UPPER(TRIM(prd_line)) = 'T' THEN 'Touring'
+                    ELSE 'n/a'
+                END AS prd_line,
+                prd_start_dt::date AS prd_start_dt
+            FROM bronze.crm_prd_info
+            WHERE dwh_row_id > v_wm AND dwh_row_id <= v_hwm
+        ) t
+        ORDER BY cat_id, prd_key, prd_start_dt, dwh_row_id DESC
+    ) AS d
+    ON s.prd_key = d.prd_key
+       AND s.cat_id = d.cat_id
+       AND s.prd_start_dt IS NOT DISTINCT FROM d.prd_start_dt
+    WHEN MATCHED THEN UPDATE SET
+        prd_id   = d.prd_id,
+        prd_nm   = d.prd_nm,
+        prd_cost = d.prd_cost,
+        prd_line = d.prd_line
+    WHEN NOT MATCHED THEN INSERT (
+        prd_id, cat_id, prd_key, prd_nm, prd_cost, prd_line, prd_start_dt
+    ) VALUES (
+        d.prd_id, d.cat_id, d.prd_key, d.prd_nm, d.prd_cost, d.prd_line, d.prd_start_dt
+    );
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+
+    -- Rebuild the validity history of the touched product keys only
+    UPDATE silver.crm_prd_info s
+    SET prd_end_dt = h.prd_end_dt
+    FROM (
+        SELECT
+            p.ctid AS row_ctid,
+            LEAD(p.prd_start_dt) OVER (
+                PARTITION BY p.cat_id, p.prd_key ORDER BY p.prd_start_dt
+            ) - 1 AS prd_end_dt
+        FROM silver.crm_prd_info p
+        WHERE (p.cat_id, p.prd_key) IN (
+            SELECT
+                REPLACE(SUBSTRING(prd_key FROM 1 FOR 5), '-', '_'),
+                SUBSTRING(prd_key FROM 7)
+            FROM bronze.crm_prd_info
+            WHERE dwh_row_id > v_wm AND dwh_row_id <= v_hwm
+        )
+    ) h
+    WHERE s.ctid = h.row_ctid
+      AND s.prd_end_dt IS DISTINCT FROM h.prd_end_dt;
+    CALL meta.set_watermark('silver.crm_prd_info', v_hwm);
+
+    end_time := clock_timestamp();
+    RAISE NOTICE '>> Rows Merged: %', v_rows;
+    RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
+    RAISE NOTICE '>> -------------';
+END;
+$$;
+
+-- silver.crm_sales_details
+CREATE OR REPLACE PROCEDURE silver.load_crm_sales_details_incremental()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time TIMESTAMP;
+    end_time   TIMESTAMP;
+    v_wm       BIGINT;
+    v_hwm      BIGINT;
+    v_rows     BIGINT;
+    v_default  REGCLASS;
+    v_part     REGCLASS;
+    v_name     TEXT;
+    v_swap     TEXT;
+    v_months   DATE[];
+BEGIN
+    start_time := clock_timestamp();
+    v_wm := meta.get_watermark('silver.crm_sales_details');
+    SELECT COALESCE(MAX(dwh_row_id), v_wm) INTO v_hwm
+    FROM bronze.crm_sales_details WHERE dwh_row_id > v_wm;
+
+    RAISE NOTICE '>> Merging Data Into: silver.crm_sales_details (rows % - %)', v_wm + 1, v_hwm;
+    CREATE TEMP TABLE tmp_sales_delta ON COMMIT DROP AS
+    SELECT DISTINCT ON (sls_ord_num, sls_prd_key)
+        sls_ord_num,
+        sls_prd_key,
+        sls_cust_id,
+        CASE
+            WHEN sls_order_dt = 0 OR LENGTH(sls_order_dt::text) <> 8 THEN NULL
+            ELSE to_date(sls_order_dt::text, 'YYYYMMDD')
+        END AS sls_order_dt,
+        CASE
+            WHEN sls_ship_dt = 0 OR LENGTH(sls_ship_dt::text) <> 8 THEN NULL
+            ELSE to_date(sls_ship_dt::text, 'YYYYMMDD')
+        END AS sls_ship_dt,
+        CASE
+            WHEN sls_due_dt = 0 OR LENGTH(sls_due_dt::text) <> 8 THEN NULL
+            ELSE to_date(sls_due_dt::text, 'YYYYMMDD')
+        END AS sls_due_dt,
+        CASE
+            WHEN sls_sales IS NULL
+              OR sls_sales <= 0
+              OR sls_sales <> sls_quantity * ABS(sls_price)
+            THEN sls_quantity * ABS(sls_price)
+            ELSE sls_sales
+        END AS sls_sales,
+        sls_quantity,
+        CASE
+            WHEN sls_price IS NULL OR sls_price <= 0
+            THEN (COALESCE(sls_sales, 0)::numeric / NULLIF(sls_quantity, 0))::int
+            ELSE sls_price
+        END AS sls_price
+    FROM bronze.crm_sales_details
+    WHERE dwh_row_id > v_wm AND dwh_row_id <= v_hwm
+    ORDER BY sls_ord_num, sls_prd_key, dwh_row_id DESC;
+
+    -- Partitions touched by the delta: those holding rows it updates, and
+    -- those its order dates fall into (created if new)
+    SELECT array_agg(DISTINCT sls_order_dt) INTO v_months FROM tmp_sales_delta;
+    CALL meta.ensure_month_partitions('silver.crm_sales_details', v_months);
+    v_default := meta.default_partition('silver.crm_sales_details');
+
+    CREATE TEMP TABLE tmp_sales_parts ON COMMIT DROP AS
+    SELECT DISTINCT s.tableoid::regclass AS part
+    FROM silver.crm_sales_details s
+        JOIN tmp_sales_delta d
+          ON s.sls_ord_num = d.sls_ord_num AND s.sls_prd_key = d.sls_prd_key
+    UNION
+    SELECT DISTINCT COALESCE(meta.month_partition('silver.crm_sales_details', sls_order_dt), v_default)
+    FROM tmp_sales_delta;
+
+    -- New content of the touched partitions: their rows with the delta
+    -- applied (same semantics as MERGE: matched rows take the delta values,
+    -- unmatched delta rows are inserted), tagged with their partition
+    CREATE TEMP TABLE tmp_sales_merged ON COMMIT DROP AS
+    WITH merged AS (
+        SELECT
+            s.sls_ord_num,
+            s.sls_prd_key,
+            CASE WHEN d.sls_ord_num IS NULL THEN s.sls_cust_id  ELSE d.sls_cust_id  END AS sls_cust_id,
+            CASE WHEN d.sls_ord_num IS NULL THEN s.sls_order_dt ELSE d.sls_order_dt END AS sls_order_dt,
+            CASE WHEN d.sls_ord_num IS NULL THEN s.sls_ship_dt  ELSE d.sls_ship_dt  END AS sls_ship_dt,
+            CASE WHEN d.sls_ord_num IS NULL THEN s.sls_due_dt   ELSE d.sls_due_dt   END AS sls_due_dt,
+            CASE WHEN d.sls_ord_num IS NULL THEN s.sls_sales    ELSE d.sls_sales    END AS sls_sales,
+            CASE WHEN d.sls_ord_num IS NULL THEN s.sls_quantity ELSE d.sls_quantity END AS sls_quantity,
+            CASE WHEN d.sls_ord_num IS NULL THEN s.sls_price    ELSE d.sls_price    END AS sls_price,
+            s.dwh_create_date,
+            d.sls_ord_num IS NOT NULL AS merged
+        FROM silver.crm_sales_details s
+            LEFT JOIN tmp_sales_delta d
+              ON s.sls_ord_num = d.sls_ord_num AND s.sls_prd_key = d.sls_prd_key
+        WHERE s.tableoid IN (SELECT part FROM tmp_sales_parts)
+        UNION ALL
+        SELECT
+            d.sls_ord_num, d.sls_prd_key, d.sls_cust_id, d.sls_order_dt, d.sls_ship_dt,
+            d.sls_due_dt, d.sls_sales, d.sls_quantity, d.sls_price,
+            CURRENT_TIMESTAMP,
+            TRUE
+        FROM tmp_sales_delta d
+        WHERE NOT EXISTS (
+            SELECT 1 FROM silver.crm_sales_details s
+            WHERE s.sls_ord_num = d.sls_ord_num AND s.sls_prd_key = d.sls_prd_key
+        )
+    )
+    SELECT m.*,
+        COALESCE(meta.month_partition('silver.crm_sales_details', m.sls_order_dt), v_default) AS part
+    FROM merged m;
+    SELECT count(*) FILTER (WHERE merged) INTO v_rows FROM tmp_sales_merged;
+    -- months of every touched partition, including those a row moved out
+    -- of (which may end up empty); read before the swaps drop them
+    SELECT array_agg(meta.partition_month(part)) INTO v_months FROM tmp_sales_parts;
+
+    -- Rebuild each touched partition off to the side and swap it in
+    FOR v_part IN SELECT part FROM tmp_sales_parts LOOP
+        v_name := v_part::text;
+        v_swap := v_name || '_swap';
+        EXECUTE format(
+            'CREATE TABLE %s (LIKE silver.crm_sales_details INCLUDING DEFAULTS)', v_swap
+        );
+        EXECUTE format(
+            'INSERT INTO %s (sls_ord_num, sls_prd_key, sls_cust_id, sls_order_dt, sls_ship_dt, '
+            'sls_due_dt, sls_sales, sls_quantity, sls_price, dwh_create_date) '
+            'SELECT sls_ord_num, sls_prd_key, sls_cust_id, sls_order_dt, sls_ship_dt, '
+            'sls_due_dt, sls_sales, sls_quantity, sls_price, dwh_create_date '
+            'FROM tmp_sales_merged WHERE part = %L::regclass',
+            v_swap, v_part
+        );
+        CALL meta.swap_partition(v_part, v_swap::regclass);
+        -- the replacement now has the partition's name (and a new oid)
+        EXECUTE format('ANALYZE %s', v_name);
+        RAISE NOTICE '>> Rebuilt partition: %', v_name;
+    END LOOP;
+
+    -- derived gold tables rebuild the same months
+    CALL meta.queue_partition_refresh('silver.crm_sales_details', 'month', v_months);
+    IF EXISTS (SELECT 1 FROM tmp_sales_parts WHERE part = v_default) THEN
+        CALL meta.queue_partition_refresh('silver.crm_sales_details', 'default');
+    END IF;
+
+    CALL meta.set_watermark('silver.crm_sales_details', v_hwm);
+
+    end_time := clock_timestamp();
+    RAISE NOTICE '>> Rows Merged: %', v_rows;
+    RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
+    RAISE NOTICE '>> -------------';
+END;
+$$;
+
+-- silver.erp_cust_info
+CREATE OR REPLACE PROCEDURE silver.load_erp_cust_info_incremental()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time TIMESTAMP;
+    end_time   TIMESTAMP;
+    v_wm       BIGINT;
+    v_hwm      BIGINT;
+    v_rows     BIGINT;
+    v_keys     TEXT[];
+BEGIN
+    start_time := clock_timestamp();
+    v_wm := meta.get_watermark('silver.erp_cust_info');
+    SELECT COALESCE(MAX(dwh_row_id), v_wm) INTO v_hwm
+    FROM bronze.erp_cust_info WHERE dwh_row_id > v_wm;
+
+    RAISE NOTICE '>> Merging Data Into: silver.erp_cust_info (rows % - %)', v_wm + 1, v_hwm;
+    -- keys about to be merged, for the gold tables maintained from them
+    SELECT array_agg(CASE WHEN cid LIKE 'NAS%' THEN SUBSTRING(cid FROM 4) ELSE cid END) INTO v_keys
+    FROM bronze.erp_cust_info
+    WHERE dwh_row_id > v_wm AND dwh_row_id <= v_hwm;
+    CALL meta.queue_dimension_changes('silver.erp_cust_info', 'cid', v_keys);
+    MERGE INTO silver.erp_cust_info AS s
+    USING (
+        SELECT DISTINCT ON (cid) *
+        FROM (
+            SELECT
+                dwh_row_id,
+                CASE
+                    WHEN cid LIKE 'NAS%' THEN SUBSTRING(cid FROM 4)
+                    ELSE cid
+                END AS cid,
+                CASE
+                    WHEN bdate > CURRENT_DATE THEN NULL
+                    WHEN bdate < DATE '1924-01-01' THEN NULL
+                    ELSE bdate
+                END AS bdate,
+                CASE
+                    WHEN UPPER(TRIM(gen)) IN ('F', 'FEMALE') THEN 'Female'
+                    WHEN UPPER(TRIM(gen)) IN ('M', 'MALE') THEN 'Male'
+                    ELSE 'n/a'
+                END AS gen
+            FROM bronze.erp_cust_info
+            WHERE dwh_row_id > v_wm AND dwh_row_id <= v_hwm
+        ) t
+        ORDER BY cid, dwh_row_id DESC
+    ) AS d
+    ON s.cid = d.cid
+    WHEN MATCHED THEN UPDATE SET
+        bdate = d.bdate,
+        gen   = d.gen
+    WHEN NOT MATCHED THEN INSERT (cid, bdate, gen)
+    VALUES (d.cid, d.bdate, d.gen);
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    CALL meta.set_watermark('silver.erp_cust_info', v_hwm);
+
+    end_time := clock_timestamp();
+    RAISE NOTICE '>> Rows Merged: %', v_rows;
+    RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
+    RAISE NOTICE '>> -------------';
+END;
+$$;
+
+-- silver.erp_loc_info
+CREATE OR REPLACE PROCEDURE silver.load_erp_loc_info_incremental()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time TIMESTAMP;
+    end_time   TIMESTAMP;
+    v_wm       BIGINT;
+    v_hwm      BIGINT;
+    v_rows     BIGINT;
+    v_keys     TEXT[];
+BEGIN
+    start_time := clock_timestamp();
+    v_wm := meta.get_watermark('silver.erp_loc_info');
+    SELECT COALESCE(MAX(dwh_row_id), v_wm) INTO v_hwm
+    FROM bronze.erp_loc_info WHERE dwh_row_id > v_wm;
+
+    RAISE NOTICE '>> Merging Data Into: silver.erp_loc_info (rows % - %)', v_wm + 1, v_hwm;
+    -- keys about to be merged, for the gold tables maintained from them
+    SELECT array_agg(REPLACE(cid, '-', '')) INTO v_keys
+    FROM bronze.erp_loc_info
+    WHERE dwh_row_id > v_wm AND dwh_row_id <= v_hwm;
+    CALL meta.queue_dimension_changes('silver.erp_loc_info', 'cid', v_keys);
+    MERGE INTO silver.erp_loc_info AS s
+    USING (
+        SELECT DISTINCT ON (cid) *
+        FROM (
+            SELECT
+                dwh_row_id,
+                REPLACE(cid, '-', '') AS cid,
+                CASE
+                    WHEN TRIM(cntry) = 'DE' THEN 'Germany'
+                    WHEN TRIM(cntry) IN ('US', 'USA') THEN 'United States'
+                    WHEN TRIM(cntry) = '' OR cntry IS NULL THEN 'n/a'
+                    ELSE TRIM(cntry)
+                END AS cntry
+            FROM bronze.erp_loc_info
+            WHERE dwh_row_id > v_wm AND dwh_row_id <= v_hwm
+        ) t
+        ORDER BY cid, dwh_row_id DESC
+    ) AS d
+    ON s.cid = d.cid
+    WHEN MATCHED THEN UPDATE SET
+        cntry = d.cntry
+    WHEN NOT MATCHED THEN INSERT (cid, cntry)
+    VALUES (d.cid, d.cntry);
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    CALL meta.set_watermark('silver.erp_loc_info', v_hwm);
+
+    end_time := clock_timestamp();
+    RAISE NOTICE '>> Rows Merged: %', v_rows;
+    RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
+    RAISE NOTICE '>> -------------';
+END;
+$$;
+
+-- silver.erp_px_cat_info
+CREATE OR REPLACE PROCEDURE silver.load_erp_px_cat_info_incremental()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time TIMESTAMP;
+    end_time   TIMESTAMP;
+    v_wm       BIGINT;
+    v_hwm      BIGINT;
+    v_rows     BIGINT;
+BEGIN
+    start_time := clock_timestamp();
+    v_wm := meta.get_watermark('silver.erp_px_cat_info');
+    SELECT COALESCE(MAX(dwh_row_id), v_wm) INTO v_hwm
+    FROM bronze.erp_px_cat_info WHERE dwh_row_id > v_wm;
+
+    RAISE NOTICE '>> Merging Data Into: silver.erp_px_cat_info (rows % - %)', v_wm + 1, v_hwm;
+    MERGE INTO silver.erp_px_cat_info AS s
+    USING (
+        SELECT DISTINCT ON (id) id, cat, subcat, maintenance
+        FROM bronze.erp_px_cat_info
+        WHERE dwh_row_id > v_wm AND dwh_row_id <= v_hwm
+        ORDER BY id, dwh_row_id DESC
+    ) AS d
+    ON s.id = d.id
+    WHEN MATCHED THEN UPDATE SET
+        cat         = d.cat,
+        subcat      = d.subcat,
+        maintenance = d.maintenance
+    WHEN NOT MATCHED THEN INSERT (id, cat, subcat, maintenance)
+    VALUES (d.id, d.cat, d.subcat, d.maintenance);
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    CALL meta.set_watermark('silver.erp_px_cat_info', v_hwm);
+
+    end_time := clock_timestamp();
+    RAISE NOTICE '>> Rows Merged: %', v_rows;
+    RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
+    RAISE NOTICE '>> -------------';
+END;
+$$;
+
+-- silver.marketing_salesperson
+CREATE OR REPLACE PROCEDURE silver.load_marketing_salesperson_incremental()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time TIMESTAMP;
+    end_time   TIMESTAMP;
+    v_wm       BIGINT;
+    v_hwm      BIGINT;
+    v_rows     BIGINT;
+BEGIN
+    start_time := clock_timestamp();
+    v_wm := meta.get_watermark('silver.marketing_salesperson');
+    SELECT COALESCE(MAX(dwh_row_id), v_wm) INTO v_hwm
+    FROM bronze.marketing_salesperson WHERE dwh_row_id > v_wm;
+
+    RAISE NOTICE '>> Merging Data Into: silver.marketing_salesperson (rows % - %)', v_wm + 1, v_hwm;
+    MERGE INTO silver.marketing_salesperson AS s
+    USING (
+        SELECT DISTINCT ON (salesperson_id)
+            salesperson_id, name, region,
+            CASE
+            WHEN email ~* '^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$'
+                THEN email
+            ELSE 'n/a'
+            END AS email
+        FROM bronze.marketing_salesperson
+        WHERE dwh_row_id > v_wm AND dwh_row_id <= v_hwm
+        ORDER BY salesperson_id, dwh_row_id DESC
+    ) AS d
+    ON s.salesperson_id = d.salesperson_id
+    WHEN MATCHED THEN UPDATE SET
+        name   = d.name,
+        region = d.region,
+        email  = d.email
+    WHEN NOT MATCHED THEN INSERT (salesperson_id, name, region, email)
+    VALUES (d.salesperson_id, d.name, d.region, d.email);
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    CALL meta.set_watermark('silver.marketing_salesperson', v_hwm);
+
+    end_time := clock_timestamp();
+    RAISE NOTICE '>> Rows Merged: %', v_rows;
+    RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
+    RAISE NOTICE '>> -------------';
+END;
+$$;
+
+-- silver.marketing_salesperson_sales
+CREATE OR REPLACE PROCEDURE silver.load_marketing_salesperson_sales_incremental()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time TIMESTAMP;
+    end_time   TIMESTAMP;
+    v_wm       BIGINT;
+    v_hwm      BIGINT;
+    v_rows     BIGINT;
+BEGIN
+    start_time := clock_timestamp();
+    v_wm := meta.get_watermark('silver.marketing_salesperson_sales');
+    SELECT COALESCE(MAX(dwh_row_id), v_wm) INTO v_hwm
+    FROM bronze.marketing_salesperson_sales WHERE dwh_row_id > v_wm;
+
+    RAISE NOTICE '>> Merging Data Into: silver.marketing_salesperson_sales (rows % - %)', v_wm + 1, v_hwm;
+    MERGE INTO silver.marketing_salesperson_sales AS s
+    USING (
+        SELECT DISTINCT ON (sls_ord_num) salesperson_id, sls_ord_num
+        FROM bronze.marketing_salesperson_sales
+        WHERE dwh_row_id > v_wm AND dwh_row_id <= v_hwm
+        ORDER BY sls_ord_num, dwh_row_id DESC
+    ) AS d
+    ON s.sls_ord_num = d.sls_ord_num
+    WHEN MATCHED THEN UPDATE SET
+        salesperson_id = d.salesperson_id
+    WHEN NOT MATCHED THEN INSERT (salesperson_id, sls_ord_num)
+    VALUES (d.salesperson_id, d.sls_ord_num);
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    CALL meta.set_watermark('silver.marketing_salesperson_sales', v_hwm);
+
+    end_time := clock_timestamp();
+    RAISE NOTICE '>> Rows Merged: %', v_rows;
+    RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
+    RAISE NOTICE '>> -------------';
+END;
+$$;
+
+-- silver.marketing_discount_info
+CREATE OR REPLACE PROCEDURE silver.load_marketing_discount_info_incremental()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time TIMESTAMP;
+    end_time   TIMESTAMP;
+    v_wm       BIGINT;
+    v_hwm      BIGINT;
+    v_rows     BIGINT;
+BEGIN
+    start_time := clock_timestamp();
+    v_wm := meta.get_watermark('silver.marketing_discount_info');
+    SELECT COALESCE(MAX(dwh_row_id), v_wm) INTO v_hwm
+    FROM bronze.marketing_discount_info WHERE dwh_row_id > v_wm;
+
+    RAISE NOTICE '>> Merging Data Into: silver.marketing_discount_info (rows % - %)', v_wm + 1, v_hwm;
+    MERGE INTO silver.marketing_discount_info AS s
+    USING (
+        SELECT DISTINCT ON (discount_id) discount_id, description, percent, active
+        FROM bronze.marketing_discount_info
+        WHERE dwh_row_id > v_wm AND dwh_row_id <= v_hwm
+        ORDER BY discount_id, dwh_row_id DESC
+    ) AS d
+    ON s.discount_id = d.discount_id
+    WHEN MATCHED THEN UPDATE SET
+        description = d.description,
+        percent     = d.percent,
+        active      = d.active
+    WHEN NOT MATCHED THEN INSERT (discount_id, description, percent, active)
+    VALUES (d.discount_id, d.description, d.percent, d.active);
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    CALL meta.set_watermark('silver.marketing_discount_info', v_hwm);
+
+    end_time := clock_timestamp();
+    RAISE NOTICE '>> Rows Merged: %', v_rows;
+    RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
+    RAISE NOTICE '>> -------------';
+END;
+$$;
+
+-- silver.marketing_sales_discount
+CREATE OR REPLACE PROCEDURE silver.load_marketing_sales_discount_incremental()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    start_time TIMESTAMP;
+    end_time   TIMESTAMP;
+    v_wm       BIGINT;
+    v_hwm      BIGINT;
+    v_rows     BIGINT;
+BEGIN
+    start_time := clock_timestamp();
+    v_wm := meta.get_watermark('silver.marketing_sales_discount');
+    SELECT COALESCE(MAX(dwh_row_id), v_wm) INTO v_hwm
+    FROM bronze.marketing_sales_discount WHERE dwh_row_id > v_wm;
+
+    RAISE NOTICE '>> Merging Data Into: silver.marketing_sales_discount (rows % - %)', v_wm + 1, v_hwm;
+    MERGE INTO silver.marketing_sales_discount AS s
+    USING (
+        SELECT DISTINCT ON (sls_ord_num) discount_id, sls_ord_num
+        FROM bronze.marketing_sales_discount
+        WHERE dwh_row_id > v_wm AND dwh_row_id <= v_hwm
+        ORDER BY sls_ord_num, dwh_row_id DESC
+    ) AS d
+    ON s.sls_ord_num = d.sls_ord_num
+    WHEN MATCHED THEN UPDATE SET
+        discount_id = d.discount_id
+    WHEN NOT MATCHED THEN INSERT (discount_id, sls_ord_num)
+    VALUES (d.discount_id, d.sls_ord_num);
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    CALL meta.set_watermark('silver.marketing_sales_discount', v_hwm);
+
+    end_time := clock_timestamp();
+    RAISE NOTICE '>> Rows Merged: %', v_rows;
+    RAISE NOTICE '>> Load Duration: % seconds', EXTRACT(EPOCH FROM (end_time - start_time))::int;
+    RAISE NOTICE '>> -------------';
+END;
+$$;
+
+CREATE OR REPLACE PROCEDURE silver.load_silver_incremental()
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    batch_start_time TIMESTAMP;
+    batch_end_time   TIMESTAMP;
+BEGIN
+    batch_start_time := clock_timestamp();
+
+    RAISE NOTICE '================================================';
+    RAISE NOTICE 'Incremental Loading Silver Layer';
+    RAISE NOTICE '================================================';
+
+    RAISE NOTICE '------------------------------------------------';
+    RAISE NOTICE 'Loading CRM Tables';
+    RAISE NOTICE '------------------------------------------------';
+
+    CALL silver.load_crm_cust_info_incremental();
+    CALL silver.load_crm_prd_info_incremental();
+    CALL silver.load_crm_sales_details_incremental();
+
+    RAISE NOTICE '------------------------------------------------';
+    RAISE NOTICE 'Loading ERP Tables';
+    RAISE NOTICE '------------------------------------------------';
+
+    CALL silver.load_erp_cust_info_incremental();
+    CALL silver.load_erp_loc_info_incremental();
+    CALL silver.load_erp_px_cat_info_incremental();
+
+    RAISE NOTICE '------------------------------------------------';
+    RAISE NOTICE 'Loading Marketing Tables';
+    RAISE NOTICE '------------------------------------------------';
+
+    CALL silver.load_marketing_salesperson_incremental();
+    CALL silver.load_marketing_salesperson_sales_incremental();
+    CALL silver.load_marketing_discount_info_incremental();
+    CALL silver.load_marketing_sales_discount_incremental();
+
+    batch_end_time := clock_timestamp();
+    RAISE NOTICE '==========================================';
+    RAISE NOTICE 'Incremental Loading Silver Layer is Completed';
+    RAISE NOTICE '   - Total Load Duration: % seconds', EXTRACT(EPOCH FROM (batch_end_time - batch_start_time))::int;
+    RAISE NOTICE '==========================================';
+
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE '==========================================';
+    RAISE NOTICE 'ERROR OCCURRED DURING INCREMENTAL LOADING SILVER LAYER';
+    RAISE NOTICE 'Error Message: %', SQLERRM;
+    RAISE NOTICE 'SQLSTATE: %', SQLSTATE;
+    RAISE NOTICE '==========================================';
+    RAISE;
+END;
+$$;
@@ -8,7 +8,9 @@ Script Purpose:
 
 Behavior:
     - Each check raises an exception when violations are found.
-    - Pipeline execution stops immediately on first failed check.
+    - Execution stops immediately on first failed check.
+    - The pipeline runs the same rules through etl/quality.py (one scan per
+      table, every violation reported); keep both in sync.
 ===============================================================================
 */
 
@@ -0,0 +1,179 @@
+"""Pure pandas transforms of etl.silver_engine against the rules of
+scripts/silver/proc_load_silver.sql. No database needed; the expected
+values are what PostgreSQL returns for the same inputs."""
+import pandas as pd
+import pytest
+
+from etl.silver_engine import (
+    clean_crm_sales_details,
+    clean_erp_loc_info,
+    finish_crm_prd_info,
+    latest_per_key,
+    yyyymmdd,
+)
+
+
+TODAY = pd.Timestamp("2026-10-17")
+
+
+def ints(values) -> pd.Series:
+    return pd.Series(values, dtype="Int64")
+
+
+def strings(values) -> pd.Series:
+    return pd.Series(values, dtype="string")
+
+
+def dates(values) -> list:
+    return [pd.NaT if v is None else pd.Timestamp(v) for v in values]
+
+
+# --------------------------------------------------
+# yyyymmdd
+# --------------------------------------------------
+def test_yyyymmdd_nulls_zero_and_wrong_length():
+    out = yyyymmdd(ints([20101229, 0, None, 2010122, 201012290]))
+    assert list(out) == dates(["2010-12-29", None, None, None, None])
+
+
+def test_yyyymmdd_month_ends():
+    out = yyyymmdd(ints([20120229, 20131231, 20130101]))
+    assert list(out) == dates(["2012-02-29", "2013-12-31", "2013-01-01"])
+
+
+@pytest.mark.parametrize("value", [20130231, 20131301, 20130100, 20130431])
+def test_yyyymmdd_out_of_range_raises(value):
+    # to_date() rejects these instead of rolling over
+    with pytest.raises(ValueError, match=str(value)):
+        yyyymmdd(ints([20130101, value]))
+
+
+# --------------------------------------------------
+# clean_crm_sales_details
+# --------------------------------------------------
+def sales_details(rows) -> pd.DataFrame:
+    sales, quantity, price = zip(*rows)
+    n = len(rows)
+    return pd.DataFrame({
+        "sls_ord_num": strings([f"SO{i}" for i in range(n)]),
+        "sls_prd_key": strings(["BK-R93R-62"] * n),
+        "sls_cust_id": ints([21768] * n),
+        "sls_order_dt": ints([20101229] * n),
+        "sls_ship_dt": ints([0] * n),
+        "sls_due_dt": ints([None] * n),
+        "sls_sales": ints(sales),
+        "sls_quantity": ints(quantity),
+        "sls_price": ints(price),
+    })
+
+
+@pytest.mark.parametrize("row, expected", [
+    # (sales, quantity, price) -> (sales, price)
+    ((50, 2, 25), (50, 25)),
+    ((50, 2, -25), (50, 25)),
+    ((None, 3, 10), (30, 10)),
+    ((None, 3, -10), (30, 0)),
+    ((40, 2, 30), (60, 30)),
+    ((7, 2, 0), (0, 4)),
+    ((5, 2, None), (5, 3)),
+    ((-5, 2, None), (None, -3)),
+    ((10, 0, None), (10, None)),
+])
+def test_sales_and_price_repair(row, expected):
+    out = clean_crm_sales_details(sales_details([row]), TODAY)
+    sales, price = out["sls_sales"].iloc[0], out["sls_price"].iloc[0]
+    assert (None if pd.isna(sales) else sales, None if pd.isna(price) else price) == expected
+
+
+def test_price_rounds_half_away_from_zero():
+    # numeric -> int rounds half away from zero, not to even
+    out = clean_crm_sales_details(
+        sales_details([(5, 2, None), (-5, 2, None), (7, 2, 0), (-7, 2, 0), (1, 4, None)]),
+        TODAY,
+    )
+    assert list(out["sls_price"]) == [3, -3, 4, -4, 0]
+
+
+def test_sales_details_dates():
+    out = clean_crm_sales_details(sales_details([(50, 2, 25)]), TODAY)
+    assert out["sls_order_dt"].iloc[0] == pd.Timestamp("2010-12-29")
+    assert pd.isna(out["sls_ship_dt"].iloc[0])
+    assert pd.isna(out["sls_due_dt"].iloc[0])
+
+
+# --------------------------------------------------
+# latest_per_key
+# --------------------------------------------------
+def test_latest_per_key_orders_descending_with_nulls_first():
+    df = pd.DataFrame({
+        "cst_id": ints([1, 1, 1, 2, 2, None]),
+        "cst_create_date": dates(["2024-01-01", "2025-01-01", None, "2025-01-01", "2025-01-01", "2025-01-01"]),
+        "dwh_row_id": ints([10, 11, 12, 13, 14, 15]),
+    })
+    out = latest_per_key(df, "cst_id", ["cst_create_date", "dwh_row_id"])
+    # ORDER BY cst_create_date DESC (NULLS FIRST), dwh_row_id DESC; NULL keys dropped
+    assert dict(zip(out["cst_id"], out["dwh_row_id"])) == {1: 12, 2: 14}
+
+
+def test_latest_per_key_full_tie_keeps_one_row():
+    df = pd.DataFrame({
+        "cid": strings(["AW1", "AW1", "AW1"]),
+        "dwh_row_id": ints([7, 7, 3]),
+        "cntry": strings(["France", "Germany", "Spain"]),
+    })
+    out = latest_per_key(df, "cid", ["dwh_row_id"])
+    assert len(out) == 1
+    assert out["dwh_row_id"].iloc[0] == 7
+
+
+# --------------------------------------------------
+# finish_crm_prd_info
+# --------------------------------------------------
+def test_prd_end_date_is_day_before_next_start():
+    df = pd.DataFrame({
+        "prd_id": ints([1, 2, 3, 4, 5]),
+        "prd_start_dt": dates(["2013-07-01", "2011-07-01", "2012-07-01", "2012-01-01", None]),
+        "source_key": strings(["CO-RF-FR-R92B-58"] * 3 + ["BK-M68B-38", "BK-M68B-38"]),
+        "source_start": dates(["2013-07-01 06:00", "2011-07-01", "2012-07-01", "2012-01-01", None]),
+    })
+    out = finish_crm_prd_info(df).set_index("prd_id")
+    assert "source_key" not in out.columns and "source_start" not in out.columns
+    assert out.loc[2, "prd_end_dt"] == pd.Timestamp("2012-06-30")
+    # the day before a start with a time of day, cast to date
+    assert out.loc[3, "prd_end_dt"] == pd.Timestamp("2013-06-30")
+    assert pd.isna(out.loc[1, "prd_end_dt"])
+    # a NULL start sorts last (ORDER BY prd_start_dt), so it ends nothing
+    assert pd.isna(out.loc[4, "prd_end_dt"])
+    assert pd.isna(out.loc[5, "prd_end_dt"])
+
+
+# --------------------------------------------------
+# clean_erp_loc_info
+# --------------------------------------------------
+def test_erp_loc_info_countries_and_ids():
+    df = pd.DataFrame({
+        "cid": strings(["AW-00011000", "AW-00011001", "AW-00011002", "AW-00011003",
+                        "AW-00011004", "AW-00011005", None]),
+        "cntry": strings([" DE ", "USA", "US", "", None, "France  ", "Germany"]),
+        "dwh_row_id": ints([1, 2, 3, 4, 5, 6, 7]),
+    })
+    out = clean_erp_loc_info(df, TODAY)
+    assert dict(zip(out["cid"], out["cntry"])) == {
+        "AW00011000": "Germany",
+        "AW00011001": "United States",
+        "AW00011002": "United States",
+        "AW00011003": "n/a",
+        "AW00011004": "n/a",
+        "AW00011005": "France",
+    }
+
+
+def test_erp_loc_info_keeps_latest_row_per_cid():
+    df = pd.DataFrame({
+        "cid": strings(["AW-00011000", "AW00011000", "AW-00011000"]),
+        "cntry": strings(["DE", "Canada", "  "]),
+        "dwh_row_id": ints([5, 9, 2]),
+    })
+    out = clean_erp_loc_info(df, TODAY)
+    # DISTINCT ON (cid) ... ORDER BY cid, dwh_row_id DESC, after REPLACE(cid, '-', '')
+    assert list(zip(out["cid"], out["cntry"])) == [("AW00011000", "Canada")]